@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI 网关负载基准
+
+启动本地 OpenAI 兼容桩服务（server/ai/testing/stub_provider.py），在可控的时延分布、
+限流与故障率下驱动 AIGateway（异步 / 同步接口，可选流式）、AIGatewayV2 与
+LangGraphLiveWorkflow，输出吞吐、时延百分位、错误率、峰值线程数与上游连接数，
+用于离线比较连接池、限流器、选路等改动前后的表现。
+
+用法:
+    python scripts/benchmark_ai_gateway.py [--target gateway|gateway_sync|gateway_v2|workflow|all]
+        [--requests 200] [--concurrency 20] [--latency lognormal:200,0.3] [--stream]
+        [--error-rate 0.0] [--rate-limit-rate 0.0]
+
+桩服务注册为 qwen 服务商，AIGateway 的并发上限按 AI_PROVIDER_QWEN_CONCURRENCY 等环境变量生效。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from server.ai.ai_gateway import AIGateway  # noqa: E402
+from server.ai.ai_gateway_v2 import AIGatewayV2  # noqa: E402
+from server.ai.provider_health import percentile  # noqa: E402
+from server.ai.testing.stub_provider import StubBehavior, StubProvider  # noqa: E402
+
+STUB_PROVIDER = "qwen"
+STUB_MODEL = "qwen-plus"
+
+_COMMENTS = ["这个杯子多少钱？", "有优惠吗", "主播讲讲容量", "包邮吗", "什么时候发货", "支持主播"]
+
+
+class ThreadSampler:
+    """后台轮询进程线程数，记录峰值（不含采样线程自身）"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.baseline = threading.active_count()
+        self.peak = self.baseline
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="thread-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, threading.active_count() - 1)
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "ThreadSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def _summary(
+    target: str,
+    latencies: List[float],
+    errors: int,
+    elapsed: float,
+    sampler: ThreadSampler,
+    stub: StubProvider,
+    first_tokens: Optional[List[float]] = None,
+) -> Dict[str, Any]:
+    total = len(latencies) + errors
+    stats = stub.stats()
+    result: Dict[str, Any] = {
+        "target": target,
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "elapsed_sec": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": _round(percentile(latencies, 50)),
+        "p95_ms": _round(percentile(latencies, 95)),
+        "p99_ms": _round(percentile(latencies, 99)),
+        "max_ms": _round(max(latencies) if latencies else None),
+        "threads_baseline": sampler.baseline,
+        "threads_peak": sampler.peak,
+        "upstream_requests": stats["requests"],
+        "upstream_status": stats["by_status"],
+        "upstream_connections": stats["connections"],
+    }
+    if first_tokens:
+        result["first_token_p50_ms"] = _round(percentile(first_tokens, 50))
+        result["first_token_p95_ms"] = _round(percentile(first_tokens, 95))
+    return result
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+def _messages(index: int) -> List[Dict[str, str]]:
+    # 每个请求内容不同，避免被网关的请求合并 / 缓存吸收
+    return [{"role": "user", "content": f"第{index}条弹幕：{_COMMENTS[index % len(_COMMENTS)]}"}]
+
+
+def stub_gateway(base_url: str) -> AIGateway:
+    """接入桩服务的独立 AIGateway：不启用响应缓存，不写用量记录"""
+    gateway = AIGateway()
+    gateway.cache = None
+    gateway._record_usage = lambda **kwargs: None  # type: ignore[method-assign]
+    gateway._record_queue = lambda *args: None  # type: ignore[method-assign]
+    gateway.register_provider(STUB_PROVIDER, "stub-key", base_url, default_model=STUB_MODEL)
+    gateway.switch_provider(STUB_PROVIDER, STUB_MODEL)
+    # 所有功能都路由到桩服务，不使用备选服务商
+    gateway.FUNCTION_MODELS = {  # type: ignore[misc]
+        name: {
+            **config, "provider": STUB_PROVIDER, "model": STUB_MODEL, "cache": None, "fallbacks": []
+        }
+        for name, config in AIGateway.FUNCTION_MODELS.items()
+    }
+    return gateway
+
+
+def run_gateway(
+    stub: StubProvider,
+    requests: int = 200,
+    concurrency: int = 20,
+    stream: bool = False,
+    sync: bool = False,
+) -> Dict[str, Any]:
+    """驱动 AIGateway：默认并发调用 achat_completion；sync=True 时从线程池调用同步接口"""
+    gateway = stub_gateway(stub.base_url)
+    stub.reset_stats()
+    latencies: List[float] = []
+    first_tokens: List[float] = []
+    errors = 0
+
+    def record(response: Any, started: float) -> None:
+        nonlocal errors
+        if not response.success:
+            errors += 1
+            return
+        latencies.append((time.perf_counter() - started) * 1000)
+        if response.first_token_ms is not None:
+            first_tokens.append(response.first_token_ms)
+
+    on_delta: Optional[Callable[[str], None]] = (lambda _text: None) if stream else None
+
+    with ThreadSampler() as sampler:
+        started_all = time.perf_counter()
+        if sync:
+            def call(index: int) -> None:
+                started = time.perf_counter()
+                response = gateway.chat_completion(messages=_messages(index), on_delta=on_delta)
+                record(response, started)
+
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(call, range(requests)))
+        else:
+            async def drive() -> None:
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def call(index: int) -> None:
+                    async with semaphore:
+                        started = time.perf_counter()
+                        response = await gateway.achat_completion(
+                            messages=_messages(index), on_delta=on_delta
+                        )
+                        record(response, started)
+
+                await asyncio.gather(*(call(i) for i in range(requests)))
+                await gateway.aclose()
+
+            asyncio.run(drive())
+        elapsed = time.perf_counter() - started_all
+
+    target = "gateway_sync" if sync else "gateway"
+    result = _summary(target, latencies, errors, elapsed, sampler, stub, first_tokens)
+    result["stream"] = stream
+    result["governor"] = gateway.get_governor_stats()["queues"]
+    if sync:
+        gateway._run_sync(gateway.aclose())
+    return result
+
+
+def run_gateway_v2(
+    stub: StubProvider,
+    requests: int = 200,
+    concurrency: int = 20,
+    stream: bool = False,
+) -> Dict[str, Any]:
+    """驱动 AIGatewayV2（同步 OpenAI 客户端）：线程池并发调用"""
+    AIGatewayV2._reset_instance()
+    gateway = AIGatewayV2()
+    gateway.register_provider("minimax", "stub-key", stub.base_url, "MiniMax-M2.5-highspeed")
+    gateway.switch_provider("minimax")
+    stub.reset_stats()
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def call(index: int) -> None:
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            if stream:
+                "".join(gateway.chat_completion_stream(messages=_messages(index), max_tokens=256))
+            else:
+                gateway.chat_completion(messages=_messages(index), max_tokens=256)
+        except Exception:
+            with lock:
+                errors += 1
+            return
+        with lock:
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    try:
+        with ThreadSampler() as sampler:
+            started_all = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(call, range(requests)))
+            elapsed = time.perf_counter() - started_all
+        result = _summary("gateway_v2", latencies, errors, elapsed, sampler, stub)
+        result["stream"] = stream
+        result["routing"] = gateway.health.snapshot()
+        return result
+    finally:
+        AIGatewayV2._reset_instance()
+
+
+def _window(index: int, anchor_id: str) -> Dict[str, Any]:
+    return {
+        "anchor_id": anchor_id,
+        "window_start": time.time(),
+        "sentences": ["家人们看看这个保温杯", f"第{index}个窗口，容量五百毫升"],
+        "comments": [
+            {
+                "type": "chat",
+                "nickname": f"观众{index}_{n}",
+                "content": _COMMENTS[(index + n) % len(_COMMENTS)],
+                "user_key": f"u{index}_{n}",
+            }
+            for n in range(4)
+        ],
+    }
+
+
+def run_workflow(stub: StubProvider, windows: int = 20, concurrency: int = 4) -> Dict[str, Any]:
+    """驱动 LangGraphLiveWorkflow.ainvoke：concurrency 个直播间并发，每个直播间的窗口依次处理"""
+    from server.ai.langgraph_live_workflow import LangGraphLiveWorkflow, LiveWorkflowConfig
+    from server.ai.live_analysis_generator import LiveAnalysisGenerator
+    from server.ai.live_question_responder import LiveQuestionResponder
+
+    gateway = stub_gateway(stub.base_url)
+    previous = AIGateway._instance
+    AIGateway._instance = gateway
+    latencies: List[float] = []
+    errors = 0
+    cards = 0
+    try:
+        with tempfile.TemporaryDirectory() as memory_root:
+            workflow = LangGraphLiveWorkflow(
+                LiveAnalysisGenerator({}),
+                LiveQuestionResponder({}),
+                config=LiveWorkflowConfig(memory_root=Path(memory_root)),
+            )
+            stub.reset_stats()
+
+            async def drive() -> None:
+                async def room(room_index: int) -> None:
+                    nonlocal errors, cards
+                    for index in range(room_index, windows, concurrency):
+                        started = time.perf_counter()
+                        try:
+                            window = _window(index, f"bench_room_{room_index}")
+                            result = await workflow.ainvoke(window)
+                        except Exception:
+                            errors += 1
+                            continue
+                        latencies.append((time.perf_counter() - started) * 1000)
+                        if (result.get("analysis_card") or {}).get("analysis_overview"):
+                            cards += 1
+
+                await asyncio.gather(*(room(i) for i in range(concurrency)))
+                await gateway.aclose()
+
+            with ThreadSampler() as sampler:
+                started_all = time.perf_counter()
+                asyncio.run(drive())
+                elapsed = time.perf_counter() - started_all
+    finally:
+        AIGateway._instance = previous
+
+    result = _summary("workflow", latencies, errors, elapsed, sampler, stub)
+    result["analysis_cards"] = cards
+    result["upstream_per_window"] = (
+        round(result["upstream_requests"] / windows, 2) if windows else 0.0
+    )
+    return result
+
+
+def run(
+    target: str = "all",
+    requests: int = 200,
+    concurrency: int = 20,
+    stream: bool = False,
+    behavior: Optional[StubBehavior] = None,
+) -> List[Dict[str, Any]]:
+    with StubProvider(behavior or StubBehavior()) as stub:
+        results = []
+        if target in ("gateway", "all"):
+            results.append(run_gateway(stub, requests, concurrency, stream))
+        if target in ("gateway_sync", "all"):
+            results.append(run_gateway(stub, requests, concurrency, stream, sync=True))
+        if target in ("gateway_v2", "all"):
+            results.append(run_gateway_v2(stub, requests, concurrency, stream))
+        if target in ("workflow", "all"):
+            # 每个窗口约 4 次 LLM 调用，窗口数按请求数折算
+            results.append(run_workflow(stub, max(requests // 4, 1), max(concurrency // 4, 1)))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AI 网关负载基准")
+    parser.add_argument(
+        "--target",
+        default="all",
+        choices=["gateway", "gateway_sync", "gateway_v2", "workflow", "all"],
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument(
+        "--latency", default="lognormal:200,0.3", help="桩服务首字节前延迟分布（毫秒）"
+    )
+    parser.add_argument(
+        "--chunk-interval", default="fixed:5", help="桩服务流式增量间隔分布（毫秒）"
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=None)
+    args = parser.parse_args()
+
+    behavior = StubBehavior(
+        latency=args.latency,
+        chunk_interval=args.chunk_interval,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+    )
+    results = run(args.target, args.requests, args.concurrency, args.stream, behavior)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
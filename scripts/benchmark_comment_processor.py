@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+评论处理器吞吐基准
+
+以固定速率（默认 5000 条/秒）向 CommentProcessor 投递评论，统计处理吞吐、
+排队延迟与批大小，验证处理器能否跟上输入速率。
+
+用法:
+    python scripts/benchmark_comment_processor.py [--rate 5000] [--seconds 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from server.comment_processor import CommentProcessor, CommentSimulator  # noqa: E402
+
+
+def run(rate: int, seconds: float, tick: float = 0.01) -> Dict[str, Any]:
+    processor = CommentProcessor()
+    processor.comment_queue = type(processor.comment_queue)(maxlen=max(10000, rate * 2))
+    processor.start()
+    try:
+        result = CommentSimulator(processor).run_load(rate, seconds, tick=tick)
+    finally:
+        processor.stop()
+    result["kept_up"] = result["handled"] == result["sent"] and result["drain_after_stop_ms"] < 1000
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="评论处理器吞吐基准")
+    parser.add_argument("--rate", type=int, default=5000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rate, args.seconds), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+弹幕事件内存基准
+
+对比原始 dict 事件与紧凑事件（CompactEvent + 用户驻留表）在大批量驻留内存时的
+每事件字节数。默认 100 万条事件、5000 名活跃观众。
+
+用法:
+    python scripts/benchmark_event_memory.py [--events 1000000] [--users 5000]
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from server.utils.compact_event import EventCompactor  # noqa: E402
+
+_CONTENTS = ["主播好棒！", "多少钱？", "666", "有优惠吗？", "包邮吗？", "支持主播", "想要这个"]
+_GIFTS = [("小心心", 1), ("玫瑰", 1), ("人气票", 1), ("抖音1号", 10001)]
+
+
+def make_event(i: int, users: int, rng: random.Random) -> Dict[str, Any]:
+    """生成一条与中转服务输出结构一致的事件（每条事件都是新的 dict/str 对象）"""
+    uid = rng.randrange(users)
+    payload: Dict[str, Any] = {
+        "user_id": 7_000_000_000 + uid,
+        "user_id_str": str(7_000_000_000 + uid),
+        "nickname": "观众" + str(uid),
+    }
+    roll = rng.random()
+    if roll < 0.7:
+        event_type = "chat"
+        payload["content"] = rng.choice(_CONTENTS) + str(i % 7)
+    elif roll < 0.8:
+        event_type = "gift"
+        name, diamond = rng.choice(_GIFTS)
+        payload.update(
+            {"gift_name": name, "count": 1, "diamond_count": diamond, "gift_value": diamond}
+        )
+    elif roll < 0.9:
+        event_type = "like"
+        payload.update({"count": rng.randint(1, 20), "total": None})
+    else:
+        event_type = "member"
+        payload.update({"gender": "female", "level": rng.randint(0, 50), "action": "enter"})
+    # 模拟 JSON 反序列化后的独立对象（键与字符串都不共享）
+    return json.loads(json.dumps({
+        "type": event_type,
+        "payload": payload,
+        "timestamp": time.time(),
+        "ts": int(time.time() * 1000),
+        "source": "douyin",
+    }, ensure_ascii=False))
+
+
+def measure(
+    events: int, users: int, build: Callable[[Dict[str, Any]], Any], seed: int = 7
+) -> float:
+    """返回每事件平均驻留字节数（tracemalloc 统计，包含用户驻留表）"""
+    rng = random.Random(seed)
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    store: List[Any] = []
+    for i in range(events):
+        store.append(build(make_event(i, users, rng)))
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = (current - base) / max(events, 1)
+    del store
+    gc.collect()
+    return result
+
+
+def run(events: int, users: int) -> Dict[str, float]:
+    dict_bytes = measure(events, users, lambda ev: ev)
+    compactor = EventCompactor()
+    compact_bytes = measure(events, users, compactor.compact)
+    return {
+        "events": events,
+        "users": users,
+        "dict_bytes_per_event": round(dict_bytes, 1),
+        "compact_bytes_per_event": round(compact_bytes, 1),
+        "reduction_pct": round((1 - compact_bytes / dict_bytes) * 100, 1) if dict_bytes else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="弹幕事件内存基准")
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=5000)
+    args = parser.parse_args()
+
+    result = run(args.events, args.users)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+评论校验微基准
+
+对比旧实现（每条评论新建 DictValidator 与规则对象）与预编译 schema
+（单条调用 / 批量调用）的耗时，输入为中转层产出的规范评论事件。
+
+用法:
+    python scripts/benchmark_validators.py [--count 100000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from server.utils.validators import (  # noqa: E402
+    DateTimeValidator,
+    DictValidator,
+    NumberValidator,
+    StringValidator,
+    Validator,
+    sanitize_input,
+    validate_comment,
+    validate_comments,
+)
+
+
+def _legacy_validate_comment(data: Dict[str, Any]) -> Dict[str, Any]:
+    """旧实现：每次调用都重新构建 schema"""
+    schema = {
+        'user': StringValidator(min_length=1, max_length=50, required=True),
+        'content': StringValidator(min_length=1, max_length=500, required=True),
+        'timestamp': DateTimeValidator(required=False),
+        'platform': StringValidator(choices=['douyin', 'kuaishou', 'bilibili'], required=False),
+        'user_level': NumberValidator(
+            min_value=0, max_value=100, integer_only=True, required=False
+        ),
+        'is_vip': Validator(required=False),
+        'gift_count': NumberValidator(min_value=0, integer_only=True, required=False)
+    }
+    return DictValidator(schema=schema).validate(data, "comment")
+
+
+def _legacy_sanitize(data: Any) -> Any:
+    if isinstance(data, str):
+        data = data.replace('<', '&lt;').replace('>', '&gt;')
+        data = data.replace('&', '&amp;').replace('"', '&quot;')
+        return data.strip()
+    if isinstance(data, dict):
+        return {k: _legacy_sanitize(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [_legacy_sanitize(item) for item in data]
+    return data
+
+
+def _events(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "user": f"观众{i % 500}",
+            "content": "这个多少钱？主播讲讲尺码",
+            "platform": "douyin",
+            "user_level": i % 60,
+            "msg_id": i,
+        }
+        for i in range(count)
+    ]
+
+
+def _timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def run(count: int) -> Dict[str, Any]:
+    events = _events(count)
+    sample = events[:100]
+    assert [_legacy_validate_comment(e) for e in sample] == [validate_comment(e) for e in sample]
+
+    legacy = _timed(lambda: [_legacy_validate_comment(e) for e in events])
+    compiled = _timed(lambda: [validate_comment(e) for e in events])
+    batched = _timed(lambda: validate_comments(events))
+    legacy_sanitize = _timed(lambda: _legacy_sanitize(events))
+    compiled_sanitize = _timed(lambda: sanitize_input(events))
+
+    per = lambda sec: round(sec / count * 1e6, 3)  # noqa: E731
+    return {
+        "count": count,
+        "legacy_validate_us": per(legacy),
+        "compiled_validate_us": per(compiled),
+        "batched_validate_us": per(batched),
+        "validate_speedup": round(legacy / batched, 1),
+        "legacy_sanitize_us": per(legacy_sanitize),
+        "compiled_sanitize_us": per(compiled_sanitize),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="评论校验微基准")
+    parser.add_argument("--count", type=int, default=100000, help="评论条数")
+    args = parser.parse_args()
+    print(json.dumps(run(args.count), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
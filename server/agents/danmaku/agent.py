@@ -184,7 +184,7 @@ class DanmakuAgent(BaseAgent[DanmakuAgentResult]):
             asyncio.Queue for receiving danmaku events
         """
         relay = self._get_relay()
-        return await relay.register_client()
+        return await relay.register_internal_client("danmaku_agent")
 
     def unregister_client_queue(self, queue) -> None:
         """注销客户端队列
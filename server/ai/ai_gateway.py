@@ -22,24 +22,116 @@ AI 模型控制网关
     
     # 方法3：切换全局默认配置
     gateway.switch_provider("deepseek", model="deepseek-chat")
+
+    # 异步调用方（FastAPI 路由、实时分析等）直接 await，不占用线程池
+    response = await gateway.achat_completion(messages=[...], function="live_analysis")
+
+传输层：
+- 每个服务商在每个事件循环上复用一个长连接的 httpx.AsyncClient（连接池上限可配置），
+  省去每次调用的 TCP/TLS 握手
+- 重试使用 asyncio.sleep 退避，不阻塞事件循环
+- 同步接口 chat_completion 只是薄封装：把协程投递到网关后台事件循环并等待结果
+- 单飞合并：同一事件循环上指纹相同的并发请求只发起一次上游调用，共享结果；
+  所有等待者都离开后取消上游调用
+
+选路：
+- 功能可配置备选服务商（AI_FUNCTION_<NAME>_FALLBACKS="qwen:qwen-plus,deepseek"），
+  候选按实测 p95 / 错误率排序，失败时依次切换（见 provider_health）
+- 熔断：连续失败或错误率过高的 (服务商, 模型) 在冷却期内直接跳过，冷却后半开探测
+- 对冲：延迟敏感的功能（AI_FUNCTION_<NAME>_HEDGE）在首选超过其 p95 仍未返回时，
+  向下一个候选再发一次请求，先成功者返回，另一个取消；没有可用备选时不对冲，
+  避免向同一服务商 / 模型重复付费请求、争抢同一限流名额
+
+限流：
+- 每次上游调用前向 RateGovernor 申请名额（按服务商的并发 / RPM / TPM 限制），
+  按功能优先级排队（AI_FUNCTION_<NAME>_PRIORITY：realtime / interactive / batch），
+  实时分析优先于复盘报告；服务商返回 429 时暂停该服务商的放行（见 rate_governor）
 """
 
 from __future__ import annotations
 
+import asyncio
 import os
+import random
+import threading
 import time
 import logging
-from typing import Any, Dict, List, Optional, Literal
-from dataclasses import dataclass, field
+import weakref
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Literal, Tuple, TypeVar
+from dataclasses import asdict, dataclass, field, fields, replace
 from enum import Enum
 
+from .provider_health import ProviderHealth
+from .rate_governor import BATCH, DEFAULT_COMPLETION_TOKENS, INTERACTIVE, REALTIME, RateGovernor
+from .response_cache import ResponseCache, get_response_cache, request_fingerprint
+from .token_budget import count_tokens, get_budget_stats
+
 try:
-    from openai import OpenAI  # pyright: ignore[reportMissingImports]
+    from openai import AsyncOpenAI, OpenAI  # pyright: ignore[reportMissingImports]
 except ImportError:
+    AsyncOpenAI = None  # type: ignore
     OpenAI = None  # type: ignore
 
+try:
+    import httpx  # openai 的依赖
+except ImportError:  # pragma: no cover
+    httpx = None  # type: ignore
+
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# 连接池配置（每个服务商一个长连接客户端）
+HTTP_MAX_CONNECTIONS = int(os.getenv("AI_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("AI_HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("AI_HTTP_KEEPALIVE_EXPIRY", "30"))
+
+# 重试退避：min(BASE * 2^n, MAX)，乘以 [0.5, 1) 的随机抖动，避免并发请求同时重试
+RETRY_BACKOFF_BASE = float(os.getenv("AI_RETRY_BACKOFF_BASE", "1.0"))
+RETRY_BACKOFF_MAX = float(os.getenv("AI_RETRY_BACKOFF_MAX", "8.0"))
+
+# 并发相同请求合并为一次上游调用（AI_COALESCE=0 关闭）
+COALESCE_ENABLED = os.getenv("AI_COALESCE", "1") != "0"
+
+
+def _function_cache(name: str, ttl: float, semantic: float = 0.0) -> Optional[Dict[str, float]]:
+    """功能级响应缓存策略
+
+    可用 AI_FUNCTION_<NAME>_CACHE_TTL / AI_FUNCTION_<NAME>_CACHE_SEMANTIC 覆盖；
+    TTL 为 0 表示该功能不缓存，SEMANTIC 为 0 表示只做精确匹配。
+    语义层默认不开启：各功能的提示词由固定模板加少量现场素材拼成，模板占去绝大部分文本，
+    问题或口播完全不同的两次请求相似度也在 0.95 以上，会把一个问题的话术返回给另一个问题。
+    """
+    prefix = f"AI_FUNCTION_{name.upper()}_CACHE"
+    ttl = float(os.getenv(f"{prefix}_TTL", ttl))
+    if ttl <= 0:
+        return None
+    policy = {"ttl": ttl}
+    semantic = float(os.getenv(f"{prefix}_SEMANTIC", semantic))
+    if semantic > 0:
+        policy["semantic"] = semantic
+    return policy
+
+
+def _function_fallbacks(name: str, default: str = "") -> List[Tuple[str, str]]:
+    """功能级备选服务商：AI_FUNCTION_<NAME>_FALLBACKS="qwen:qwen-plus,deepseek"（模型缺省为服务商默认模型）"""
+    routes = []
+    for item in os.getenv(f"AI_FUNCTION_{name.upper()}_FALLBACKS", default).split(","):
+        provider, _, model = item.strip().partition(":")
+        if provider:
+            routes.append((provider.lower(), model))
+    return routes
+
+
+def _function_hedge(name: str, default: bool = False) -> bool:
+    """功能级对冲开关：AI_FUNCTION_<NAME>_HEDGE=1/0"""
+    return os.getenv(f"AI_FUNCTION_{name.upper()}_HEDGE", "1" if default else "0") != "0"
+
+
+def _function_priority(name: str, default: str = INTERACTIVE) -> str:
+    """功能级排队优先级：AI_FUNCTION_<NAME>_PRIORITY=realtime/interactive/batch"""
+    return os.getenv(f"AI_FUNCTION_{name.upper()}_PRIORITY", default).lower()
+
 
 class AIProvider(str, Enum):
     """AI 服务商枚举"""
@@ -63,6 +155,8 @@ class ProviderConfig:
     enabled: bool = True
     timeout: int = 30
     max_retries: int = 2
+    max_connections: int = HTTP_MAX_CONNECTIONS
+    max_keepalive: int = HTTP_MAX_KEEPALIVE
     
     def __post_init__(self):
         if not self.models:
@@ -80,6 +174,23 @@ class AIResponse:
     duration_ms: float
     success: bool = True
     error: Optional[str] = None
+    # 命中响应缓存时为 "exact" / "semantic"，共享进行中请求时为 "inflight"
+    cache_hit: Optional[str] = None
+    first_token_ms: Optional[float] = None  # 流式调用时首个增量到达的耗时
+    queue_ms: float = 0.0  # 在限流器中排队的耗时
+
+
+_AI_RESPONSE_FIELDS = {f.name for f in fields(AIResponse)}
+
+
+class _Flight:
+    """一次进行中的上游调用及其等待者数量"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[AIResponse]"):
+        self.task = task
+        self.waiters = 0
 
 
 class AIGateway:
@@ -93,30 +204,63 @@ class AIGateway:
     # AI_FUNCTION_STYLE_PROFILE_PROVIDER, AI_FUNCTION_STYLE_PROFILE_MODEL
     # AI_FUNCTION_SCRIPT_GENERATION_PROVIDER, AI_FUNCTION_SCRIPT_GENERATION_MODEL
     # AI_FUNCTION_LIVE_REVIEW_PROVIDER, AI_FUNCTION_LIVE_REVIEW_MODEL
+    # cache: 响应缓存策略 {"ttl": 秒, "semantic": 相似度阈值}，None 表示不缓存（见 _function_cache）
+    # fallbacks: 备选 (服务商, 模型) 列表（见 _function_fallbacks）
+    # hedge: 是否对慢请求发起对冲（见 _function_hedge）
+    # priority: 限流排队优先级（见 _function_priority）
     FUNCTION_MODELS = {
         "live_analysis": {
             "provider": os.getenv("AI_FUNCTION_LIVE_ANALYSIS_PROVIDER", "xunfei"), # 已修正为 xunfei
-            "model": os.getenv("AI_FUNCTION_LIVE_ANALYSIS_MODEL", "lite")      # 已修正为 lite
+            "model": os.getenv("AI_FUNCTION_LIVE_ANALYSIS_MODEL", "lite"),      # 已修正为 lite
+            "cache": _function_cache("live_analysis", 60),
+            "fallbacks": _function_fallbacks("live_analysis"),
+            "hedge": _function_hedge("live_analysis", True),
+            "priority": _function_priority("live_analysis", REALTIME),
         },
         "style_profile": {
             "provider": os.getenv("AI_FUNCTION_STYLE_PROFILE_PROVIDER", "xunfei"),
-            "model": os.getenv("AI_FUNCTION_STYLE_PROFILE_MODEL", "lite")  # 直播间氛围与情绪识别：使用 qwen3-max
+            # 直播间氛围与情绪识别：使用 qwen3-max
+            "model": os.getenv("AI_FUNCTION_STYLE_PROFILE_MODEL", "lite"),
+            "cache": _function_cache("style_profile", 300),
+            "fallbacks": _function_fallbacks("style_profile"),
+            "hedge": _function_hedge("style_profile"),
+            "priority": _function_priority("style_profile"),
         },
         "script_generation": {
             "provider": os.getenv("AI_FUNCTION_SCRIPT_GENERATION_PROVIDER", "xunfei"),
-            "model": os.getenv("AI_FUNCTION_SCRIPT_GENERATION_MODEL", "lite")  # 话术生成：使用 qwen3-max
+            # 话术生成：使用 qwen3-max
+            "model": os.getenv("AI_FUNCTION_SCRIPT_GENERATION_MODEL", "lite"),
+            "cache": _function_cache("script_generation", 600),
+            "fallbacks": _function_fallbacks("script_generation"),
+            "hedge": _function_hedge("script_generation"),
+            "priority": _function_priority("script_generation"),
         },
         "live_review": {
             "provider": os.getenv("AI_FUNCTION_LIVE_REVIEW_PROVIDER", "gemini"),
-            "model": os.getenv("AI_FUNCTION_LIVE_REVIEW_MODEL", "gemini-2.5-flash-preview-09-2025")  # 复盘：使用 Gemini 2.5 Flash Preview
+            # 复盘：使用 Gemini 2.5 Flash Preview
+            "model": os.getenv("AI_FUNCTION_LIVE_REVIEW_MODEL", "gemini-2.5-flash-preview-09-2025"),
+            "cache": _function_cache("live_review", 86400),
+            "fallbacks": _function_fallbacks("live_review"),
+            "hedge": _function_hedge("live_review"),
+            "priority": _function_priority("live_review", BATCH),
         },
         "chat_focus": {
             "provider": os.getenv("AI_FUNCTION_CHAT_FOCUS_PROVIDER", "xunfei"),
-            "model": os.getenv("AI_FUNCTION_CHAT_FOCUS_MODEL", "lite")  # 聊天焦点摘要：使用 qwen3-max
+            # 聊天焦点摘要：使用 qwen3-max
+            "model": os.getenv("AI_FUNCTION_CHAT_FOCUS_MODEL", "lite"),
+            "cache": _function_cache("chat_focus", 120),
+            "fallbacks": _function_fallbacks("chat_focus"),
+            "hedge": _function_hedge("chat_focus", True),
+            "priority": _function_priority("chat_focus", REALTIME),
         },
         "topic_generation": {
             "provider": os.getenv("AI_FUNCTION_TOPIC_GENERATION_PROVIDER", "xunfei"),
-            "model": os.getenv("AI_FUNCTION_TOPIC_GENERATION_MODEL", "lite")  # 智能话题生成：使用 qwen3-max
+            # 智能话题生成：使用 qwen3-max
+            "model": os.getenv("AI_FUNCTION_TOPIC_GENERATION_MODEL", "lite"),
+            "cache": _function_cache("topic_generation", 300),
+            "fallbacks": _function_fallbacks("topic_generation"),
+            "hedge": _function_hedge("topic_generation"),
+            "priority": _function_priority("topic_generation"),
         },
     }
     
@@ -165,6 +309,30 @@ class AIGateway:
         self.clients: Dict[str, OpenAI] = {}
         self.current_provider: Optional[str] = None
         self.current_model: Optional[str] = None
+        # 异步客户端按事件循环隔离（httpx 连接池绑定创建它的事件循环）
+        self._async_clients: (
+            "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]"
+        ) = weakref.WeakKeyDictionary()
+        # 进行中的请求：事件循环 -> {请求指纹: _Flight}
+        self._inflight: (
+            "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, _Flight]]"
+        ) = weakref.WeakKeyDictionary()
+        self.coalesced = 0
+        self.upstream_cancelled = 0
+        # 各 (服务商, 模型) 的时延 / 错误率与熔断状态
+        self.health = ProviderHealth()
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        # 按服务商的并发 / 速率限制与优先级排队
+        self.governor = RateGovernor(on_queued=lambda *args: self._record_queue(*args))
+        # 同步接口使用的后台事件循环（懒启动）
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        # 响应缓存（AI_RESPONSE_CACHE=0 关闭）
+        self.cache: Optional[ResponseCache] = (
+            get_response_cache() if os.getenv("AI_RESPONSE_CACHE", "1") != "0" else None
+        )
         
         # 从环境变量加载配置
         self._load_from_env()
@@ -295,6 +463,7 @@ class AIGateway:
         )
         
         self.providers[provider] = config
+        self._discard_async_clients(provider)
         
         # 创建客户端
         if OpenAI and enabled:
@@ -363,6 +532,7 @@ class AIGateway:
         del self.providers[provider]
         if provider in self.clients:
             del self.clients[provider]
+        self._discard_async_clients(provider)
         
         logger.info(f"服务商已删除: {provider}")
     
@@ -384,6 +554,7 @@ class AIGateway:
         
         config = self.providers[provider]
         config.api_key = api_key
+        self._discard_async_clients(provider)
         
         # 重新创建客户端
         if OpenAI and config.enabled:
@@ -405,7 +576,7 @@ class AIGateway:
                 config.enabled = False
                 raise
     
-    def chat_completion(
+    async def achat_completion(
         self,
         messages: List[Dict[str, str]],
         provider: Optional[str] = None,
@@ -414,9 +585,13 @@ class AIGateway:
         temperature: float = 0.3,
         max_tokens: Optional[int] = None,
         response_format: Optional[Dict[str, str]] = None,
+        cache: Optional[bool] = None,
+        coalesce: bool = True,
+        on_delta: Optional[Callable[[str], None]] = None,
+        cache_text: Optional[str] = None,
         **kwargs: Any,
     ) -> AIResponse:
-        """统一的对话补全接口
+        """统一的对话补全接口（异步）
         
         Args:
             messages: 消息列表 [{"role": "user", "content": "..."}]
@@ -426,16 +601,25 @@ class AIGateway:
             temperature: 温度参数
             max_tokens: 最大token数
             response_format: 响应格式（如 {"type": "json_object"}）
+            cache: 是否使用响应缓存（None 按功能配置；False 跳过；True 对未配置的功能使用默认 TTL）
+            coalesce: 是否与进行中的相同请求合并
+            on_delta: 流式回调；提供时以 stream=True 请求，每个文本增量到达即回调（不参与请求合并）
+            cache_text: 语义缓存比对用的文本（只含本次请求的可变素材，如问题、口播）；
+                为空时取非 system 消息
             **kwargs: 其他参数
             
         Returns:
-            AIResponse: 统一响应对象
+            AIResponse: 统一响应对象（流式调用时 content 为拼接后的完整文本）
         """
         # 如果指定了功能，但没有指定provider和model，则使用功能级别的默认配置
+        fallbacks: List[Tuple[str, str]] = []
+        hedge = False
         if function and function in self.FUNCTION_MODELS and not provider and not model:
             func_config = self.FUNCTION_MODELS[function]
             target_provider = func_config["provider"].lower()
             target_model = func_config["model"]
+            fallbacks = func_config.get("fallbacks") or []
+            hedge = bool(func_config.get("hedge"))
         else:
             # 确定使用的服务商和模型
             target_provider = (provider or self.current_provider or "").lower()
@@ -471,7 +655,292 @@ class AIGateway:
                 f"模型 {target_model} 不在服务商 {target_provider} 支持列表 {provider_cfg.models} 中，自动降级为 {provider_cfg.default_model}"
             )
             target_model = provider_cfg.default_model
+        primary = (target_provider, target_model or provider_cfg.default_model)
+        routes = self._candidate_routes(primary, fallbacks)
+
+        # 响应缓存（按功能开启）
+        policy = self._cache_policy(function, cache)
+        # 流式调用的增量只回调给发起者，无法与其他等待者共享
+        coalesce = coalesce and COALESCE_ENABLED and on_delta is None
+        fingerprint: Optional[Tuple[str, str, str]] = None
+        if policy or coalesce:
+            fingerprint = request_fingerprint(
+                target_provider,
+                target_model or provider_cfg.default_model,
+                messages,
+                {
+                    "temperature": temperature,
+                    "max_tokens": max_tokens,
+                    "response_format": response_format,
+                    **kwargs,
+                },
+            )
+            if cache_text:
+                fingerprint = (fingerprint[0], fingerprint[1], cache_text)
+        if policy:
+            cached = self._cache_lookup(fingerprint, policy, function)
+            if cached is not None:
+                if on_delta is not None and cached.content:
+                    on_delta(cached.content)
+                return cached
+
+        async def call() -> AIResponse:
+            response = await self._route(
+                routes,
+                # 流式增量已推送给调用方，无法在两个请求之间切换
+                hedge and on_delta is None,
+                function,
+                messages,
+                temperature,
+                max_tokens,
+                response_format,
+                on_delta=on_delta,
+                **kwargs,
+            )
+            if policy and response.success and response.content:
+                self._cache_store(fingerprint, policy, function, response)
+            return response
+
+        if not coalesce:
+            return await call()
+        return await self._single_flight(fingerprint[0], call)
+
+    async def _single_flight(self, key: str, call: Any) -> AIResponse:
+        """
+        相同指纹的并发请求共享一次上游调用。
+
+        上游调用运行在独立 Task 中，等待者通过 shield 等待：单个等待者被取消不影响其他人；
+        最后一个等待者离开时才取消上游调用。
+        """
+        loop = asyncio.get_running_loop()
+        flights = self._inflight.get(loop)
+        if flights is None:
+            flights = self._inflight[loop] = {}
+        flight = flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _Flight(loop.create_task(call()))
+            flights[key] = flight
+
+            def _done(task: "asyncio.Task[AIResponse]", flight: _Flight = flight) -> None:
+                if flights.get(key) is flight:
+                    del flights[key]
+                if task.cancelled():
+                    self.upstream_cancelled += 1
+                else:
+                    # 标记异常已读取，避免无人等待时的 "exception was never retrieved" 警告
+                    task.exception()
+
+            flight.task.add_done_callback(_done)
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            response = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+        if leader:
+            return response
+        # 跟随者拿到副本，避免调用方之间互相修改
+        return replace(
+            response, usage=dict(response.usage), cache_hit=response.cache_hit or "inflight"
+        )
+
+    def _candidate_routes(
+        self, primary: Tuple[str, str], fallbacks: List[Tuple[str, str]]
+    ) -> List[Tuple[str, str]]:
+        """首选 + 已注册的备选 (服务商, 模型)，未注册或已禁用的备选跳过"""
+        routes = [primary]
+        for fallback_provider, fallback_model in fallbacks:
+            cfg = self.providers.get(fallback_provider)
+            if cfg is None or not cfg.enabled:
+                continue
+            if not fallback_model or fallback_model not in cfg.models:
+                fallback_model = cfg.default_model
+            if (fallback_provider, fallback_model) not in routes:
+                routes.append((fallback_provider, fallback_model))
+        return routes
+
+    async def _route(
+        self,
+        routes: List[Tuple[str, str]],
+        hedge: bool,
+        function: Optional[str],
+        *args: Any,
+        **kwargs: Any,
+    ) -> AIResponse:
+        """按实测时延与熔断状态排序候选并依次尝试，失败时切换到下一个
+
+        流式调用一旦有增量推送给调用方就不再切换：下一个服务商会从头推送完整内容，
+        调用方（如增量 JSON 解析）会收到截断的前半段再接一份新内容。
+        """
+        ordered = self.health.rank(routes)
+        if not ordered:
+            provider, model = routes[0]
+            return self._failed_response(
+                provider, model, f"{function or provider} 的候选服务商均处于熔断状态"
+            )
+        on_delta = kwargs.get("on_delta")
+        delivered = False
+        if on_delta is not None:
+            def forward(text: str) -> None:
+                nonlocal delivered
+                delivered = True
+                on_delta(text)
+
+            kwargs["on_delta"] = forward
+        tried: set = set()
+        response: Optional[AIResponse] = None
+        for index, route in enumerate(ordered):
+            if delivered:
+                logger.warning(
+                    "服务商 %s/%s 流式输出中断（%s），已推送部分增量，不再切换服务商",
+                    response.provider,
+                    response.model,
+                    response.error,
+                )
+                break
+            if route in tried:
+                continue
+            if response is not None:
+                self.failovers += 1
+                logger.warning(
+                    "服务商 %s/%s 调用失败（%s），切换到 %s/%s",
+                    response.provider,
+                    response.model,
+                    response.error,
+                    *route,
+                )
+            backup = None
+            if hedge:
+                backup = next((r for r in ordered[index + 1:] if r not in tried), None)
+            if backup is not None:
+                response = await self._hedged(route, backup, tried, function, *args, **kwargs)
+            else:
+                tried.add(route)
+                response = await self._observed(route, function, *args, **kwargs)
+            if response.success:
+                return response
+        return response
+
+    async def _hedged(
+        self,
+        primary: Tuple[str, str],
+        backup: Tuple[str, str],
+        tried: set,
+        *args: Any,
+        **kwargs: Any,
+    ) -> AIResponse:
+        """首选超过其 p95 仍未返回时向 backup 发起对冲请求，先成功者返回，另一个取消"""
+        tasks = [asyncio.ensure_future(self._observed(primary, *args, **kwargs))]
+        tried.add(primary)
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.health.hedge_delay(*primary))
+            if not done and self.health.available(*backup):
+                self.hedges += 1
+                tried.add(backup)
+                tasks.append(asyncio.ensure_future(self._observed(backup, *args, **kwargs)))
+            pending = set(tasks)
+            response: Optional[AIResponse] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    response = task.result()
+                    if response.success:
+                        if len(tasks) > 1 and task is tasks[1]:
+                            self.hedge_wins += 1
+                        return response
+            return response
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _observed(
+        self,
+        route: Tuple[str, str],
+        function: Optional[str],
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: Optional[int],
+        response_format: Optional[Dict[str, str]],
+        **kwargs: Any,
+    ) -> AIResponse:
+        """经熔断器与限流器放行后调用，并记录耗时与成败（排队时间不计入耗时）"""
+        provider, model = route
+        if not self.health.acquire(provider, model):
+            return self._failed_response(provider, model, f"{provider}/{model} 熔断中")
+        tokens = 0
+        if self.governor.tpm_limited(provider):
+            tokens = self._estimate_request_tokens(messages, max_tokens)
+        try:
+            priority = self._function_priority(function)
+            ticket = await self.governor.acquire(provider, priority, tokens)
+        except asyncio.CancelledError:
+            self.health.release(provider, model)
+            raise
+        response: Optional[AIResponse] = None
+        started = time.perf_counter()
+        try:
+            response = await self._dispatch(
+                provider, model, function, messages,
+                temperature, max_tokens, response_format, **kwargs,
+            )
+        except asyncio.CancelledError:
+            # 被对冲请求或调用方取消：不计入统计，归还半开探测名额
+            self.health.release(provider, model)
+            raise
+        except Exception:
+            self.health.record(provider, model, (time.perf_counter() - started) * 1000, ok=False)
+            raise
+        finally:
+            used = None
+            if response is not None and response.success:
+                used = response.usage.get("total_tokens")
+            self.governor.release(ticket, used_tokens=used)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.health.record(provider, model, elapsed_ms, ok=response.success)
+        response.queue_ms = ticket.queue_ms
+        return response
+
+    def _function_priority(self, function: Optional[str]) -> str:
+        config = self.FUNCTION_MODELS.get(function or "")
+        return (config or {}).get("priority") or INTERACTIVE
+
+    @staticmethod
+    def _estimate_request_tokens(messages: List[Dict[str, Any]], max_tokens: Optional[int]) -> int:
+        """TPM 预扣量：提示词 token 估算 + 输出上限"""
+        prompt = sum(count_tokens(str(m.get("content") or "")) for m in messages)
+        return prompt + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+    @staticmethod
+    def _failed_response(provider: str, model: str, error: str) -> AIResponse:
+        return AIResponse(
+            content="",
+            model=model,
+            provider=provider,
+            usage={"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            cost=0.0,
+            duration_ms=0.0,
+            success=False,
+            error=error,
+        )
 
+    async def _dispatch(
+        self,
+        target_provider: str,
+        target_model: Optional[str],
+        function: Optional[str],
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: Optional[int],
+        response_format: Optional[Dict[str, str]],
+        **kwargs: Any,
+    ) -> AIResponse:
+        """发起调用（含讯飞 response_format 兼容回退）"""
         # 对 xunfei 的消息长度/字符数做基本统计，便于定位 404 来源（可能与超长提示相关）
         if target_provider == "xunfei":
             try:
@@ -484,7 +953,7 @@ class AIGateway:
         # 直接调用，不做降级；对讯飞进行 response_format 兼容性回退（部分模型不支持该参数会触发 404）
         if target_provider == "xunfei" and response_format:
             try:
-                return self._call_provider(
+                return await self._acall_provider(
                     provider=target_provider,
                     model=target_model,
                     function=function,
@@ -500,7 +969,7 @@ class AIGateway:
                 if "NotFound" in err_name or "404" in str(e):
                     logger.warning(f"讯飞调用含 response_format 发生 {err_name}: {e} -> 自动回退去除 response_format 重试")
                     try:
-                        return self._call_provider(
+                        return await self._acall_provider(
                             provider=target_provider,
                             model=target_model,
                             function=function,
@@ -534,7 +1003,7 @@ class AIGateway:
                         error=str(e),
                     )
         # 普通路径
-        return self._call_provider(
+        return await self._acall_provider(
             provider=target_provider,
             model=target_model,
             function=function,  # 传递功能标识
@@ -545,19 +1014,284 @@ class AIGateway:
             **kwargs,
         )
     
+    def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        function: Optional[str] = None,
+        temperature: float = 0.3,
+        max_tokens: Optional[int] = None,
+        response_format: Optional[Dict[str, str]] = None,
+        cache: Optional[bool] = None,
+        coalesce: bool = True,
+        on_delta: Optional[Callable[[str], None]] = None,
+        cache_text: Optional[str] = None,
+        **kwargs: Any,
+    ) -> AIResponse:
+        """统一的对话补全接口（同步），参数同 achat_completion
+
+        在网关后台事件循环中执行，所有调用方共享同一组连接池；
+        on_delta 在后台事件循环线程中回调，跨线程投递由调用方负责。
+        """
+        return self._run_sync(
+            self.achat_completion(
+                messages=messages,
+                provider=provider,
+                model=model,
+                function=function,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                response_format=response_format,
+                cache=cache,
+                coalesce=coalesce,
+                on_delta=on_delta,
+                cache_text=cache_text,
+                **kwargs,
+            )
+        )
+
+    # ------------------------------------------------------------------
+    # 响应缓存
+    # ------------------------------------------------------------------
+    def _cache_policy(
+        self, function: Optional[str], cache: Optional[bool]
+    ) -> Optional[Dict[str, float]]:
+        if cache is False or self.cache is None:
+            return None
+        policy = (self.FUNCTION_MODELS.get(function) or {}).get("cache") if function else None
+        if policy:
+            return policy
+        if cache:
+            return {"ttl": self.cache.default_ttl}
+        return None
+
+    def _cache_lookup(
+        self,
+        fingerprint: Tuple[str, str, str],
+        policy: Dict[str, float],
+        function: Optional[str],
+    ) -> Optional[AIResponse]:
+        key, scope, text = fingerprint
+        semantic = policy.get("semantic")
+        value, kind = self.cache.lookup(  # type: ignore[union-attr]
+            key,
+            scope=scope,
+            text=text if semantic else None,
+            threshold=semantic,
+            function=function,
+        )
+        if not isinstance(value, dict):
+            return None
+        response = AIResponse(**{k: v for k, v in value.items() if k in _AI_RESPONSE_FIELDS})
+        response.cost = 0.0
+        response.duration_ms = 0.0
+        response.cache_hit = kind
+        display_name = self._get_function_display_name(function, response.provider, response.model)
+        logger.info(
+            f"💾 AI网关缓存命中({kind}): {display_name} | "
+            f"节省 Token: {response.usage.get('total_tokens', 0)}"
+        )
+        return response
+
+    def _cache_store(
+        self,
+        fingerprint: Tuple[str, str, str],
+        policy: Dict[str, float],
+        function: Optional[str],
+        response: AIResponse,
+    ) -> None:
+        key, scope, text = fingerprint
+        value = asdict(response)
+        value["cache_hit"] = None
+        self.cache.set(  # type: ignore[union-attr]
+            key,
+            value,
+            ttl=policy.get("ttl"),
+            scope=scope,
+            text=text if policy.get("semantic") else None,
+            tokens=response.usage.get("total_tokens", 0),
+            function=function,
+        )
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """响应缓存指标（附带各调用方提示词压缩节省的 token）"""
+        single_flight = {
+            "inflight": sum(len(flights) for flights in list(self._inflight.values())),
+            "coalesced": self.coalesced,
+            "upstream_cancelled": self.upstream_cancelled,
+        }
+        extra = {"single_flight": single_flight, "prompt_budget": get_budget_stats()}
+        if self.cache is None:
+            return {"enabled": False, **extra}
+        return {"enabled": True, **self.cache.get_stats(), **extra}
+
+    def get_routing_stats(self) -> Dict[str, Any]:
+        """选路指标：各 (服务商, 模型) 的 p50 / p95、错误率、熔断状态，以及对冲与切换次数"""
+        return {
+            "routes": self.health.snapshot(),
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+        }
+
+    def get_governor_stats(self) -> Dict[str, Any]:
+        """限流指标：各服务商在途 / 排队数量，按优先级的排队耗时"""
+        return self.governor.snapshot()
+
+    def clear_cache(self) -> None:
+        if self.cache is not None:
+            self.cache.clear()
+
     def _call_provider(
+        self,
+        provider: str,
+        model: Optional[str],
+        messages: List[Dict[str, str]],
+        function: Optional[str] = None,
+        **kwargs: Any,
+    ) -> AIResponse:
+        """调用指定服务商（同步）"""
+        return self._run_sync(
+            self._acall_provider(
+                provider=provider, model=model, messages=messages, function=function, **kwargs
+            )
+        )
+
+    # ------------------------------------------------------------------
+    # 传输层：连接池与后台事件循环
+    # ------------------------------------------------------------------
+    def _make_http_client(self, config: ProviderConfig) -> Any:
+        """创建服务商的长连接 HTTP 客户端"""
+        return httpx.AsyncClient(
+            timeout=config.timeout,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    def _get_async_client(self, provider: str) -> Any:
+        """获取当前事件循环上该服务商的异步客户端（懒创建）"""
+        config = self.providers[provider]
+        if AsyncOpenAI is None or httpx is None or not config.enabled:
+            return None
+        loop = asyncio.get_running_loop()
+        clients = self._async_clients.get(loop)
+        if clients is None:
+            clients = self._async_clients[loop] = {}
+        client = clients.get(provider)
+        if client is None:
+            client_kwargs: Dict[str, Any] = {
+                "api_key": config.api_key,
+                "timeout": config.timeout,
+                # 重试由网关统一处理
+                "max_retries": 0,
+                "http_client": self._make_http_client(config),
+            }
+            if config.base_url:
+                client_kwargs["base_url"] = config.base_url
+            client = clients[provider] = AsyncOpenAI(**client_kwargs)
+        return client
+
+    def _discard_async_clients(self, provider: Optional[str] = None) -> None:
+        """配置变化后丢弃异步客户端，并在各自事件循环中关闭连接池"""
+        for loop, clients in list(self._async_clients.items()):
+            names = [provider] if provider else list(clients)
+            for name in names:
+                client = clients.pop(name, None)
+                if client is None or loop.is_closed():
+                    continue
+                try:
+                    loop.call_soon_threadsafe(lambda c=client, lp=loop: lp.create_task(c.close()))
+                except RuntimeError:
+                    pass
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环上的全部连接池，并将响应缓存落盘"""
+        if self.cache is not None:
+            self.cache.flush()
+        clients = self._async_clients.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            try:
+                await client.close()
+            except Exception as e:  # pragma: no cover
+                logger.debug(f"关闭 AI 客户端失败: {e}")
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="ai-gateway-loop", daemon=True
+                ).start()
+                self._loop = loop
+            return self._loop
+
+    def _run_sync(self, coro: Coroutine[Any, Any, T]) -> T:
+        """在网关后台事件循环中执行协程并阻塞等待结果"""
+        loop = self._ensure_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            coro.close()
+            raise RuntimeError("不能在网关事件循环内调用同步接口，请使用 achat_completion")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    @staticmethod
+    def _is_transient(exc: Exception) -> bool:
+        """超时、限流与 5xx 视为可重试"""
+        err_type = type(exc).__name__
+        err_text = str(exc)
+        return (
+            "timeout" in err_text.lower()
+            or "Timeout" in err_type
+            or "ServiceUnavailable" in err_type
+            or "RateLimit" in err_type
+            or "InternalServer" in err_type
+            or "APIConnection" in err_type
+            or "429" in err_text
+            or "500" in err_text
+            or "503" in err_text
+        )
+
+    @staticmethod
+    def _is_rate_limited(exc: Exception) -> bool:
+        return "RateLimit" in type(exc).__name__ or getattr(exc, "status_code", None) == 429
+
+    @staticmethod
+    def _retry_after(exc: Exception) -> Optional[float]:
+        """读取 429 响应的 Retry-After（秒）"""
+        response = getattr(exc, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _backoff_delay(retries: int) -> float:
+        delay = min(RETRY_BACKOFF_BASE * (2 ** retries), RETRY_BACKOFF_MAX)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _acall_provider(
         self,
         provider: str,
         model: Optional[str],
         messages: List[Dict[str, str]],
         function: Optional[str] = None,  # 功能标识
+        on_delta: Optional[Callable[[str], None]] = None,
         **kwargs: Any,
     ) -> AIResponse:
-        """调用指定服务商"""
+        """调用指定服务商；提供 on_delta 时以流式请求并逐块回调"""
         start_time = time.time()
+        first_token_ms: Optional[float] = None
         
         config = self.providers[provider]
-        client = self.clients.get(provider)
+        client = self._get_async_client(provider)
         
         if not client:
             raise RuntimeError(f"{provider} 客户端未初始化")
@@ -578,38 +1312,59 @@ class AIGateway:
             except Exception:  # pragma: no cover
                 pass
         
+        if on_delta is not None:
+            kwargs["stream"] = True
+            # 讯飞兼容层不识别 stream_options，其余服务商在最后一块返回 usage
+            if provider != "xunfei":
+                kwargs.setdefault("stream_options", {"include_usage": True})
+
         # 调用 API，增强异常捕获，统一返回 AIResponse 而不是直接抛出导致上层中断
         try:
-            oc = client
-            try:
-                oc = client.with_options(timeout=config.timeout)
-            except Exception:
-                oc = client
             retries = 0
             while True:
                 try:
-                    response = oc.chat.completions.create(
+                    response = await client.chat.completions.create(
                         model=actual_model,
                         messages=messages,  # type: ignore
                         **kwargs,
                     )
                     break
                 except Exception as e_inner:
-                    err_type_inner = type(e_inner).__name__
-                    err_text_inner = str(e_inner)
-                    transient = (
-                        "timeout" in err_text_inner.lower()
-                        or "ServiceUnavailable" in err_type_inner
-                        or "RateLimit" in err_type_inner
-                        or "429" in err_text_inner
-                        or "500" in err_text_inner
-                        or "503" in err_text_inner
-                    )
-                    if not transient or retries >= config.max_retries:
+                    retry_after = None
+                    if self._is_rate_limited(e_inner):
+                        # 暂停该服务商的放行，排队中的请求统一等待而不是各自重试
+                        retry_after = self._retry_after(e_inner)
+                        self.governor.throttle(provider, retry_after)
+                    if not self._is_transient(e_inner) or retries >= config.max_retries:
                         raise e_inner
-                    wait = min(2 ** retries, 8)
-                    time.sleep(wait)
+                    await asyncio.sleep(retry_after or self._backoff_delay(retries))
                     retries += 1
+            if on_delta is None:
+                content = response.choices[0].message.content or ""
+                usage_info = response.usage
+            else:
+                # 只重试建立连接阶段；增量开始后的中断按失败返回
+                parts: List[str] = []
+                usage_info = None
+                try:
+                    async for chunk in response:
+                        if getattr(chunk, "usage", None):
+                            usage_info = chunk.usage
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if not delta:
+                            continue
+                        if first_token_ms is None:
+                            first_token_ms = (time.time() - start_time) * 1000
+                        parts.append(delta)
+                        try:
+                            on_delta(delta)
+                        except Exception as cb_exc:
+                            logger.warning("流式回调异常（已忽略）: %s", cb_exc)
+                finally:
+                    await response.close()
+                content = "".join(parts)
         except Exception as e:  # 捕获 openai / 兼容层异常
             err_type = type(e).__name__
             err_text = str(e)
@@ -659,11 +1414,10 @@ class AIGateway:
         duration_ms = (time.time() - start_time) * 1000
         
         # 提取数据
-        content = response.choices[0].message.content or ""
         usage = {
-            "prompt_tokens": response.usage.prompt_tokens if response.usage else 0,
-            "completion_tokens": response.usage.completion_tokens if response.usage else 0,
-            "total_tokens": response.usage.total_tokens if response.usage else 0,
+            "prompt_tokens": usage_info.prompt_tokens if usage_info else 0,
+            "completion_tokens": usage_info.completion_tokens if usage_info else 0,
+            "total_tokens": usage_info.total_tokens if usage_info else 0,
         }
         
         # 计算成本
@@ -701,6 +1455,7 @@ class AIGateway:
             cost=cost,
             duration_ms=duration_ms,
             success=True,
+            first_token_ms=first_token_ms,
         )
     
     def _calculate_cost(
@@ -814,6 +1569,15 @@ class AIGateway:
         except Exception as e:
             logger.debug(f"记录使用情况失败: {e}")
     
+    def _record_queue(self, provider: str, priority: str, queue_ms: float) -> None:
+        """排队耗时上报到监控系统"""
+        try:
+            from server.utils.ai_usage_monitor import get_usage_monitor
+
+            get_usage_monitor().record_queue_time(provider, priority, queue_ms)
+        except Exception as e:
+            logger.debug(f"记录排队耗时失败: {e}")
+
     def get_current_config(self) -> Dict[str, Any]:
         """获取当前配置信息"""
         if not self.current_provider:
@@ -839,6 +1603,8 @@ class AIGateway:
                 "enabled": config.enabled,
                 "timeout": config.timeout,
                 "max_retries": config.max_retries,
+                "max_connections": config.max_connections,
+                "max_keepalive": config.max_keepalive,
                 "masked_api_key": (f"{config.api_key[:8]}..." if config.api_key else None),
             }
             for name, config in self.providers.items()
@@ -1,18 +1,20 @@
 """AI模型控制网关 2.0
 
 统一管理GLM-5和MiniMax服务商，支持：
-- 智能路由
+- 智能路由（结合实测时延与熔断状态，见 provider_health）
 - 思考模式
 - 流式输出
 """
 from __future__ import annotations
 
 import os
+import time
 import logging
 from typing import Any, Dict, Generator, Iterator, List, Optional
 from dataclasses import dataclass, field
 from enum import Enum
 
+from server.ai.provider_health import ProviderHealth
 from server.ai.thinking_mode import ThinkingMode
 
 try:
@@ -49,6 +51,14 @@ class AIGatewayV2:
 
     _instance: Optional[AIGatewayV2] = None
 
+    # 静态路由结果的备选：首选熔断时切换；延迟敏感任务按实测 p95 选更快者
+    ROUTE_ALTERNATIVES: Dict[str, List[str]] = {
+        "minimax:MiniMax-M2.5-highspeed": ["minimax:MiniMax-M2.5", "glm:glm-5"],
+        "minimax:MiniMax-M2.5": ["minimax:MiniMax-M2.5-highspeed", "glm:glm-5"],
+        "glm:glm-5": ["minimax:MiniMax-M2.5"],
+    }
+    LATENCY_SENSITIVE_TASKS = {"live_analysis", "chat_focus"}
+
     def __new__(cls):
         """确保单例模式"""
         if cls._instance is None:
@@ -66,6 +76,8 @@ class AIGatewayV2:
         self.clients: Dict[str, OpenAI] = {}
         self.current_provider: Optional[str] = None
         self.current_model: Optional[str] = None
+        # 各 (服务商, 模型) 的时延 / 错误率与熔断状态，由 chat_completion 记录
+        self.health = ProviderHealth()
 
         # 从环境变量加载配置
         self._load_from_env()
@@ -195,6 +207,9 @@ class AIGatewayV2:
     def smart_route(self, task_type: str, requirements: Dict[str, Any]) -> str:
         """智能路由 - 只在GLM-5和MiniMax之间选择
 
+        先按任务类型给出静态首选，再结合观测数据调整：首选熔断时切换到可用的备选；
+        延迟敏感任务（实时分析 / 快速摘要，或 latency=fast）在首选有实测数据时选 p95 更低者。
+
         Args:
             task_type: 任务类型（live_analysis/style_profile等）
             requirements: 任务需求（latency/quality等）
@@ -202,6 +217,35 @@ class AIGatewayV2:
         Returns:
             格式为 "provider:model" 的字符串
         """
+        route = self._static_route(task_type, requirements)
+        latency_sensitive = (
+            task_type in self.LATENCY_SENSITIVE_TASKS or requirements.get("latency") == "fast"
+        )
+        return self._observed_route(route, latency_sensitive)
+
+    def _observed_route(self, route: str, latency_sensitive: bool) -> str:
+        routes = [route] + self.ROUTE_ALTERNATIVES.get(route, [])
+        candidates = [tuple(c.split(":", 1)) for c in routes]
+        candidates = [
+            c for c in candidates if c[0] in self.providers and self.providers[c[0]].enabled
+        ]
+        if not candidates:
+            return route
+        primary = tuple(route.split(":", 1))
+        if latency_sensitive and self.health.latency(*primary) is not None:
+            ranked = self.health.rank(candidates)
+        else:
+            # 只做熔断切换，保持配置顺序
+            ranked = [c for c in candidates if self.health.available(*c)]
+        if not ranked:
+            return route
+        chosen = ":".join(ranked[0])
+        if chosen != route:
+            logger.info(f"智能路由按观测数据由 {route} 切换到 {chosen}")
+        return chosen
+
+    def _static_route(self, task_type: str, requirements: Dict[str, Any]) -> str:
+        """按任务类型的静态首选"""
         # 实时分析任务 → MiniMax highspeed（100 TPS）
         if task_type == "live_analysis":
             latency = requirements.get("latency", "normal")
@@ -280,11 +324,16 @@ class AIGatewayV2:
                 api_kwargs = ThinkingMode.enable_for_minimax(api_kwargs)
 
         # 调用API
+        started = time.perf_counter()
         try:
             response = client.chat.completions.create(**api_kwargs)
         except Exception as e:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.health.record(self.current_provider, use_model, elapsed_ms, ok=False)
             logger.error(f"API调用失败: provider={self.current_provider}, model={use_model}, error={e}")
             raise RuntimeError(f"AI服务调用失败 ({self.current_provider}/{use_model}): {e}") from e
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.health.record(self.current_provider, use_model, elapsed_ms, ok=True)
 
         # 解析响应
         if enable_thinking:
@@ -360,7 +409,12 @@ class AIGatewayV2:
             elif self.current_provider == "minimax":
                 api_kwargs = ThinkingMode.enable_for_minimax(api_kwargs)
 
-        # 调用API并迭代流式响应
+        # 调用API并迭代流式响应；每次调用只记录一次观测：
+        # 中途出错记为失败，正常结束或调用方提前停止读取记为成功（耗时按首个增量计）
+        provider = self.current_provider
+        started = time.perf_counter()
+        first_chunk_ms: Optional[float] = None
+        completed = failed = False
         try:
             stream = client.chat.completions.create(**api_kwargs)
             for chunk in stream:
@@ -368,10 +422,21 @@ class AIGatewayV2:
                     delta = chunk.choices[0].delta
                     content = getattr(delta, 'content', None)
                     if content:
+                        if first_chunk_ms is None:
+                            first_chunk_ms = (time.perf_counter() - started) * 1000
                         yield content
+            completed = True
         except Exception as e:
-            logger.error(f"流式API调用失败: provider={self.current_provider}, model={use_model}, error={e}")
-            raise RuntimeError(f"AI流式服务调用失败 ({self.current_provider}/{use_model}): {e}") from e
+            failed = True
+            logger.error(f"流式API调用失败: provider={provider}, model={use_model}, error={e}")
+            raise RuntimeError(f"AI流式服务调用失败 ({provider}/{use_model}): {e}") from e
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if failed:
+                self.health.record(provider, use_model, elapsed_ms, ok=False)
+            elif completed or first_chunk_ms is not None:
+                ttfb_ms = first_chunk_ms if first_chunk_ms is not None else elapsed_ms
+                self.health.record(provider, use_model, ttfb_ms, ok=True)
 
 
 # 便捷函数
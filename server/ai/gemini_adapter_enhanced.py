@@ -13,9 +13,17 @@ import json
 import logging
 from typing import Dict, Any, List, Optional
 from .gemini_adapter import GeminiAdapter, get_gemini_adapter, _generate_real_trend_charts
+from .token_budget import Section, TokenBudgeter, budget_from_env, text_salience
 
 logger = logging.getLogger(__name__)
 
+# 复盘提示词中转写时间窗与弹幕样本的 token 预算（AI_PROMPT_BUDGET_REVIEW，0 为不限制）
+REVIEW_PROMPT_BUDGET = budget_from_env("review", 24000)
+# 条数上限（原先固定展示前 100 个时间窗、前 50 条弹幕），与预算同时生效，
+# 长直播的提示词不会比原先更长
+REVIEW_MAX_WINDOWS = 100
+REVIEW_MAX_CHATS = 50
+
 
 def _split_transcript_into_time_windows(
     transcript_data,
@@ -249,16 +257,44 @@ def _build_content_analysis_prompt(
         f"🎯 事件匹配完成 - 礼物触发点: {len(gift_matches)}, 关注触发点: {len(follow_matches)}"
     )
     
-    # 🆕 格式化带时间戳的转写文本（限制展示数量）
-    max_windows_to_show = min(100, len(time_windows))  # 最多展示100个窗口
-    transcript_with_timestamps = "\n\n".join([
+    # 🆕 按 token 预算压缩转写时间窗与弹幕样本：触发礼物/关注的时间窗优先保留，重复弹幕折叠
+    trigger_keys = set(gift_matches) | set(follow_matches)
+    window_texts = [
         f"[{_format_seconds(w['start_time'])} - {_format_seconds(w['end_time'])}]\n{w['text']}"
-        for w in time_windows[:max_windows_to_show]
+        for w in time_windows
+    ]
+    window_scores = [
+        text_salience(w["text"])
+        + (1.0 if f"{w['start_time']}-{w['end_time']}" in trigger_keys else 0.0)
+        for w in time_windows
+    ]
+    chats = events["chats"]
+    compact = TokenBudgeter(REVIEW_PROMPT_BUDGET, label="review").compact([
+        Section(
+            "transcript",
+            window_texts,
+            weight=3,
+            scores=window_scores,
+            dedupe=False,
+            joiner="\n\n",
+            max_items=REVIEW_MAX_WINDOWS,
+        ),
+        Section(
+            "chats",
+            [json.dumps(c, ensure_ascii=False, default=str) for c in chats],
+            weight=1,
+            scores=[text_salience(str(c.get("content") or "")) for c in chats],
+            keys=[str(c.get("content") or "") for c in chats],
+            max_items=REVIEW_MAX_CHATS,
+        ),
     ])
-    
-    if len(time_windows) > max_windows_to_show:
-        transcript_with_timestamps += f"\n\n...（省略 {len(time_windows) - max_windows_to_show} 个时间窗）"
-    
+    transcript_with_timestamps = compact["transcript"]
+    if compact.dropped["transcript"]:
+        transcript_with_timestamps += (
+            f"\n\n...（按信息量省略 {compact.dropped['transcript']} 个时间窗）"
+        )
+    chat_preview = compact["chats"]
+
     # 🆕 格式化触发点证据（展示匹配到事件的时间窗）
     trigger_evidence = []
     
@@ -294,9 +330,6 @@ def _build_content_analysis_prompt(
             ]
         })
     
-    # 限制弹幕和事件数量
-    chat_preview = events["chats"][:200] if len(events["chats"]) > 200 else events["chats"]
-    
     prompt = f"""你是一个专注于**颜值暧昧类主播**的直播复盘教练。你的目标是帮助主播提升内容质量，识别优质话术，训练消费刺激能力，并指导大哥维护策略。
 
 ## 🎯 核心任务（按优先级排序）
@@ -364,8 +397,8 @@ def _build_content_analysis_prompt(
 ### 语音转写（带30秒时间窗）
 {transcript_with_timestamps}
 
-### 弹幕消息样本（前50条）
-{json.dumps(chat_preview[:50], ensure_ascii=False, indent=2)}
+### 弹幕消息样本（重复弹幕已折叠为 ×N）
+{chat_preview}
 
 ### 礼物记录（完整列表）
 {json.dumps(trigger_evidence, ensure_ascii=False, indent=2)}
@@ -8,29 +8,34 @@ Qwen3-Max based assistant to produce an analysis-only report (no scripts).
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import os
 import re
 import time
 import uuid
 from collections import Counter
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Literal, Optional, Set, Tuple, TypedDict
+from typing import Any, Callable, Dict, Iterable, List, Literal, Optional, Set, Tuple, TypedDict
 
 try:  # pragma: no cover - optional dependency
     from langgraph.graph import END, StateGraph  # pyright: ignore[reportMissingImports]
     from langgraph.checkpoint.memory import MemorySaver  # pyright: ignore[reportMissingImports]
+    from langchain_core.runnables import RunnableLambda  # pyright: ignore[reportMissingImports]
 
     _LANGGRAPH_AVAILABLE = True
 except Exception:  # pragma: no cover
     StateGraph = None  # type: ignore[assignment]
     MemorySaver = None  # type: ignore[assignment]
+    RunnableLambda = None  # type: ignore[assignment]
     END = "__end__"  # type: ignore[misc]
     _LANGGRAPH_AVAILABLE = False
 
 from .live_analysis_generator import LiveAnalysisGenerator
 from .live_question_responder import LiveQuestionResponder
+from ..nlp.question_extractor import QuestionExtractor
 from .knowledge_service import get_knowledge_base
 from .ai_gateway import get_gateway
 from .style_profile_builder import StyleProfileBuilder
@@ -52,6 +57,9 @@ except Exception:  # pragma: no cover
 
 logger = logging.getLogger(__name__)
 
+# 单个分析窗口内 LLM 分支的截止时间（秒，仅 ainvoke 生效）；超时分支使用降级结果，0 表示不限制
+WORKFLOW_DEADLINE = float(os.getenv("AI_WORKFLOW_DEADLINE", "25"))
+
 
 class ChatSignal(TypedDict, total=False):
     text: str
@@ -85,8 +93,14 @@ class GraphState(TypedDict, total=False):
     risks: List[str]
     suggestions: List[str]
     top_questions: List[str]
+    question_clusters: List[Dict[str, Any]]
     knowledge_snippets: List[Dict[str, Any]]
     topic_playlist: List[Dict[str, Any]]
+    stream_id: str  # 流式事件订阅标识（见 LangGraphLiveWorkflow.invoke 的 on_event）
+    deadline: float  # 窗口截止时间戳，0 表示不限制
+    rolling_summary: str  # 此前窗口的紧凑摘要（见 window_delta），分析提示词只需附带本窗口新增素材
+    style_refresh: bool  # False 且已有 style_profile 时沿用画像，不调用风格画像生成
+    chat_focus: str
 
 
 @dataclass
@@ -141,8 +155,47 @@ class ChatFocusSummarizer:
         fallback: str,
         vibe: Optional[Dict[str, Any]] = None,
     ) -> str:
-        if not self.gateway:
+        messages = self._build_messages(chat_signals, transcript, fallback, vibe)
+        if messages is None:
+            return fallback
+        # 通过Gateway调用，支持功能级别的模型配置
+        # 如果指定了model则使用，否则通过function参数让Gateway自动选择
+        response = self.gateway.chat_completion(messages=messages, **self._call_options())
+        return self._focus_from_response(response, fallback)
+
+    async def asummarize(
+        self,
+        *,
+        chat_signals: List[ChatSignal],
+        transcript: str = "",
+        fallback: str,
+        vibe: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """异步版本，供事件循环内的调用方直接 await"""
+        messages = self._build_messages(chat_signals, transcript, fallback, vibe)
+        if messages is None:
             return fallback
+        response = await self.gateway.achat_completion(messages=messages, **self._call_options())
+        return self._focus_from_response(response, fallback)
+
+    def _call_options(self) -> Dict[str, Any]:
+        return {
+            "function": "chat_focus",  # 使用功能标识，支持通过环境变量配置
+            "model": self.model,  # 可选，如果指定则覆盖功能默认配置
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+        }
+
+    def _build_messages(
+        self,
+        chat_signals: List[ChatSignal],
+        transcript: str,
+        fallback: str,
+        vibe: Optional[Dict[str, Any]],
+    ) -> Optional[List[Dict[str, str]]]:
+        """构造提示词；网关不可用或没有可用素材时返回 None"""
+        if not self.gateway:
+            return None
 
         samples: List[str] = []
         for signal in (chat_signals or [])[-12:]:
@@ -161,7 +214,7 @@ class ChatFocusSummarizer:
 
         transcript = str(transcript or "").strip()
         if not samples and not transcript:
-            return fallback
+            return None
 
         vibe_note = ""
         if vibe and isinstance(vibe, dict):
@@ -186,19 +239,12 @@ class ChatFocusSummarizer:
             "概括观众此刻最关注的主题。必须是自然语言，不含序号、标点符号或乱码，"
             "例如“宿舍八卦”或“夏季穿搭分享”。若信息不足，请原样输出提供的备用短语。"
         )
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
 
-        # 通过Gateway调用，支持功能级别的模型配置
-        # 如果指定了model则使用，否则通过function参数让Gateway自动选择
-        response = self.gateway.chat_completion(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            function="chat_focus",  # 使用功能标识，支持通过环境变量配置
-            model=self.model,  # 可选，如果指定则覆盖功能默认配置
-            temperature=self.temperature,
-            max_tokens=self.max_tokens,
-        )
+    def _focus_from_response(self, response: Any, fallback: str) -> str:
         if not response.success:
             logger.debug("Chat focus summarizer failed: %s", response.error)
             return fallback
@@ -248,8 +294,12 @@ def _top_n_words(items: Iterable[str], n: int = 5) -> List[Tuple[str, int]]:
     return counter.most_common(n)
 
 
+# (节点名, 同步实现, 异步实现)
+_Step = Tuple[str, Callable[..., Dict[str, Any]], Optional[Callable[..., Any]]]
+
+
 class LangGraphLiveWorkflow:
-    """Top-level orchestrator exposing a `.invoke()` helper."""
+    """Top-level orchestrator exposing `.invoke()` / `.ainvoke()` helpers."""
 
     def __init__(
         self,
@@ -264,6 +314,8 @@ class LangGraphLiveWorkflow:
         self._graph = None
         self._workflow = None
         self.chat_focus_summarizer = chat_focus_summarizer
+        # stream_id -> 流式事件回调；回调不可序列化，不放进图状态（检查点会保存状态）
+        self._listeners: Dict[str, Callable[[Dict[str, Any]], None]] = {}
         
         # 初始化独立的风格画像生成器（通过 Gateway，使用 qwen3-max）
         try:
@@ -290,49 +342,148 @@ class LangGraphLiveWorkflow:
         else:
             logger.warning("LangGraph unavailable; workflow will run in sequential fallback mode.")
 
-    def invoke(self, state: GraphState) -> GraphState:
+    def invoke(
+        self,
+        state: GraphState,
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> GraphState:
+        """运行一次工作流（同步）。
+
+        planner 之后的独立分支由 LangGraph 在线程池中并发执行。
+        on_event: 生成节点的流式事件回调，收到 {"node", "field", "value"}，
+        在卡片字段生成完成时立即触发（运行在工作流所在线程或网关事件循环线程）。
+        """
+        thread_id, stream_id = self._prepare_state(state, on_event, deadline=0.0)
+        try:
+            if self._workflow is None:
+                return self._fallback_run(dict(state))
+            cfg = {"configurable": {"thread_id": thread_id}}
+            result: GraphState = self._workflow.invoke(state, config=cfg)  # type: ignore[arg-type]
+            return result
+        finally:
+            self._listeners.pop(stream_id, None)
+
+    async def ainvoke(
+        self,
+        state: GraphState,
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> GraphState:
+        """运行一次工作流（异步），参数同 invoke。
+
+        LLM 分支直接 await 网关异步接口并发执行，本地节点放到线程池，不阻塞事件循环；
+        所有分支受窗口截止时间 AI_WORKFLOW_DEADLINE 约束，窗口耗时接近最慢分支而非各分支之和。
+        """
+        deadline = time.time() + WORKFLOW_DEADLINE if WORKFLOW_DEADLINE > 0 else 0.0
+        thread_id, stream_id = self._prepare_state(state, on_event, deadline=deadline)
+        try:
+            if self._workflow is None:
+                return await self._afallback_run(dict(state))
+            cfg = {"configurable": {"thread_id": thread_id}}
+            result: GraphState = await self._workflow.ainvoke(state, config=cfg)  # type: ignore[arg-type]
+            return result
+        finally:
+            self._listeners.pop(stream_id, None)
+
+    def _prepare_state(
+        self,
+        state: GraphState,
+        on_event: Optional[Callable[[Dict[str, Any]], None]],
+        deadline: float,
+    ) -> Tuple[str, str]:
         anchor_input = state.get("anchor_id") or self.config.anchor_id
         anchor_key = _sanitize_anchor_id(anchor_input)
         state["anchor_id"] = anchor_key
         state["broadcaster_id"] = anchor_key
         thread_id = anchor_key or f"session_{uuid.uuid4().hex}"
-        if self._workflow is None:
-            return self._fallback_run(dict(state))
-        cfg = {"configurable": {"thread_id": thread_id}}
-        result: GraphState = self._workflow.invoke(state, config=cfg)  # type: ignore[arg-type]
-        return result
+        stream_id = uuid.uuid4().hex if on_event else ""
+        state["stream_id"] = stream_id
+        state["deadline"] = deadline
+        if on_event:
+            self._listeners[stream_id] = on_event
+        return thread_id, stream_id
+
+    async def _within_deadline(self, state: GraphState, node: str, awaitable: Any) -> Any:
+        """在窗口截止时间内等待分支结果；超时取消上游调用并抛出 asyncio.TimeoutError"""
+        deadline = float(state.get("deadline") or 0.0)
+        if deadline <= 0:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, timeout=max(deadline - time.time(), 0.0))
+        except asyncio.TimeoutError:
+            logger.warning("节点 %s 超出窗口截止时间，使用降级结果", node)
+            raise
+
+    @staticmethod
+    async def _call_async(target: Any, name: str, *args: Any, **kwargs: Any) -> Any:
+        """优先调用目标的异步实现（a 前缀同名方法），没有则放到线程池执行同步实现"""
+        afunc = getattr(target, f"a{name}", None)
+        if afunc is not None:
+            return await afunc(*args, **kwargs)
+        return await asyncio.to_thread(getattr(target, name), *args, **kwargs)
+
+    def _field_listener(self, state: GraphState, node: str) -> Optional[Callable[[str, Any], None]]:
+        """返回把生成节点的字段增量转发给订阅者的回调；无订阅者时为 None"""
+        emit = self._listeners.get(state.get("stream_id") or "")
+        if emit is None:
+            return None
+
+        def on_field(field: str, value: Any) -> None:
+            emit({"node": node, "field": field, "value": value})
+
+        return on_field
 
     # ------------------------------------------------------------------ graph
+    def _pipeline(self) -> Tuple[List[_Step], List[_Step]]:
+        """节点编排（图与降级路径共用）：顺序执行的本地前置节点 + planner 之后相互独立的分支。
+
+        分支之间没有数据依赖：风格画像、知识检索 + 分析卡片、观众问题话术、弹幕焦点各自只读取
+        前置节点的输出，并发执行后在 summary 汇合。每个分支只占一个图节点——LangGraph 按超步
+        同步推进，分支内再拆节点会让后半段等待其他分支全部结束。
+        """
+        prefix: List[_Step] = [
+            ("memory_loader", self._memory_loader, None),
+            ("signal_collector", self._signal_collector, None),
+            ("topic_detector", self._topic_detector, None),
+            ("mood_estimator", self._mood_estimator, None),
+            ("planner", self._planner, None),
+        ]
+        branches: List[_Step] = [
+            ("style_profile_builder", self._style_profile_builder, self._astyle_profile_builder),
+            ("analysis_generator", self._analysis_branch, self._aanalysis_branch),
+            ("chat_focus_summarizer", self._chat_focus_node, self._achat_focus_node),
+        ]
+        if self.question_responder:
+            branches.append(
+                ("question_responder", self._question_responder, self._aquestion_responder)
+            )
+        return prefix, branches
+
+    @staticmethod
+    def _node(func: Callable[..., Any], afunc: Optional[Callable[..., Any]] = None) -> Any:
+        """同步 / 异步双实现节点：invoke 走同步实现，ainvoke 走异步实现（缺省时放到线程池执行）"""
+        if afunc is None:
+
+            async def afunc(state: GraphState, _func: Callable[..., Any] = func) -> Dict[str, Any]:
+                return await asyncio.to_thread(_func, state)
+
+        return RunnableLambda(func, afunc=afunc)
+
     def _build_graph(self) -> Any:
         assert StateGraph is not None  # type hint
         graph = StateGraph(GraphState)
-        graph.add_node("memory_loader", self._memory_loader)
-        graph.add_node("signal_collector", self._signal_collector)
-        graph.add_node("topic_detector", self._topic_detector)
-        graph.add_node("mood_estimator", self._mood_estimator)
-        graph.add_node("planner", self._planner)
-        graph.add_node("knowledge_loader", self._knowledge_loader)
-        graph.add_node("analysis_generator", self._analysis_generator)
-        graph.add_node("style_profile_builder", self._style_profile_builder)  # 新增：独立的风格画像生成节点（使用 qwen3-max）
-        if self.question_responder:
-            graph.add_node("question_responder", self._question_responder)
-        graph.add_node("summary", self._summary_node)
-
-        graph.set_entry_point("memory_loader")
-        graph.add_edge("memory_loader", "signal_collector")
-        graph.add_edge("signal_collector", "topic_detector")
-        graph.add_edge("topic_detector", "mood_estimator")
-        graph.add_edge("mood_estimator", "planner")
-        graph.add_edge("planner", "knowledge_loader")
-        # 顺序执行：先执行 style_profile_builder（qwen3-max），再执行 analysis_generator（xunfei lite）
-        # 这样可以确保两个任务独立生成，不会混合在一起
-        graph.add_edge("knowledge_loader", "style_profile_builder")
-        graph.add_edge("style_profile_builder", "analysis_generator")
-        if self.question_responder:
-            graph.add_edge("analysis_generator", "question_responder")
-            graph.add_edge("question_responder", "summary")
-        else:
-            graph.add_edge("analysis_generator", "summary")
+        prefix, branches = self._pipeline()
+        for name, func, afunc in prefix + branches:
+            graph.add_node(name, self._node(func, afunc))
+        graph.add_node("summary", self._node(self._summary_node))
+
+        graph.set_entry_point(prefix[0][0])
+        for (head, _, _), (tail, _, _) in zip(prefix, prefix[1:]):
+            graph.add_edge(head, tail)
+        # 扇出：planner 之后各分支并发执行
+        for name, _, _ in branches:
+            graph.add_edge(prefix[-1][0], name)
+        # 扇入：所有分支完成后再汇总
+        graph.add_edge([name for name, _, _ in branches], "summary")
         graph.add_edge("summary", END)
         return graph
 
@@ -379,7 +530,8 @@ class LangGraphLiveWorkflow:
             speaker_timeline.append(entry)
         speaker_timeline = speaker_timeline[-120:]
         chat_signals: List[ChatSignal] = []
-        top_questions: List[str] = []
+        # 问题按近似文本聚簇，只把各簇代表问题（热门在前）交给下游回答
+        question_extractor = QuestionExtractor()
         category_counts: Dict[str, int] = {"question": 0, "product": 0, "support": 0, "emotion": 0, "other": 0}
         total_chars = sum(len(s) for s in sentences)
         window_start = float(state.get("window_start") or time.time())
@@ -562,11 +714,10 @@ class LangGraphLiveWorkflow:
                 weight = 0.5
 
             if event_type == "chat":
-                if any(q in lowered for q in ["?", "？", "什么", "怎么", "why", "how", "price", "多少", "几号"]):
+                if question_extractor.is_question(content):
                     weight = max(weight, 0.85)
                     category = "question"
                     reasons.append("高权重提问")
-                    top_questions.append(content)
                 elif any(p in lowered for p in ["买", "价", "券", "折扣", "产品", "链接", "怎么买"]):
                     weight = max(weight, 0.7)
                     category = "product"
@@ -594,6 +745,9 @@ class LangGraphLiveWorkflow:
                 weight += 0.12
                 reasons.append("老粉丝")
 
+            if category == "question":
+                question_extractor.add(content, user=user_key, weight=weight, check=False)
+
             category_counts[category] = category_counts.get(category, 0) + 1
             chat_signals.append(
                 {
@@ -625,8 +779,10 @@ class LangGraphLiveWorkflow:
         priority_candidates.sort(key=lambda item: item.get("score", 0), reverse=True)
         lead_candidates = priority_candidates[:3]
 
+        question_clusters = question_extractor.top_clusters(limit=6)
         chat_stats = {
             "total_messages": len(chat_signals),
+            "question_stats": question_extractor.get_stats(),
             "category_counts": category_counts,
             "window_seconds": round(elapsed, 1),
             "priority_candidates": len(lead_candidates),
@@ -642,7 +798,8 @@ class LangGraphLiveWorkflow:
             "transcript_snippet": transcript_snippet,
             "chat_signals": chat_signals,
             "chat_stats": chat_stats,
-            "top_questions": list(dict.fromkeys(top_questions))[:6],
+            "top_questions": [c["question"] for c in question_clusters],
+            "question_clusters": question_clusters,
             "speech_stats": speech_stats,
             "lead_candidates": lead_candidates,
             "speaker_timeline": speaker_timeline,
@@ -893,7 +1050,7 @@ class LangGraphLiveWorkflow:
                     break
         return {"knowledge_snippets": snippets_payload, "topic_playlist": topic_playlist}
 
-    def _analysis_generator(self, state: GraphState) -> Dict[str, Any]:
+    def _analysis_context(self, state: GraphState) -> Dict[str, Any]:
         transcript = state.get("transcript_snippet") or "\n".join(state.get("sentences") or [])
         context = {
             "transcript": transcript,
@@ -910,66 +1067,137 @@ class LangGraphLiveWorkflow:
         }
         context["knowledge_snippets"] = state.get("knowledge_snippets") or []
         context["speaker_timeline"] = state.get("speaker_timeline") or []
+        context["rolling_summary"] = state.get("rolling_summary") or ""
+        return context
+
+    def _analysis_branch(self, state: GraphState) -> Dict[str, Any]:
+        """知识检索 + 分析卡片：分析依赖检索结果，在同一分支内顺序执行"""
+        knowledge = self._knowledge_loader(state)
+        return {**knowledge, **self._analysis_generator({**state, **knowledge})}
+
+    async def _aanalysis_branch(self, state: GraphState) -> Dict[str, Any]:
+        knowledge = await asyncio.to_thread(self._knowledge_loader, state)
+        return {**knowledge, **await self._aanalysis_generator({**state, **knowledge})}
+
+    def _analysis_generator(self, state: GraphState) -> Dict[str, Any]:
+        context = self._analysis_context(state)
         error_msg = None
+        on_field = self._field_listener(state, "analysis_generator")
         try:
-            card = self.analysis_generator.generate(context)
+            if on_field is not None:
+                card = self.analysis_generator.generate(context, on_field=on_field)
+            else:
+                card = self.analysis_generator.generate(context)
         except Exception as exc:  # pragma: no cover
             logger.exception("Analysis generation failed: %s", exc)
             card = {"analysis_overview": f"生成失败：{exc}"}
             error_msg = str(exc)
         return {"analysis_card": card, "analysis_error": error_msg}
 
-    def _style_profile_builder(self, state: GraphState) -> Dict[str, Any]:
-        """独立的风格画像与氛围分析生成节点（通过 Gateway，使用 qwen3-max）"""
-        # 如果没有初始化 style_profile_builder，返回现有的 persona
+    async def _aanalysis_generator(self, state: GraphState) -> Dict[str, Any]:
+        context = self._analysis_context(state)
+        on_field = self._field_listener(state, "analysis_generator")
+        # 始终流式生成：超过截止时间时保留已完整生成的卡片字段
+        partial: Dict[str, Any] = {}
+
+        def collect(field: str, value: Any) -> None:
+            partial[field] = value
+            if on_field is not None:
+                on_field(field, value)
+
+        error_msg = None
+        try:
+            card = await self._within_deadline(
+                state,
+                "analysis_generator",
+                self._call_async(self.analysis_generator, "generate", context, on_field=collect),
+            )
+        except asyncio.TimeoutError:
+            card = dict(partial) or {"analysis_overview": "分析生成超时，请稍后重试"}
+            error_msg = "deadline exceeded"
+        except Exception as exc:  # pragma: no cover
+            logger.exception("Analysis generation failed: %s", exc)
+            card = {"analysis_overview": f"生成失败：{exc}"}
+            error_msg = str(exc)
+        return {"analysis_card": card, "analysis_error": error_msg}
+
+    def _style_profile_request(self, state: GraphState) -> Optional[Dict[str, Any]]:
+        """风格画像调用参数；未初始化生成器或转写内容不足时返回 None"""
         if not self.style_profile_builder:
-            return {"style_profile": state.get("persona") or {}}
-        
+            return None
+        # 调用方已有画像且本窗口无需刷新
+        if state.get("style_refresh") is False and state.get("style_profile"):
+            return None
         transcript = state.get("transcript_snippet") or "\n".join(state.get("sentences") or [])
-        
         # 如果没有足够的转写内容，跳过生成
         if not transcript or len(transcript.strip()) < 50:
-            return {"style_profile": state.get("persona") or {}}
-        
-        anchor_id = state.get("anchor_id") or "default"
-        session_date = time.strftime("%Y-%m-%d", time.localtime())
-        session_index = int(state.get("window_start", 0) // 60) or 1  # 简单的会话索引
-        
+            return None
+        return {
+            "anchor_id": state.get("anchor_id") or "default",
+            "transcript": transcript,
+            "session_date": time.strftime("%Y-%m-%d", time.localtime()),
+            "session_index": int(state.get("window_start", 0) // 60) or 1,  # 简单的会话索引
+        }
+
+    @staticmethod
+    def _style_profile_update(state: GraphState, profile_result: Dict[str, Any]) -> Dict[str, Any]:
+        # 提取 style_profile
+        style_profile = profile_result.get("style_profile") or {}
+        if isinstance(style_profile, dict):
+            logger.info(f"✅ 风格画像生成完成（qwen3-max）: {len(style_profile)} 个字段")
+            return {"style_profile": style_profile, "persona": style_profile}
+        return {"style_profile": state.get("persona") or {}, "persona": state.get("persona") or {}}
+
+    def _style_profile_builder(self, state: GraphState) -> Dict[str, Any]:
+        """独立的风格画像与氛围分析生成节点（通过 Gateway，使用 qwen3-max）"""
+        request = self._style_profile_request(state)
+        if request is None:
+            return {"style_profile": state.get("style_profile") or state.get("persona") or {}}
         try:
             # 通过 Gateway 调用 StyleProfileBuilder（使用 qwen3-max）
-            profile_result = self.style_profile_builder.build_profile(
-                anchor_id=anchor_id,
-                transcript=transcript,
-                session_date=session_date,
-                session_index=session_index,
-            )
-            
-            # 提取 style_profile
-            style_profile = profile_result.get("style_profile") or {}
-            if isinstance(style_profile, dict):
-                logger.info(f"✅ 风格画像生成完成（qwen3-max）: {len(style_profile)} 个字段")
-                return {"style_profile": style_profile, "persona": style_profile}
-            else:
-                return {"style_profile": state.get("persona") or {}, "persona": state.get("persona") or {}}
+            profile_result = self.style_profile_builder.build_profile(**request)
         except Exception as exc:
             logger.warning(f"风格画像生成失败: {exc}")
             # 失败时返回现有的 persona 或空字典
             return {"style_profile": state.get("persona") or {}, "persona": state.get("persona") or {}}
+        return self._style_profile_update(state, profile_result)
 
-    def _question_responder(self, state: GraphState) -> Dict[str, Any]:
+    async def _astyle_profile_builder(self, state: GraphState) -> Dict[str, Any]:
+        request = self._style_profile_request(state)
+        if request is None:
+            return {"style_profile": state.get("style_profile") or state.get("persona") or {}}
+        try:
+            profile_result = await self._within_deadline(
+                state,
+                "style_profile_builder",
+                self._call_async(self.style_profile_builder, "build_profile", **request),
+            )
+        except Exception as exc:
+            if not isinstance(exc, asyncio.TimeoutError):
+                logger.warning(f"风格画像生成失败: {exc}")
+            persona = state.get("persona") or {}
+            return {"style_profile": persona, "persona": persona}
+        return self._style_profile_update(state, profile_result)
+
+    def _question_context(self, state: GraphState) -> Optional[Dict[str, Any]]:
         if not self.question_responder:
-            return {"answer_scripts": []}
+            return None
         questions = state.get("planner_notes", {}).get("top_questions") or state.get("top_questions") or []
         if not questions:
-            return {"answer_scripts": []}
+            return None
         transcript = state.get("transcript_snippet") or "\n".join(state.get("sentences") or [])
-        context = {
+        return {
             "questions": questions,
             "persona": state.get("persona") or {},
             "vibe": state.get("vibe") or {},
             "mood": state.get("mood"),
             "transcript": transcript,
         }
+
+    def _question_responder(self, state: GraphState) -> Dict[str, Any]:
+        context = self._question_context(state)
+        if context is None:
+            return {"answer_scripts": []}
         try:
             scripts = self.question_responder.generate(context)
         except Exception as exc:  # pragma: no cover
@@ -977,6 +1205,46 @@ class LangGraphLiveWorkflow:
             scripts = []
         return {"answer_scripts": scripts}
 
+    async def _aquestion_responder(self, state: GraphState) -> Dict[str, Any]:
+        context = self._question_context(state)
+        if context is None:
+            return {"answer_scripts": []}
+        try:
+            scripts = await self._within_deadline(
+                state,
+                "question_responder",
+                self._call_async(self.question_responder, "generate", context),
+            )
+        except asyncio.TimeoutError:
+            scripts = []
+        except Exception as exc:  # pragma: no cover
+            logger.exception("Question responder failed: %s", exc)
+            scripts = []
+        return {"answer_scripts": scripts}
+
+    def _chat_focus_node(self, state: GraphState) -> Dict[str, Any]:
+        topic = (state.get("planner_notes") or {}).get("selected_topic") or {}
+        return {"chat_focus": self._resolve_chat_focus(state, topic)}
+
+    async def _achat_focus_node(self, state: GraphState) -> Dict[str, Any]:
+        topic = (state.get("planner_notes") or {}).get("selected_topic") or {}
+        fallback = self._chat_focus_fallback(topic)
+        summarizer = self.chat_focus_summarizer
+        if not summarizer:
+            return {"chat_focus": self._sanitize_focus_text(fallback, "互动")}
+        try:
+            ai_focus = await self._within_deadline(
+                state,
+                "chat_focus_summarizer",
+                self._call_async(
+                    summarizer, "summarize", **self._chat_focus_request(state, fallback)
+                ),
+            )
+        except Exception as exc:  # pragma: no cover - robust fallback
+            logger.debug("Chat focus summarizer exception: %s", exc)
+            ai_focus = fallback
+        return {"chat_focus": self._sanitize_focus_text(ai_focus, fallback)}
+
     @staticmethod
     def _is_topic_noise(text: Optional[str]) -> bool:
         candidate = str(text or "").strip()
@@ -1014,31 +1282,33 @@ class LangGraphLiveWorkflow:
             return fallback
         return cleaned
 
-    def _resolve_chat_focus(self, state: GraphState, topic: Dict[str, Any]) -> str:
+    def _chat_focus_fallback(self, topic: Dict[str, Any]) -> str:
         raw_topic = str(topic.get("topic") if isinstance(topic, dict) else topic or "").strip()
         fallback = raw_topic
         if self._is_topic_noise(fallback):
             fallback = "互动"
-        fallback = fallback[:12] or "互动"
+        return fallback[:12] or "互动"
 
-        focus_text = fallback
-        summarizer = self.chat_focus_summarizer
-        if summarizer:
-            try:
-                ai_focus = summarizer.summarize(
-                    chat_signals=state.get("chat_signals") or [],
-                    transcript=str(state.get("transcript_snippet") or ""),
-                    fallback=fallback,
-                    vibe=state.get("vibe") or {},
-                )
-            except Exception as exc:  # pragma: no cover - robust fallback
-                logger.debug("Chat focus summarizer exception: %s", exc)
-                ai_focus = fallback
-            focus_text = self._sanitize_focus_text(ai_focus, fallback)
-        else:
-            focus_text = self._sanitize_focus_text(fallback, "互动")
+    @staticmethod
+    def _chat_focus_request(state: GraphState, fallback: str) -> Dict[str, Any]:
+        return {
+            "chat_signals": state.get("chat_signals") or [],
+            "transcript": str(state.get("transcript_snippet") or ""),
+            "fallback": fallback,
+            "vibe": state.get("vibe") or {},
+        }
 
-        return focus_text
+    def _resolve_chat_focus(self, state: GraphState, topic: Dict[str, Any]) -> str:
+        fallback = self._chat_focus_fallback(topic)
+        summarizer = self.chat_focus_summarizer
+        if not summarizer:
+            return self._sanitize_focus_text(fallback, "互动")
+        try:
+            ai_focus = summarizer.summarize(**self._chat_focus_request(state, fallback))
+        except Exception as exc:  # pragma: no cover - robust fallback
+            logger.debug("Chat focus summarizer exception: %s", exc)
+            ai_focus = fallback
+        return self._sanitize_focus_text(ai_focus, fallback)
 
     def _summary_node(self, state: GraphState) -> Dict[str, Any]:
         card = state.get("analysis_card") or {}
@@ -1077,7 +1347,8 @@ class LangGraphLiveWorkflow:
         else:
             speech_hint = f"这段你说了 {sentence_count} 句"
 
-        topic_text = self._resolve_chat_focus(state, topic)
+        # 弹幕焦点由并行分支 chat_focus_summarizer 生成；单独调用 summary 时现场计算
+        topic_text = state.get("chat_focus") or self._resolve_chat_focus(state, topic)
         topic_direction = str(card.get("next_topic_direction") or "").strip()
         level_raw = (vibe.get("level") or "").lower()
         level_map = {"cold": "偏冷", "neutral": "平稳", "hot": "火热"}
@@ -1191,23 +1462,20 @@ class LangGraphLiveWorkflow:
 
     # ------------------------------------------------------------------ fallback
     def _fallback_run(self, state: GraphState) -> GraphState:
-        updates: Dict[str, Any] = {}
-        sequence = [
-            self._memory_loader,
-            self._signal_collector,
-            self._topic_detector,
-            self._mood_estimator,
-            self._planner,
-            self._knowledge_loader,
-            self._style_profile_builder,  # 新增：独立的风格画像生成（qwen3-max）
-            self._analysis_generator,  # 直播分析（xunfei lite）
-        ]
-        if self.question_responder:
-            sequence.append(self._question_responder)
-        sequence.append(self._summary_node)
-        for step in sequence:
-            updates = step({**state, **updates})
+        prefix, branches = self._pipeline()
+        for _, func, _ in prefix + branches:
+            state.update(func(state))
+        state.update(self._summary_node(state))
+        return state
+
+    async def _afallback_run(self, state: GraphState) -> GraphState:
+        prefix, branches = self._pipeline()
+        for _, func, _ in prefix:
+            state.update(await asyncio.to_thread(func, dict(state)))
+
+        for updates in await asyncio.gather(*(afunc(dict(state)) for _, _, afunc in branches)):
             state.update(updates)
+        state.update(self._summary_node(state))
         return state
 
 
@@ -9,10 +9,12 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 # 使用统一网关
 from .ai_gateway import get_gateway
+from .stream_json import IncrementalJSONParser
+from .token_budget import Section, TokenBudgeter, budget_from_env, recency_scores, split_sentences
 
 try:
     from ..utils.ai_tracking_decorator import track_ai_usage
@@ -26,6 +28,9 @@ except Exception:
 
 logger = logging.getLogger(__name__)
 
+# 口播 / 知识库 / 画像三段可压缩素材的 token 预算（AI_PROMPT_BUDGET_LIVE_ANALYSIS，0 为不限制）
+PROMPT_BUDGET = budget_from_env("live_analysis", 1600)
+
 
 class LiveAnalysisGenerator:
     """Generate live analysis cards via AI Gateway."""
@@ -189,9 +194,22 @@ class LiveAnalysisGenerator:
                 highlight_text = " | ".join(str(h) for h in highlights[:3]) if highlights else ""
                 block = f"《{title or '知识片段'}》 {summary or highlight_text}"
             knowledge_blocks.append(block)
+        transcript_lines = split_sentences(transcript)
+        compact = TokenBudgeter(PROMPT_BUDGET, label="live_analysis").compact([
+            # 口播按句切分，越新越重要；重复口播折叠
+            Section(
+                "transcript", transcript_lines, weight=3, scores=recency_scores(transcript_lines)
+            ),
+            Section("knowledge", knowledge_blocks[:3], weight=1, dedupe=False, joiner="\n\n"),
+            Section(
+                "persona", [json.dumps(persona, ensure_ascii=False)] if persona else [], weight=1
+            ),
+        ])
+        transcript = compact["transcript"]
+
         knowledge_note = ""
-        if knowledge_blocks:
-            knowledge_note = "【知识库参考】\n" + "\n\n".join(knowledge_blocks[:3]) + "\n\n"
+        if compact["knowledge"]:
+            knowledge_note = "【知识库参考】\n" + compact["knowledge"] + "\n\n"
 
         vibe_line = (
             f"level={vibe.get('level', 'unknown')}, "
@@ -225,17 +243,24 @@ class LiveAnalysisGenerator:
         )
 
         persona_notes = ""
-        if persona:
-            persona_notes = (
-                "【主播画像】\n"
-                + json.dumps(persona, ensure_ascii=False)
-                + "\n\n"
+        if compact["persona"]:
+            persona_notes = "【主播画像】\n" + compact["persona"] + "\n\n"
+
+        # 滚动摘要已按预算压缩（见 window_delta），下面的口播与弹幕只包含本窗口新增内容
+        history_notes = ""
+        rolling_summary = context.get("rolling_summary") or ""
+        if rolling_summary:
+            history_notes = (
+                "【此前窗口摘要】\n"
+                f"{rolling_summary}\n"
+                "（以下素材仅为本窗口新增：重点写相对摘要的变化与延续，不要重复摘要里已有的结论）\n\n"
             )
 
         user_prompt = (
             f"{focus_notes}"
             f"{persona_notes}"
             f"{knowledge_note}"
+            f"{history_notes}"
             f"【时间窗口】{window_label}\n"
             "【口播节选】\n"
             f"{transcript or '（暂无口播文本）'}\n\n"
@@ -258,29 +283,60 @@ class LiveAnalysisGenerator:
             {"role": "user", "content": user_prompt},
         ]
 
-    def generate(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        """生成直播分析（网关会自动记录使用情况）"""
+    def generate(
+        self,
+        context: Dict[str, Any],
+        on_field: Optional[Callable[[str, Any], None]] = None,
+    ) -> Dict[str, Any]:
+        """生成直播分析（网关会自动记录使用情况）
+
+        提供 on_field 时以流式请求，卡片的每个顶层字段一旦完整即回调 (字段名, 值)，
+        不必等待整段补全结束；返回值与非流式一致。
+        """
         messages = self._build_prompt(context)
-        
-        # 判断当前 live_analysis 功能配置使用的服务商，讯飞兼容模式接口可能不支持 OpenAI 的 response_format 参数
+        # 使用网关调用，通过 function 参数自动选择默认模型；
+        # 如果是讯飞则不传 response_format，避免 404
+        response = self.gateway.chat_completion(messages=messages, **self._call_options(on_field))
+        return self._card_from_response(response)
+
+    async def agenerate(
+        self,
+        context: Dict[str, Any],
+        on_field: Optional[Callable[[str, Any], None]] = None,
+    ) -> Dict[str, Any]:
+        """异步版本，供事件循环内的调用方直接 await"""
+        messages = self._build_prompt(context)
+        response = await self.gateway.achat_completion(
+            messages=messages, **self._call_options(on_field)
+        )
+        return self._card_from_response(response)
+
+    def _call_options(self, on_field: Optional[Callable[[str, Any], None]]) -> Dict[str, Any]:
+        """网关调用参数（同步 / 异步路径共用）"""
+        options: Dict[str, Any] = {
+            "function": "live_analysis",
+            "temperature": 0.3,
+            "max_tokens": 800,
+        }
+        # 判断当前 live_analysis 功能配置使用的服务商，
+        # 讯飞兼容模式接口可能不支持 OpenAI 的 response_format 参数
         func_cfg = self.gateway.get_function_config("live_analysis") or {}
         provider_for_function = func_cfg.get("provider") or ""
-        use_response_format = provider_for_function.lower() not in {"xunfei"}
-        extra_kwargs = {}
-        if use_response_format:
-            extra_kwargs["response_format"] = {"type": "json_object"}
+        if provider_for_function.lower() not in {"xunfei"}:
+            options["response_format"] = {"type": "json_object"}
         else:
             logger.debug("Skip response_format for xunfei provider to avoid 404 NotFound.")
-        
-        # 使用网关调用，通过 function 参数自动选择默认模型；如果是讯飞则不传 response_format，避免 404
-        response = self.gateway.chat_completion(
-            messages=messages,
-            function="live_analysis",
-            temperature=0.3,
-            max_tokens=800,
-            **extra_kwargs,
-        )
-        
+        if on_field is not None:
+            parser = IncrementalJSONParser()
+
+            def on_delta(text: str) -> None:
+                for key, value in parser.feed(text):
+                    on_field(key, value)
+
+            options["on_delta"] = on_delta
+        return options
+
+    def _card_from_response(self, response: Any) -> Dict[str, Any]:
         if not response.success:
             logger.error(f"AI调用失败: {response.error}")
             return {"analysis_overview": "生成失败，请稍后重试"}
@@ -7,6 +7,7 @@ This module uses a Qwen3-Max compatible endpoint via the OpenAI SDK.
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import re
@@ -129,6 +130,14 @@ class LiveQuestionResponder:
             )
         return items
 
+    # 话术生成调用参数（同步 / 异步路径共用）
+    _CALL_OPTIONS: Dict[str, Any] = {
+        "function": "script_generation",  # 使用功能标识，自动选择qwen3-max（话术生成）
+        "temperature": 0.4,
+        "response_format": {"type": "json_object"},
+        "max_tokens": 900,
+    }
+
     def generate(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
         questions = context.get("questions") or []
         if not questions:
@@ -138,13 +147,30 @@ class LiveQuestionResponder:
         
         # 使用网关调用，通过function参数自动选择默认模型
         response = self.gateway.chat_completion(
-            messages=messages,
-            function="script_generation",  # 使用功能标识，自动选择qwen3-max（话术生成）
-            temperature=0.4,
-            response_format={"type": "json_object"},
-            max_tokens=900,
+            messages=messages, cache_text=self._cache_text(context), **self._CALL_OPTIONS
         )
-        
+        return self._scripts_from_response(response)
+
+    async def agenerate(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """异步版本，供事件循环内的调用方直接 await"""
+        questions = context.get("questions") or []
+        if not questions:
+            return []
+
+        # 拼提示词会查询知识库、读取话术示例文件，放到线程中避免阻塞事件循环
+        messages = await asyncio.to_thread(self._build_prompt, context)
+        response = await self.gateway.achat_completion(
+            messages=messages, cache_text=self._cache_text(context), **self._CALL_OPTIONS
+        )
+        return self._scripts_from_response(response)
+
+    @staticmethod
+    def _cache_text(context: Dict[str, Any]) -> str:
+        """语义缓存只比对问题与口播，提示词模板不参与"""
+        questions = context.get("questions") or []
+        return "\n".join([str(q) for q in questions[:3]] + [str(context.get("transcript") or "")])
+
+    def _scripts_from_response(self, response: Any) -> List[Dict[str, Any]]:
         if not response.success:
             logger.error(f"AI调用失败: {response.error}")
             return []
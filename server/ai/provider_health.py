@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+ProviderHealth - 服务商 / 模型的时延与错误率观测、熔断
+
+网关按静态配置选路时，慢或抖动的服务商会一直拖住实时分析直到重试耗尽。
+本模块为每个 (服务商, 模型) 维护：
+- 滚动窗口：最近 N 次调用的耗时与成败，给出 p50 / p95 与错误率（耗时只统计成功调用）
+- 熔断器：连续失败或窗口错误率超阈值即打开，冷却期内直接拒绝；
+  冷却结束进入半开状态，只放行一个探测请求，成功则关闭、失败则重新打开
+- 排序：可用的候选优先，再按 "p95 / 成功率" 由快到慢；样本不足的候选排在有数据的候选之后，
+  保持配置顺序（首选服务商在出现更快的实测替代前不会被换掉）
+- 对冲延迟：按 p95 给出发起对冲请求前的等待时间
+
+时钟可注入，便于测试。
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+Route = Tuple[str, str]  # (provider, model)
+
+HEALTH_WINDOW = int(os.getenv("AI_HEALTH_WINDOW", "50"))
+HEALTH_MIN_SAMPLES = int(os.getenv("AI_HEALTH_MIN_SAMPLES", "5"))
+BREAKER_FAILURES = int(os.getenv("AI_BREAKER_FAILURES", "5"))
+BREAKER_ERROR_RATE = float(os.getenv("AI_BREAKER_ERROR_RATE", "0.5"))
+BREAKER_COOLDOWN = float(os.getenv("AI_BREAKER_COOLDOWN", "30"))
+# 对冲等待 = clamp(p95, MIN, MAX)；样本不足时使用 DEFAULT（秒）
+HEDGE_MIN_DELAY = float(os.getenv("AI_HEDGE_MIN_DELAY", "0.2"))
+HEDGE_MAX_DELAY = float(os.getenv("AI_HEDGE_MAX_DELAY", "10"))
+HEDGE_DEFAULT_DELAY = float(os.getenv("AI_HEDGE_DEFAULT_DELAY", "3"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """最近秩法百分位"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class CircuitBreaker:
+    """closed -> open -> half_open -> closed / open"""
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURES,
+        error_rate: float = BREAKER_ERROR_RATE,
+        cooldown: float = BREAKER_COOLDOWN,
+        min_samples: int = HEALTH_MIN_SAMPLES,
+    ):
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self.min_samples = min_samples
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_inflight = False
+        self.trips = 0
+
+    def current_state(self, now: float) -> str:
+        if self.state == OPEN and now - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+            self.probe_inflight = False
+        return self.state
+
+    def available(self, now: float) -> bool:
+        """是否可以接收请求（不占用半开探测名额）"""
+        state = self.current_state(now)
+        return state == CLOSED or (state == HALF_OPEN and not self.probe_inflight)
+
+    def acquire(self, now: float) -> bool:
+        """申请发起一次请求；半开状态下只放行一个探测"""
+        state = self.current_state(now)
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self.probe_inflight:
+            self.probe_inflight = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """请求被取消、没有结果时归还探测名额"""
+        self.probe_inflight = False
+
+    def record(self, ok: bool, window_error_rate: float, window_samples: int, now: float) -> None:
+        if self.state == HALF_OPEN:
+            self.probe_inflight = False
+            if ok:
+                self.state = CLOSED
+                self.consecutive_failures = 0
+            else:
+                self._trip(now)
+            return
+        if ok:
+            self.consecutive_failures = 0
+            return
+        self.consecutive_failures += 1
+        if self.state == CLOSED and (
+            self.consecutive_failures >= self.failure_threshold
+            or (window_samples >= self.min_samples and window_error_rate >= self.error_rate)
+        ):
+            self._trip(now)
+
+    def _trip(self, now: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self.trips += 1
+
+
+class _RouteStats:
+    """单个 (服务商, 模型) 的滚动窗口与熔断器"""
+
+    def __init__(self, window: int, breaker: CircuitBreaker):
+        self.samples: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self.breaker = breaker
+        self.calls = 0
+        self.failures = 0
+
+    def latencies(self) -> List[float]:
+        return [latency for latency, ok in self.samples if ok]
+
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+
+class ProviderHealth:
+    """按 (服务商, 模型) 汇总时延与错误率，并维护熔断器"""
+
+    def __init__(
+        self,
+        window: int = HEALTH_WINDOW,
+        min_samples: int = HEALTH_MIN_SAMPLES,
+        clock: Callable[[], float] = time.monotonic,
+        breaker_factory: Optional[Callable[[], CircuitBreaker]] = None,
+    ):
+        self.window = window
+        self.min_samples = min_samples
+        self.clock = clock
+        self.breaker_factory = breaker_factory or (lambda: CircuitBreaker(min_samples=min_samples))
+        self._routes: Dict[Route, _RouteStats] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, route: Route) -> _RouteStats:
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = self._routes[route] = _RouteStats(self.window, self.breaker_factory())
+        return stats
+
+    def record(self, provider: str, model: str, latency_ms: float, ok: bool) -> None:
+        with self._lock:
+            stats = self._get((provider, model))
+            stats.samples.append((latency_ms, ok))
+            stats.calls += 1
+            if not ok:
+                stats.failures += 1
+            stats.breaker.record(ok, stats.error_rate(), len(stats.samples), self.clock())
+
+    def acquire(self, provider: str, model: str) -> bool:
+        with self._lock:
+            return self._get((provider, model)).breaker.acquire(self.clock())
+
+    def release(self, provider: str, model: str) -> None:
+        with self._lock:
+            self._get((provider, model)).breaker.release()
+
+    def available(self, provider: str, model: str) -> bool:
+        with self._lock:
+            return self._get((provider, model)).breaker.available(self.clock())
+
+    def state(self, provider: str, model: str) -> str:
+        with self._lock:
+            return self._get((provider, model)).breaker.current_state(self.clock())
+
+    def latency(self, provider: str, model: str, pct: float = 95) -> Optional[float]:
+        """成功调用耗时的百分位（毫秒）；样本不足返回 None"""
+        with self._lock:
+            stats = self._routes.get((provider, model))
+            latencies = stats.latencies() if stats else []
+        if len(latencies) < self.min_samples:
+            return None
+        return percentile(latencies, pct)
+
+    def rank(self, routes: Sequence[Route]) -> List[Route]:
+        """可用候选按实测 p95 / 成功率 由快到慢排序
+
+        无数据的候选按配置顺序排在后面，熔断中的候选被剔除
+        """
+        with self._lock:
+            now = self.clock()
+            scored = []
+            for order, route in enumerate(dict.fromkeys(routes)):
+                stats = self._get(route)
+                if not stats.breaker.available(now):
+                    continue
+                latencies = stats.latencies()
+                if len(latencies) >= self.min_samples:
+                    score = percentile(latencies, 95) / max(1.0 - stats.error_rate(), 0.1)
+                else:
+                    score = math.inf
+                scored.append((score, order, route))
+        return [route for _, _, route in sorted(scored)]
+
+    def hedge_delay(self, provider: str, model: str) -> float:
+        """发起对冲请求前等待的秒数"""
+        p95 = self.latency(provider, model, 95)
+        if p95 is None:
+            return HEDGE_DEFAULT_DELAY
+        return min(max(p95 / 1000.0, HEDGE_MIN_DELAY), HEDGE_MAX_DELAY)
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        """各 (服务商, 模型) 的观测指标，键为 "provider/model" """
+        with self._lock:
+            now = self.clock()
+            items = [
+                (route, stats, stats.breaker.current_state(now))
+                for route, stats in self._routes.items()
+            ]
+            result: Dict[str, Dict[str, object]] = {}
+            for (provider, model), stats, state in items:
+                latencies = stats.latencies()
+                result[f"{provider}/{model}"] = {
+                    "calls": stats.calls,
+                    "failures": stats.failures,
+                    "window": len(stats.samples),
+                    "error_rate": round(stats.error_rate(), 4),
+                    "p50_ms": percentile(latencies, 50),
+                    "p95_ms": percentile(latencies, 95),
+                    "breaker": state,
+                    "trips": stats.breaker.trips,
+                }
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
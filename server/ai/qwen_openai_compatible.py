@@ -16,6 +16,8 @@ import os
 import json
 from typing import Any, Dict, List, Optional
 
+from .token_budget import Section, TokenBudgeter, budget_from_env, recency_scores, split_sentences
+
 try:
     from openai import OpenAI  # pyright: ignore[reportMissingImports]
 except Exception:  # pragma: no cover
@@ -37,6 +39,8 @@ DEFAULT_OPENAI_MODEL = (
     or os.getenv("OPENAI_MODEL")
     or "qwen-plus"
 )
+# 窗口复盘中口播与弹幕素材的 token 预算（AI_PROMPT_BUDGET_WINDOW，0 为不限制）
+WINDOW_PROMPT_BUDGET = budget_from_env("window", 4000)
 
 try:  # pragma: no cover - optional style memory
     from .style_memory import StyleMemoryManager
@@ -86,6 +90,25 @@ def _digest(transcript: str, comments: List[Dict[str, Any]]):
     return transcript[:20000], comments_digest, top_users_text
 
 
+def _window_digest(transcript: str, comments: List[Dict[str, Any]]):
+    """窗口复盘素材：在 token 预算内保留高信息量的口播句与弹幕（重复弹幕折叠为 ×N）"""
+    _, _, top_users_text = _digest(transcript, comments)
+    sentences = split_sentences(transcript)
+    lines: List[str] = []
+    keys: List[str] = []
+    for ev in comments[:2000]:
+        user = (ev.get("user") or ev.get("payload", {}).get("user") or "?")
+        content = ev.get("content") or ev.get("payload", {}).get("content") or ""
+        if content:
+            lines.append(f"{user}: {content}")
+            keys.append(content)
+    compact = TokenBudgeter(WINDOW_PROMPT_BUDGET, label="analyze_window").compact([
+        Section("transcript", sentences, weight=2, scores=recency_scores(sentences)),
+        Section("comments", lines, weight=1, keys=keys),
+    ])
+    return compact["transcript"], compact["comments"], top_users_text
+
+
 def _style_context(anchor_id: Optional[str]) -> str:
     if _STYLE_MANAGER and _STYLE_MANAGER.available():
         try:
@@ -226,7 +249,7 @@ def analyze_window(
     """
     client = _get_client()
     model = DEFAULT_OPENAI_MODEL
-    t_clip, comments_digest, top_users_text = _digest(transcript, comments)
+    t_clip, comments_digest, top_users_text = _window_digest(transcript, comments)
     style_notes = _style_context(anchor_id)
     feedback_notes = _feedback_context(anchor_id)
     style_block = ""
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+RateGovernor - 按服务商限制并发与每分钟请求 / token 数
+
+复盘报告、实时分析、话术生成同时涌向一个服务商时容易触发 429，随后各自退避重试形成重试风暴。
+网关在发起上游调用前向本模块申请名额：
+- 并发：每个服务商的在途请求数上限（AI_PROVIDER_<NAME>_CONCURRENCY）
+- 速率：RPM / TPM 令牌桶（AI_PROVIDER_<NAME>_RPM / _TPM，0 为不限制）；
+  TPM 按 "提示词 token 估算 + max_tokens" 预扣，调用结束后按实际用量退还差额
+- 优先级：realtime（实时分析等）> interactive（话术 / 话题）> batch（复盘报告），
+  同一服务商按 (优先级, 到达顺序) 排队，只放行队首；
+  非 realtime 请求不能占用为 realtime 预留的并发名额
+- 429：服务商返回限流时暂停该服务商的放行（优先使用 Retry-After），排队请求统一等待，
+  而不是各自睡眠后同时重试
+- 指标：按服务商 / 优先级统计排队次数与排队耗时（p50 / p95 / max），并上报 AIUsageMonitor
+
+等待者可能来自不同事件循环（网关后台循环与调用方循环），状态由线程锁保护，
+唤醒通过 call_soon_threadsafe。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .provider_health import percentile
+
+REALTIME = "realtime"
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = {REALTIME: 0, INTERACTIVE: 1, BATCH: 2}
+
+DEFAULT_CONCURRENCY = int(os.getenv("AI_PROVIDER_CONCURRENCY", "8"))
+DEFAULT_RPM = int(os.getenv("AI_PROVIDER_RPM", "0"))
+DEFAULT_TPM = int(os.getenv("AI_PROVIDER_TPM", "0"))
+# 为 realtime 预留的并发名额
+REALTIME_RESERVED = int(os.getenv("AI_PROVIDER_REALTIME_RESERVED", "1"))
+# 未指定 max_tokens 时按该值预扣输出 token
+DEFAULT_COMPLETION_TOKENS = int(os.getenv("AI_GOVERNOR_COMPLETION_TOKENS", "512"))
+# 服务商返回 429 且无 Retry-After 时的暂停秒数
+RATE_LIMIT_PAUSE = float(os.getenv("AI_GOVERNOR_429_PAUSE", "2"))
+
+
+def _provider_limit(provider: str, name: str, default: int) -> int:
+    return int(os.getenv(f"AI_PROVIDER_{provider.upper()}_{name}", str(default)))
+
+
+class TokenBucket:
+    """每分钟补满 rate 个令牌的令牌桶；rate <= 0 表示不限制"""
+
+    def __init__(self, rate: int, now: float):
+        self.rate = rate
+        self.capacity = float(rate)
+        self.level = float(rate)
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        if self.rate > 0:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """取出 amount 个令牌还需等待的秒数（超过容量的请求按容量计）"""
+        if self.rate <= 0:
+            return 0.0
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60.0 / self.rate
+
+    def take(self, amount: float) -> None:
+        if self.rate > 0:
+            self.level -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        if self.rate > 0:
+            self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass(order=True)
+class Ticket:
+    """一次排队中的申请；按 (优先级, 到达序号) 排序"""
+
+    rank: int
+    seq: int
+    provider: str = field(compare=False)
+    priority: str = field(compare=False)
+    tokens: int = field(compare=False)
+    enqueued: float = field(compare=False)
+    loop: Any = field(default=None, compare=False, repr=False)
+    future: Any = field(default=None, compare=False, repr=False)
+    cancelled: bool = field(default=False, compare=False)
+    queue_ms: float = field(default=0.0, compare=False)
+
+
+class _ProviderLimiter:
+    def __init__(self, provider: str, now: float):
+        self.concurrency = max(1, _provider_limit(provider, "CONCURRENCY", DEFAULT_CONCURRENCY))
+        self.reserved = min(REALTIME_RESERVED, self.concurrency - 1)
+        self.rpm = TokenBucket(_provider_limit(provider, "RPM", DEFAULT_RPM), now)
+        self.tpm = TokenBucket(_provider_limit(provider, "TPM", DEFAULT_TPM), now)
+        self.inflight = 0
+        self.paused_until = 0.0
+        self.queue: List[Ticket] = []
+        self.rate_limited = 0
+
+    def head(self) -> Optional[Ticket]:
+        while self.queue and self.queue[0].cancelled:
+            heapq.heappop(self.queue)
+        return self.queue[0] if self.queue else None
+
+    def slots_for(self, priority: str) -> int:
+        return self.concurrency if priority == REALTIME else self.concurrency - self.reserved
+
+
+class RateGovernor:
+    """按服务商的并发 / RPM / TPM 限制与优先级排队"""
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.monotonic,
+        on_queued: Optional[Callable[[str, str, float], None]] = None,
+    ):
+        self.clock = clock
+        self.on_queued = on_queued  # (provider, priority, queue_ms)，用于上报监控
+        self._limiters: Dict[str, _ProviderLimiter] = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._waits: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=500))
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: {"granted": 0, "queued": 0})
+
+    def _limiter(self, provider: str) -> _ProviderLimiter:
+        limiter = self._limiters.get(provider)
+        if limiter is None:
+            limiter = self._limiters[provider] = _ProviderLimiter(provider, self.clock())
+        return limiter
+
+    def tpm_limited(self, provider: str) -> bool:
+        """该服务商是否配置了 TPM 限制（未配置时调用方无需估算 token）"""
+        with self._lock:
+            return self._limiter(provider).tpm.rate > 0
+
+    async def acquire(self, provider: str, priority: str = INTERACTIVE, tokens: int = 0) -> Ticket:
+        """排队直到获得名额；取消时自动出队"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            ticket = Ticket(
+                rank=PRIORITIES.get(priority, PRIORITIES[INTERACTIVE]),
+                seq=next(self._seq),
+                provider=provider,
+                priority=priority if priority in PRIORITIES else INTERACTIVE,
+                tokens=max(int(tokens), 0),
+                enqueued=self.clock(),
+                loop=loop,
+            )
+            heapq.heappush(self._limiter(provider).queue, ticket)
+        queued = False
+        try:
+            while True:
+                wait = self._try_grant(ticket)
+                if wait == 0:
+                    break
+                queued = True
+                try:
+                    await asyncio.wait_for(ticket.future, timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self._lock:
+                ticket.cancelled = True
+                self._wake_head(self._limiter(provider))
+            raise
+        self._record_wait(ticket, queued)
+        return ticket
+
+    def release(self, ticket: Ticket, used_tokens: Optional[int] = None) -> None:
+        """归还并发名额；提供实际用量时退还 TPM 预扣的差额"""
+        with self._lock:
+            limiter = self._limiter(ticket.provider)
+            limiter.inflight = max(limiter.inflight - 1, 0)
+            if used_tokens is not None and used_tokens < ticket.tokens:
+                limiter.tpm.refund(ticket.tokens - used_tokens)
+            self._wake_head(limiter)
+
+    def throttle(self, provider: str, seconds: Optional[float] = None) -> None:
+        """服务商返回 429：在 seconds 秒内暂停放行"""
+        with self._lock:
+            limiter = self._limiter(provider)
+            limiter.rate_limited += 1
+            until = self.clock() + (seconds if seconds and seconds > 0 else RATE_LIMIT_PAUSE)
+            limiter.paused_until = max(limiter.paused_until, until)
+
+    def _try_grant(self, ticket: Ticket) -> Optional[float]:
+        """放行返回 0；否则返回建议等待秒数（None 表示等待唤醒），并为本轮等待准备 future"""
+        with self._lock:
+            limiter = self._limiter(ticket.provider)
+            now = self.clock()
+            wait: Optional[float] = None
+            if limiter.head() is ticket and limiter.inflight < limiter.slots_for(ticket.priority):
+                limiter.rpm.refill(now)
+                limiter.tpm.refill(now)
+                wait = max(
+                    limiter.paused_until - now,
+                    limiter.rpm.wait_time(1),
+                    limiter.tpm.wait_time(ticket.tokens),
+                    0.0,
+                )
+                if wait == 0:
+                    heapq.heappop(limiter.queue)
+                    limiter.inflight += 1
+                    limiter.rpm.take(1)
+                    limiter.tpm.take(ticket.tokens)
+                    ticket.queue_ms = (now - ticket.enqueued) * 1000
+                    # 新队首可能也能放行（并发仍有余量）
+                    self._wake_head(limiter)
+                    return 0
+            ticket.future = ticket.loop.create_future()
+            return wait
+
+    def _wake_head(self, limiter: _ProviderLimiter) -> None:
+        head = limiter.head()
+        if head is None or head.future is None or head.future.done():
+            return
+
+        def _set(future: "asyncio.Future[None]") -> None:
+            if not future.done():
+                future.set_result(None)
+
+        try:
+            head.loop.call_soon_threadsafe(_set, head.future)
+        except RuntimeError:  # 事件循环已关闭
+            head.cancelled = True
+
+    def _record_wait(self, ticket: Ticket, queued: bool) -> None:
+        key = f"{ticket.provider}/{ticket.priority}"
+        with self._lock:
+            self._waits[key].append(ticket.queue_ms)
+            self._counts[key]["granted"] += 1
+            if queued:
+                self._counts[key]["queued"] += 1
+        if queued and self.on_queued is not None:
+            try:
+                self.on_queued(ticket.provider, ticket.priority, ticket.queue_ms)
+            except Exception:
+                pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        """各服务商的在途 / 排队数量与按优先级的排队耗时"""
+        with self._lock:
+            providers = {
+                name: {
+                    "inflight": limiter.inflight,
+                    "waiting": sum(1 for t in limiter.queue if not t.cancelled),
+                    "concurrency": limiter.concurrency,
+                    "rpm": limiter.rpm.rate,
+                    "tpm": limiter.tpm.rate,
+                    "rate_limited": limiter.rate_limited,
+                }
+                for name, limiter in self._limiters.items()
+            }
+            queues = {}
+            for key, waits in self._waits.items():
+                values = list(waits)
+                queues[key] = {
+                    **self._counts[key],
+                    "p50_ms": percentile(values, 50),
+                    "p95_ms": percentile(values, 95),
+                    "max_ms": max(values) if values else None,
+                }
+        return {"providers": providers, "queues": queues}
@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+"""
+ResponseCache - AI 网关响应缓存
+
+相同或几乎相同的提示词（重复的话术生成、内容未变化的分析窗口、重新渲染的复盘）
+不必再请求服务商：
+- 精确层：按规范化后的 (服务商, 模型, 消息, 参数) 计算哈希作为键
+- 语义层（可选）：同一 (服务商, 模型, 参数) 范围内，用户消息向量余弦相似度超过阈值即视为命中；
+  默认向量为字符二元组哈希，可替换为任意 embedding 函数；同一范围的向量堆叠成矩阵，
+  一次矩阵乘法完成比对
+- TTL + LRU 容量上限，磁盘 JSON 持久化（写入节流，临时文件 + 原子替换）
+- 命中率、节省 token 数等指标，按功能分别统计
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Embedder = Callable[[str], Sequence[float]]
+
+_WS_RE = re.compile(r"\s+")
+
+# 语义层每个范围保留的向量数
+SEMANTIC_SCOPE_LIMIT = 256
+
+
+def normalize_messages(messages: Sequence[Mapping[str, Any]]) -> List[Tuple[str, str]]:
+    """只保留 role / content，折叠空白，避免格式差异导致未命中"""
+    normalized: List[Tuple[str, str]] = []
+    for msg in messages or ():
+        role = str(msg.get("role") or "user")
+        content = msg.get("content")
+        if not isinstance(content, str):
+            content = json.dumps(content, ensure_ascii=False, sort_keys=True, default=str)
+        normalized.append((role, _WS_RE.sub(" ", content).strip()))
+    return normalized
+
+
+def request_fingerprint(
+    provider: str,
+    model: str,
+    messages: Sequence[Mapping[str, Any]],
+    params: Mapping[str, Any],
+) -> Tuple[str, str, str]:
+    """
+    返回 (精确键, 语义范围, 语义文本)。
+    参数中值为 None 的项忽略；语义范围不含消息，只有范围相同的条目才参与相似度比较。
+    语义文本只取非 system 消息：固定的系统提示词会主导向量，使内容不同的请求也高度相似。
+    """
+    clean_params = {k: v for k, v in sorted(params.items()) if v is not None}
+    scope_raw = json.dumps(
+        [provider, model, clean_params], ensure_ascii=False, sort_keys=True, default=str
+    )
+    scope = hashlib.sha1(scope_raw.encode("utf-8")).hexdigest()[:16]
+    normalized = normalize_messages(messages)
+    key_raw = json.dumps([scope, normalized], ensure_ascii=False)
+    key = hashlib.sha256(key_raw.encode("utf-8")).hexdigest()
+    text = "\n".join(content for role, content in normalized if role != "system")
+    return key, scope, text
+
+
+def bigram_embedding(text: str, dim: int = 4096) -> np.ndarray:
+    """字符二元组哈希向量，对中文提示词足够区分近似重复"""
+    compact = _WS_RE.sub("", text)
+    grams = [compact[i:i + 2] for i in range(len(compact) - 1)] or ([compact] if compact else [])
+    idx = [zlib.crc32(g.encode("utf-8")) % dim for g in grams]
+    if not idx:
+        return np.zeros(dim, dtype=np.float32)
+    return np.bincount(idx, minlength=dim).astype(np.float32)
+
+
+def _normalize(vec: Sequence[float]) -> np.ndarray:
+    arr = np.asarray(vec, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(arr))
+    return arr / norm if norm else arr
+
+
+class _ScopeIndex:
+    """同一范围内的向量，按需堆叠成矩阵"""
+
+    __slots__ = ("vectors", "_keys", "_matrix")
+
+    def __init__(self) -> None:
+        self.vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._keys: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def add(self, key: str, vec: np.ndarray) -> None:
+        self.vectors.pop(key, None)
+        self.vectors[key] = vec
+        while len(self.vectors) > SEMANTIC_SCOPE_LIMIT:
+            self.vectors.popitem(last=False)
+        self._matrix = None
+
+    def remove(self, key: str) -> None:
+        if self.vectors.pop(key, None) is not None:
+            self._matrix = None
+
+    def best(self, query: np.ndarray) -> Tuple[Optional[str], float]:
+        if not self.vectors:
+            return None, 0.0
+        if self._matrix is None or self._matrix.shape[1] != query.shape[0]:
+            self._keys = list(self.vectors)
+            try:
+                self._matrix = np.vstack([self.vectors[k] for k in self._keys])
+            except ValueError:  # 向量维度不一致（更换了 embedder）
+                return None, 0.0
+        if self._matrix.shape[1] != query.shape[0]:
+            return None, 0.0
+        sims = self._matrix @ query
+        i = int(np.argmax(sims))
+        return self._keys[i], float(sims[i])
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+
+class ResponseCache:
+    """两级响应缓存（线程安全）"""
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_entries: int = 500,
+        default_ttl: float = 300.0,
+        embedder: Optional[Embedder] = None,
+        flush_interval: float = 5.0,
+    ):
+        """
+        Args:
+            path: 持久化 JSON 文件路径，None 表示仅内存
+            max_entries: 最大条目数，超出时按 LRU 淘汰
+            default_ttl: 未指定 ttl 时的有效期（秒）
+            embedder: 语义层向量函数，返回定长数值序列（无需归一化）
+            flush_interval: 两次落盘的最小间隔（秒）
+        """
+        self.path = Path(path) if path else None
+        self.max_entries = max(1, int(max_entries))
+        self.default_ttl = default_ttl
+        self.embedder: Embedder = embedder or bigram_embedding
+        self.flush_interval = flush_interval
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # 语义索引：scope -> 向量矩阵
+        self._vectors: Dict[str, _ScopeIndex] = defaultdict(_ScopeIndex)
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._last_flush = 0.0
+
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.saved_tokens = 0
+        self._by_function: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "semantic_hits": 0, "misses": 0}
+        )
+        self._load_file()
+
+    # ------------------------------------------------------------------
+    # 读写
+    # ------------------------------------------------------------------
+    def get(self, key: str, now: Optional[float] = None) -> Optional[Any]:
+        """精确查找（不计入命中统计）"""
+        with self._lock:
+            entry = self._live_entry(key, time.time() if now is None else now)
+            return entry["value"] if entry else None
+
+    def lookup(
+        self,
+        key: str,
+        scope: Optional[str] = None,
+        text: Optional[str] = None,
+        threshold: Optional[float] = None,
+        function: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        先精确后语义查找，返回 (值, "exact"/"semantic")；未命中返回 (None, None)。
+        只有提供 scope、text 与 threshold 时才启用语义层。
+        """
+        ts = time.time() if now is None else now
+        with self._lock:
+            entry = self._live_entry(key, ts)
+        kind = "exact" if entry else None
+        if entry is None and scope and text and threshold and scope in self._vectors:
+            # 向量计算放在锁外
+            query = self._embed(text)
+            if query is not None:
+                with self._lock:
+                    entry = self._nearest(scope, query, threshold, ts)
+                kind = "semantic" if entry else None
+        with self._lock:
+            stats = self._by_function[function or "default"]
+            if entry is None:
+                self.misses += 1
+                stats["misses"] += 1
+                return None, None
+            if kind == "exact":
+                self.hits += 1
+                stats["hits"] += 1
+            else:
+                self.semantic_hits += 1
+                stats["semantic_hits"] += 1
+            self.saved_tokens += int(entry.get("tokens") or 0)
+            return entry["value"], kind
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        scope: Optional[str] = None,
+        text: Optional[str] = None,
+        tokens: int = 0,
+        function: Optional[str] = None,
+    ) -> None:
+        """写入一条记录；提供 scope 与 text 时同时加入语义索引"""
+        if value is None:
+            return
+        now = time.time()
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        if expires_at <= now:
+            return
+        entry: Dict[str, Any] = {
+            "value": value,
+            "expires_at": expires_at,
+            "tokens": int(tokens or 0),
+            "function": function,
+        }
+        vec = None
+        if scope and text:
+            entry["scope"] = scope
+            entry["text"] = text
+            vec = self._embed(text)
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = entry
+            if vec is not None:
+                self._vectors[scope].add(key, vec)
+            self.stores += 1
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+            self._dirty = True
+            self._maybe_flush(now)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            if self._drop(key):
+                self._dirty = True
+                self._maybe_flush(time.time())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+            self._dirty = True
+            self.flush()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # 内部
+    # ------------------------------------------------------------------
+    def _live_entry(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires_at"] <= now:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _drop(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        scope = entry.get("scope")
+        if scope and scope in self._vectors:
+            self._vectors[scope].remove(key)
+            if not self._vectors[scope]:
+                del self._vectors[scope]
+        return True
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        try:
+            return _normalize(self.embedder(text))
+        except Exception as e:
+            logger.debug(f"响应缓存向量计算失败: {e}")
+            return None
+
+    def _nearest(
+        self, scope: str, query: np.ndarray, threshold: float, now: float
+    ) -> Optional[Dict[str, Any]]:
+        index = self._vectors.get(scope)
+        if not index:
+            return None
+        best_key, best_sim = index.best(query)
+        if best_key is None or best_sim < threshold:
+            return None
+        return self._live_entry(best_key, now)
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+    def _maybe_flush(self, now: float) -> None:
+        if now - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """立即落盘（有未保存的变更时）"""
+        if self.path is None:
+            self._dirty = False
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            self._last_flush = time.time()
+            self._dirty = False
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+                tmp.write_text(
+                    json.dumps(self._entries, ensure_ascii=False, default=str), encoding="utf-8"
+                )
+                os.replace(tmp, self.path)
+            except Exception as e:
+                logger.debug(f"响应缓存写入失败: {e}")
+
+    def _load_file(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8")) or {}
+        except Exception as e:
+            logger.warning(f"响应缓存文件读取失败，忽略: {e}")
+            return
+        now = time.time()
+        for key, entry in data.items():
+            if not isinstance(entry, dict) or float(entry.get("expires_at", 0)) <= now:
+                continue
+            self._entries[key] = entry
+            if entry.get("scope") and entry.get("text"):
+                vec = self._embed(entry["text"])
+                if vec is not None:
+                    self._vectors[entry["scope"]].add(key, vec)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        # 与工作线程（同步路径）上的 lookup / set 并发，整体在锁内取快照
+        with self._lock:
+            lookups = self.hits + self.semantic_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (
+                    round((self.hits + self.semantic_hits) / lookups, 4) if lookups else 0.0
+                ),
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "saved_tokens": self.saved_tokens,
+                "by_function": {name: dict(stats) for name, stats in self._by_function.items()},
+                "path": str(self.path) if self.path else None,
+            }
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """获取全局响应缓存（AI_RESPONSE_CACHE_PATH 为空字符串时仅内存）"""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                path = os.getenv("AI_RESPONSE_CACHE_PATH", "records/cache/ai_responses.json")
+                _response_cache = ResponseCache(
+                    Path(path) if path else None,
+                    max_entries=int(os.getenv("AI_RESPONSE_CACHE_MAX", "500")),
+                )
+    return _response_cache
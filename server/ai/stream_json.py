@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+IncrementalJSONParser - 流式 JSON 顶层字段解析
+
+模型以流式返回分析卡片（JSON 对象）时，不必等整段文本到齐再 json.loads：
+逐块喂入增量文本，每当一个顶层字段的值完整闭合，立即产出 (字段名, 值)。
+- 字符串 / 对象 / 数组在闭合引号或括号处产出；数字、布尔、null 在其后的逗号或右花括号处产出
+- 忽略对象之前的任意前缀（如 ```json 代码块标记），顶层对象闭合后忽略剩余内容
+- 扫描位置与状态跨块保留，每个字符只处理一次
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 顶层对象内的扫描状态
+_EXPECT_KEY = "key"
+_IN_KEY = "in_key"
+_EXPECT_COLON = "colon"
+_EXPECT_VALUE = "value"
+_IN_VALUE = "in_value"
+_AFTER_VALUE = "after"
+
+
+class IncrementalJSONParser:
+    """增量解析 JSON 对象，字段完整即产出"""
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._state = _EXPECT_KEY
+        self._key: Optional[str] = None
+        self._key_start = 0
+        self._value_start = 0
+        self._scalar = False
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """喂入增量文本，返回本次新闭合的顶层字段"""
+        if self.done or not chunk:
+            return []
+        self._text += chunk
+        completed: List[Tuple[str, Any]] = []
+        text = self._text
+        pos = self._pos
+        end = len(text)
+        while pos < end and not self.done:
+            ch = text[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        if self._state == _IN_KEY:
+                            self._key = self._decode(text[self._key_start:pos + 1])
+                            self._state = _EXPECT_COLON
+                        elif self._state == _IN_VALUE:
+                            self._emit(text[self._value_start:pos + 1], completed)
+            elif self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._state = _EXPECT_KEY
+            elif ch == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    if self._state == _EXPECT_KEY:
+                        self._key_start = pos
+                        self._state = _IN_KEY
+                    elif self._state == _EXPECT_VALUE:
+                        self._begin_value(pos, scalar=False)
+            elif ch in "{[":
+                if self._depth == 1 and self._state == _EXPECT_VALUE:
+                    self._begin_value(pos, scalar=False)
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._state == _IN_VALUE:
+                    self._emit(text[self._value_start:pos + 1], completed)
+                elif self._depth == 0:
+                    if self._state == _IN_VALUE and self._scalar:
+                        self._emit(text[self._value_start:pos], completed)
+                    self.done = True
+            elif self._depth == 1:
+                if ch == ":" and self._state == _EXPECT_COLON:
+                    self._state = _EXPECT_VALUE
+                elif ch == ",":
+                    if self._state == _IN_VALUE and self._scalar:
+                        self._emit(text[self._value_start:pos], completed)
+                    self._state = _EXPECT_KEY
+                elif not ch.isspace() and self._state == _EXPECT_VALUE:
+                    self._begin_value(pos, scalar=True)
+            pos += 1
+        self._pos = pos
+        return completed
+
+    def result(self) -> Dict[str, Any]:
+        """已解析出的全部字段"""
+        return dict(self.fields)
+
+    def _begin_value(self, pos: int, scalar: bool) -> None:
+        self._value_start = pos
+        self._scalar = scalar
+        self._state = _IN_VALUE
+
+    def _emit(self, raw: str, completed: List[Tuple[str, Any]]) -> None:
+        self._state = _AFTER_VALUE
+        key = self._key
+        self._key = None
+        if key is None:
+            return
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            logger.debug("流式 JSON 字段 %s 解析失败: %s", key, raw[:80])
+            return
+        self.fields[key] = value
+        completed.append((key, value))
+
+    @staticmethod
+    def _decode(raw: str) -> Optional[str]:
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
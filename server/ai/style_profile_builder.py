@@ -8,7 +8,7 @@ import json
 import logging
 import os
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 # 使用统一网关
 from .ai_gateway import get_gateway
@@ -45,22 +45,59 @@ class StyleProfileBuilder:
         session_index: int,
     ) -> Dict[str, Any]:
         """Summarise ASR transcript into structured style guidance."""
-        excerpt = transcript.strip()
-        if not excerpt:
+        prompt = self._profile_prompt(anchor_id, transcript, session_date, session_index)
+        if prompt is None:
             return {}
-        if len(excerpt) > self.config.max_chars:
-            excerpt = excerpt[: self.config.max_chars]
-        
-        prompt = self._build_prompt(anchor_id, session_date, session_index, excerpt)
-        
         # 使用网关调用，通过function参数自动选择默认模型
         response = self.gateway.chat_completion(
-            messages=prompt,
-            function="style_profile",  # 使用功能标识，自动选择qwen3-max（直播间氛围与情绪识别）
-            max_tokens=800,
-            temperature=0.4,
+            messages=prompt, cache_text=transcript.strip(), **self._CALL_OPTIONS
         )
-        
+        return self._profile_from_response(response, anchor_id, session_date, session_index)
+
+    async def abuild_profile(
+        self,
+        anchor_id: Optional[str],
+        transcript: str,
+        session_date: str,
+        session_index: int,
+    ) -> Dict[str, Any]:
+        """异步版本，供事件循环内的调用方直接 await"""
+        prompt = self._profile_prompt(anchor_id, transcript, session_date, session_index)
+        if prompt is None:
+            return {}
+        response = await self.gateway.achat_completion(
+            messages=prompt, cache_text=transcript.strip(), **self._CALL_OPTIONS
+        )
+        return self._profile_from_response(response, anchor_id, session_date, session_index)
+
+    # 风格画像调用参数（同步 / 异步路径共用）；语义缓存只比对口播原文（cache_text）
+    _CALL_OPTIONS: Dict[str, Any] = {
+        "function": "style_profile",  # 使用功能标识，自动选择qwen3-max（直播间氛围与情绪识别）
+        "max_tokens": 800,
+        "temperature": 0.4,
+    }
+
+    def _profile_prompt(
+        self,
+        anchor_id: Optional[str],
+        transcript: str,
+        session_date: str,
+        session_index: int,
+    ) -> Optional[List[Dict[str, Any]]]:
+        excerpt = transcript.strip()
+        if not excerpt:
+            return None
+        if len(excerpt) > self.config.max_chars:
+            excerpt = excerpt[: self.config.max_chars]
+        return self._build_prompt(anchor_id, session_date, session_index, excerpt)
+
+    def _profile_from_response(
+        self,
+        response: Any,
+        anchor_id: Optional[str],
+        session_date: str,
+        session_index: int,
+    ) -> Dict[str, Any]:
         if not response.success:
             logger.error(f"AI调用失败: {response.error}")
             return {}
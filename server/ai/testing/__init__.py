@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""AI 网关离线测量工具（本地 OpenAI 兼容桩服务），供基准脚本与测试共用"""
@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""
+本地 OpenAI 兼容桩服务 - 离线测量网关真实请求路径
+
+在本机端口上提供 POST /v1/chat/completions（FastAPI + uvicorn，后台线程运行），
+请求经过真实的 TCP 连接、HTTP 解析与 SSE 流式传输，可以衡量连接复用、并发与限流行为：
+- 时延分布：首字节前延迟与流式增量间隔均可配置，
+  支持 fixed:ms / uniform:lo,hi / normal:mean,std / lognormal:median,sigma（毫秒）
+- 流式：请求带 stream=true 时按 chunk_size 切分回复逐块下发，最后一块携带 usage
+- 故障：按概率返回 503 或 429（可带 Retry-After）
+- 按模型覆盖行为（models={"qwen-max": StubBehavior(...)}），模拟快慢不同的服务商 / 模型
+- 统计：请求数、按状态码计数、流式请求数、不同客户端连接数（按客户端端口区分）
+
+请求 response_format=json_object 时回复一张字段齐全的分析卡片 JSON，否则回显最后一条消息。
+
+命令行单独启动：
+    python -m server.ai.testing.stub_provider --port 18080 \
+        --latency lognormal:300,0.4 --rate-limit-rate 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# 请求 JSON 输出时的回复：覆盖实时分析卡片、话术、风格画像、聊天焦点等调用方解析的字段
+JSON_REPLY = {
+    "analysis_overview": "新观众在问价格，互动正在升温",
+    "audience_sentiment": {"label": "平稳", "signals": ["连续两条价格提问"]},
+    "engagement_highlights": ["价格提问集中"],
+    "risks": ["讲解节奏偏慢"],
+    "next_actions": ["点名回答价格问题"],
+    "next_topic_direction": "聊聊杯子容量",
+    "confidence": 0.8,
+    "scripts": [{"question": "多少钱", "line": "今天直播间到手价四十九块九", "type": "answer"}],
+    "style_profile": {"persona": "邻家", "tone": "热情", "tempo": "中", "register": "口语"},
+    "vibe": {"level": "neutral", "score": 60, "trends": []},
+    "focus": "杯子价格",
+}
+
+
+class LatencyDistribution:
+    """毫秒时延分布"""
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal")
+
+    def __init__(self, kind: str = "fixed", params: Optional[List[float]] = None):
+        if kind not in self.KINDS:
+            raise ValueError(f"未知的时延分布: {kind}（可选 {', '.join(self.KINDS)}）")
+        self.kind = kind
+        self.params = params or [0.0]
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        """解析 "lognormal:200,0.5" 形式的描述；纯数字等价于 fixed"""
+        kind, _, raw = spec.partition(":")
+        if not raw:
+            kind, raw = "fixed", kind
+        return cls(kind.strip(), [float(x) for x in raw.split(",") if x.strip()])
+
+    def sample(self, rng: random.Random) -> float:
+        p = self.params
+        if self.kind == "fixed":
+            value = p[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(p[0], p[1])
+        elif self.kind == "normal":
+            value = rng.gauss(p[0], p[1])
+        else:
+            # lognormal:median,sigma
+            value = rng.lognormvariate(0.0, p[1]) * p[0]
+        return max(value, 0.0)
+
+    def __repr__(self) -> str:
+        return f"{self.kind}:{','.join(str(x) for x in self.params)}"
+
+
+@dataclass
+class StubBehavior:
+    """一个模型的响应行为"""
+
+    latency: str = "fixed:50"  # 首字节前延迟
+    chunk_interval: str = "fixed:0"  # 流式增量间隔；非流式请求按块数累加到总耗时
+    chunk_size: int = 8
+    error_rate: float = 0.0  # 返回 503 的概率
+    rate_limit_rate: float = 0.0  # 返回 429 的概率
+    retry_after: Optional[float] = None  # 429 响应的 Retry-After 秒数
+    reply: Optional[str] = None  # 固定回复；为空时按请求生成
+
+    def __post_init__(self) -> None:
+        self._latency = LatencyDistribution.parse(self.latency)
+        self._interval = LatencyDistribution.parse(self.chunk_interval)
+
+
+def _usage(prompt_tokens: int, completion_tokens: int) -> Dict[str, int]:
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+class StubProvider:
+    """后台线程运行的 OpenAI 兼容 HTTP 桩服务"""
+
+    def __init__(
+        self,
+        behavior: Optional[StubBehavior] = None,
+        models: Optional[Dict[str, StubBehavior]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int = 7,
+    ):
+        self.behavior = behavior or StubBehavior()
+        self.models = models or {}
+        self.host = host
+        self.port = port
+        self.rng = random.Random(seed)
+        self.app = self._build_app()
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    # ---------------- 生命周期 ----------------
+
+    def start(self, timeout: float = 10.0) -> "StubProvider":
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        self.port = sock.getsockname()[1]
+        config = uvicorn.Config(self.app, log_level="warning", access_log=False, lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(
+            target=self._server.run, kwargs={"sockets": [sock]}, name="stub-provider", daemon=True
+        )
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("桩服务启动失败")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._server = None
+        self._thread = None
+
+    def __enter__(self) -> "StubProvider":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    # ---------------- 统计 ----------------
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._requests = 0
+            self._streams = 0
+            self._by_status: Dict[int, int] = {}
+            self._clients: set = set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "streams": self._streams,
+                "by_status": dict(self._by_status),
+                "connections": len(self._clients),
+            }
+
+    def _count(self, request: Request, status: int, stream: bool = False) -> None:
+        with self._lock:
+            self._requests += 1
+            self._streams += int(stream)
+            self._by_status[status] = self._by_status.get(status, 0) + 1
+            if request.client is not None:
+                self._clients.add((request.client.host, request.client.port))
+
+    # ---------------- 请求处理 ----------------
+
+    def _reply(self, behavior: StubBehavior, body: Dict[str, Any]) -> str:
+        if behavior.reply is not None:
+            return behavior.reply
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            return json.dumps(JSON_REPLY, ensure_ascii=False)
+        messages = body.get("messages") or [{}]
+        content = messages[-1].get("content") or ""
+        if isinstance(content, list):
+            content = " ".join(
+                str(part.get("text", "")) for part in content if isinstance(part, dict)
+            )
+        return f"stub:{str(content)[:40]}"
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/v1/chat/completions")
+        async def chat_completions(request: Request):
+            body = await request.json()
+            model = body.get("model") or "stub"
+            behavior = self.models.get(model, self.behavior)
+            await asyncio.sleep(behavior._latency.sample(self.rng) / 1000.0)
+
+            roll = self.rng.random()
+            if roll < behavior.rate_limit_rate:
+                self._count(request, 429)
+                headers = None
+                if behavior.retry_after is not None:
+                    headers = {"retry-after": str(behavior.retry_after)}
+                return JSONResponse(
+                    {"error": {"message": "stub rate limited", "type": "rate_limit_error"}},
+                    status_code=429,
+                    headers=headers,
+                )
+            if roll < behavior.rate_limit_rate + behavior.error_rate:
+                self._count(request, 503)
+                return JSONResponse({"error": {"message": "stub unavailable"}}, status_code=503)
+
+            content = self._reply(behavior, body)
+            size = behavior.chunk_size
+            chunks = [content[i:i + size] for i in range(0, len(content), size)] or [""]
+            prompt_chars = sum(len(str(m.get("content") or "")) for m in body.get("messages") or [])
+            prompt_tokens = prompt_chars // 2 + 1
+            usage = _usage(prompt_tokens, len(chunks))
+
+            if body.get("stream"):
+                self._count(request, 200, stream=True)
+                return StreamingResponse(
+                    self._sse(model, chunks, usage, behavior), media_type="text/event-stream"
+                )
+
+            delay = sum(behavior._interval.sample(self.rng) for _ in chunks) / 1000.0
+            if delay:
+                await asyncio.sleep(delay)
+            self._count(request, 200)
+            return JSONResponse({
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            })
+
+        return app
+
+    async def _sse(
+        self, model: str, chunks: List[str], usage: Dict[str, int], behavior: StubBehavior
+    ):
+        base = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+        }
+        for index, text in enumerate(chunks):
+            if index:
+                interval = behavior._interval.sample(self.rng)
+                if interval:
+                    await asyncio.sleep(interval / 1000.0)
+            choice = {"index": 0, "delta": {"content": text}, "finish_reason": None}
+            payload = {**base, "choices": [choice]}
+            yield f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+        yield f"data: {json.dumps({**base, 'choices': [], 'usage': usage})}\n\n"
+        yield "data: [DONE]\n\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容桩服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency", default="fixed:50", help="首字节前延迟分布（毫秒）")
+    parser.add_argument("--chunk-interval", default="fixed:0", help="流式增量间隔分布（毫秒）")
+    parser.add_argument("--chunk-size", type=int, default=8)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=None)
+    args = parser.parse_args()
+
+    behavior = StubBehavior(
+        latency=args.latency,
+        chunk_interval=args.chunk_interval,
+        chunk_size=args.chunk_size,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+    )
+    stub = StubProvider(behavior, host=args.host, port=args.port).start()
+    print(f"桩服务已启动: {stub.base_url}（Ctrl+C 退出）")
+    try:
+        while True:
+            time.sleep(5)
+            print(json.dumps(stub.stats(), ensure_ascii=False))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+"""
+TokenBudgeter - 提示词 token 预算与压缩
+
+口播转写、弹幕列表等原始素材直接拼进提示词，长度往往远超分析所需，拖慢响应并增加成本。
+本模块在本地完成 token 计数与压缩，不依赖网络：
+- 计数：配置 AI_TOKENIZER_PATH（HuggingFace tokenizer.json，需安装 tokenizers）时精确计数，
+  否则使用按字符类别校准的估算器（中文字、英文单词、数字、标点分别计价）
+- 分配：按权重把总预算分给各段落；用不满份额的段落把余量让给其他段落（注水法）
+- 压缩：段内去重（重复弹幕折叠为 "×N"）、按显著性挑选条目并保持原始顺序、
+  单条超长时按 token 截断；全部过程确定性，同样输入得到同样输出
+- 统计：每次压缩返回前后 token 数，并按调用方汇总节省量（get_budget_stats）
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+TokenCounter = Callable[[str], int]
+
+# 估算器系数（以 Qwen / DeepSeek 系 BPE 分词器在直播语料上的均值校准）
+CJK_TOKENS_PER_CHAR = 0.7
+LATIN_CHARS_PER_TOKEN = 4.0
+DIGITS_PER_TOKEN = 3.0
+
+_TOKEN_RE = re.compile(
+    r"(?P<cjk>[㐀-鿿豈-﫿])"
+    r"|(?P<latin>[A-Za-z]+)"
+    r"|(?P<digit>[0-9]+)"
+    r"|(?P<space>\s+)"
+    r"|(?P<other>.)",
+    re.S,
+)
+_SENTENCE_RE = re.compile(r"[^。！？!?\n]+[。！？!?]*")
+_NORMALIZE_RE = re.compile(r"[\s\W_]+", re.U)
+_QUESTION_RE = re.compile(r"[?？]|吗|多少|怎么|什么|哪|几|能不能|可以吗|有没有")
+
+ELLIPSIS = "…"
+
+
+def estimate_tokens(text: str) -> int:
+    """按字符类别估算 token 数"""
+    if not text:
+        return 0
+    total = 0.0
+    for match in _TOKEN_RE.finditer(text):
+        kind = match.lastgroup
+        if kind == "cjk":
+            total += CJK_TOKENS_PER_CHAR
+        elif kind == "latin":
+            total += math.ceil(len(match.group()) / LATIN_CHARS_PER_TOKEN)
+        elif kind == "digit":
+            total += math.ceil(len(match.group()) / DIGITS_PER_TOKEN)
+        elif kind == "space":
+            total += match.group().count("\n") * 0.5
+        else:
+            total += 1
+    return max(1, int(math.ceil(total)))
+
+
+_tokenizer: Any = None
+_tokenizer_loaded = False
+_tokenizer_lock = threading.Lock()
+
+
+def _load_tokenizer() -> Any:
+    global _tokenizer, _tokenizer_loaded
+    if _tokenizer_loaded:
+        return _tokenizer
+    with _tokenizer_lock:
+        if not _tokenizer_loaded:
+            path = os.getenv("AI_TOKENIZER_PATH", "")
+            if path:
+                try:
+                    from tokenizers import Tokenizer  # pyright: ignore[reportMissingImports]
+
+                    _tokenizer = Tokenizer.from_file(path)
+                    logger.info("提示词计数使用本地分词器: %s", path)
+                except Exception as exc:
+                    logger.warning("加载分词器 %s 失败，改用估算器: %s", path, exc)
+            _tokenizer_loaded = True
+    return _tokenizer
+
+
+def count_tokens(text: str) -> int:
+    """本地 token 计数：优先使用配置的离线分词器，否则估算"""
+    if not text:
+        return 0
+    tokenizer = _load_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, add_special_tokens=False).ids)
+    return estimate_tokens(text)
+
+
+def budget_from_env(name: str, default: int) -> int:
+    """读取 AI_PROMPT_BUDGET_<NAME>，0 表示不限制"""
+    return int(os.getenv(f"AI_PROMPT_BUDGET_{name.upper()}", str(default)))
+
+
+def split_sentences(text: str) -> List[str]:
+    """按中文 / 英文句末标点与换行切句"""
+    return [s.strip() for s in _SENTENCE_RE.findall(text or "") if s.strip()]
+
+
+def text_salience(text: str) -> float:
+    """条目的信息量评分：提问、数字、有效长度加分，纯表情 / 刷屏短词减分"""
+    core = _NORMALIZE_RE.sub("", text or "")
+    if not core:
+        return 0.0
+    score = min(len(core), 30) / 30.0
+    if _QUESTION_RE.search(text):
+        score += 1.0
+    if any(ch.isdigit() for ch in core):
+        score += 0.3
+    if len(set(core)) <= 2:
+        score -= 0.5
+    return score
+
+
+def recency_scores(items: Sequence[str], recency: float = 0.5) -> List[float]:
+    """显著性 + 时间靠后加分（口播转写等按时间排列的素材）"""
+    n = len(items)
+    return [text_salience(t) + recency * (i + 1) / n for i, t in enumerate(items)]
+
+
+def truncate_to_tokens(text: str, max_tokens: int, counter: TokenCounter = count_tokens) -> str:
+    """截断到不超过 max_tokens（二分查找前缀长度），截断时以省略号结尾"""
+    if max_tokens <= 0:
+        return ""
+    if counter(text) <= max_tokens:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if counter(text[:mid] + ELLIPSIS) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo] + ELLIPSIS if lo else ""
+
+
+@dataclass
+class Section:
+    """提示词中的一个可压缩段落"""
+
+    name: str
+    items: Sequence[str]
+    weight: float = 1.0  # 分配预算时的权重
+    scores: Optional[Sequence[float]] = None  # 条目显著性，缺省为 text_salience
+    dedupe: bool = True  # 折叠重复条目（规范化后相同），保留首次出现并标注次数
+    joiner: str = "\n"
+    # 去重键（如只按弹幕内容、忽略用户名），缺省为规范化后的条目文本
+    keys: Optional[Sequence[str]] = None
+    # 最多保留的条目数（去重后按显著性挑选），与 token 预算同时生效；预算为 0 时仍生效
+    max_items: Optional[int] = None
+
+
+@dataclass
+class CompactResult:
+    texts: Dict[str, str]
+    tokens_before: int
+    tokens_after: int
+    kept: Dict[str, int] = field(default_factory=dict)
+    dropped: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def saved(self) -> int:
+        return max(self.tokens_before - self.tokens_after, 0)
+
+    def __getitem__(self, name: str) -> str:
+        return self.texts[name]
+
+
+class TokenBudgeter:
+    """在总预算内压缩多个段落"""
+
+    # 剩余预算不足该值时不再截断塞入半条内容
+    MIN_TRUNCATED_TOKENS = 12
+
+    def __init__(self, budget: int, label: str = "default", counter: TokenCounter = count_tokens):
+        self.budget = budget
+        self.label = label
+        self.counter = counter
+
+    def compact(self, sections: Sequence[Section]) -> CompactResult:
+        joined_before = {s.name: s.joiner.join(s.items) for s in sections}
+        tokens_before = sum(self.counter(text) for text in joined_before.values())
+        if self.budget <= 0 and not any(s.max_items for s in sections):
+            kept_all = {s.name: len(s.items) for s in sections}
+            result = CompactResult(joined_before, tokens_before, tokens_before, kept_all)
+            _record(self.label, result)
+            return result
+
+        prepared = [self._prepare(section) for section in sections]
+        needs = [sum(cost for _, _, cost in entries) for entries in prepared]
+        if self.budget > 0:
+            allocations = self._allocate(needs, [max(s.weight, 0.0) for s in sections])
+        else:
+            allocations = needs
+
+        texts: Dict[str, str] = {}
+        kept: Dict[str, int] = {}
+        dropped: Dict[str, int] = {}
+        for section, entries, allowance in zip(sections, prepared, allocations):
+            chosen = self._select(entries, allowance, section.joiner, section.max_items)
+            texts[section.name] = section.joiner.join(chosen)
+            kept[section.name] = len(chosen)
+            dropped[section.name] = len(section.items) - len(chosen)
+        tokens_after = sum(self.counter(text) for text in texts.values())
+        result = CompactResult(texts, tokens_before, tokens_after, kept, dropped)
+        _record(self.label, result)
+        if result.saved:
+            logger.debug(
+                "提示词压缩[%s]: %d -> %d tokens（节省 %d），丢弃 %s",
+                self.label,
+                tokens_before,
+                tokens_after,
+                result.saved,
+                {k: v for k, v in dropped.items() if v},
+            )
+        return result
+
+    def _prepare(self, section: Section) -> List[Tuple[float, str, int]]:
+        """去重并计算每个条目的 (显著性, 文本, token 数)，保持首次出现的顺序"""
+        items = [str(item) for item in section.items]
+        if section.scores is not None:
+            scores = list(section.scores)
+        else:
+            scores = [text_salience(t) for t in items]
+        joiner_cost = self.counter(section.joiner) if section.joiner.strip() else 0
+        order: List[str] = []
+        merged: Dict[str, List[Any]] = {}
+        for idx, text in enumerate(items):
+            if not text.strip():
+                continue
+            if not section.dedupe:
+                key = str(idx)
+            else:
+                raw = str(section.keys[idx]) if section.keys is not None else text
+                key = _NORMALIZE_RE.sub("", raw).lower() or raw
+            slot = merged.get(key)
+            if slot is None:
+                merged[key] = [text, scores[idx], 1]
+                order.append(key)
+            else:
+                slot[1] = max(slot[1], scores[idx])
+                slot[2] += 1
+        entries: List[Tuple[float, str, int]] = []
+        for key in order:
+            text, score, repeats = merged[key]
+            if repeats > 1:
+                text = f"{text} ×{repeats}"
+                # 反复出现说明观众在集中表达，适度加分
+                score += min(math.log2(repeats), 3.0) * 0.2
+            entries.append((score, text, self.counter(text) + joiner_cost))
+        return entries
+
+    def _allocate(self, needs: List[int], weights: List[float]) -> List[int]:
+        """注水法分配：按权重均分，需求小于份额的段落把余量让给其他段落"""
+        allocations = [0] * len(needs)
+        active = [i for i, need in enumerate(needs) if need > 0]
+        left = float(self.budget)
+        while active and left > 0:
+            total_weight = sum(max(weights[i], 1e-6) for i in active)
+            share = {i: left * max(weights[i], 1e-6) / total_weight for i in active}
+            satisfied = [i for i in active if needs[i] <= share[i]]
+            if not satisfied:
+                for i in active:
+                    allocations[i] = int(share[i])
+                break
+            for i in satisfied:
+                allocations[i] = needs[i]
+                left -= needs[i]
+            active = [i for i in active if i not in satisfied]
+        return allocations
+
+    def _select(
+        self,
+        entries: List[Tuple[float, str, int]],
+        allowance: int,
+        joiner: str,
+        max_items: Optional[int] = None,
+    ) -> List[str]:
+        """按显著性（同分取靠后者）挑选条目，输出保持原始顺序；放不下的最高分条目截断后塞入"""
+        limit = len(entries) if max_items is None else max(max_items, 0)
+        if len(entries) <= limit and sum(cost for _, _, cost in entries) <= allowance:
+            return [text for _, text, _ in entries]
+        ranked = sorted(range(len(entries)), key=lambda i: (-entries[i][0], -i))
+        picked: Dict[int, str] = {}
+        left = allowance
+        truncated_one = False
+        for idx in ranked:
+            if len(picked) >= limit:
+                break
+            score, text, cost = entries[idx]
+            if score <= 0:
+                # 需要压缩时不拿余量填充纯表情 / 刷屏短词
+                break
+            if cost <= left:
+                picked[idx] = text
+                left -= cost
+            elif not truncated_one and left >= self.MIN_TRUNCATED_TOKENS:
+                # 只截断一条，避免满屏半句话
+                truncated_one = True
+                joiner_cost = self.counter(joiner) if joiner.strip() else 0
+                truncated = truncate_to_tokens(text, left - joiner_cost, self.counter)
+                if truncated:
+                    picked[idx] = truncated
+                    left -= self.counter(truncated) + joiner_cost
+        return [picked[i] for i in sorted(picked)]
+
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = defaultdict(
+    lambda: {"calls": 0, "tokens_before": 0, "tokens_after": 0, "saved": 0}
+)
+
+
+def _record(label: str, result: CompactResult) -> None:
+    with _stats_lock:
+        entry = _stats[label]
+        entry["calls"] += 1
+        entry["tokens_before"] += result.tokens_before
+        entry["tokens_after"] += result.tokens_after
+        entry["saved"] += result.saved
+
+
+def get_budget_stats() -> Dict[str, Dict[str, int]]:
+    """按调用方汇总的压缩统计"""
+    with _stats_lock:
+        return {label: dict(entry) for label, entry in _stats.items()}
+
+
+def reset_budget_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
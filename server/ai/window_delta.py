@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+WindowDelta - 实时分析窗口的增量判定与滚动摘要
+
+AILiveAnalyzer 每 window_sec 秒跑一次完整工作流（分析卡片、聊天焦点、风格画像等多次 LLM 调用），
+安静时段或刷屏重复弹幕的窗口也照跑不误。本模块在调用前判定窗口是否值得分析：
+- 指纹：口播句子与弹幕 / 礼物内容归一化（去空白标点、折叠叠字）后取字符二元组集合；
+  进场、点赞、表情等环境事件带着各自的昵称，不参与指纹
+- 空窗口：没有口播也没有弹幕 / 礼物，直接跳过
+- 无变化：与上次分析窗口的指纹相似度（Jaccard）超过阈值时跳过，沿用上一张卡片；
+  始终与上次 "分析过的" 窗口比较，缓慢漂移累积到阈值以下时会重新分析
+- 新问题：弹幕按 QuestionExtractor 聚类，出现此前分析过的窗口里没有的问题簇时，
+  即使整体指纹相似也照常分析，避免刷屏口播淹没新的观众提问
+- 素材不足：新增口播字数与有效弹幕数都低于阈值时顺延，素材保留并入下一个窗口；
+  顺延 AI_LIVE_MAX_DEFER 个窗口后仍不足，按空窗口丢弃（含新问题的窗口不丢弃，照常分析）
+
+分析完成后记录一条紧凑摘要（概览、接下来方向、观众问题），多条摘要按 token 预算拼成滚动摘要，
+随下一个窗口的提示词发送：模型拿到 "此前摘要 + 本窗口新增素材"，而不是每次从头理解整场直播。
+风格画像按 AI_STYLE_REFRESH_WINDOWS 个分析窗口刷新一次，其余窗口沿用已有画像。
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, FrozenSet, Iterable, List, Optional
+
+from ..nlp.question_extractor import QuestionExtractor, jaccard, normalize_question, shingles
+from .token_budget import budget_from_env, count_tokens, truncate_to_tokens
+
+# 新增口播字数、有效弹幕数都低于阈值时视为素材不足
+MIN_NEW_CHARS = int(os.getenv("AI_LIVE_MIN_NEW_CHARS", "30"))
+MIN_NEW_COMMENTS = int(os.getenv("AI_LIVE_MIN_NEW_COMMENTS", "3"))
+# 素材不足时最多顺延的窗口数，之后仍不足则丢弃
+MAX_DEFER = int(os.getenv("AI_LIVE_MAX_DEFER", "3"))
+# 与上次分析窗口的指纹相似度不低于该值视为无变化，>1 表示关闭
+UNCHANGED_SIMILARITY = float(os.getenv("AI_LIVE_UNCHANGED_SIMILARITY", "0.85"))
+# 风格画像每隔多少个分析窗口刷新一次（1 为每个窗口都刷新）
+STYLE_REFRESH_WINDOWS = int(os.getenv("AI_STYLE_REFRESH_WINDOWS", "5"))
+# 滚动摘要 token 预算（AI_PROMPT_BUDGET_ROLLING_SUMMARY），单条摘要上限
+SUMMARY_BUDGET = budget_from_env("rolling_summary", 200)
+SUMMARY_ENTRY_TOKENS = 80
+# 记住最近分析过的问题簇数量，超出后最早的问题再次出现时按新问题处理
+SEEN_QUESTIONS = 200
+
+RUN = "run"
+EMPTY = "empty"
+SPARSE = "sparse"
+UNCHANGED = "unchanged"
+
+# 参与指纹与素材计数的互动类型
+_MATERIAL_TYPES = {"chat", "gift"}
+_PUNCT_RE = re.compile(r"[\s\W_]+", re.U)
+_REPEAT_RE = re.compile(r"(.)\1{2,}")
+
+
+def normalize(text: str) -> str:
+    """去空白标点、转小写，三个以上的叠字折叠为两个（"哈哈哈哈" -> "哈哈"）"""
+    return _REPEAT_RE.sub(r"\1\1", _PUNCT_RE.sub("", str(text or "")).lower())
+
+
+def material_lines(sentences: Iterable[str], comments: Iterable[Dict[str, Any]]) -> List[str]:
+    """窗口内参与判定的素材（归一化、去重、保持顺序）"""
+    lines: List[str] = [normalize(s) for s in sentences]
+    for comment in comments:
+        if not isinstance(comment, dict) or comment.get("type", "chat") not in _MATERIAL_TYPES:
+            continue
+        if comment.get("type") == "gift":
+            # 礼物内容带送礼人昵称，按礼物名计
+            lines.append(f"gift{normalize(comment.get('gift_name') or '')}")
+        else:
+            lines.append(normalize(comment.get("content") or ""))
+    return list(dict.fromkeys(line for line in lines if line))
+
+
+def fingerprint(lines: Iterable[str]) -> FrozenSet[str]:
+    """素材的字符二元组集合（单字素材取自身）"""
+    grams = set()
+    for line in lines:
+        if len(line) == 1:
+            grams.add(line)
+        grams.update(line[i:i + 2] for i in range(len(line) - 1))
+    return frozenset(grams)
+
+
+def window_questions(comments: Iterable[Dict[str, Any]]) -> List[FrozenSet[str]]:
+    """窗口内各问题簇代表问题的字二元组集合（近似问题只取一个）"""
+    extractor = QuestionExtractor()
+    extractor.add_comments(
+        c for c in comments if isinstance(c, dict) and c.get("type", "chat") == "chat"
+    )
+    questions = (normalize_question(q) for q in extractor.representatives(limit=SEEN_QUESTIONS))
+    return [frozenset(shingles(q)) for q in questions if q]
+
+
+def similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class WindowDecision:
+    action: str  # run / empty / sparse / unchanged
+    new_chars: int
+    new_comments: int
+    similarity: float = 0.0
+    new_questions: int = 0
+
+    @property
+    def run(self) -> bool:
+        return self.action == RUN
+
+
+class WindowDelta:
+    """单场直播的窗口增量状态：上次分析窗口的指纹、连续顺延次数、滚动摘要"""
+
+    def __init__(
+        self,
+        min_chars: int = MIN_NEW_CHARS,
+        min_comments: int = MIN_NEW_COMMENTS,
+        max_defer: int = MAX_DEFER,
+        unchanged_similarity: float = UNCHANGED_SIMILARITY,
+        style_refresh: int = STYLE_REFRESH_WINDOWS,
+        summary_budget: int = SUMMARY_BUDGET,
+    ):
+        self.min_chars = min_chars
+        self.min_comments = min_comments
+        self.max_defer = max_defer
+        self.unchanged_similarity = unchanged_similarity
+        self.style_refresh = max(1, style_refresh)
+        self.summary_budget = summary_budget
+        self._last: FrozenSet[str] = frozenset()
+        self._questions: Deque[FrozenSet[str]] = deque(maxlen=SEEN_QUESTIONS)
+        self._question_similarity = QuestionExtractor().similarity
+        self._deferred = 0
+        self._since_style = 0
+        self._entries: Deque[str] = deque(maxlen=12)
+        self._counts: Dict[str, int] = {RUN: 0, EMPTY: 0, SPARSE: 0, UNCHANGED: 0}
+
+    def assess(self, sentences: List[str], comments: List[Dict[str, Any]]) -> WindowDecision:
+        """判定窗口是否需要分析；返回 sparse 时调用方保留素材并入下一个窗口"""
+        lines = material_lines(sentences, comments)
+        new_chars = sum(len(normalize(s)) for s in sentences)
+        new_comments = sum(
+            1 for c in comments if isinstance(c, dict) and c.get("type", "chat") in _MATERIAL_TYPES
+        )
+        decision = WindowDecision(RUN, new_chars, new_comments)
+        if not lines:
+            decision.action = EMPTY
+        else:
+            decision.similarity = similarity(fingerprint(lines), self._last)
+            decision.new_questions = len(self._new_questions(comments))
+            unchanged = self._last and decision.similarity >= self.unchanged_similarity
+            if unchanged and not decision.new_questions:
+                decision.action = UNCHANGED
+            elif new_chars < self.min_chars and new_comments < self.min_comments:
+                if self._deferred < self.max_defer:
+                    decision.action = SPARSE
+                elif not decision.new_questions:
+                    decision.action = EMPTY
+        self._deferred = self._deferred + 1 if decision.action == SPARSE else 0
+        self._counts[decision.action] += 1
+        return decision
+
+    def _new_questions(self, comments: List[Dict[str, Any]]) -> List[FrozenSet[str]]:
+        """窗口内此前分析过的窗口里没有出现过的问题簇"""
+        threshold = self._question_similarity
+        return [
+            grams for grams in window_questions(comments)
+            if not any(jaccard(grams, seen) >= threshold for seen in self._questions)
+        ]
+
+    def style_due(self, has_profile: bool) -> bool:
+        """本窗口是否需要刷新风格画像（尚无画像时始终刷新）"""
+        if not has_profile or self._since_style >= self.style_refresh:
+            self._since_style = 0
+            return True
+        return False
+
+    def mark_analyzed(
+        self,
+        sentences: List[str],
+        comments: List[Dict[str, Any]],
+        payload: Dict[str, Any],
+        now: Optional[float] = None,
+    ) -> None:
+        """窗口分析成功：记录指纹并把卡片要点追加到滚动摘要"""
+        self._last = fingerprint(material_lines(sentences, comments))
+        self._questions.extend(self._new_questions(comments))
+        self._since_style += 1
+        entry = summary_entry(payload, now)
+        if entry:
+            self._entries.append(entry)
+
+    def rolling_summary(self) -> str:
+        """最近若干窗口的摘要，按 token 预算从新到旧保留，输出按时间顺序"""
+        kept: List[str] = []
+        used = 0
+        for entry in reversed(self._entries):
+            tokens = count_tokens(entry)
+            if self.summary_budget > 0 and used + tokens > self.summary_budget:
+                break
+            kept.append(entry)
+            used += tokens
+        return "\n".join(reversed(kept))
+
+    def stats(self) -> Dict[str, Any]:
+        windows = sum(self._counts.values())
+        return {
+            "windows": windows,
+            "analyzed": self._counts[RUN],
+            "skipped": {key: value for key, value in self._counts.items() if key != RUN},
+            "skip_rate": round(1 - self._counts[RUN] / windows, 4) if windows else 0.0,
+            "summary_entries": len(self._entries),
+        }
+
+
+def summary_entry(payload: Dict[str, Any], now: Optional[float] = None) -> str:
+    """一张分析卡片的紧凑摘要："[HH:MM] 概览；方向：…；问题：…" """
+    card = payload.get("analysis_card") or {}
+    overview = str(card.get("analysis_overview") or payload.get("summary") or "").strip()
+    if not overview or payload.get("error"):
+        return ""
+    parts = [overview]
+    direction = str(card.get("next_topic_direction") or payload.get("analysis_focus") or "").strip()
+    if direction:
+        parts.append(f"方向：{direction}")
+    questions = [str(q).strip() for q in (payload.get("top_questions") or [])[:2] if str(q).strip()]
+    if questions:
+        parts.append("问题：" + "、".join(questions))
+    stamp = time.strftime("%H:%M", time.localtime(now if now is not None else time.time()))
+    return truncate_to_tokens(f"[{stamp}] " + "；".join(parts), SUMMARY_ENTRY_TOKENS)
@@ -118,7 +118,7 @@ async def chat_completion(req: ChatCompletionRequest):
     """对话补全（测试接口）"""
     try:
         gateway = get_gateway()
-        response = gateway.chat_completion(
+        response = await gateway.achat_completion(
             messages=req.messages,
             provider=req.provider,
             model=req.model,
@@ -230,3 +230,44 @@ async def update_function_config(function: str, req: UpdateFunctionConfigRequest
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """响应缓存指标（命中率、节省 token 等）"""
+    gateway = get_gateway()
+    return {
+        "success": True,
+        "cache": gateway.get_cache_stats(),
+    }
+
+
+@router.get("/routing")
+async def get_routing_stats():
+    """选路指标（各服务商 / 模型的 p50 / p95、错误率、熔断状态，对冲与切换次数）"""
+    gateway = get_gateway()
+    return {
+        "success": True,
+        "routing": gateway.get_routing_stats(),
+    }
+
+
+@router.get("/governor")
+async def get_governor_stats():
+    """限流指标（各服务商在途 / 排队数量、按优先级的排队耗时）"""
+    gateway = get_gateway()
+    return {
+        "success": True,
+        "governor": gateway.get_governor_stats(),
+    }
+
+
+@router.post("/cache/clear")
+async def clear_cache():
+    """清空响应缓存"""
+    gateway = get_gateway()
+    gateway.clear_cache()
+    return {
+        "success": True,
+        "message": "响应缓存已清空",
+    }
@@ -81,7 +81,7 @@ async def ai_stream() -> StreamingResponse:
 async def generate_live_answers(req: GenerateLiveAnswersRequest):
     svc = get_ai_live_analyzer()
     try:
-        result = svc.generate_answer_scripts(
+        result = await svc.generate_answer_scripts_async(
             questions=req.questions,
             transcript=req.transcript,
             style_profile=req.style_profile,
@@ -205,6 +205,16 @@ async def get_model_pricing():
     }
 
 
+@router.get("/queue")
+async def get_queue_stats():
+    """AI 网关限流排队耗时（按服务商/优先级）"""
+    monitor = get_usage_monitor()
+    return {
+        "success": True,
+        "queues": monitor.get_queue_stats(),
+    }
+
+
 @router.post("/export_report")
 async def export_report(
     days: int = Query(7, ge=1, le=90, description="统计天数")
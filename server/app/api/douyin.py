@@ -16,6 +16,7 @@ from fastapi.responses import StreamingResponse
 # 服务导入
 from ..services.douyin_service import get_douyin_service
 from ..services.douyin_web_relay import get_douyin_web_relay
+from server.utils.event_broadcaster import SubscriberClosed
 from server.utils.service_logger import log_service_start, log_service_stop, log_service_error
 from server.app.schemas import StartDouyinMonitoringRequest, DouyinStatusResponse
 from server.app.schemas.common import BaseResponse
@@ -171,23 +172,22 @@ async def stream_events():
     抖音直播事件流 (Server-Sent Events)
     推送实时弹幕、礼物、点赞等事件
     """
-    async def generate() -> AsyncGenerator[str, None]:
+    async def generate() -> AsyncGenerator[str | bytes, None]:
         relay = get_douyin_web_relay()
         queue = None
         try:
             # 注册客户端队列
-            queue = await relay.register_client()
+            queue = await relay.register_client(name="sse:/api/douyin/stream")
             
             # 发送初始连接确认
             yield f"data: {json.dumps({'type': 'connected', 'message': '连接成功'})}\n\n"
             
-            # 持续推送事件
+            # 持续推送事件（帧已在广播层编码，直接透传共享字节）
             while True:
                 try:
-                    event = await asyncio.wait_for(queue.get(), timeout=30.0)
-                    if event is None:
-                        continue
-                    yield f"data: {json.dumps(event)}\n\n"
+                    yield await asyncio.wait_for(queue.get_frame(), timeout=30.0)
+                except SubscriberClosed:
+                    break
                 except asyncio.TimeoutError:
                     # 发送心跳保持连接
                     yield f"data: {json.dumps({'type': 'ping', 'timestamp': time.time()})}\n\n"
@@ -2,13 +2,13 @@
 """Web 端抖音弹幕测试接口."""
 
 import asyncio
-import json
 from typing import AsyncGenerator
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from server.utils.event_broadcaster import SubscriberClosed
 from ..services.douyin_web_relay import get_douyin_web_relay
 
 router = APIRouter(prefix="/api/douyin/web", tags=["douyin-web"])
@@ -84,14 +84,14 @@ async def relay_status():
 @router.get("/stream")
 async def stream_events() -> StreamingResponse:
     relay = get_douyin_web_relay()
-    queue = await relay.register_client()
+    queue = await relay.register_client(name="sse:/api/douyin/web/stream")
 
-    async def event_generator() -> AsyncGenerator[str, None]:
+    async def event_generator() -> AsyncGenerator[bytes, None]:
         try:
             while True:
-                event = await queue.get()
-                yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
-        except asyncio.CancelledError:
+                # 帧在广播层编码一次，所有客户端共享同一份字节
+                yield await queue.get_frame()
+        except (asyncio.CancelledError, SubscriberClosed):
             pass
         finally:
             await relay.unregister_client(queue)
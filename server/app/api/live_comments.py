@@ -8,7 +8,7 @@ import json
 import time
 import asyncio
 from datetime import datetime
-from typing import Dict, Any, Optional, List, AsyncGenerator
+from typing import Dict, Any, Optional, List, AsyncGenerator, Tuple
 from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
@@ -39,6 +39,10 @@ hotword_analyzer: Optional[HotwordAnalyzer] = None
 tip_generator: Optional[TipGenerator] = None
 sse_clients = set()
 
+# SSE 心跳间隔（秒）与单次补发上限
+SSE_HEARTBEAT_SEC = float(os.getenv("LIVE_COMMENTS_SSE_HEARTBEAT", "15"))
+SSE_BATCH_LIMIT = 200
+
 # Pydantic 模型
 class HealthStatus(BaseModel):
     """健康检查响应模型"""
@@ -80,6 +84,20 @@ class ConfigResponse(BaseModel):
     timestamp: str
     code: int
 
+def _resume_cursor(cursor: int) -> Tuple[int, bool]:
+    """
+    校验客户端回传的游标，返回 (游标, 是否重置)。
+    评论序号按进程计数，服务重启或抓取器重建后从 0 开始；超过当前最新序号的游标
+    来自之前的进程，原样使用会一直等到新序号追上它，改为从头续读。
+    """
+    if comment_fetcher and cursor > comment_fetcher.last_seq:
+        return 0, True
+    return cursor, False
+
+def _sse_event(payload: Dict[str, Any]) -> str:
+    """将控制消息编码为一帧 SSE 数据"""
+    return f"data: {json.dumps(payload)}\n\n"
+
 def init_services():
     """初始化服务实例"""
     global comment_fetcher, hotword_analyzer, tip_generator
@@ -89,6 +107,10 @@ def init_services():
             comment_fetcher = CommentFetcher(config)
         if not hotword_analyzer:
             hotword_analyzer = HotwordAnalyzer(config)
+            hotword_analyzer.start_analyzing()
+        # 新评论实时计入热词引擎（抓取器重建后重新注册），/hotwords 才有数据
+        if hotword_analyzer.add_comment not in comment_fetcher.callbacks:
+            comment_fetcher.add_callback(hotword_analyzer.add_comment)
         if not tip_generator:
             tip_generator = TipGenerator(config)
             
@@ -142,7 +164,8 @@ async def health_check():
 @router.get("/comments", response_model=CommentsResponse)
 async def get_comments(
     limit: int = Query(50, description="返回评论数量限制"),
-    since: Optional[float] = Query(None, description="获取指定时间戳之后的评论")
+    since: Optional[float] = Query(None, description="获取指定时间戳之后的评论"),
+    cursor: Optional[int] = Query(None, description="上次返回的游标（评论序号），从其后续读")
 ):
     """获取评论列表"""
     try:
@@ -162,17 +185,28 @@ async def get_comments(
                 }
             )
         
-        # 获取评论数据
-        if since:
+        # 获取评论数据（游标续读与按时间查询均为 O(log n) 定位）
+        missed = 0
+        reset = False
+        if cursor is not None:
+            cursor, reset = _resume_cursor(cursor)
+            page = comment_fetcher.get_comments_after(cursor, limit)
+            comments, next_cursor, missed = page['comments'], page['cursor'], page['missed']
+        elif since:
             comments = comment_fetcher.get_comments_since(since)
+            next_cursor = comment_fetcher.last_seq
         else:
             comments = comment_fetcher.get_recent_comments(limit)
+            next_cursor = comment_fetcher.last_seq
         
         return CommentsResponse(
             success=True,
             data={
                 'comments': comments,
                 'total': len(comments),
+                'cursor': next_cursor,
+                'missed': missed,
+                'reset': reset,
                 'stats': comment_fetcher.get_stats() if hasattr(comment_fetcher, 'get_stats') else {}
             },
             message='获取评论成功',
@@ -195,8 +229,20 @@ async def get_comments(
         )
 
 @router.get("/stream/comments")
-async def stream_comments():
-    """评论流推送接口 (Server-Sent Events)"""
+async def stream_comments(
+    request: Request,
+    cursor: Optional[int] = Query(None, description="从该评论序号之后续传（断线重连时使用）")
+):
+    """
+    评论流推送接口 (Server-Sent Events)
+    
+    新评论写入时通过 SeqNotifier 唤醒，无新评论时协程挂起、不轮询；
+    每帧带 ``id: <序号>``，断线重连时浏览器回传 Last-Event-ID（或显式传 cursor）即可从断点补发；
+    游标超过当前最新序号（服务重启或抓取器重建后）时先发送 reset 事件，再从头补发。
+    """
+    last_event_id = request.headers.get('last-event-id')
+    if cursor is None and last_event_id and last_event_id.isdigit():
+        cursor = int(last_event_id)
     
     async def generate() -> AsyncGenerator[str, None]:
         """生成SSE数据流"""
@@ -210,22 +256,46 @@ async def stream_comments():
             logger.info(f"新的SSE客户端连接: {client_id}")
             
             # 发送初始连接确认
-            yield f"data: {json.dumps({'type': 'connected', 'message': '连接成功'})}\n\n"
+            if cursor is not None:
+                position = cursor
+            else:
+                position = comment_fetcher.last_seq if comment_fetcher else 0
+            position, reset = _resume_cursor(position)
+            if reset:
+                yield _sse_event({'type': 'reset', 'cursor': position, 'previous': cursor})
+            yield _sse_event({'type': 'connected', 'message': '连接成功', 'cursor': position})
             
-            # 持续推送评论数据
+            # 持续推送评论数据：有新评论才被唤醒，按游标补齐其间的全部评论
             while client_id in sse_clients:
                 try:
-                    # 从评论抓取器获取最新评论
-                    if comment_fetcher and hasattr(comment_fetcher, 'has_new_comments') and comment_fetcher.has_new_comments():
-                        comments = comment_fetcher.get_latest_comments(limit=10)
-                        for comment in comments:
-                            if hasattr(comment, 'to_dict'):
-                                data = json.dumps(comment.to_dict())
-                            else:
-                                data = json.dumps(comment)
-                            yield f"data: {data}\n\n"
+                    if not comment_fetcher:
+                        await asyncio.sleep(SSE_HEARTBEAT_SEC)
+                        continue
+                    # 连接期间抓取器被重建，序号重新从 0 开始
+                    previous = position
+                    position, reset = _resume_cursor(position)
+                    if reset:
+                        yield _sse_event(
+                            {'type': 'reset', 'cursor': position, 'previous': previous}
+                        )
+                    latest = await comment_fetcher.wait_for_comments(
+                        position, timeout=SSE_HEARTBEAT_SEC
+                    )
+                    if latest <= position:
+                        # 发送心跳保持连接
+                        yield _sse_event(
+                            {'type': 'ping', 'timestamp': time.time(), 'cursor': position}
+                        )
+                        continue
                     
-                    await asyncio.sleep(0.5)  # 500ms间隔
+                    page = comment_fetcher.get_comments_after(position, limit=SSE_BATCH_LIMIT)
+                    if page['missed']:
+                        yield _sse_event({'type': 'gap', 'missed': page['missed']})
+                    seq = page['cursor'] - len(page['comments'])
+                    for comment in page['comments']:
+                        seq += 1
+                        yield f"id: {seq}\ndata: {json.dumps(comment)}\n\n"
+                    position = page['cursor']
                     
                 except asyncio.CancelledError:
                     break
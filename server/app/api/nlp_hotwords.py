@@ -25,6 +25,8 @@ DATA_PATH = Path("data/hotwords.json").resolve()
 
 class HotwordsBody(BaseModel):
     replace: Dict[str, List[str]] = Field(default_factory=dict)
+    # 按主播（live_id 或主播名）追加/覆盖的规则
+    anchors: Dict[str, Dict[str, List[str]]] = Field(default_factory=dict)
 
 
 @router.get("/hotwords")
@@ -44,14 +46,17 @@ async def set_hotwords(body: HotwordsBody) -> dict:
     # Update file
     try:
         DATA_PATH.parent.mkdir(parents=True, exist_ok=True)
-        DATA_PATH.write_text(json.dumps({"replace": body.replace}, ensure_ascii=False, indent=2), encoding="utf-8")
+        payload = {"replace": body.replace, "anchors": body.anchors}
+        DATA_PATH.write_text(
+            json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
     # Update in-service replacer
     try:
         svc = get_live_audio_service()
-        svc.update_hotwords(body.replace)
+        svc.update_hotwords(body.replace, body.anchors)
     except Exception:
         pass
     return {"success": True}
@@ -72,7 +77,7 @@ async def reset_hotwords() -> dict:
 
     try:
         svc = get_live_audio_service()
-        svc.update_hotwords({})
+        svc.update_hotwords({}, {})
     except Exception:
         pass
     return {"success": True}
@@ -546,6 +546,13 @@ async def shutdown_event():
 
     # Redis已移除，无需关闭连接
 
+    # 关闭 AI 网关连接池
+    try:
+        from server.ai.ai_gateway import get_gateway
+        await get_gateway().aclose()
+    except Exception as e:
+        logging.warning(f"⚠️ AI 网关连接池关闭失败: {e}")
+
     try:
         stop_websocket_services()
         log_service_stop("WebSocket服务")
@@ -9,11 +9,12 @@ streams results to frontend via SSE.
 from __future__ import annotations
 
 import asyncio
+import copy
 import time
 import logging
 import os
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, List, Optional, Set
 
 try:
     from ...ai.qwen_openai_compatible import (  # type: ignore
@@ -29,8 +30,9 @@ except Exception:  # pragma: no cover
 from ...ai.live_analysis_generator import LiveAnalysisGenerator
 from ...ai.langgraph_live_workflow import LiveWorkflowConfig, ensure_workflow
 from ...ai.knowledge_service import get_knowledge_base
+from ...ai.response_cache import get_response_cache
+from ...ai.window_delta import SPARSE, WindowDelta
 
-from .live_audio_stream_service import get_live_audio_service
 from .douyin_web_relay import get_douyin_web_relay
 
 
@@ -40,6 +42,12 @@ def _now_ms() -> int:
 
 logger = logging.getLogger(__name__)
 
+# 内容完全相同的分析窗口复用上次结果的有效期（秒），0 表示关闭
+ANALYSIS_CACHE_TTL = float(os.getenv("AI_ANALYSIS_CACHE_TTL", "120"))
+
+# 分析卡片字段生成完成即推送 ai_delta 事件，不必等待整张卡片，0 表示关闭
+ANALYSIS_STREAM = os.getenv("AI_LIVE_STREAM", "1") != "0"
+
 
 @dataclass
 class AIState:
@@ -78,6 +86,8 @@ class AILiveAnalyzer:
         self._script_responder = None
         self._workflow = None
         self._session_id: Optional[str] = None  # 🔧 初始化session_id，防止stop()时访问不存在的属性
+        # 窗口增量判定与滚动摘要（每场直播重置）
+        self._delta = WindowDelta()
 
         self._init_workflow()
 
@@ -108,6 +118,7 @@ class AILiveAnalyzer:
                 window_sec=max(30, int(window_sec)),
                 anchor_id=self._anchor_id,
             )
+            self._delta = WindowDelta()
             
             # 🆕 保存session_id到state中（如果有AIState需要扩展字段）
             self._session_id = session_id
@@ -151,6 +162,8 @@ class AILiveAnalyzer:
             # Expose learned style & vibe snapshot for consumers (frontend/other services)
             "style_profile": s.style_profile,
             "vibe": s.vibe,
+            # 分析 / 跳过的窗口数，用于观察每小时 LLM 调用量
+            "windows": self._delta.stats(),
         }
 
     async def register_client(self) -> asyncio.Queue:
@@ -297,6 +310,29 @@ class AILiveAnalyzer:
         transcript: Optional[str] = None,
         style_profile: Optional[Dict[str, Any]] = None,
         vibe: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        context = self._answer_context(questions, transcript, style_profile, vibe)
+        scripts = self._script_responder.generate(context)
+        return {"scripts": scripts}
+
+    async def generate_answer_scripts_async(
+        self,
+        questions: List[str],
+        transcript: Optional[str] = None,
+        style_profile: Optional[Dict[str, Any]] = None,
+        vibe: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """异步生成话术，网关调用直接在事件循环上等待"""
+        context = self._answer_context(questions, transcript, style_profile, vibe)
+        scripts = await self._script_responder.agenerate(context)
+        return {"scripts": scripts}
+
+    def _answer_context(
+        self,
+        questions: List[str],
+        transcript: Optional[str],
+        style_profile: Optional[Dict[str, Any]],
+        vibe: Optional[Dict[str, Any]],
     ) -> Dict[str, Any]:
         clean_questions = [str(q).strip() for q in questions if str(q).strip()]
         if not clean_questions:
@@ -314,26 +350,29 @@ class AILiveAnalyzer:
         sentence_clip = "\n".join(self._state.sentences[-6:]) if self._state.sentences else ""
         transcript_snippet = transcript or last_transcript or sentence_clip
 
-        context = {
+        return {
             "questions": clean_questions,
             "persona": persona,
             "vibe": vibe_payload,
             "mood": mood,
             "transcript": transcript_snippet,
         }
-        scripts = self._script_responder.generate(context)
-        return {"scripts": scripts}
 
-    # 缓存辅助方法（已移除Redis，保留接口兼容）
+    # 缓存辅助方法（与 AI 网关共用进程内 + 磁盘响应缓存）
     async def _get_cached_analysis(self, cache_key: str) -> Optional[Dict[str, Any]]:
-        """获取缓存的AI分析结果（已禁用缓存）"""
-        # Redis缓存已移除，直接返回None
-        return None
+        """获取缓存的AI分析结果"""
+        if ANALYSIS_CACHE_TTL <= 0:
+            return None
+        cached, _ = get_response_cache().lookup(cache_key, function="live_window")
+        return copy.deepcopy(cached) if isinstance(cached, dict) else None
 
     async def _cache_analysis_result(self, cache_key: str, result: Dict[str, Any]) -> None:
-        """缓存AI分析结果（已禁用缓存）"""
-        # Redis缓存已移除，不执行任何操作
-        pass
+        """缓存AI分析结果（存副本，避免后续对 payload 的修改污染缓存）"""
+        if ANALYSIS_CACHE_TTL <= 0 or not isinstance(result, dict):
+            return
+        get_response_cache().set(
+            cache_key, copy.deepcopy(result), ttl=ANALYSIS_CACHE_TTL, function="live_window"
+        )
 
     def _generate_cache_key(self, sentences: List[str], comments: List[Dict[str, Any]]) -> str:
         """生成缓存键（基于输入内容的哈希）"""
@@ -377,7 +416,7 @@ class AILiveAnalyzer:
         except Exception as e:
             logger.error(f"强制内存限制失败: {e}")
 
-    def _run_workflow(
+    def _workflow_state(
         self,
         sentences: List[str],
         comments: List[Dict[str, Any]],
@@ -387,10 +426,6 @@ class AILiveAnalyzer:
     ) -> Dict[str, Any]:
         if self._workflow is None:
             raise RuntimeError("LangGraph workflow not available")
-        
-        # 🆕 尝试从缓存获取（注意：_run_workflow是同步方法，需要用asyncio.run或在调用方处理）
-        # 这里简化处理，直接执行workflow（缓存逻辑放在async wrapper中）
-        
         state: Dict[str, Any] = {
             "anchor_id": self._anchor_id or "default",
             "broadcaster_id": self._anchor_id or "default",
@@ -401,10 +436,13 @@ class AILiveAnalyzer:
         }
         if speaker_sentences:
             state["speaker_timeline"] = speaker_sentences
-        # 使用 run_in_executor 将同步调用转为异步，避免阻塞事件循环
-        result = self._workflow.invoke(state)  # type: ignore[arg-type]
-        return self._format_workflow_payload(result)
-    
+        # 增量分析：附带此前窗口摘要；已有风格画像时按间隔刷新
+        state["rolling_summary"] = self._delta.rolling_summary()
+        if self._state.style_profile:
+            state["style_profile"] = self._state.style_profile
+        state["style_refresh"] = self._delta.style_due(bool(self._state.style_profile))
+        return state
+
     async def _run_workflow_async(
         self,
         sentences: List[str],
@@ -413,22 +451,45 @@ class AILiveAnalyzer:
         user_scores: Optional[Dict[str, Dict[str, Any]]] = None,
         speaker_sentences: Optional[List[Dict[str, Any]]] = None,
     ) -> Dict[str, Any]:
-        """异步运行 workflow，避免阻塞事件循环"""
-        loop = asyncio.get_event_loop()
-        # 在线程池中执行同步的 workflow 调用
-        result = await loop.run_in_executor(
-            None,
-            self._run_workflow,
-            sentences,
-            comments,
-            window_start,
-            user_scores,
-            speaker_sentences,
+        """异步运行 workflow：LLM 分支在事件循环内并发执行，本地节点走线程池，不阻塞事件循环"""
+        state = self._workflow_state(
+            sentences, comments, window_start, user_scores, speaker_sentences
         )
-        return result
+        loop = asyncio.get_running_loop()
+        started = time.time()
+        first_event: List[float] = []
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None
+        if ANALYSIS_STREAM and self._clients:
+
+            def on_event(event: Dict[str, Any]) -> None:
+                elapsed_ms = (time.time() - started) * 1000
+                if not first_event:
+                    first_event.append(elapsed_ms)
+                message = {
+                    "type": "ai_delta",
+                    "payload": {
+                        **event,
+                        "window_start": window_start,
+                        "elapsed_ms": round(elapsed_ms, 1),
+                    },
+                    "timestamp": time.time(),
+                }
+                # 生成节点可能在线程池中回调，统一投递回事件循环再推送
+                loop.call_soon_threadsafe(self._publish, message)
+
+        result = await self._workflow.ainvoke(state, on_event=on_event)  # type: ignore[union-attr]
+        elapsed_ms = (time.time() - started) * 1000
+        if first_event:
+            logger.info("分析卡片首个字段 %.0fms 推送，完整结果 %.0fms", first_event[0], elapsed_ms)
+        else:
+            logger.debug("分析窗口工作流耗时 %.0fms", elapsed_ms)
+        return self._format_workflow_payload(result)
 
     async def _attach_hooks(self) -> None:
         # Subscribe to live_audio final sentences
+        # local import: 音频采集依赖 pyaudio，窗口分析逻辑本身不需要
+        from .live_audio_stream_service import get_live_audio_service
+
         svc = get_live_audio_service()
         name = f"ai_{int(time.time()*1000)}"
         self._cb_name = name
@@ -469,12 +530,14 @@ class AILiveAnalyzer:
 
         # Subscribe to Douyin relay events (chat-like)
         relay = get_douyin_web_relay()
-        self._relay_queue = await relay.register_client()
+        self._relay_queue = await relay.register_internal_client("ai_live_analyzer")
 
     async def _detach_hooks(self) -> None:
         # Remove live_audio callback
         try:
             if self._cb_name:
+                from .live_audio_stream_service import get_live_audio_service
+
                 get_live_audio_service().remove_transcription_callback(self._cb_name)
         except Exception:
             pass
@@ -585,8 +648,17 @@ class AILiveAnalyzer:
         window_sentences = list(s.sentences[-100:])
         window_speaker_sentences = list(s.speaker_sentences[-100:])
         comments_window = list(s.comments[-200:])
-        transcript = "\n".join(window_sentences)
         window_started_at = time.time()
+        decision = self._delta.assess(window_sentences, comments_window)
+        if decision.action == SPARSE:
+            # 素材不足：保留本窗口内容，并入下一个窗口再分析
+            s.last_window_ts = _now_ms()
+            logger.debug(
+                "分析窗口素材不足（口播 %d 字，弹幕 %d 条），顺延",
+                decision.new_chars,
+                decision.new_comments,
+            )
+            return
         user_keys = {msg.get("user_key") for msg in comments_window if msg.get("user_key")}
         user_snapshot: Dict[str, Dict[str, Any]] = {}
         for key in user_keys:
@@ -598,7 +670,9 @@ class AILiveAnalyzer:
         s.comments.clear()
         s.speaker_sentences.clear()
 
-        if not transcript and not comments_window:
+        if not decision.run:
+            # 空窗口，或与上次分析窗口几乎相同：沿用上一张卡片，不调用 LLM
+            logger.info("分析窗口跳过（%s，相似度 %.2f）", decision.action, decision.similarity)
             return
 
         # prune stale user scores (older than 10 minutes)
@@ -626,15 +700,20 @@ class AILiveAnalyzer:
             import gc
             gc.collect()
 
-        # call AI (异步执行，避免阻塞事件循环)
+        # call AI (异步执行，避免阻塞事件循环)；内容未变化的窗口直接复用上次结果
+        cache_key = self._generate_cache_key(window_sentences, comments_window)
         try:
-            payload = await self._run_workflow_async(
-                window_sentences,
-                comments_window,
-                window_started_at,
-                user_snapshot,
-                window_speaker_sentences,
-            )
+            payload = await self._get_cached_analysis(cache_key)
+            if payload is None:
+                payload = await self._run_workflow_async(
+                    window_sentences,
+                    comments_window,
+                    window_started_at,
+                    user_snapshot,
+                    window_speaker_sentences,
+                )
+                await self._cache_analysis_result(cache_key, payload)
+            self._delta.mark_analyzed(window_sentences, comments_window, payload)
         except Exception as exc:
             logger.exception("LangGraph workflow failed, fallback to legacy analyzer: %s", exc)
             payload = {
@@ -672,6 +751,9 @@ class AILiveAnalyzer:
         await self._broadcast({"type": "ai", "payload": s.last_result, "timestamp": time.time()})
 
     async def _broadcast(self, event: Dict[str, Any]) -> None:
+        self._publish(event)
+
+    def _publish(self, event: Dict[str, Any]) -> None:
         for q in list(self._clients):
             try:
                 q.put_nowait(event)
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""弹幕互动事件批量持久化服务.
+
+单个常驻写入任务从有界队列中取事件，按批量大小或时间间隔刷新，
+每批在一个事务内写入按月分库的直播 SQLite 数据库（live_events 表）。
+入队为同步非阻塞操作，不会为单条事件创建任务。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.engine import Engine
+
+from server.database.live_event_schema import (
+    event_to_row,
+    init_live_event_tables,
+    insert_live_events,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _default_engine_factory() -> Engine:
+    from server.database.sqlite_manager import get_sqlite_manager
+
+    return get_sqlite_manager().get_current_session_database()
+
+
+class DanmuBatchWriter:
+    """有界队列 + 单写入任务的批量持久化器"""
+
+    def __init__(
+        self,
+        *,
+        session_id: Optional[str] = None,
+        live_id: Optional[str] = None,
+        batch_size: int = 500,
+        flush_interval: float = 5.0,
+        max_queue: int = 20000,
+        engine_factory: Optional[Callable[[], Engine]] = None,
+    ):
+        self.session_id = session_id
+        self.live_id = live_id
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.01, float(flush_interval))
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(self.batch_size, int(max_queue)))
+        self._engine_factory = engine_factory or _default_engine_factory
+        self._engine: Optional[Engine] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        # 停止信号：写入任务每批写完后检查；队列满时哨兵放不进去，只能靠它退出
+        self._stop_event = asyncio.Event()
+        # 指标
+        self._accepted = 0
+        self._dropped = 0
+        self._written = 0
+        self._batches = 0
+        self._failed_batches = 0
+        self._last_flush_ms: Optional[float] = None
+        self._last_flush_at: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._stop_event = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="DanmuBatchWriter")
+
+    async def stop(self) -> None:
+        """停止写入任务并刷新队列中剩余的事件"""
+        self._stopping = True
+        self._stop_event.set()
+        task = self._task
+        self._task = None
+        if task is not None:
+            # 队列为空时写入任务阻塞在 get 上，放入哨兵唤醒；
+            # 队列已满时任务不会阻塞，写完当前批次即看到停止信号
+            try:
+                self._queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        # 任务未启动或异常退出时兜底排空
+        await self._flush_remaining()
+
+    # ------------------------------------------------------------------
+    # 写入端（事件循环线程内同步调用）
+    # ------------------------------------------------------------------
+    def submit(self, event: Dict[str, Any]) -> bool:
+        if self._stopping:
+            return False
+        try:
+            self._queue.put_nowait(event_to_row(event, self.session_id, self.live_id))
+        except asyncio.QueueFull:
+            self._dropped += 1
+            if self._dropped % 1000 == 1:
+                logger.warning(f"弹幕持久化队列已满，累计丢弃 {self._dropped} 条")
+            return False
+        self._accepted += 1
+        return True
+
+    # ------------------------------------------------------------------
+    # 写入任务
+    # ------------------------------------------------------------------
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                first = await self._queue.get()
+                if first is None:
+                    break
+                batch: List[Dict[str, Any]] = [first]
+                deadline = loop.time() + self.flush_interval
+                done = False
+                while len(batch) < self.batch_size:
+                    # 先非阻塞取尽已到达的事件，再等待剩余时间
+                    try:
+                        item = self._queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        try:
+                            item = await asyncio.wait_for(self._queue.get(), timeout)
+                        except asyncio.TimeoutError:
+                            break
+                    if item is None:
+                        done = True
+                        break
+                    batch.append(item)
+                await self._flush(batch)
+                if done or self._stop_event.is_set():
+                    break
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"弹幕批量写入任务异常: {e}")
+        finally:
+            await self._flush_remaining()
+
+    async def _flush_remaining(self) -> None:
+        """排空队列，仍按批量大小分批写入"""
+        rows = self._drain_nowait()
+        for offset in range(0, len(rows), self.batch_size):
+            await self._flush(rows[offset:offset + self.batch_size])
+
+    def _drain_nowait(self) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return rows
+            if item is not None:
+                rows.append(item)
+
+    async def _flush(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._write_batch, rows)
+        except Exception as e:
+            self._failed_batches += 1
+            logger.error(f"弹幕批次写入失败({len(rows)}条): {e}")
+            return
+        self._written += len(rows)
+        self._batches += 1
+        self._last_flush_ms = (time.perf_counter() - start) * 1000
+        self._last_flush_at = time.time()
+
+    def _write_batch(self, rows: List[Dict[str, Any]]) -> None:
+        if self._engine is None:
+            engine = self._engine_factory()
+            init_live_event_tables(engine)
+            self._engine = engine
+        for offset in range(0, len(rows), self.batch_size):
+            insert_live_events(self._engine, rows[offset:offset + self.batch_size])
+
+    # ------------------------------------------------------------------
+    # 指标
+    # ------------------------------------------------------------------
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "queued": self._queue.qsize(),
+            "accepted": self._accepted,
+            "dropped": self._dropped,
+            "written": self._written,
+            "batches": self._batches,
+            "failed_batches": self._failed_batches,
+            "last_flush_ms": (
+                round(self._last_flush_ms, 2) if self._last_flush_ms is not None else None
+            ),
+            "last_flush_at": self._last_flush_at,
+        }
@@ -5,8 +5,9 @@
 
 import time
 import logging
-from typing import Optional, Dict, Any, Callable
-from dataclasses import dataclass
+from collections import deque
+from typing import Optional, Dict, Any, Callable, Deque
+from dataclasses import dataclass, field
 from enum import Enum
 
 logger = logging.getLogger(__name__)
@@ -34,6 +35,12 @@ class ConnectionState:
     success_count: int = 0
     last_success_time: Optional[float] = None
     start_time: float = 0
+    # 🆕 断线重连指标（续传 vs 完整握手）
+    resume_attempts: int = 0
+    resume_succeeded: int = 0
+    resume_rejected: int = 0
+    full_reconnects: int = 0
+    reconnect_samples: Deque[Dict[str, Any]] = field(default_factory=lambda: deque(maxlen=50))
     
     def is_healthy(self) -> bool:
         """判断连接是否健康"""
@@ -266,6 +273,67 @@ class DouyinConnectionManager:
         else:
             return "unknown"
     
+    def reset_attempts(self):
+        """连接曾正常收到数据后断开：重新计算重试次数，不视为连续失败"""
+        self.state.attempt = 0
+        self.state.consecutive_failures = 0
+
+    def record_resume_attempt(self):
+        """记录一次使用 cursor/internal_ext 的续传尝试"""
+        self.state.resume_attempts += 1
+
+    def record_reconnect(
+        self,
+        resumed: bool,
+        reconnect_ms: float,
+        gap_sec: Optional[float] = None,
+        redelivered: int = 0,
+    ):
+        """记录一次重连后收到首条消息（续传或完整握手）"""
+        if resumed:
+            self.state.resume_succeeded += 1
+        else:
+            self.state.full_reconnects += 1
+        self.state.reconnect_samples.append({
+            "resumed": resumed,
+            "reconnect_ms": round(reconnect_ms, 1),
+            "gap_sec": round(gap_sec, 3) if gap_sec is not None else None,
+            "redelivered": redelivered,
+            "time": time.time(),
+        })
+        logger.info(
+            f"🔁 重连恢复数据流（{'续传' if resumed else '完整握手'}）: "
+            f"首条消息 {reconnect_ms:.0f}ms, 断流 {gap_sec if gap_sec is not None else '-'}s, "
+            f"重复下发 {redelivered} 条"
+        )
+
+    def record_resume_rejected(self, error: str = ""):
+        """记录续传被拒（连接关闭前未收到任何数据），调用方应回退到完整握手"""
+        self.state.resume_rejected += 1
+        logger.warning(f"⚠️ 会话续传被拒绝，回退到完整握手: {error or '未收到数据'}")
+
+    def get_reconnect_stats(self) -> Dict[str, Any]:
+        """重连指标汇总：续传命中率、重连到首条消息耗时与断流时长"""
+        samples = list(self.state.reconnect_samples)
+
+        def _avg(values):
+            values = [v for v in values if v is not None]
+            return round(sum(values) / len(values), 3) if values else None
+
+        resumed = [s for s in samples if s["resumed"]]
+        full = [s for s in samples if not s["resumed"]]
+        return {
+            "resume_attempts": self.state.resume_attempts,
+            "resume_succeeded": self.state.resume_succeeded,
+            "resume_rejected": self.state.resume_rejected,
+            "full_reconnects": self.state.full_reconnects,
+            "avg_resume_reconnect_ms": _avg([s["reconnect_ms"] for s in resumed]),
+            "avg_full_reconnect_ms": _avg([s["reconnect_ms"] for s in full]),
+            "avg_gap_sec": _avg([s["gap_sec"] for s in samples]),
+            "redelivered_total": sum(s["redelivered"] for s in samples),
+            "last": samples[-1] if samples else None,
+        }
+
     def get_success_rate(self) -> float:
         """获取成功率"""
         total = self.state.success_count + self.state.total_failures
@@ -284,6 +352,7 @@ class DouyinConnectionManager:
             "success_rate": self.get_success_rate(),
             "is_healthy": self.state.is_healthy(),
             "uptime": time.time() - self.state.start_time if self.state.start_time > 0 else 0,
+            "reconnect": self.get_reconnect_stats(),
         }
     
     def reset(self):
@@ -64,7 +64,7 @@ class DouyinLiveService:
             self.current_live_id = live_id
             self.current_room_id = None
 
-            self._client_queue = await self._relay.register_client()
+            self._client_queue = await self._relay.register_internal_client("douyin_service")
             self._queue_consumer = asyncio.create_task(self._consume_events())
 
             for _ in range(20):
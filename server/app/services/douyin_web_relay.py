@@ -8,7 +8,7 @@ import threading
 import time
 import logging
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, List, Optional
 
 from server.modules.douyin.liveMan import (
     ChatMessage,
@@ -26,7 +26,16 @@ from server.modules.douyin.liveMan import (
     RoomUserSeqMessage,
     SocialMessage,
 )
+from server.utils.event_broadcaster import (
+    OVERFLOW_DROP_OLDEST,
+    BroadcastSubscriber,
+    EventBroadcaster,
+)
+from server.utils.gift_combo import GiftComboAggregator
+from server.utils.msg_dedup import MessageDeduplicator
+from server.utils.resolve_cache import ResolveCache, get_resolve_cache
 from server.utils.service_logger import log_service_start, log_service_stop
+from .danmu_batch_writer import DanmuBatchWriter
 from .douyin_connection_manager import get_connection_manager, reset_connection_manager
 
 logger = logging.getLogger(__name__)
@@ -44,9 +53,62 @@ class RelayStatus:
 class _WebRelayFetcher(DouyinLiveWebFetcher):
     """DouyinLiveWebFetcher 的特化版本, 将消息透传给回调."""
 
-    def __init__(self, live_id: str, emitter: Callable[[Dict[str, Any]], None]):
-        super().__init__(live_id)
+    def __init__(
+        self,
+        live_id: str,
+        emitter: Callable[[Dict[str, Any]], None],
+        dedup: Optional[MessageDeduplicator] = None,
+        on_first_response: Optional[Callable[["_WebRelayFetcher", int], None]] = None,
+        resolve_cache: Optional[ResolveCache] = None,
+    ):
+        super().__init__(live_id, resolve_cache=resolve_cache)
         self._emit = emitter
+        self._dedup = dedup
+        self._on_first_response = on_first_response
+        self.stopping = False
+        # 本次连接的续传/首包信息，供重连指标统计
+        self.connect_started: Optional[float] = None
+        self.first_response_time: Optional[float] = None
+        self.previous_response_time: Optional[float] = None
+        self.resumed = False
+        self._dup_baseline = 0
+
+    def start(self, resume: bool = False):  # type: ignore[override]
+        self.connect_started = time.time()
+        self.first_response_time = None
+        self.previous_response_time = self.last_response_time
+        self.resumed = bool(resume and self.can_resume)
+        self._dup_baseline = self._dedup.get_stats()["duplicates"] if self._dedup else 0
+        super().start(resume=self.resumed)
+
+    @property
+    def received_data(self) -> bool:
+        """本次连接是否收到过服务端数据（未收到视为握手/续传失败）"""
+        return self.first_response_time is not None
+
+    def _wsOnMessage(self, ws, message):  # noqa: N802
+        super()._wsOnMessage(ws, message)
+        if (
+            self.first_response_time is None
+            and self.last_response_time is not None
+            and self.connect_started is not None
+            and self.last_response_time >= self.connect_started
+        ):
+            self.first_response_time = self.last_response_time
+            if self._on_first_response is not None:
+                redelivered = 0
+                if self._dedup is not None:
+                    redelivered = self._dedup.get_stats()["duplicates"] - self._dup_baseline
+                try:
+                    self._on_first_response(self, redelivered)
+                except Exception:
+                    pass
+
+    def _acceptMessage(self, msg):  # noqa: N802
+        # 🆕 按 msg_id 去重（重连、need_ack、历史推送的重复下发），在解析前丢弃
+        if self._dedup is None:
+            return True
+        return not self._dedup.is_duplicate(getattr(msg, "msg_id", 0), getattr(msg, "method", ""))
 
     def _emit_event(self, event_type: str, payload: Dict[str, Any]) -> None:
         try:
@@ -62,6 +124,7 @@ class _WebRelayFetcher(DouyinLiveWebFetcher):
             pass
 
     def stop(self):  # type: ignore[override]
+        self.stopping = True
         try:
             if hasattr(self, "ws") and getattr(self, "ws", None):
                 super().stop()
@@ -126,6 +189,12 @@ class _WebRelayFetcher(DouyinLiveWebFetcher):
                 "diamond_count": diamond_count,
                 "fan_ticket_count": fan_ticket,
                 "gift_value": gift_value,
+                # 🆕 连击聚合所需字段
+                "gift_id": getattr(message.gift, "id", None) or message.gift_id,
+                "group_id": message.group_id,
+                "repeat_count": message.repeat_count,
+                "repeat_end": message.repeat_end,
+                "combo": bool(getattr(message.gift, "combo", False)),
             },
         )
 
@@ -301,7 +370,25 @@ class DouyinWebRelay:
         self._fetcher: Optional[_WebRelayFetcher] = None
         self._thread: Optional[threading.Thread] = None
         self._status = RelayStatus()
-        self._clients: Set[asyncio.Queue] = set()
+        # 🆕 一次编码广播：每个客户端有界队列，溢出按策略丢弃最旧/断开
+        import os
+        self._broadcaster = EventBroadcaster(
+            default_maxsize=int(os.getenv("DANMU_CLIENT_QUEUE_SIZE", "1000")),
+            default_overflow=os.getenv("DANMU_CLIENT_OVERFLOW", "drop_oldest"),
+        )
+        # 🆕 msg_id 去重（跨重连保留，切换直播间时清空）
+        self._dedup = MessageDeduplicator(
+            horizon_sec=float(os.getenv("DANMU_DEDUP_HORIZON_SEC", "600")),
+            max_entries=int(os.getenv("DANMU_DEDUP_MAX_ENTRIES", "200000")),
+        )
+        self._dedup_live_id: Optional[str] = None
+        # 🆕 礼物连击聚合：中间 repeat 更新合并为一条权威 gift 事件 + 低频 gift_progress
+        self._gift_combo_enabled: bool = bool(int(os.getenv("DANMU_GIFT_COMBO_ENABLED", "1")))
+        self._gift_combo = GiftComboAggregator(
+            window_sec=float(os.getenv("DANMU_GIFT_COMBO_WINDOW_SEC", "3.0")),
+            progress_interval_sec=float(os.getenv("DANMU_GIFT_PROGRESS_INTERVAL_SEC", "1.0")),
+        )
+        self._gift_combo_task: Optional[asyncio.Task] = None
         self._last_status_event: Optional[Dict[str, Any]] = None
         self._last_rank_event: Optional[Dict[str, Any]] = None
         self._lock = asyncio.Lock()
@@ -318,28 +405,48 @@ class DouyinWebRelay:
         self._last_signature_check: Optional[float] = None  # 上次签名检查时间
         self._health_check_task: Optional[asyncio.Task] = None  # 健康检查任务
         
-        # 🆕 Redis批量写入配置（弹幕数据）
-        import os
-        self._redis_batch_enabled: bool = bool(int(os.getenv("REDIS_BATCH_ENABLED", "1")))
-        self._redis_batch_size: int = int(os.getenv("DANMU_BATCH_SIZE", "500"))
-        self._redis_batch_interval: float = float(os.getenv("DANMU_BATCH_INTERVAL", "5.0"))
-        self._redis_batch_buffer: List[Dict[str, Any]] = []
-        self._redis_batch_task: Optional[asyncio.Task] = None
+        # 🆕 弹幕批量入库配置（单写入任务 + 有界队列，写入直播 SQLite 分库）
+        self._danmu_batch_enabled: bool = bool(int(os.getenv("REDIS_BATCH_ENABLED", "1")))
+        self._danmu_batch_size: int = int(os.getenv("DANMU_BATCH_SIZE", "500"))
+        self._danmu_batch_interval: float = float(os.getenv("DANMU_BATCH_INTERVAL", "5.0"))
+        self._danmu_batch_queue: int = int(os.getenv("DANMU_BATCH_QUEUE_SIZE", "20000"))
+        self._batch_writer: Optional[DanmuBatchWriter] = None
+
+        # 🆕 断线续传：重连时沿用 cursor/internal_ext，不重新解析房间和签名
+        self._session_resume_enabled: bool = bool(int(os.getenv("DOUYIN_SESSION_RESUME", "1")))
+        self._resume_delay: float = float(os.getenv("DOUYIN_RESUME_DELAY", "0.5"))
+        # 🆕 room_id / ttwid 共享解析缓存（内存 + 磁盘，跨重启复用）
+        self._resolve_cache: Optional[ResolveCache] = (
+            get_resolve_cache() if bool(int(os.getenv("DOUYIN_RESOLVE_CACHE", "1"))) else None
+        )
 
     # ------------------------------------------------------------------
     # 客户端管理
     # ------------------------------------------------------------------
-    async def register_client(self) -> asyncio.Queue:
-        queue: asyncio.Queue = asyncio.Queue()
-        self._clients.add(queue)
+    async def register_client(
+        self,
+        maxsize: Optional[int] = None,
+        overflow: Optional[str] = None,
+        name: str = "",
+    ) -> BroadcastSubscriber:
+        queue = self._broadcaster.subscribe(maxsize=maxsize, overflow=overflow, name=name)
         if self._last_status_event:
             queue.put_nowait(self._last_status_event)
         if self._last_rank_event:
             queue.put_nowait(self._last_rank_event)
         return queue
 
+    async def register_internal_client(self, name: str) -> BroadcastSubscriber:
+        """服务内部的消费者（分析、报告、转发）：固定按 drop_oldest 处理溢出，
+        不受 DANMU_CLIENT_OVERFLOW 影响，积压时丢旧事件而不是被断开后失去事件源"""
+        return await self.register_client(overflow=OVERFLOW_DROP_OLDEST, name=name)
+
     async def unregister_client(self, queue: asyncio.Queue) -> None:
-        self._clients.discard(queue)
+        self._broadcaster.unsubscribe(queue)
+
+    def get_client_stats(self) -> Dict[str, Any]:
+        """各订阅客户端的队列深度、丢弃数与滞后指标"""
+        return self._broadcaster.stats()
 
     # ------------------------------------------------------------------
     # 启动 / 停止
@@ -349,7 +456,8 @@ class DouyinWebRelay:
             if self._status.is_running:
                 if self._status.live_id == live_id:
                     return {"success": True, "message": "已经在抓取该直播间"}
-                await self.stop()
+                # 已持有 self._lock（非可重入），直接调用无锁版本
+                await self._stop_locked()
 
             self._event_loop = asyncio.get_running_loop()
             self._status = RelayStatus(is_running=True, live_id=live_id, session_id=session_id)
@@ -380,7 +488,16 @@ class DouyinWebRelay:
                 
                 self._event_loop.call_soon_threadsafe(self._dispatch_event, event)
 
-            self._fetcher = _WebRelayFetcher(live_id, emitter)
+            if self._dedup_live_id != live_id:
+                self._dedup.clear()
+                self._dedup_live_id = live_id
+            self._fetcher = _WebRelayFetcher(
+                live_id,
+                emitter,
+                dedup=self._dedup,
+                on_first_response=self._on_first_response,
+                resolve_cache=self._resolve_cache,
+            )
             # 🆕 重置监控指标
             self._message_count = 0
             self._valid_message_count = 0
@@ -392,6 +509,27 @@ class DouyinWebRelay:
             # 🆕 启动健康检查任务
             self._health_check_task = asyncio.create_task(self._health_check_loop())
 
+            # 🆕 启动礼物连击超时清理任务
+            if self._gift_combo_task is not None:
+                self._gift_combo_task.cancel()
+                self._gift_combo_task = None
+            if self._gift_combo_enabled:
+                self._gift_combo_task = asyncio.create_task(self._gift_combo_loop())
+
+            # 🆕 启动弹幕批量写入任务（抓取线程自行结束时旧写入器可能仍在，先排空）
+            if self._batch_writer is not None:
+                await self._batch_writer.stop()
+                self._batch_writer = None
+            if self._danmu_batch_enabled:
+                self._batch_writer = DanmuBatchWriter(
+                    session_id=session_id,
+                    live_id=live_id,
+                    batch_size=self._danmu_batch_size,
+                    flush_interval=self._danmu_batch_interval,
+                    max_queue=self._danmu_batch_queue,
+                )
+                self._batch_writer.start()
+
             def runner():
                 try:
                     emitter(
@@ -509,8 +647,59 @@ class DouyinWebRelay:
                             "timestamp": time.time(),
                         }
                     )
-                    # 直接调用 start()，内部会自动处理 WebSocket 连接
-                    self._fetcher.start()
+                    # 连接断开后自动重连：优先用服务端下发的 cursor/internal_ext 续传，
+                    # 续传被拒（未收到任何数据即关闭）时回退到完整握手
+                    fetcher = self._fetcher
+                    resume = False
+                    while fetcher is not None:
+                        if fetcher.stopping or self._fetcher is not fetcher:
+                            break
+                        if resume:
+                            conn_mgr.record_resume_attempt()
+                        try:
+                            fetcher.start(resume=resume)
+                        except Exception as exc:
+                            logger.warning(f"WebSocket 连接异常: {exc}")
+                        replaced = self._fetcher is not fetcher
+                        if fetcher.stopping or replaced or not self._status.is_running:
+                            break
+
+                        if fetcher.received_data:
+                            conn_mgr.reset_attempts()
+                        else:
+                            if fetcher.resumed:
+                                conn_mgr.record_resume_rejected()
+                            conn_mgr.record_failure("WebSocket 连接关闭前未收到数据")
+                            fetcher.resetSession()
+                        resume = self._session_resume_enabled and fetcher.can_resume
+
+                        if not conn_mgr.should_retry():
+                            emitter(
+                                {
+                                    "type": "error",
+                                    "payload": {
+                                        "message": "WebSocket 重连失败: "
+                                        f"{conn_mgr.get_status()['last_error']}"
+                                    },
+                                    "timestamp": time.time(),
+                                }
+                            )
+                            break
+                        attempt = conn_mgr.start_attempt()
+                        delay = self._resume_delay if resume else conn_mgr.calculate_delay()
+                        emitter(
+                            {
+                                "type": "status",
+                                "payload": {
+                                    "stage": "reconnecting",
+                                    "resume": resume,
+                                    "attempt": attempt,
+                                    "next_retry_in": round(delay, 2),
+                                },
+                                "timestamp": time.time(),
+                            }
+                        )
+                        time.sleep(delay)
                     
                 except Exception as exc:
                     emitter(
@@ -566,69 +755,82 @@ class DouyinWebRelay:
 
     async def stop(self) -> Dict[str, Any]:
         async with self._lock:
-            if not self._status.is_running:
-                return {"success": True, "message": "未在运行"}
+            return await self._stop_locked()
+
+    async def _stop_locked(self) -> Dict[str, Any]:
+        """停止抓取，调用方需持有 self._lock"""
+        if not self._status.is_running:
+            return {"success": True, "message": "未在运行"}
+
+        # 🆕 更新统一会话状态
+        try:
+            if self._status.session_id:
+                from .live_session_manager import get_session_manager
+                session_mgr = get_session_manager()
+                if session_mgr:
+                    await session_mgr.update_session(
+                        douyin_relay_active=False
+                    )
+        except Exception as e:
+            logger.warning(f"更新统一会话状态失败: {e}")
+
+        fetcher = self._fetcher
+        thread = self._thread
+        live_id = self._status.live_id
+        room_id = self._status.room_id
+        session_id = self._status.session_id
+        self._status.is_running = False
+        self._status.live_id = None
+        self._status.session_id = None
+
+        log_service_stop(
+            "抖音直播互动服务", live_id=live_id, room_id=room_id, session_id=session_id
+        )
 
-            # 🆕 更新统一会话状态
+        if fetcher:
+            await asyncio.to_thread(fetcher.stop)
+        if thread and thread.is_alive():
+            await asyncio.to_thread(thread.join, 5)
+
+        self._emit_status("stopped", {})
+        self._fetcher = None
+        self._thread = None
+        self._status.room_id = None
+        # close persistence
+        try:
+            if self._writer is not None:
+                self._writer.close()
+        except Exception:
+            pass
+        self._writer = None
+        # 🆕 停止健康检查任务
+        if self._health_check_task:
+            self._health_check_task.cancel()
             try:
-                if self._status.session_id:
-                    from .live_session_manager import get_session_manager
-                    session_mgr = get_session_manager()
-                    if session_mgr:
-                        await session_mgr.update_session(
-                            douyin_relay_active=False
-                        )
-            except Exception as e:
-                logger.warning(f"更新统一会话状态失败: {e}")
-
-            fetcher = self._fetcher
-            thread = self._thread
-            live_id = self._status.live_id
-            room_id = self._status.room_id
-            session_id = self._status.session_id
-            self._status.is_running = False
-            self._status.live_id = None
-            self._status.session_id = None
-
-            log_service_stop("抖音直播互动服务", live_id=live_id, room_id=room_id, session_id=session_id)
-
-            if fetcher:
-                await asyncio.to_thread(fetcher.stop)
-            if thread and thread.is_alive():
-                await asyncio.to_thread(thread.join, 5)
-
-            self._emit_status("stopped", {})
-            self._fetcher = None
-            self._thread = None
-            self._status.room_id = None
-            # close persistence
+                await self._health_check_task
+            except asyncio.CancelledError:
+                pass
+            self._health_check_task = None
+        
+        # 🆕 停止连击清理任务，未结束的连击按当前累计数量输出
+        if self._gift_combo_task:
+            self._gift_combo_task.cancel()
             try:
-                if self._writer is not None:
-                    self._writer.close()
-            except Exception:
+                await self._gift_combo_task
+            except asyncio.CancelledError:
                 pass
-            self._writer = None
-            # 🆕 停止健康检查任务
-            if self._health_check_task:
-                self._health_check_task.cancel()
-                try:
-                    await self._health_check_task
-                except asyncio.CancelledError:
-                    pass
-                self._health_check_task = None
-            
-            # 🆕 停止批量任务并flush剩余数据
-            if self._redis_batch_task:
-                self._redis_batch_task.cancel()
-                try:
-                    await self._redis_batch_task
-                except asyncio.CancelledError:
-                    pass
-                self._redis_batch_task = None
-            # 最后flush一次确保没有遗漏
-            await self._flush_danmu_batch()
-            
-            return {"success": True}
+            self._gift_combo_task = None
+        for combo_event in self._gift_combo.sweep(force=True):
+            self._publish_event(combo_event)
+
+        # 🆕 停止批量写入任务并flush剩余数据
+        if self._batch_writer is not None:
+            writer = self._batch_writer
+            self._batch_writer = None
+            await writer.stop()
+            logger.info(f"弹幕批量入库完成: {writer.get_stats()}")
+        
+        return {"success": True}
 
     def _thread_finished(self) -> None:
         self._emit_status("stopped", {})
@@ -638,10 +840,40 @@ class DouyinWebRelay:
         self._status.live_id = None
         self._status.room_id = None
 
+    def _on_first_response(self, fetcher: _WebRelayFetcher, redelivered: int) -> None:
+        """抓取线程回调：重连后收到首个数据包，记录重连耗时与断流时长"""
+        if fetcher.previous_response_time is None or fetcher.first_response_time is None:
+            return  # 首次连接，不是重连
+        connect_started = fetcher.connect_started or fetcher.first_response_time
+        reconnect_ms = (fetcher.first_response_time - connect_started) * 1000
+        gap_sec = fetcher.first_response_time - fetcher.previous_response_time
+        get_connection_manager().record_reconnect(
+            resumed=fetcher.resumed,
+            reconnect_ms=reconnect_ms,
+            gap_sec=gap_sec,
+            redelivered=redelivered,
+        )
+        self._emit_status(
+            "resumed" if fetcher.resumed else "reconnected",
+            {
+                "reconnect_ms": round(reconnect_ms, 1),
+                "gap_sec": round(gap_sec, 3),
+                "redelivered": redelivered,
+            },
+        )
+
     # ------------------------------------------------------------------
     # 事件派发
     # ------------------------------------------------------------------
     def _dispatch_event(self, event: Dict[str, Any]) -> None:
+        if self._gift_combo_enabled and event.get("type") == "gift":
+            for combo_event in self._gift_combo.feed(event):
+                self._publish_event(combo_event)
+            return
+        self._publish_event(event)
+
+    def _publish_event(self, event: Dict[str, Any]) -> None:
+        event = self._broadcaster.publish(event)
         event_type = event.get("type")
         if event_type == "status":
             stage = (event.get("payload") or {}).get("stage")
@@ -659,11 +891,6 @@ class DouyinWebRelay:
             self._last_rank_event = event
         elif event_type == "error":
             self._status.last_error = (event.get("payload") or {}).get("message")
-        for queue in list(self._clients):
-            try:
-                queue.put_nowait(event)
-            except asyncio.QueueFull:
-                pass
         # Persist non-status events
         try:
             if self._writer is not None and event_type not in {"status"}:
@@ -671,9 +898,10 @@ class DouyinWebRelay:
         except Exception:
             pass
         
-        # 🆕 Redis批量缓冲（弹幕和互动数据）
-        if self._redis_batch_enabled and event_type in {"chat", "gift", "like", "member", "follow"}:
-            asyncio.create_task(self._buffer_danmu_for_batch(event))
+        # 🆕 批量入库（弹幕和互动数据），同步入队，不创建任务
+        persisted = {"chat", "gift", "like", "member", "follow"}
+        if self._batch_writer is not None and event_type in persisted:
+            self._batch_writer.submit(event)
 
     def _emit_status(
         self, stage: str, payload: Optional[Dict[str, Any]] = None
@@ -729,6 +957,12 @@ class DouyinWebRelay:
             "websocket_connected": self._websocket_connected,
             "signature_failures": self._signature_failures,
             "last_signature_check": self._last_signature_check,
+            "clients": self._broadcaster.stats(),
+            "persistence": self._batch_writer.get_stats() if self._batch_writer else None,
+            "dedup": self._dedup.get_stats(),
+            "gift_combo": self._gift_combo.get_stats(),
+            "reconnect": get_connection_manager().get_reconnect_stats(),
+            "resolve_cache": self._resolve_cache.get_stats() if self._resolve_cache else None,
         }
     
     async def _health_check_loop(self):
@@ -775,6 +1009,17 @@ class DouyinWebRelay:
         except Exception as e:
             logger.error(f"健康检查任务异常: {e}")
 
+    async def _gift_combo_loop(self) -> None:
+        """🆕 定期结束静默超时的礼物连击"""
+        interval = max(0.1, min(1.0, self._gift_combo.window_sec / 2))
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                for combo_event in self._gift_combo.sweep():
+                    self._publish_event(combo_event)
+        except asyncio.CancelledError:
+            pass
+
     def get_persist(self) -> Dict[str, Any]:
         return {
             "persist_enabled": self._persist_enabled,
@@ -788,61 +1033,6 @@ class DouyinWebRelay:
             self._persist_root = str(root)
         return {"persist_enabled": self._persist_enabled, "persist_root": self._persist_root}
 
-    # 🆕 Redis批量入库相关方法
-    async def _buffer_danmu_for_batch(self, event: Dict[str, Any]) -> None:
-        """将弹幕/互动事件加入批量缓冲区"""
-        try:
-            async with self._lock:
-                self._redis_batch_buffer.append(event)
-                
-                # 如果达到批量大小，立即触发写入
-                if len(self._redis_batch_buffer) >= self._redis_batch_size:
-                    await self._flush_danmu_batch()
-            
-            # 启动后台批量任务（如果尚未启动）
-            if self._redis_batch_task is None or self._redis_batch_task.done():
-                self._redis_batch_task = asyncio.create_task(self._batch_danmu_worker())
-        except Exception as e:
-            logger.error(f"缓冲弹幕数据失败: {e}")
-
-    async def _batch_danmu_worker(self) -> None:
-        """后台批量写入任务"""
-        try:
-            while self._status.is_running:
-                await asyncio.sleep(self._redis_batch_interval)
-                await self._flush_danmu_batch()
-        except asyncio.CancelledError:
-            # 任务被取消时，最后flush一次
-            await self._flush_danmu_batch()
-        except Exception as e:
-            logger.error(f"批量弹幕任务异常: {e}")
-
-    async def _flush_danmu_batch(self) -> None:
-        """将缓冲的弹幕数据批量处理（已移除Redis写入，保留批量处理框架）"""
-        try:
-            async with self._lock:
-                if not self._redis_batch_buffer:
-                    return
-
-                batch_to_write = self._redis_batch_buffer.copy()
-                self._redis_batch_buffer.clear()
-
-            if not batch_to_write:
-                return
-
-            # 批量处理弹幕数据（不再写入Redis）
-            # 分类统计
-            chat_count = sum(1 for e in batch_to_write if e.get("type") == "chat")
-            gift_count = sum(1 for e in batch_to_write if e.get("type") == "gift")
-            like_count = sum(e.get("payload", {}).get("count", 1) for e in batch_to_write if e.get("type") == "like")
-
-            logger.debug(
-                f"批量处理弹幕: 弹幕{chat_count}条, 礼物{gift_count}条, 点赞{like_count}次"
-            )
-
-        except Exception as e:
-            logger.error(f"刷新弹幕批次失败: {e}")
-
 
 _relay_instance: Optional[DouyinWebRelay] = None
 
@@ -189,6 +189,8 @@ class LiveAudioStreamService:
 
         # Hotword replacer (optional)
         self._hotword: Optional[Any] = None
+        # 主播级规则的查找键（live_id、主播名），每句解析以跟随规则热加载
+        self._hotword_keys: tuple = ()
         try:
             if HotwordReplacer is not None:
                 self._hotword = HotwordReplacer()
@@ -407,6 +409,7 @@ class LiveAudioStreamService:
             )
             self._agc_gain = 1.0
             self._init_diarizer()
+            self._hotword_keys = (live_id, anchor_name)
             if self._sv is not None:
                 seed_terms: List[str] = []
                 if anchor_name:
@@ -944,7 +947,8 @@ class LiveAudioStreamService:
         # Hotword replace
         if self._hotword is not None and clean:
             try:
-                clean = self._hotword.apply(clean)
+                anchor = self._hotword.anchor_for(*self._hotword_keys)
+                clean = self._hotword.apply(clean, anchor=anchor)
             except Exception:
                 pass
         # Anti-hallucination
@@ -1853,12 +1857,16 @@ class LiveAudioStreamService:
         return {"persist_enabled": self.persist_enabled, "persist_root": self.persist_root or "records/live_logs"}
 
     # Hotwords update from API
-    def update_hotwords(self, replace: Dict[str, List[str]]) -> None:
+    def update_hotwords(
+        self,
+        replace: Dict[str, List[str]],
+        anchors: Optional[Dict[str, Dict[str, List[str]]]] = None,
+    ) -> None:
         try:
             if self._hotword is None and HotwordReplacer is not None:
                 self._hotword = HotwordReplacer()
             if self._hotword is not None:
-                self._hotword.set_rules(replace)  # type: ignore
+                self._hotword.set_rules(replace, anchors)  # type: ignore
         except Exception:
             pass
 
@@ -46,6 +46,7 @@ from server.modules.ast.sensevoice_service import (  # type: ignore
     SenseVoiceService,
 )
 from ...utils.async_process import AsyncProcess, create_subprocess_exec
+from ...utils.compact_event import EventCompactor, to_dict as compact_to_dict
 
 logger = logging.getLogger(__name__)
 
@@ -99,7 +100,9 @@ class LiveReportService:
         self._session: Optional[LiveReportStatus] = None
         self._ffmpeg_proc: Optional[AsyncProcess] = None
         self._comment_queue: Optional[asyncio.Queue] = None
-        self._comments: List[Dict[str, Any]] = []
+        # 🆕 弹幕以紧凑记录保存（用户信息按 user_id 驻留），仅在落盘/接口边界还原为 dict
+        self._comments: List[Any] = []
+        self._compactor = EventCompactor()
         self._comment_task: Optional[asyncio.Task] = None
         self._relay_client_queue: Optional[asyncio.Queue] = None
 
@@ -250,7 +253,7 @@ class LiveReportService:
                 with comments_file.open("r", encoding="utf-8") as f:
                     for line in f:
                         try:
-                            self._comments.append(json.loads(line))
+                            self._comments.append(self._compactor.compact(json.loads(line)))
                         except Exception:
                             pass
                 logger.info(f"✅ 加载了 {len(self._comments)} 条弹幕记录")
@@ -419,7 +422,7 @@ class LiveReportService:
             else:
                 logger.warning(f"⚠️ 无法获取房间ID，弹幕采集可能失败")
             
-            self._relay_client_queue = await relay.register_client()
+            self._relay_client_queue = await relay.register_internal_client("live_report")
             logger.info(f"✅ 注册弹幕客户端成功，队列: {self._relay_client_queue}")
             
             self._comment_task = asyncio.create_task(self._consume_danmu())
@@ -635,7 +638,7 @@ class LiveReportService:
                 await relay.start(self._session.room_id)
                 logger.info(f"✅ 弹幕 relay 重启成功")
             
-            self._relay_client_queue = await relay.register_client()
+            self._relay_client_queue = await relay.register_internal_client("live_report")
             logger.info(f"✅ 重新注册弹幕客户端")
             
             self._comment_task = asyncio.create_task(self._consume_danmu())
@@ -734,7 +737,7 @@ class LiveReportService:
             comments_path = artifacts_dir / "comments.jsonl"
             with comments_path.open("w", encoding="utf-8") as f:
                 for ev in self._comments:
-                    f.write(json.dumps(ev, ensure_ascii=False) + "\n")
+                    f.write(json.dumps(compact_to_dict(ev), ensure_ascii=False) + "\n")
             
             logger.info(f"💾 已保存 {len(self._comments)} 条弹幕记录")
         except Exception as e:
@@ -756,7 +759,7 @@ class LiveReportService:
         comments_path = artifacts_dir / "comments.jsonl"
         with comments_path.open("w", encoding="utf-8") as f:
             for ev in self._comments:
-                f.write(json.dumps(ev, ensure_ascii=False) + "\n")
+                f.write(json.dumps(compact_to_dict(ev), ensure_ascii=False) + "\n")
 
         # Transcribe each segment with SenseVoice
         transcripts: List[Dict[str, Any]] = []
@@ -868,7 +871,7 @@ class LiveReportService:
                 transcript_data = transcript_txt  # str 格式（降级）
             
             # 🔧 修复：读取弹幕数据（comments.jsonl）
-            comments_data = self._comments  # 默认使用内存中的评论
+            comments_data = [compact_to_dict(ev) for ev in self._comments]  # 默认使用内存中的评论
             comments_jsonl_path = artifacts_dir / "comments.jsonl"
             if comments_jsonl_path.exists():
                 try:
@@ -1021,7 +1024,7 @@ class LiveReportService:
         report_html = self._render_html_report(
             session=self._session,
             transcript=transcript_txt,
-            comments=self._comments,
+            comments=[compact_to_dict(ev) for ev in self._comments],
             ai=ai_summary,
         )
         report_path = artifacts_dir / "report.html"
@@ -1502,8 +1505,11 @@ class LiveReportService:
 
     def _slice_comments(self, start_ts: Optional[int], end_ts: Optional[int]) -> List[Dict[str, Any]]:
         if start_ts is None or end_ts is None:
-            return list(self._comments)
-        return [ev for ev in self._comments if isinstance(ev, dict) and start_ts <= int(ev.get("ts", 0)) <= end_ts]
+            return [compact_to_dict(ev) for ev in self._comments]
+        return [
+            compact_to_dict(ev) for ev in self._comments
+            if hasattr(ev, "get") and start_ts <= int(ev.get("ts", 0)) <= end_ts
+        ]
 
     async def _process_and_analyze_segment(self, seg_meta: Dict[str, Any]) -> None:
         try:
@@ -1579,10 +1585,13 @@ class LiveReportService:
                 if event_count % 10 == 1:
                     logger.info(f"📊 已接收 {event_count} 个弹幕事件，当前聚合数据: follows={self._agg.get('follows', 0)}, entries={self._agg.get('entries', 0)}, likes={self._agg.get('like_total', 0)}")
                 
-                # annotate minimal fields
-                ev.setdefault("ts", int(time.time() * 1000))
-                ev.setdefault("source", "douyin")
-                self._comments.append(ev)
+                # annotate minimal fields（广播事件为多端共享对象，不直接修改）
+                ev = {
+                    **ev,
+                    "ts": ev.get("ts") or int(time.time() * 1000),
+                    "source": ev.get("source") or "douyin",
+                }
+                self._comments.append(self._compactor.compact(ev))
                 
                 # 🆕 内存优化：限制评论数量
                 if len(self._comments) > 10000:
@@ -81,7 +81,7 @@ class LiveTestHub:
         if not result.get("success"):
             raise RuntimeError(result.get("error") or "启动 Douyin 抓取失败")
 
-        self._douyin_queue = await relay.register_client()
+        self._douyin_queue = await relay.register_internal_client("live_test_hub")
         self._douyin_forward_task = asyncio.create_task(self._forward_douyin_events())
         self._status.douyin_running = True
         self._emit_status("douyin_started", {"live_id": live_id})
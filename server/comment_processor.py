@@ -7,14 +7,16 @@ import re
 import json
 import time
 import threading
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any, Tuple
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
+from collections import Counter, deque
 from dataclasses import asdict
 
 from .models import Comment, HotWord, data_manager
+from .nlp.hotword_engine import WORD_CATEGORIES, HotwordEngine, classify_word
+from .utils.aho_corasick import Hit, LexiconMatcher
 from .utils.helpers import format_time, safe_get, Timer
-from .utils.validators import validate_comment, sanitize_input
+from .utils.validators import validate_comments, sanitize_input
 
 
 class CommentProcessor:
@@ -23,54 +25,97 @@ class CommentProcessor:
     def __init__(self):
         self.is_running = False
         self.processing_thread = None
-        self.comment_queue = deque(maxlen=10000)  # 评论队列
-        self.hot_words = defaultdict(int)  # 热词统计
-        self.word_trends = defaultdict(list)  # 词汇趋势
+        # 评论队列：(入队时间 monotonic, 原始数据)，新评论到达时通过条件变量唤醒处理线程
+        self.comment_queue: deque = deque(maxlen=10000)
+        self._queue_cond = threading.Condition()
         self.callbacks = []  # 回调函数列表
         self.stats = {
             'total_comments': 0,
             'processed_comments': 0,
             'error_comments': 0,
             'start_time': None,
-            'last_comment_time': None
+            'last_comment_time': None,
+            'dropped_comments': 0,
+            'spam_comments': 0,
+            'batches': 0,
         }
+        # 吞吐与排队延迟指标（处理线程写入）
+        self._metrics = {
+            'last_batch_size': 0,
+            'max_batch_size': 0,
+            'last_batch_ms': 0.0,
+            'last_queue_lag_ms': 0.0,
+            'max_queue_lag_ms': 0.0,
+        }
+        self._throughput_window: deque = deque()  # (完成时间, 条数)，最近 10 秒
         
         # 配置参数
         self.config = {
             'hot_word_threshold': 3,  # 热词阈值
             'max_hot_words': 50,      # 最大热词数量
+            'hotword_capacity': 2000,  # 热词引擎跟踪的词数上限（固定内存）
             'trend_window': 300,      # 趋势窗口（秒）
             'cleanup_interval': 600,  # 清理间隔（秒）
-            'batch_size': 10,         # 批处理大小
+            'max_batch_size': 2000,   # 单批最大条数（积压越多批次越大）
+            'min_batch_size': 32,     # 低于此数量时短暂等待凑批
+            'batch_linger_ms': 5,     # 凑批最长等待（毫秒）
             'enable_sentiment': True,  # 启用情感分析
             'filter_spam': True,      # 过滤垃圾评论
             'min_word_length': 2,     # 最小词长
             'max_word_length': 20     # 最大词长
         }
         
-        # 垃圾评论过滤规则
+        # 垃圾评论过滤规则（结构性规则用正则，广告词走词典自动机）
         self.spam_patterns = [
             r'(.)\1{4,}',  # 重复字符
             r'[^\u4e00-\u9fa5a-zA-Z0-9\s\.,!?，。！？]',  # 特殊字符
-            r'(微信|QQ|加我|私聊|联系)',  # 广告词
         ]
-        self.spam_regex = [re.compile(pattern) for pattern in self.spam_patterns]
+        # 合并为单个正则，一次扫描完成检查（重复字符规则须在首位，保持 \1 分组编号）
+        self._spam_combined = re.compile('|'.join(f'(?:{p})' for p in self.spam_patterns))
+        self.spam_keywords = ['微信', 'QQ', '加我', '私聊', '联系']  # 广告词
+        self._word_regex = re.compile(r'[\u4e00-\u9fa5a-zA-Z]+')
         
         # 情感词典（简化版）
         self.sentiment_dict = {
             'positive': ['好', '棒', '赞', '喜欢', '爱', '优秀', '完美', '满意', '开心', '高兴'],
             'negative': ['差', '烂', '垃圾', '讨厌', '恨', '失望', '糟糕', '不满', '生气', '愤怒'],
-            'neutral': ['一般', '还行', '普通', '平常', '正常', '可以', '行吧', '凑合']
+            'neutral': ['一般', '还行', '普通', '平常', '正常', '可以', '行吧', '凑合'],
+            'negation': ['不', '没', '别', '无', '未'],  # 否定词：紧邻情感词前时反转极性
+            'intensity': ['很', '非常', '太', '超级', '特别', '十分', '真的'],  # 程度词：加权
         }
         
-        # 词汇分类
-        self.word_categories = {
-            'product': ['产品', '商品', '价格', '质量', '功能', '效果', '材质', '品牌'],
-            'emotion': ['喜欢', '爱', '讨厌', '恨', '开心', '生气', '满意', '失望'],
-            'question': ['怎么', '什么', '哪里', '为什么', '如何', '多少', '几个', '什么时候'],
-            'interaction': ['主播', '老师', '老板', '美女', '帅哥', '大家', '朋友们']
+        # 词汇分类（与热词分析器共用 hotword_engine.WORD_CATEGORIES）
+        self.word_categories = WORD_CATEGORIES
+        # 所有词族编译进同一个 Aho-Corasick 自动机，每条评论只扫描一次
+        self.lexicon = LexiconMatcher(self._lexicon_families())
+        # 流式热词引擎：有界内存，分类在词首次被跟踪时计算一次
+        self.hotword_engine = HotwordEngine(
+            capacity=self.config['hotword_capacity'],
+            classifier=self._classify_word,
+        )
+    
+    def _lexicon_families(self) -> Dict[str, List[str]]:
+        return {
+            'spam': self.spam_keywords,
+            'positive': self.sentiment_dict['positive'],
+            'negative': self.sentiment_dict['negative'],
+            'negation': self.sentiment_dict['negation'],
+            'intensity': self.sentiment_dict['intensity'],
         }
     
+    def update_lexicon(self, family: str, words: List[str]):
+        """
+        替换一个词族（spam/positive/negative/negation/intensity）并原子重建自动机，
+        处理线程中正在进行的扫描不受影响
+        """
+        if family == 'spam':
+            self.spam_keywords = list(words)
+        elif family in self.sentiment_dict:
+            self.sentiment_dict[family] = list(words)
+        else:
+            raise ValueError(f"未知词族: {family}")
+        self.lexicon.update({family: words})
+    
     def start(self):
         """启动评论处理器"""
         if self.is_running:
@@ -88,32 +133,38 @@ class CommentProcessor:
             return
         
         self.is_running = False
+        with self._queue_cond:
+            self._queue_cond.notify_all()
         if self.processing_thread:
             self.processing_thread.join(timeout=5)
         print(f"[{format_time()}] 评论处理器已停止")
     
     def add_comment(self, comment_data: Dict[str, Any]) -> bool:
-        """添加评论到处理队列"""
-        try:
-            # 数据清理和验证
-            cleaned_data = sanitize_input(comment_data)
-            validated_data = validate_comment(cleaned_data)
-            
-            # 添加时间戳
-            if 'timestamp' not in validated_data or not validated_data['timestamp']:
-                validated_data['timestamp'] = datetime.now()
-            
-            # 添加到队列
-            self.comment_queue.append(validated_data)
-            self.stats['total_comments'] += 1
-            self.stats['last_comment_time'] = datetime.now()
-            
-            return True
-            
-        except Exception as e:
+        """
+        添加评论到处理队列（清理、验证在处理线程中按批完成，这里只入队并唤醒）
+        """
+        if not isinstance(comment_data, dict):
             self.stats['error_comments'] += 1
-            print(f"[{format_time()}] 添加评论失败: {e}")
             return False
+        return self.add_comments([comment_data]) == 1
+    
+    def add_comments(self, comments: List[Dict[str, Any]]) -> int:
+        """批量添加评论，返回入队条数"""
+        now = time.monotonic()
+        items = [(now, c) for c in comments if isinstance(c, dict)]
+        if not items:
+            return 0
+        with self._queue_cond:
+            incoming = len(self.comment_queue) + len(items)
+            overflow = incoming - (self.comment_queue.maxlen or 0)
+            if self.comment_queue.maxlen and overflow > 0:
+                # 队列满时 deque 丢弃最旧的评论
+                self.stats['dropped_comments'] += min(overflow, incoming)
+            self.comment_queue.extend(items)
+            self.stats['total_comments'] += len(items)
+            self.stats['last_comment_time'] = datetime.now()
+            self._queue_cond.notify()
+        return len(items)
     
     def add_callback(self, callback: Callable[[Comment], None]):
         """添加评论处理回调函数"""
@@ -127,9 +178,18 @@ class CommentProcessor:
     def get_stats(self) -> Dict[str, Any]:
         """获取处理统计信息"""
         stats = self.stats.copy()
-        stats['queue_size'] = len(self.comment_queue)
-        stats['hot_words_count'] = len(self.hot_words)
+        # 处理线程会并发弹出队首，队列长度与队首时间在锁内一起读取
+        with self._queue_cond:
+            queue_size = len(self.comment_queue)
+            oldest = self.comment_queue[0][0] if self.comment_queue else None
+        stats['queue_size'] = queue_size
+        stats['hot_words_count'] = len(self.hotword_engine)
         stats['is_running'] = self.is_running
+        stats.update(self._metrics)
+        stats['throughput_per_sec'] = self._current_throughput()
+        stats['queue_lag_ms'] = (
+            round((time.monotonic() - oldest) * 1000, 1) if oldest is not None else 0.0
+        )
         
         if stats['start_time']:
             runtime = datetime.now() - stats['start_time']
@@ -138,26 +198,30 @@ class CommentProcessor:
         
         return stats
     
+    @property
+    def hot_words(self) -> Dict[str, int]:
+        """当前跟踪的词及其计数（只读快照）"""
+        tracked = self.hotword_engine.top(self.config['hotword_capacity'])
+        return {hw['word']: hw['count'] for hw in tracked}
+    
     def get_hot_words(self, limit: int = 20, category: str = None) -> List[Dict[str, Any]]:
-        """获取热词列表"""
-        # 过滤和排序
-        filtered_words = []
-        for word, count in self.hot_words.items():
-            if count >= self.config['hot_word_threshold']:
-                word_category = self._classify_word(word)
-                if category is None or word_category == category:
-                    trend = self._calculate_trend(word)
-                    filtered_words.append({
-                        'word': word,
-                        'count': count,
-                        'category': word_category,
-                        'trend': trend,
-                        'last_updated': datetime.now()
-                    })
-        
-        # 按计数排序
-        filtered_words.sort(key=lambda x: x['count'], reverse=True)
-        return filtered_words[:limit]
+        """获取热词列表（Top-K 由热词引擎直接给出，趋势为快/慢衰减速率比）"""
+        threshold = self.config['hot_word_threshold']
+        result = []
+        for hw in self.hotword_engine.top(limit, category=category):
+            if hw['count'] < threshold:
+                break
+            result.append({
+                'word': hw['word'],
+                'count': hw['count'],
+                'category': hw['category'],
+                'trend': hw['trend'],
+                'last_updated': (
+                    datetime.fromtimestamp(hw['last_updated'])
+                    if hw['last_updated'] else datetime.now()
+                ),
+            })
+        return result
     
     def update_config(self, new_config: Dict[str, Any]):
         """更新配置"""
@@ -167,31 +231,27 @@ class CommentProcessor:
     def clear_data(self):
         """清空数据"""
         self.comment_queue.clear()
-        self.hot_words.clear()
-        self.word_trends.clear()
+        self.hotword_engine.clear()
         self.stats = {
             'total_comments': 0,
             'processed_comments': 0,
             'error_comments': 0,
             'start_time': self.stats.get('start_time'),
-            'last_comment_time': None
+            'last_comment_time': None,
+            'dropped_comments': 0,
+            'spam_comments': 0,
+            'batches': 0,
         }
+        self._throughput_window.clear()
         print(f"[{format_time()}] 评论处理器数据已清空")
     
     def _processing_loop(self):
-        """处理循环"""
+        """处理循环：有评论到达即唤醒，按积压量取整批处理"""
         last_cleanup = time.time()
         
         while self.is_running:
             try:
-                # 批量处理评论
-                batch = []
-                for _ in range(self.config['batch_size']):
-                    if self.comment_queue:
-                        batch.append(self.comment_queue.popleft())
-                    else:
-                        break
-                
+                batch = self._next_batch(timeout=self.config['cleanup_interval'])
                 if batch:
                     self._process_batch(batch)
                 
@@ -201,183 +261,183 @@ class CommentProcessor:
                     self._cleanup_old_data()
                     last_cleanup = current_time
                 
-                # 短暂休眠
-                time.sleep(0.1)
-                
             except Exception as e:
                 print(f"[{format_time()}] 处理循环错误: {e}")
                 time.sleep(1)
     
-    def _process_batch(self, batch: List[Dict[str, Any]]):
-        """批量处理评论"""
-        for comment_data in batch:
+    def _next_batch(self, timeout: float) -> List[Tuple[float, Dict[str, Any]]]:
+        """等待评论到达并取出一批；积压少时最多等待 batch_linger_ms 凑批"""
+        with self._queue_cond:
+            if not self.comment_queue:
+                self._queue_cond.wait(timeout=timeout)
+            if not self.comment_queue or not self.is_running:
+                return []
+            min_size = self.config['min_batch_size']
+            if len(self.comment_queue) < min_size and self.config['batch_linger_ms'] > 0:
+                deadline = time.monotonic() + self.config['batch_linger_ms'] / 1000.0
+                while len(self.comment_queue) < min_size and self.is_running:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._queue_cond.wait(timeout=remaining)
+            take = min(len(self.comment_queue), self.config['max_batch_size'])
+            return [self.comment_queue.popleft() for _ in range(take)]
+    
+    def _process_batch(self, batch: List[Tuple[float, Dict[str, Any]]]):
+        """
+        整批处理评论：清理 → 验证 → 垃圾过滤 → 情感 → 分词，每个阶段对整批做一次遍历，
+        热词计数在批末一次性合并
+        """
+        started = time.monotonic()
+        enqueued = [item[0] for item in batch]
+        
+        # 1) 清理（整批）
+        cleaned = sanitize_input([item[1] for item in batch])
+        
+        # 2) 验证（预编译 schema，规范数据走快速路径）
+        valid, errors = validate_comments(cleaned)
+        self.stats['error_comments'] += len(errors)
+        
+        # 3) 词典扫描（每条一次，命中供垃圾过滤与情感共用）+ 垃圾过滤
+        lexicon = self.lexicon
+        filter_spam = self.config['filter_spam']
+        kept: List[Tuple[Dict[str, Any], List[Hit]]] = []
+        for data in valid:
+            hits = lexicon.find(data['content'])
+            if filter_spam and self._is_spam(data['content'], hits):
+                self.stats['spam_comments'] += 1
+                continue
+            kept.append((data, hits))
+        
+        # 4) 情感 + 5) 分词（批内计数，批末合并）
+        enable_sentiment = self.config['enable_sentiment']
+        batch_words: Counter = Counter()
+        comments: List[Comment] = []
+        for data, hits in kept:
             try:
-                comment = self._process_single_comment(comment_data)
-                if comment:
-                    # 保存到数据管理器
-                    data_manager.add_comment(comment)
-                    
-                    # 调用回调函数
-                    for callback in self.callbacks:
-                        try:
-                            callback(comment)
-                        except Exception as e:
-                            print(f"[{format_time()}] 回调函数错误: {e}")
-                    
-                    self.stats['processed_comments'] += 1
-                
+                comment = self._build_comment(data)
+                if enable_sentiment:
+                    comment.sentiment = self._analyze_sentiment(comment.content, hits)
+                batch_words.update(self._tokenize(comment.content))
+                comments.append(comment)
             except Exception as e:
                 self.stats['error_comments'] += 1
                 print(f"[{format_time()}] 处理评论错误: {e}")
-    
-    def _process_single_comment(self, comment_data: Dict[str, Any]) -> Optional[Comment]:
-        """处理单个评论"""
-        try:
-            # 垃圾评论过滤
-            if self.config['filter_spam'] and self._is_spam(comment_data['content']):
-                return None
-            
-            # 创建评论对象
-            comment = Comment(
-                user=comment_data['user'],
-                content=comment_data['content'],
-                timestamp=comment_data.get('timestamp', datetime.now()),
-                platform=comment_data.get('platform', 'unknown'),
-                user_level=comment_data.get('user_level', 0),
-                is_vip=comment_data.get('is_vip', False),
-                gift_count=comment_data.get('gift_count', 0)
-            )
-            
-            # 情感分析
-            if self.config['enable_sentiment']:
-                comment.sentiment = self._analyze_sentiment(comment.content)
-            
-            # 提取和统计热词
-            self._extract_hot_words(comment.content)
-            
-            return comment
+        self._merge_hot_words(batch_words, docs=len(comments))
+        
+        for comment in comments:
+            # 保存到数据管理器
+            data_manager.add_comment(comment)
             
-        except Exception as e:
-            print(f"[{format_time()}] 处理评论失败: {e}")
-            return None
+            # 调用回调函数
+            for callback in self.callbacks:
+                try:
+                    callback(comment)
+                except Exception as e:
+                    print(f"[{format_time()}] 回调函数错误: {e}")
+        
+        finished = time.monotonic()
+        self.stats['processed_comments'] += len(comments)
+        self.stats['batches'] += 1
+        self._record_batch(len(batch), started, finished, enqueued)
+    
+    def _record_batch(self, size: int, started: float, finished: float, enqueued: List[float]):
+        """更新批大小、处理耗时、排队延迟与吞吐指标"""
+        lag_ms = (started - min(enqueued)) * 1000 if enqueued else 0.0
+        metrics = self._metrics
+        metrics['last_batch_size'] = size
+        metrics['max_batch_size'] = max(metrics['max_batch_size'], size)
+        metrics['last_batch_ms'] = round((finished - started) * 1000, 3)
+        metrics['last_queue_lag_ms'] = round(lag_ms, 3)
+        metrics['max_queue_lag_ms'] = round(max(metrics['max_queue_lag_ms'], lag_ms), 3)
+        self._throughput_window.append((finished, size))
+        cutoff = finished - 10.0
+        while self._throughput_window and self._throughput_window[0][0] < cutoff:
+            self._throughput_window.popleft()
     
-    def _is_spam(self, content: str) -> bool:
+    def _current_throughput(self) -> float:
+        """最近 10 秒的平均处理速度（条/秒）"""
+        window = list(self._throughput_window)
+        if not window:
+            return 0.0
+        span = max(time.monotonic() - window[0][0], 1.0)
+        return round(sum(n for _, n in window) / min(span, 10.0), 1)
+    
+    def _build_comment(self, comment_data: Dict[str, Any]) -> Comment:
+        return Comment(
+            user=comment_data['user'],
+            content=comment_data['content'],
+            timestamp=comment_data.get('timestamp') or datetime.now(),
+            platform=comment_data.get('platform', 'unknown'),
+            user_level=comment_data.get('user_level', 0),
+            is_vip=comment_data.get('is_vip', False),
+            gift_count=comment_data.get('gift_count', 0)
+        )
+    
+    def _is_spam(self, content: str, hits: Optional[List[Hit]] = None) -> bool:
         """检查是否为垃圾评论"""
         # 长度检查
         if len(content) < 2 or len(content) > 500:
             return True
         
-        # 正则匹配
-        for regex in self.spam_regex:
-            if regex.search(content):
+        # 广告词
+        if hits is None:
+            if self.lexicon.contains(content, 'spam'):
                 return True
+        elif any(hit[3] == 'spam' for hit in hits):
+            return True
         
-        return False
+        # 结构性规则（合并后的单个正则）
+        return self._spam_combined.search(content) is not None
     
-    def _analyze_sentiment(self, content: str) -> str:
-        """分析情感"""
-        positive_score = 0
-        negative_score = 0
-        
-        for word in self.sentiment_dict['positive']:
-            positive_score += content.count(word)
+    def _analyze_sentiment(self, content: str, hits: Optional[List[Hit]] = None) -> str:
+        """
+        分析情感：基于词典命中计分，情感词前 2 个字符内的否定词反转极性、程度词加权
+        """
+        if hits is None:
+            hits = self.lexicon.find(content)
+        score = 0.0
+        negation_ends = set()
+        intensity_ends = set()
+        # 命中按结束位置递增产出，修饰词总是先于其后的情感词出现
+        for start, end, _word, family in hits:
+            if family == 'negation':
+                negation_ends.add(end)
+            elif family == 'intensity':
+                intensity_ends.add(end)
+            elif family == 'positive' or family == 'negative':
+                value = 1.0 if family == 'positive' else -1.0
+                if start in negation_ends or start - 1 in negation_ends:
+                    value = -value
+                if start in intensity_ends or start - 1 in intensity_ends:
+                    value *= 1.5
+                score += value
         
-        for word in self.sentiment_dict['negative']:
-            negative_score += content.count(word)
-        
-        if positive_score > negative_score:
+        if score > 0:
             return 'positive'
-        elif negative_score > positive_score:
+        elif score < 0:
             return 'negative'
         else:
             return 'neutral'
     
-    def _extract_hot_words(self, content: str):
-        """提取热词"""
-        # 简单的词汇提取（可以使用jieba等分词库优化）
-        words = re.findall(r'[\u4e00-\u9fa5a-zA-Z]+', content)
-        
-        current_time = time.time()
-        
-        for word in words:
-            # 长度过滤
-            if (len(word) < self.config['min_word_length'] or 
-                len(word) > self.config['max_word_length']):
-                continue
-            
-            # 更新计数
-            self.hot_words[word] += 1
-            
-            # 记录趋势
-            if word not in self.word_trends:
-                self.word_trends[word] = []
-            self.word_trends[word].append(current_time)
-            
-            # 限制趋势数据长度
-            if len(self.word_trends[word]) > 100:
-                self.word_trends[word] = self.word_trends[word][-50:]
+    def _tokenize(self, content: str) -> List[str]:
+        """切分候选热词（按长度过滤）"""
+        min_len = self.config['min_word_length']
+        max_len = self.config['max_word_length']
+        return [w for w in self._word_regex.findall(content) if min_len <= len(w) <= max_len]
+    
+    def _merge_hot_words(self, counts: Counter, docs: int = 1):
+        """把一批的热词计数并入热词引擎"""
+        if counts:
+            self.hotword_engine.add_counts(counts, docs=docs)
     
     def _classify_word(self, word: str) -> str:
         """分类词汇"""
-        for category, keywords in self.word_categories.items():
-            if any(keyword in word for keyword in keywords):
-                return category
-        return 'other'
-    
-    def _calculate_trend(self, word: str) -> str:
-        """计算词汇趋势"""
-        if word not in self.word_trends:
-            return 'stable'
-        
-        timestamps = self.word_trends[word]
-        if len(timestamps) < 2:
-            return 'stable'
-        
-        current_time = time.time()
-        window_start = current_time - self.config['trend_window']
-        
-        # 计算窗口内的出现次数
-        recent_count = sum(1 for t in timestamps if t >= window_start)
-        total_count = len(timestamps)
-        
-        if total_count < 5:
-            return 'stable'
-        
-        recent_ratio = recent_count / min(total_count, 10)
-        
-        if recent_ratio > 0.7:
-            return 'up'
-        elif recent_ratio < 0.3:
-            return 'down'
-        else:
-            return 'stable'
+        return classify_word(word, self.word_categories)
     
     def _cleanup_old_data(self):
-        """清理旧数据"""
-        current_time = time.time()
-        cutoff_time = current_time - self.config['trend_window'] * 2
-        
-        # 清理趋势数据
-        for word in list(self.word_trends.keys()):
-            timestamps = self.word_trends[word]
-            # 保留最近的时间戳
-            recent_timestamps = [t for t in timestamps if t >= cutoff_time]
-            
-            if recent_timestamps:
-                self.word_trends[word] = recent_timestamps
-            else:
-                # 如果没有最近的数据，删除该词
-                del self.word_trends[word]
-                if word in self.hot_words:
-                    del self.hot_words[word]
-        
-        # 限制热词数量
-        if len(self.hot_words) > self.config['max_hot_words']:
-            # 保留计数最高的词
-            sorted_words = sorted(self.hot_words.items(), key=lambda x: x[1], reverse=True)
-            self.hot_words = dict(sorted_words[:self.config['max_hot_words']])
-        
-        print(f"[{format_time()}] 数据清理完成，当前热词数量: {len(self.hot_words)}")
+        """清理旧数据（热词引擎按时间桶滚动、容量固定，无需清理）"""
+        print(f"[{format_time()}] 数据清理完成，当前热词数量: {len(self.hotword_engine)}")
 
 
 class CommentSimulator:
@@ -408,6 +468,64 @@ class CommentSimulator:
         ]
         self.platforms = ['douyin', 'kuaishou', 'bilibili']
     
+    def make_comment(self, rng) -> Dict[str, Any]:
+        """生成一条随机评论；rng 为 random 模块或 random.Random 实例"""
+        return {
+            'user': rng.choice(self.sample_users),
+            'content': rng.choice(self.sample_comments),
+            'platform': rng.choice(self.platforms),
+            'user_level': rng.randint(1, 50),
+            'is_vip': rng.choice([True, False]),
+            'gift_count': rng.randint(0, 10)
+        }
+    
+    def run_load(self, rate: int, seconds: float, tick: float = 0.01,
+                 drain_timeout: float = 10.0, seed: int = 7) -> Dict[str, Any]:
+        """按固定速率（条/秒）投递评论 seconds 秒，等待排空后返回计数与延迟统计。
+
+        处理器需已启动；基准脚本与测试共用此驱动。
+        """
+        import random
+        
+        rng = random.Random(seed)
+        sent = 0
+        started = time.monotonic()
+        next_tick = started
+        while True:
+            elapsed = time.monotonic() - started
+            if elapsed >= seconds:
+                break
+            due = int(elapsed * rate) - sent
+            if due > 0:
+                self.processor.add_comments([self.make_comment(rng) for _ in range(due)])
+                sent += due
+            next_tick += tick
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+        produce_end = time.monotonic()
+        
+        def handled_count(stats: Dict[str, Any]) -> int:
+            return stats['processed_comments'] + stats['spam_comments'] + stats['error_comments']
+        
+        # 等待队列排空且最后一批处理完成（被丢弃的评论不会再被处理）
+        stats = self.processor.get_stats()
+        while (handled_count(stats) + stats['dropped_comments'] < sent
+               and time.monotonic() - produce_end < drain_timeout):
+            time.sleep(0.005)
+            stats = self.processor.get_stats()
+        drain_sec = time.monotonic() - produce_end
+        handled = handled_count(stats)
+        return {
+            'target_rate': rate,
+            'sent': sent,
+            'handled': handled,
+            'dropped': stats['dropped_comments'],
+            'achieved_rate': round(handled / max(produce_end - started + drain_sec, 1e-9), 1),
+            'drain_after_stop_ms': round(drain_sec * 1000, 1),
+            'max_queue_lag_ms': stats['max_queue_lag_ms'],
+            'max_batch_size': stats['max_batch_size'],
+            'batches': stats['batches'],
+        }
+    
     def start_simulation(self, interval: float = 2.0):
         """开始模拟评论"""
         if self.is_running:
@@ -438,18 +556,8 @@ class CommentSimulator:
         
         while self.is_running:
             try:
-                # 生成随机评论
-                comment_data = {
-                    'user': random.choice(self.sample_users),
-                    'content': random.choice(self.sample_comments),
-                    'platform': random.choice(self.platforms),
-                    'user_level': random.randint(1, 50),
-                    'is_vip': random.choice([True, False]),
-                    'gift_count': random.randint(0, 10)
-                }
-                
-                # 添加到处理器
-                self.processor.add_comment(comment_data)
+                # 生成随机评论并添加到处理器
+                self.processor.add_comment(self.make_comment(random))
                 
                 # 随机间隔
                 actual_interval = interval * random.uniform(0.5, 1.5)
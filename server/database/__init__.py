@@ -9,6 +9,7 @@ from server.database.sqlite_manager import (
     close_sqlite,
 )
 from server.database.ai_schema import init_ai_tables
+from server.database.live_event_schema import init_live_event_tables, insert_live_events
 
 __all__ = [
     "SQLiteDatabaseManager",
@@ -16,4 +17,6 @@ __all__ = [
     "get_sqlite_manager",
     "close_sqlite",
     "init_ai_tables",
+    "init_live_event_tables",
+    "insert_live_events",
 ]
@@ -0,0 +1,123 @@
+"""直播互动事件Schema定义
+
+定义按月分库的直播数据库中的事件表：
+- live_events: 弹幕/礼物/点赞/进场/关注等互动事件
+"""
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+# 直播事件表DDL
+LIVE_EVENTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS live_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT,
+    live_id TEXT,
+    event_type TEXT NOT NULL,
+    user_id TEXT,
+    nickname TEXT,
+    content TEXT,
+    gift_name TEXT,
+    count INTEGER,
+    value REAL,
+    ts REAL NOT NULL,
+    payload TEXT
+)
+"""
+
+LIVE_EVENTS_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_live_events_session_ts ON live_events(session_id, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_live_events_live_ts ON live_events(live_id, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_live_events_type_ts ON live_events(event_type, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_live_events_user ON live_events(user_id)",
+]
+
+_INSERT_LIVE_EVENT = text(
+    """
+    INSERT INTO live_events
+        (session_id, live_id, event_type, user_id, nickname, content,
+         gift_name, count, value, ts, payload)
+    VALUES
+        (:session_id, :live_id, :event_type, :user_id, :nickname, :content,
+         :gift_name, :count, :value, :ts, :payload)
+    """
+)
+
+
+def init_live_event_tables(engine: Engine) -> None:
+    """初始化直播事件表
+
+    Args:
+        engine: 直播会话数据库引擎
+    """
+    with engine.begin() as conn:
+        conn.execute(text(LIVE_EVENTS_SCHEMA))
+        for index_sql in LIVE_EVENTS_INDEXES:
+            conn.execute(text(index_sql))
+    logger.info("✅ 直播事件表已初始化")
+
+
+def event_to_row(
+    event: Dict[str, Any],
+    session_id: Optional[str] = None,
+    live_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """将中转事件转换为 live_events 行
+
+    Args:
+        event: {"type", "payload", "timestamp"} 格式的事件
+        session_id: 统一会话ID
+        live_id: 直播间ID
+
+    Returns:
+        可直接绑定到插入语句的参数字典
+    """
+    payload = event.get("payload") or {}
+    user_id = payload.get("user_id_str") or payload.get("user_id")
+    value = payload.get("gift_value")
+    return {
+        "session_id": session_id,
+        "live_id": live_id,
+        "event_type": str(event.get("type") or ""),
+        "user_id": str(user_id) if user_id not in (None, "", 0) else None,
+        "nickname": payload.get("nickname"),
+        "content": payload.get("content"),
+        "gift_name": payload.get("gift_name"),
+        "count": payload.get("count"),
+        "value": float(value) if value is not None else None,
+        "ts": float(event.get("timestamp") or 0.0),
+        "payload": json.dumps(payload, ensure_ascii=False, default=str),
+    }
+
+
+def insert_live_events(engine: Engine, rows: Iterable[Dict[str, Any]]) -> int:
+    """在单个事务中批量写入事件行
+
+    Args:
+        engine: 直播会话数据库引擎
+        rows: event_to_row 生成的行
+
+    Returns:
+        写入的行数
+    """
+    batch: List[Dict[str, Any]] = list(rows)
+    if not batch:
+        return 0
+    with engine.begin() as conn:
+        conn.execute(_INSERT_LIVE_EVENT, batch)
+    return len(batch)
+
+
+__all__ = [
+    "LIVE_EVENTS_SCHEMA",
+    "LIVE_EVENTS_INDEXES",
+    "init_live_event_tables",
+    "event_to_row",
+    "insert_live_events",
+]
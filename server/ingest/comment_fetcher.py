@@ -3,6 +3,7 @@
 负责从抖音直播间抓取评论数据
 """
 
+import sys
 import time
 import json
 import random
@@ -11,14 +12,19 @@ from typing import List, Dict, Any, Optional, Callable
 from datetime import datetime
 import requests
 from server.utils.logger import LoggerMixin
+from server.utils.ring_buffer import SeqRingBuffer
+from server.utils.seq_notifier import SeqNotifier
 
 
 class Comment:
     """评论数据模型"""
+
+    # 使用 __slots__ 去掉每条评论的实例 __dict__，并驻留重复出现的用户字段
+    __slots__ = ("user_id", "username", "content", "timestamp", "id")
     
     def __init__(self, user_id: str, username: str, content: str, timestamp: float = None):
-        self.user_id = user_id
-        self.username = username
+        self.user_id = sys.intern(user_id) if isinstance(user_id, str) else user_id
+        self.username = sys.intern(username) if isinstance(username, str) else username
         self.content = content
         self.timestamp = timestamp or time.time()
         self.id = f"{user_id}_{int(self.timestamp * 1000)}"
@@ -43,8 +49,13 @@ class CommentFetcher(LoggerMixin):
         self.room_id = room_id or "default_room"
         self.cookie = cookie
         self.is_running = False
-        self.comments = []
         self.max_comments = 1000
+        # 定长环形缓冲：按序号续读 O(1)，按时间戳二分 O(log n)，内存固定
+        self.comments: SeqRingBuffer[Comment] = SeqRingBuffer(
+            self.max_comments, key=lambda c: c.timestamp
+        )
+        # 新评论到达时唤醒推流订阅者
+        self.notifier = SeqNotifier()
         self.fetch_interval = 5
         self.callbacks = []
         self._thread = None
@@ -136,34 +147,47 @@ class CommentFetcher(LoggerMixin):
         self.logger.warning("真实评论抓取功能待实现，使用模拟数据")
         return self._fetch_mock_comments()
     
-    def _add_comment(self, comment: Comment):
-        """添加评论到缓存"""
-        with self._lock:
-            self.comments.append(comment)
-            
-            # 限制评论数量
-            if len(self.comments) > self.max_comments:
-                self.comments = self.comments[-self.max_comments:]
+    def _add_comment(self, comment: Comment) -> int:
+        """添加评论到缓存并通知订阅者，返回其序号"""
+        seq = self.comments.append(comment)
+        self.notifier.notify(seq)
+        return seq
+    
+    async def wait_for_comments(self, cursor: int, timeout: Optional[float] = None) -> int:
+        """等待序号超过 cursor 的新评论，返回最新序号（超时时可能仍等于 cursor）"""
+        return await self.notifier.wait_for(cursor, timeout)
+    
+    @property
+    def last_seq(self) -> int:
+        """最新一条评论的序号，客户端可从这里开始续读"""
+        return self.comments.last_seq
     
     def get_recent_comments(self, limit: int = 50) -> List[Dict[str, Any]]:
         """获取最近的评论"""
-        with self._lock:
-            recent = self.comments[-limit:] if self.comments else []
-            return [comment.to_dict() for comment in recent]
+        return [comment.to_dict() for comment in self.comments.latest(limit)]
     
-    def get_comments_since(self, timestamp: float) -> List[Dict[str, Any]]:
-        """获取指定时间后的评论"""
-        with self._lock:
-            filtered = [
-                comment for comment in self.comments 
-                if comment.timestamp > timestamp
-            ]
-            return [comment.to_dict() for comment in filtered]
+    def get_comments_since(
+        self, timestamp: float, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """获取指定时间后的评论（二分定位）"""
+        return [comment.to_dict() for comment in self.comments.since(timestamp, limit)]
+    
+    def get_comments_after(self, cursor: int, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        按序号续读：返回序号大于 cursor 的评论及新游标。
+        missed 为游标之后已被覆盖、无法补发的条数。
+        """
+        missed = max(0, self.comments.first_seq - cursor - 1)
+        comments, next_cursor = self.comments.after(cursor, limit)
+        return {
+            'comments': [comment.to_dict() for comment in comments],
+            'cursor': next_cursor,
+            'missed': missed,
+        }
     
     def clear_comments(self):
         """清空评论缓存"""
-        with self._lock:
-            self.comments.clear()
+        self.comments.clear()
         self.logger.info("评论缓存已清空")
     
     def get_stats(self) -> Dict[str, Any]:
@@ -171,6 +195,8 @@ class CommentFetcher(LoggerMixin):
         with self._lock:
             return {
                 'total_comments': len(self.comments),
+                'last_seq': self.comments.last_seq,
+                'stream_waiters': self.notifier.waiter_count,
                 'is_running': self.is_running,
                 'room_id': self.room_id,
                 'fetch_interval': self.fetch_interval,
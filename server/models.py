@@ -4,11 +4,13 @@
 """
 
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from datetime import datetime
 import json
 import uuid
 
+from .utils.ring_buffer import SeqRingBuffer
+
 
 @dataclass
 class Comment:
@@ -260,37 +262,52 @@ class APIResponse:
 
 
 # 数据存储管理器
+def _comment_time_ms(comment: Comment) -> float:
+    """评论时间戳（毫秒）；兼容处理器传入的 datetime"""
+    ts = comment.timestamp
+    if isinstance(ts, datetime):
+        return ts.timestamp() * 1000
+    return float(ts or 0)
+
+
 class DataManager:
     """数据管理器，负责数据的存储和检索"""
     
     def __init__(self):
-        self.comments: List[Comment] = []
-        self.hot_words: List[HotWord] = []
-        self.scripts: List[AIScript] = []
-        self.config: AppConfig = AppConfig()
-        
         # 内存限制
         self.max_comments = 1000
         self.max_scripts = 100
-    
-    def add_comment(self, comment: Comment) -> None:
-        """添加评论"""
-        self.comments.insert(0, comment)
         
-        # 限制数量
-        if len(self.comments) > self.max_comments:
-            self.comments = self.comments[:self.max_comments]
+        # 评论使用定长环形缓冲：O(1) 写入，按序号/时间戳定位，内存固定
+        self.comments: SeqRingBuffer[Comment] = SeqRingBuffer(
+            self.max_comments, key=_comment_time_ms
+        )
+        self.hot_words: List[HotWord] = []
+        self.scripts: List[AIScript] = []
+        self.config: AppConfig = AppConfig()
+    
+    def add_comment(self, comment: Comment) -> int:
+        """添加评论，返回评论序号"""
+        return self.comments.append(comment)
     
     def get_comments(self, limit: int = 50, offset: int = 0) -> List[Comment]:
-        """获取评论列表"""
-        start = offset
-        end = offset + limit
-        return self.comments[start:end]
+        """获取评论列表（新→旧）"""
+        newest = self.comments.latest(offset + limit)
+        newest.reverse()
+        return newest[offset:]
+    
+    def get_comments_after(
+        self, cursor: int, limit: Optional[int] = None
+    ) -> Tuple[List[Comment], int]:
+        """按序号续读评论（旧→新），返回 (评论, 新游标)"""
+        return self.comments.after(cursor, limit)
     
     def get_recent_comments(self, minutes: int = 10) -> List[Comment]:
-        """获取最近的评论"""
+        """获取最近的评论（新→旧）"""
         cutoff_time = int((datetime.now().timestamp() - minutes * 60) * 1000)
-        return [c for c in self.comments if c.timestamp > cutoff_time]
+        recent = self.comments.since(cutoff_time)
+        recent.reverse()
+        return recent
     
     def update_hot_words(self, hot_words: List[HotWord]) -> None:
         """更新热词列表"""
@@ -337,6 +354,7 @@ class DataManager:
         """更新配置"""
         self.config = config
         self.max_comments = config.max_comments
+        self.comments.resize(self.max_comments)
     
     def get_stats(self) -> Dict[str, Any]:
         """获取统计信息"""
@@ -356,19 +374,20 @@ class DataManager:
         """计算内存使用情况"""
         import sys
         
+        comments_size = sys.getsizeof(self.comments.snapshot())
         return {
-            'comments': sys.getsizeof(self.comments),
+            'comments': comments_size,
             'hot_words': sys.getsizeof(self.hot_words),
             'scripts': sys.getsizeof(self.scripts),
-            'total': sys.getsizeof(self.comments) + sys.getsizeof(self.hot_words) + sys.getsizeof(self.scripts)
+            'total': comments_size + sys.getsizeof(self.hot_words) + sys.getsizeof(self.scripts)
         }
     
     def clear_old_data(self, days: int = 7) -> None:
         """清理旧数据"""
         cutoff_time = int((datetime.now().timestamp() - days * 24 * 3600) * 1000)
         
-        # 清理旧评论
-        self.comments = [c for c in self.comments if c.timestamp > cutoff_time]
+        # 清理旧评论（时间索引单调，二分后整体前移）
+        self.comments.drop_before(cutoff_time)
         
         # 清理旧话术
         self.scripts = [s for s in self.scripts if s.timestamp > cutoff_time]
@@ -120,11 +120,17 @@ def generateMsToken(length=182):
 
 class DouyinLiveWebFetcher:
 
-    def __init__(self, live_id, abogus_file="a_bogus.js"):
+    # 共享解析缓存中 room_id / ttwid 的有效期（秒）
+    ROOM_ID_TTL = 1800
+    TTWID_TTL = 12 * 3600
+
+    def __init__(self, live_id, abogus_file="a_bogus.js", resolve_cache=None):
         """
         直播间弹幕抓取对象
         :param live_id: 直播间的直播id，打开直播间web首页的链接如：https://live.douyin.com/261378947940，
                         其中的261378947940即是live_id
+        :param resolve_cache: 可选的共享解析缓存（需提供 get_or_load/invalidate），
+                              用于跨实例、跨进程复用 room_id 与 ttwid
         """
         abogus_path = Path(abogus_file)
         if not abogus_path.is_absolute():
@@ -134,15 +140,42 @@ class DouyinLiveWebFetcher:
         self.__room_id = None
         self.session = requests.Session()
         self.live_id = live_id
+        self.resolve_cache = resolve_cache
         self.host = "https://www.douyin.com/"
         self.live_url = "https://live.douyin.com/"
         self.user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36 Edg/140.0.0.0"
         self.headers = {
             'User-Agent': self.user_agent
         }
+        # 断线续传：记录服务端最近下发的 cursor/internal_ext，重连时从该位置继续推送
+        self.cursor = None
+        self.internal_ext = None
+        self.last_response_time = None
+        self.__signature = None
 
-    def start(self):
-        self._connectWebSocket()
+    def start(self, resume=False):
+        """
+        建立 WebSocket 连接并阻塞直到连接关闭
+        :param resume: 为 True 且持有上次会话的 cursor 时，沿用 cursor/internal_ext 续传
+        """
+        self._connectWebSocket(resume=resume)
+
+    @property
+    def can_resume(self):
+        return bool(self.cursor and self.internal_ext and self.__room_id)
+
+    def resetSession(self):
+        """
+        丢弃续传状态与缓存的 room_id/ttwid/签名，下次连接走完整握手
+        """
+        self.cursor = None
+        self.internal_ext = None
+        self.__room_id = None
+        self.__ttwid = None
+        self.__signature = None
+        if self.resolve_cache is not None:
+            self.resolve_cache.invalidate(f"douyin:room:{self.live_id}")
+            self.resolve_cache.invalidate("douyin:ttwid")
 
     def stop(self):
         if hasattr(self, "ws") and self.ws:
@@ -156,6 +189,18 @@ class DouyinLiveWebFetcher:
         """
         if self.__ttwid:
             return self.__ttwid
+        if self.resolve_cache is not None:
+            self.__ttwid = self.resolve_cache.get_or_load(
+                "douyin:ttwid", self._fetchTtwid, ttl=self.TTWID_TTL
+            )
+        else:
+            self.__ttwid = self._fetchTtwid()
+        return self.__ttwid
+
+    def _fetchTtwid(self):
+        """
+        访问直播首页获取 ttwid，失败时返回 None
+        """
         headers = {
             "User-Agent": self.user_agent,
         }
@@ -165,8 +210,7 @@ class DouyinLiveWebFetcher:
         except Exception as err:
             print("【X】Request the live url error: ", err)
         else:
-            self.__ttwid = response.cookies.get('ttwid')
-            return self.__ttwid
+            return response.cookies.get('ttwid')
 
     @property
     def room_id(self):
@@ -176,6 +220,19 @@ class DouyinLiveWebFetcher:
         """
         if self.__room_id:
             return self.__room_id
+        if self.resolve_cache is not None:
+            # 并发启动同一直播间时只解析一次，结果跨进程重启复用
+            self.__room_id = self.resolve_cache.get_or_load(
+                f"douyin:room:{self.live_id}", self._resolveRoomId, ttl=self.ROOM_ID_TTL
+            )
+        else:
+            self.__room_id = self._resolveRoomId()
+        return self.__room_id
+
+    def _resolveRoomId(self):
+        """
+        请求直播间页面解析 roomId，失败时返回 None（允许调用方重试）
+        """
         url = self.live_url + self.live_id
         headers = {
             "User-Agent": self.user_agent,
@@ -209,15 +266,13 @@ class DouyinLiveWebFetcher:
                 try:
                     rid = self._resolve_room_id_via_enter()
                     if rid:
-                        self.__room_id = rid
-                        return self.__room_id
+                        return rid
                 except Exception as _:
                     pass
                 # 🔧 修复：不抛出异常，返回 None，让调用方处理（与原始版本行为一致）
                 print("【X】No match found for roomId/room_id_str")
                 return None  # 返回 None 而不是抛出异常，允许重试
-            self.__room_id = found
-            return self.__room_id
+            return found
 
     def _resolve_room_id_via_enter(self):
         """Resolve room_id via enter API without prior room_id_str.
@@ -430,10 +485,22 @@ class DouyinLiveWebFetcher:
         except Exception as e:
             raise RuntimeError(f"获取房间状态失败: {str(e)}")
 
-    def _connectWebSocket(self):
+    def _connectWebSocket(self, resume=False):
         """
         连接抖音直播间websocket服务器，请求直播间数据
+        :param resume: 使用上次会话的 cursor/internal_ext（不重新解析房间、不重新签名）
         """
+        if resume and self.can_resume:
+            cursor = self.cursor
+            internal_ext = self.internal_ext
+        else:
+            cursor = "d-1_u-1_fh-7392091211001140287_t-1721106114633_r-1"
+            internal_ext = (
+                f"internal_src:dim|wss_push_room_id:{self.room_id}"
+                "|wss_push_did:7319483754668557238"
+                "|first_req_ms:1721106114541|fetch_time:1721106114633|seq:1"
+                "|wss_info:0-1721106114633-0-0|wrds_v:7392094459690748497"
+            )
         wss = ("wss://webcast100-ws-web-lq.douyin.com/webcast/im/push/v2/?app_name=douyin_web"
                "&version_code=180800&webcast_sdk_version=1.0.14-beta.0"
                "&update_version_code=1.0.14-beta.0&compress=gzip&device_platform=web&cookie_enabled=true"
@@ -442,16 +509,16 @@ class DouyinLiveWebFetcher:
                "&browser_version=5.0%20(Windows%20NT%2010.0;%20Win64;%20x64)%20AppleWebKit/537.36%20(KHTML,"
                "%20like%20Gecko)%20Chrome/126.0.0.0%20Safari/537.36"
                "&browser_online=true&tz_name=Asia/Shanghai"
-               "&cursor=d-1_u-1_fh-7392091211001140287_t-1721106114633_r-1"
-               f"&internal_ext=internal_src:dim|wss_push_room_id:{self.room_id}|wss_push_did:7319483754668557238"
-               f"|first_req_ms:1721106114541|fetch_time:1721106114633|seq:1|wss_info:0-1721106114633-0-0|"
-               f"wrds_v:7392094459690748497"
+               f"&cursor={urllib.parse.quote(cursor, safe=':|-_')}"
+               f"&internal_ext={urllib.parse.quote(internal_ext, safe=':|-_')}"
                f"&host=https://live.douyin.com&aid=6383&live_id=1&did_rule=3&endpoint=live_pc&support_wrds=1"
                f"&user_unique_id=7319483754668557238&im_path=/webcast/im/fetch/&identity=audience"
                f"&need_persist_msg_count=15&insert_task_id=&live_reason=&room_id={self.room_id}&heartbeatDuration=0")
 
-        signature = generateSignature(wss)
-        wss += f"&signature={signature}"
+        # 签名只依赖 room_id 等固定参数，与 cursor 无关，续传时直接复用
+        if not self.__signature:
+            self.__signature = generateSignature(wss)
+        wss += f"&signature={self.__signature}"
 
         headers = {
             "cookie": f"ttwid={self.ttwid}",
@@ -528,6 +595,12 @@ class DouyinLiveWebFetcher:
             # 根据proto结构体解析对象（与原始版本一致）
             package = PushFrame().parse(message)
             response = Response().parse(gzip.decompress(package.payload))
+            self.last_response_time = time.time()
+            # 记录续传位置，断线重连时从这里继续
+            if response.cursor:
+                self.cursor = response.cursor
+            if response.internal_ext:
+                self.internal_ext = response.internal_ext
             
             # 返回直播间服务器链接存活确认消息，便于持续获取数据
             if response.need_ack:
@@ -544,6 +617,9 @@ class DouyinLiveWebFetcher:
             
             # 根据消息类别解析消息体（与原始版本一致）
             for msg in response.messages_list:
+                # 重连/need_ack/历史推送会重复下发同一 msg_id，交由子类过滤
+                if not self._acceptMessage(msg):
+                    continue
                 method = msg.method
                 try:
                     {
@@ -569,6 +645,13 @@ class DouyinLiveWebFetcher:
             # 抖音数据拉取不是100%成功，静默处理异常是正常的
             pass
 
+    def _acceptMessage(self, msg):
+        """
+        消息分发前的过滤钩子，返回 False 时跳过该消息（默认全部接受）
+        :param msg: Response.messages_list 中的 Message
+        """
+        return True
+
     def _wsOnError(self, ws, error):
         print("WebSocket error: ", error)
 
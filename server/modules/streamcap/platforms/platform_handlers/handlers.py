@@ -1,8 +1,19 @@
+import dataclasses
+
 import streamget
 
 from ...utils.utils import trace_error_decorator
 from .base import PlatformHandler, StreamData
 
+try:
+    from server.utils.resolve_cache import get_resolve_cache, url_expiry
+except ImportError:  # standalone StreamCap: no shared resolve cache
+    get_resolve_cache = None
+    url_expiry = None
+
+# Upper bound for cached Douyin stream info when the URLs carry no expire parameter
+DOUYIN_STREAM_CACHE_TTL = 600
+
 
 class CustomHandler(PlatformHandler):
     platform = "custom"
@@ -43,7 +54,29 @@ class DouyinHandler(PlatformHandler):
     async def get_stream_info(self, live_url: str) -> StreamData:
         """
         Fetch stream information for a Douyin live URL.
+
+        Live results are shared through the resolve cache until the earliest
+        ``expire`` parameter of the stream URLs; concurrent lookups of the same
+        room resolve once.
         """
+        if get_resolve_cache is None:
+            return await self._fetch_stream_info(live_url)
+
+        async def load() -> dict:
+            return dataclasses.asdict(await self._fetch_stream_info(live_url))
+
+        def expires_from(data: dict) -> float | None:
+            if not data.get("is_live"):
+                return 0.0  # never cache offline/failed lookups
+            return url_expiry([data.get("record_url"), data.get("flv_url"), data.get("m3u8_url")])
+
+        key = f"douyin:stream:{self.record_quality}:{self.proxy or ''}:{live_url}"
+        data = await get_resolve_cache().aget_or_load(
+            key, load, ttl=DOUYIN_STREAM_CACHE_TTL, expires_from=expires_from
+        )
+        return StreamData(**data)
+
+    async def _fetch_stream_info(self, live_url: str) -> StreamData:
         if not self.live_stream:
             self.live_stream = streamget.DouyinLiveStream(proxy_addr=self.proxy, cookies=self.cookies)
 
@@ -1,55 +1,97 @@
 """
-精简版热词分析器
+热词分析器
 
-按需求关闭 NLP 热词分析，保持接口不变以避免调用方崩溃。
-所有方法返回空结果或不执行实际处理。
+基于流式热词引擎（Space-Saving + Count-Min 时间分桶 + 指数衰减趋势），
+内存占用固定，与直播时长无关；Top-K 查询 O(K)。
 """
 
 from __future__ import annotations
 
+import re
+import time
 from typing import Any, Dict, List, Optional
 
+from server.nlp.hotword_engine import WORD_CATEGORIES, HotwordEngine, classify_word  # noqa: F401
 from server.utils.logger import LoggerMixin
 
+_WORD_RE = re.compile(r"[\u4e00-\u9fa5a-zA-Z]+")
+
 
 class HotwordAnalyzer(LoggerMixin):
-    """空实现：不再做任何热词统计，返回空结果。"""
+    """流式热词分析器"""
 
-    def __init__(self, config: Optional[Dict[str, Any]] = None) -> None:
+    def __init__(self, config: Optional[Any] = None) -> None:
         self.config = config or {}
+        get = getattr(self.config, "get", None) or (lambda key, default=None: default)
+        self.min_word_length = int(get("hotword_min_length", 2))
+        self.max_word_length = int(get("hotword_max_length", 20))
+        self.min_count = int(get("hotword_min_count", 3))
+        self.engine = HotwordEngine(
+            capacity=int(get("hotword_capacity", 2000)),
+            bucket_sec=float(get("hotword_bucket_sec", 10)),
+            classifier=classify_word,
+        )
         self.is_running = False
-        self.logger.info("热词分析功能已禁用，所有接口返回空结果。")
+
+    def tokenize(self, content: str) -> List[str]:
+        return [
+            w for w in _WORD_RE.findall(content or "")
+            if self.min_word_length <= len(w) <= self.max_word_length
+        ]
+
+    def add_comment(self, comment: Any, now: Optional[float] = None) -> None:
+        """计入一条评论（dict 或 Comment），可直接注册为 CommentFetcher 的新评论回调"""
+        if isinstance(comment, dict):
+            content = comment.get("content")
+        else:
+            content = getattr(comment, "content", "")
+        words = self.tokenize(content)
+        if words:
+            self.engine.add(words, now=now)
 
     def analyze_comments(self, comments: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """返回空热词分析结果。"""
-        return self._empty_result()
+        """把一批评论计入引擎并返回当前热词快照"""
+        now = time.time()
+        for comment in comments:
+            self.add_comment(comment, now=now)
+
+        hot_words = self.get_hotwords(limit=50)
+        stats = self.engine.get_stats()
+        return {
+            "hot_words": hot_words,
+            "hot_phrases": [hw for hw in hot_words if len(hw["word"]) >= 4][:20],
+            "word_cloud_data": [{"name": hw["word"], "value": hw["count"]} for hw in hot_words],
+            "stats": {
+                "total_comments": stats["total_docs"],
+                "total_words": stats["total_words"],
+                "unique_words": stats["tracked_words"],
+                "last_update": stats["last_update"],
+            },
+        }
 
     def get_hotwords(self, limit: int = 10, category: Optional[str] = None) -> List[Dict[str, Any]]:
-        """返回空列表，保持兼容。"""
-        return []
+        """全程热词 Top-K（低于最小计数的词不返回）"""
+        return [
+            hw for hw in self.engine.top(limit, category=category) if hw["count"] >= self.min_count
+        ]
+
+    def get_window_hotwords(self, window: str = "5m", limit: int = 10) -> List[Dict[str, Any]]:
+        """滑动窗口（1m/5m/30m）热词 Top-K"""
+        window_sec = HotwordEngine.WINDOWS.get(window, 300)
+        return self.engine.top_window(window_sec, k=limit)
 
-    def get_trending_words(self, time_window: int = 300) -> List[Dict[str, Any]]:
-        """返回空列表。"""
-        return []
+    def get_trending_words(self, time_window: int = 300, limit: int = 10) -> List[Dict[str, Any]]:
+        """最近 time_window 秒内出现过、趋势分最高的词"""
+        return self.engine.trending(k=limit, min_count=self.min_count, window_sec=time_window)
 
     def clear_cache(self) -> None:
-        """无缓存可清理，仅记录日志。"""
-        self.logger.debug("热词缓存已禁用，无需清理。")
+        self.engine.clear()
+        self.logger.debug("热词统计已清空")
 
     def start_analyzing(self) -> None:
         """标记运行状态，便于健康检查。"""
         self.is_running = True
-        self.logger.info("热词分析任务已启动（空实现，无分析逻辑）。")
+        self.logger.info("热词分析任务已启动")
 
-    def _empty_result(self) -> Dict[str, Any]:
-        return {
-            "hot_words": [],
-            "hot_phrases": [],
-            "word_cloud_data": [],
-            "stats": {
-                "total_comments": 0,
-                "total_words": 0,
-                "unique_words": 0,
-                "last_update": 0,
-            },
-        }
+    def get_stats(self) -> Dict[str, Any]:
+        return self.engine.get_stats()
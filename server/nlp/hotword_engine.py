@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-
+"""
+流式热词引擎
+
+弹幕流是无界的，热词统计必须在固定内存内完成：
+- ``SpaceSaving``：Stream-Summary 结构的 Space-Saving 重击者（heavy hitter）统计，
+  单位增量 O(1)，Top-K 查询 O(K)，只跟踪 capacity 个词
+- ``CountMinSketch``：固定宽高的计数草图，估计任意词在某个时间桶内的出现次数
+- ``HotwordEngine``：时间分桶（每桶一个 Count-Min + 桶内 Top 候选）支撑 1/5/30 分钟滑动窗口，
+  对被跟踪的词维护快/慢两条指数衰减速率，比值即趋势
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import math
+import threading
+import time
+from array import array
+from collections import deque
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+# 热词分类词表（评论处理器与热词分析器共用）：词中包含任一关键词即归入该类
+WORD_CATEGORIES: Dict[str, List[str]] = {
+    "product": ["产品", "商品", "价格", "质量", "功能", "效果", "材质", "品牌"],
+    "emotion": ["喜欢", "爱", "讨厌", "恨", "开心", "生气", "满意", "失望"],
+    "question": ["怎么", "什么", "哪里", "为什么", "如何", "多少", "几个", "什么时候"],
+    "interaction": ["主播", "老师", "老板", "美女", "帅哥", "大家", "朋友们"],
+}
+
+
+def classify_word(word: str, categories: Mapping[str, Iterable[str]] = WORD_CATEGORIES) -> str:
+    for category, keywords in categories.items():
+        if any(keyword in word for keyword in keywords):
+            return category
+    return "other"
+
+
+class _Bucket:
+    __slots__ = ("count", "words", "prev", "next")
+
+    def __init__(self, count: int):
+        self.count = count
+        self.words: Dict[str, None] = {}
+        self.prev: Optional["_Bucket"] = None
+        self.next: Optional["_Bucket"] = None
+
+
+class SpaceSaving:
+    """Space-Saving 重击者统计（Stream-Summary 实现，非线程安全）"""
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = max(1, int(capacity))
+        self._items: Dict[str, List[Any]] = {}  # word -> [bucket, error]
+        self._head: Optional[_Bucket] = None  # 最小计数
+        self._tail: Optional[_Bucket] = None  # 最大计数
+        self.total = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._items
+
+    def count(self, word: str) -> int:
+        item = self._items.get(word)
+        return item[0].count if item else 0
+
+    def offer(self, word: str, n: int = 1) -> Optional[str]:
+        """计入 n 次出现，返回被淘汰的词（没有淘汰时为 None）"""
+        if n <= 0:
+            return None
+        self.total += n
+        item = self._items.get(word)
+        if item is not None:
+            self._move(word, item, item[0].count + n)
+            return None
+
+        evicted = None
+        base = 0
+        if len(self._items) >= self.capacity:
+            # 替换最小计数的词，继承其计数作为误差上界
+            bucket = self._head
+            evicted = next(iter(bucket.words))
+            base = bucket.count
+            del self._items[evicted]
+            self._detach(evicted, bucket)
+        item = [None, base]
+        self._items[word] = item
+        self._place(word, item, base + n, after=None)
+        return evicted
+
+    def top(self, k: int) -> List[Tuple[str, int, int]]:
+        """按计数降序返回前 k 个 (词, 计数, 误差上界)，O(k)"""
+        return list(islice(self.iter_desc(), max(0, k)))
+
+    def iter_desc(self) -> Iterator[Tuple[str, int, int]]:
+        """按计数降序逐个产出 (词, 计数, 误差上界)，调用方取够即停"""
+        bucket = self._tail
+        while bucket is not None:
+            for word in bucket.words:
+                yield word, bucket.count, self._items[word][1]
+            bucket = bucket.prev
+
+    def words(self) -> Iterable[str]:
+        return self._items.keys()
+
+    # --- 链表维护 ---
+    def _detach(self, word: str, bucket: _Bucket) -> None:
+        del bucket.words[word]
+        if not bucket.words:
+            if bucket.prev:
+                bucket.prev.next = bucket.next
+            else:
+                self._head = bucket.next
+            if bucket.next:
+                bucket.next.prev = bucket.prev
+            else:
+                self._tail = bucket.prev
+
+    def _place(self, word: str, item: List[Any], count: int, after: Optional[_Bucket]) -> None:
+        """把词放入计数为 count 的桶；after 为计数小于 count 的前驱桶（None 表示从头查找）"""
+        node = after.next if after is not None else self._head
+        while node is not None and node.count < count:
+            after, node = node, node.next
+        if node is not None and node.count == count:
+            target = node
+        else:
+            target = _Bucket(count)
+            target.prev, target.next = after, node
+            if after is not None:
+                after.next = target
+            else:
+                self._head = target
+            if node is not None:
+                node.prev = target
+            else:
+                self._tail = target
+        target.words[word] = None
+        item[0] = target
+
+    def _move(self, word: str, item: List[Any], count: int) -> None:
+        bucket = item[0]
+        nxt = bucket.next
+        if len(bucket.words) == 1 and (nxt is None or nxt.count > count):
+            # 唯一成员且不会越过后继：原地改计数
+            bucket.count = count
+            return
+        after = bucket if len(bucket.words) > 1 else bucket.prev
+        self._detach(word, bucket)
+        self._place(word, item, count, after=after)
+
+
+class CountMinSketch:
+    """Count-Min 计数草图（只增不减，估计值不低于真实值）"""
+
+    __slots__ = ("width", "depth", "_rows", "_seeds")
+
+    def __init__(self, width: int = 512, depth: int = 4):
+        self.width = int(width)
+        self.depth = int(depth)
+        self._rows = [array("I", bytes(4 * self.width)) for _ in range(self.depth)]
+        self._seeds = [i * 0x9E3779B1 & 0xFFFFFFFF for i in range(1, self.depth + 1)]
+
+    def indexes(self, word: str) -> List[int]:
+        raw = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        digest = int.from_bytes(raw, "little")
+        h1, h2 = digest & 0xFFFFFFFF, digest >> 32
+        return [(h1 + i * h2 + seed) % self.width for i, seed in enumerate(self._seeds)]
+
+    def add(self, word: str, n: int = 1, indexes: Optional[List[int]] = None) -> None:
+        for row, idx in zip(self._rows, indexes or self.indexes(word)):
+            row[idx] += n
+
+    def estimate(self, word: str, indexes: Optional[List[int]] = None) -> int:
+        return min(row[idx] for row, idx in zip(self._rows, indexes or self.indexes(word)))
+
+
+class _TimeBucket:
+    __slots__ = ("start", "sketch", "top")
+
+    def __init__(self, start: float, width: int, depth: int, top_capacity: int):
+        self.start = start
+        self.sketch = CountMinSketch(width, depth)
+        self.top = SpaceSaving(top_capacity)
+
+
+class HotwordEngine:
+    """流式热词引擎（线程安全）"""
+
+    WINDOWS = {"1m": 60, "5m": 300, "30m": 1800}
+
+    def __init__(
+        self,
+        capacity: int = 2000,
+        bucket_sec: float = 10.0,
+        horizon_sec: float = 1800.0,
+        sketch_width: int = 512,
+        sketch_depth: int = 4,
+        bucket_top: int = 64,
+        fast_half_life: float = 60.0,
+        slow_half_life: float = 600.0,
+        classifier: Optional[Callable[[str], str]] = None,
+    ):
+        """
+        Args:
+            capacity: 全局跟踪的词数上限（Space-Saving 计数器个数）
+            bucket_sec: 时间桶粒度（秒）
+            horizon_sec: 最长窗口（秒），决定保留的桶数
+            sketch_width/sketch_depth: 每个时间桶的 Count-Min 尺寸
+            bucket_top: 每个时间桶保留的候选词数
+            fast_half_life/slow_half_life: 趋势用快/慢指数衰减半衰期（秒）
+            classifier: 词分类函数，词首次被跟踪时调用一次
+        """
+        self.bucket_sec = float(bucket_sec)
+        self.max_buckets = int(math.ceil(horizon_sec / self.bucket_sec)) + 1
+        self._sketch_width = sketch_width
+        self._sketch_depth = sketch_depth
+        self._bucket_top = bucket_top
+        self._fast_lambda = math.log(2) / fast_half_life
+        self._slow_lambda = math.log(2) / slow_half_life
+        self._classifier = classifier
+
+        self._summary = SpaceSaving(capacity)
+        self._buckets: Deque[_TimeBucket] = deque()
+        self._decay: Dict[str, List[float]] = {}  # word -> [fast, slow, last_ts]
+        self._categories: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.total_words = 0
+        self.total_docs = 0
+        self.last_update = 0.0
+        self._started: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+    def add(self, words: Iterable[str], now: Optional[float] = None) -> None:
+        """计入一条评论切分出的词（同一条内重复的词按次数计）"""
+        counts: Dict[str, int] = {}
+        for w in words:
+            counts[w] = counts.get(w, 0) + 1
+        self.add_counts(counts, docs=1, now=now)
+
+    def add_counts(
+        self, counts: Mapping[str, int], docs: int = 1, now: Optional[float] = None
+    ) -> None:
+        """计入一批已聚合的词频（如一个处理批次），一次加锁"""
+        if not counts:
+            return
+        ts = time.time() if now is None else now
+        with self._lock:
+            if self._started is None:
+                self._started = ts
+            bucket = self._bucket_for(ts)
+            for word, n in counts.items():
+                if n > 0:
+                    self._add_one(word, int(n), ts, bucket)
+            self.total_docs += docs
+            self.last_update = ts
+
+    def _add_one(self, word: str, n: int, ts: float, bucket: _TimeBucket) -> None:
+        self.total_words += n
+        bucket.sketch.add(word, n)
+        bucket.top.offer(word, n)
+
+        evicted = self._summary.offer(word, n)
+        if evicted is not None:
+            self._decay.pop(evicted, None)
+            self._categories.pop(evicted, None)
+        state = self._decay.get(word)
+        if state is None:
+            self._decay[word] = [float(n), float(n), ts]
+            if self._classifier is not None:
+                self._categories[word] = self._classifier(word)
+        else:
+            dt = max(0.0, ts - state[2])
+            state[0] = state[0] * math.exp(-self._fast_lambda * dt) + n
+            state[1] = state[1] * math.exp(-self._slow_lambda * dt) + n
+            state[2] = ts
+
+    def _bucket_for(self, ts: float) -> _TimeBucket:
+        start = ts - (ts % self.bucket_sec)
+        if not self._buckets or self._buckets[-1].start < start:
+            self._buckets.append(
+                _TimeBucket(start, self._sketch_width, self._sketch_depth, self._bucket_top)
+            )
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popleft()
+            return self._buckets[-1]
+        # 迟到的数据计入起始时间不晚于它的最近一个桶；早于所有保留的桶时计入最旧的桶
+        for bucket in reversed(self._buckets):
+            if bucket.start <= start:
+                return bucket
+        return self._buckets[0]
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+    def top(
+        self, k: int = 10, category: Optional[str] = None, now: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """全程热词 Top-K（Space-Saving 计数，O(K)；按分类过滤时从高到低扫描，凑够 K 个即停）"""
+        ts = time.time() if now is None else now
+        with self._lock:
+            entries = self._summary.iter_desc()
+            if category is not None:
+                entries = (e for e in entries if self._categories.get(e[0], "other") == category)
+            entries = list(islice(entries, max(0, k)))
+            return [self._describe(word, count, error, ts) for word, count, error in entries]
+
+    def top_window(
+        self, window_sec: float = 300, k: int = 10, now: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """滑动窗口内的热词 Top-K：窗口内各桶候选词合并，用 Count-Min 估计窗口计数"""
+        ts = time.time() if now is None else now
+        cutoff = ts - window_sec
+        with self._lock:
+            buckets = [b for b in self._buckets if b.start + self.bucket_sec > cutoff]
+            # 先用各桶候选的计数粗排（字典查找），只对入围的词做 Count-Min 精估
+            rough: Dict[str, int] = {}
+            for b in buckets:
+                for word, count, _ in b.top.top(self._bucket_top):
+                    rough[word] = rough.get(word, 0) + count
+            shortlist = heapq.nlargest(max(4 * k, 32), rough, key=rough.__getitem__)
+            scored = []
+            for word in shortlist:
+                idx = buckets[0].sketch.indexes(word)
+                scored.append((sum(b.sketch.estimate(word, idx) for b in buckets), word))
+            best = heapq.nlargest(k, scored)
+            return [
+                {**self._describe(word, self._summary.count(word), 0, ts), "window_count": count}
+                for count, word in best
+            ]
+
+    def window_count(self, word: str, window_sec: float, now: Optional[float] = None) -> int:
+        ts = time.time() if now is None else now
+        cutoff = ts - window_sec
+        with self._lock:
+            buckets = [b for b in self._buckets if b.start + self.bucket_sec > cutoff]
+            if not buckets:
+                return 0
+            idx = buckets[0].sketch.indexes(word)
+            return sum(b.sketch.estimate(word, idx) for b in buckets)
+
+    def trending(
+        self,
+        k: int = 10,
+        min_count: int = 3,
+        window_sec: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """按快/慢衰减速率比排序的上升词（只看被跟踪的词，内存有界）
+
+        window_sec 限定最近出现过的词
+        """
+        ts = time.time() if now is None else now
+        since = ts - window_sec if window_sec is not None else None
+        with self._lock:
+            scored = []
+            for word, state in self._decay.items():
+                if since is not None and state[2] < since:
+                    continue
+                if self._summary.count(word) < min_count:
+                    continue
+                scored.append((self._trend_score(state, ts), word))
+            best = heapq.nlargest(k, scored)
+            return [self._describe(word, self._summary.count(word), 0, ts) for _, word in best]
+
+    def _trend_score(self, state: List[float], ts: float) -> float:
+        dt = max(0.0, ts - state[2])
+        fast_rate = state[0] * math.exp(-self._fast_lambda * dt) * self._fast_lambda
+        slow_rate = state[1] * math.exp(-self._slow_lambda * dt) * self._slow_lambda
+        # 按引擎运行时长做预热校正，否则开播初期慢速率偏低、所有词都显示上升
+        age = max(ts - (self._started if self._started is not None else ts), 1e-6)
+        fast_rate /= -math.expm1(-self._fast_lambda * age)
+        slow_rate /= -math.expm1(-self._slow_lambda * age)
+        return fast_rate / slow_rate if slow_rate > 0 else 0.0
+
+    def _describe(self, word: str, count: int, error: int, ts: float) -> Dict[str, Any]:
+        state = self._decay.get(word)
+        score = self._trend_score(state, ts) if state else 0.0
+        if score > 1.5:
+            trend = "up"
+        elif score < 0.67:
+            trend = "down"
+        else:
+            trend = "stable"
+        return {
+            "word": word,
+            "count": count,
+            "error": error,
+            "category": self._categories.get(word, "other"),
+            "trend": trend,
+            "trend_score": round(score, 3),
+            "last_updated": state[2] if state else None,
+        }
+
+    def __len__(self) -> int:
+        return len(self._summary)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._summary = SpaceSaving(self._summary.capacity)
+            self._buckets.clear()
+            self._decay.clear()
+            self._categories.clear()
+            self.total_words = 0
+            self.total_docs = 0
+            self._started = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "tracked_words": len(self._summary),
+            "capacity": self._summary.capacity,
+            "time_buckets": len(self._buckets),
+            "total_words": self.total_words,
+            "total_docs": self.total_docs,
+            "last_update": self.last_update,
+        }
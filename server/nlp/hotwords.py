@@ -1,23 +1,212 @@
+# -*- coding: utf-8 -*-
 """
-热词替换工具的空实现。
+热词替换（ASR 专有名词纠错）
 
-保留接口，直接返回原文本，不再加载或应用替换规则。
+规则格式与 ``data/hotwords.json`` 一致：``{"replace": {正确词: [误识别1, 误识别2, ...]}}``，
+可选 ``"anchors": {主播标识: {正确词: [...]}}`` 为单个主播追加/覆盖规则。
+
+- 全部规则编译进一个 Aho-Corasick 自动机，每句只做一次从左到右的扫描，
+  耗时与规则数量无关
+- 最左最长匹配：同一起点取最长规则，已替换的片段不再参与后续匹配
+- 正确词本身也作为“保护词”编入自动机，避免“拼多多”被规则“多多→…”改坏
+- 规则文件按修改时间热加载；``set_rules`` 在旁路编译后整体替换，扫描中的线程不受影响
 """
 
 from __future__ import annotations
 
-from typing import Dict, List
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional
+
+from server.utils.aho_corasick import AhoCorasick
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.getenv("HOTWORDS_PATH", "data/hotwords.json")
+RELOAD_INTERVAL_SEC = float(os.getenv("HOTWORDS_RELOAD_INTERVAL", "2.0"))
+
+Rules = Mapping[str, List[str]]
+
+
+def _flatten(replace: Optional[Rules]) -> Dict[str, str]:
+    """{正确词: [误识别...]} → {误识别: 正确词}"""
+    mapping: Dict[str, str] = {}
+    for right, wrongs in (replace or {}).items():
+        right = str(right or "").strip()
+        if not right:
+            continue
+        if isinstance(wrongs, str):
+            wrongs = [wrongs]
+        for wrong in wrongs or ():
+            wrong = str(wrong or "").strip()
+            if wrong and wrong != right:
+                mapping[wrong] = right
+    return mapping
+
+
+def _compile(mapping: Dict[str, str]) -> AhoCorasick:
+    # 正确词作为恒等规则（保护词），误识别规则同名时优先
+    patterns: Dict[str, str] = {right: right for right in mapping.values()}
+    patterns.update(mapping)
+    return AhoCorasick(patterns.items())
 
 
 class HotwordReplacer:
-    """直接返回传入文本，不执行任何替换。"""
+    """基于 Aho-Corasick 的批量热词替换（线程安全）"""
 
-    def __init__(self, path: str | None = None) -> None:
-        self.path = path
+    def __init__(
+        self, path: Optional[str] = None, reload_interval: float = RELOAD_INTERVAL_SEC
+    ) -> None:
+        self.path = path if path is not None else DEFAULT_PATH
+        self.reload_interval = reload_interval
         self.rules: Dict[str, List[str]] = {}
+        self.anchor_rules: Dict[str, Dict[str, List[str]]] = {}
+        self.version = 0
+        self.applied = 0
+        self.replaced = 0
+
+        self._lock = threading.Lock()
+        self._global: Dict[str, str] = {}
+        self._anchors: Dict[str, Dict[str, str]] = {}
+        self._automaton = AhoCorasick(())
+        self._compiled: Dict[str, AhoCorasick] = {}
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        if self.path:
+            self.reload(force=True)
+
+    # ------------------------------------------------------------------
+    # 规则管理
+    # ------------------------------------------------------------------
+    def set_rules(
+        self, replace: Optional[Rules], anchors: Optional[Mapping[str, Rules]] = None
+    ) -> None:
+        """整体替换规则；anchors 为 None 时保留现有主播规则"""
+        mapping = _flatten(replace)
+        automaton = _compile(mapping)
+        with self._lock:
+            if anchors is not None:
+                self.anchor_rules = {str(k): dict(v or {}) for k, v in anchors.items() if k}
+                self._anchors = {k: _flatten(v) for k, v in self.anchor_rules.items()}
+            self.rules = {str(k): list(v or []) for k, v in (replace or {}).items()}
+            self._global = mapping
+            self._automaton = automaton
+            # 主播自动机依赖全局规则，按需重新编译
+            self._compiled = {}
+            self.version += 1
+
+    def set_anchor_rules(self, anchor: str, replace: Optional[Rules]) -> None:
+        """更新单个主播的规则；replace 为空时移除该主播"""
+        with self._lock:
+            rules = dict(self.anchor_rules)
+            if replace:
+                rules[anchor] = dict(replace)
+            else:
+                rules.pop(anchor, None)
+            self.anchor_rules = rules
+            self._anchors = {k: _flatten(v) for k, v in rules.items()}
+            self._compiled = {}
+            self.version += 1
+
+    def reload(self, force: bool = False) -> bool:
+        """规则文件有变化时重新加载，返回是否加载"""
+        if not self.path:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if not force and mtime == self._mtime:
+            return False
+        try:
+            data = json.loads(Path(self.path).read_text(encoding="utf-8")) or {}
+        except Exception as exc:
+            logger.warning("热词规则加载失败 %s: %s", self.path, exc)
+            return False
+        self._mtime = mtime
+        self.set_rules(data.get("replace") or {}, data.get("anchors") or {})
+        return True
+
+    def _maybe_reload(self) -> None:
+        if not self.path or self.reload_interval <= 0:
+            return
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.reload_interval
+        self.reload()
+
+    def anchor_for(self, *keys: Optional[str]) -> Optional[str]:
+        """按顺序返回第一个配置了规则的主播标识（如 live_id、主播名）"""
+        for key in keys:
+            if key and str(key) in self._anchors:
+                return str(key)
+        return None
+
+    def _automaton_for(self, anchor: Optional[str]) -> AhoCorasick:
+        if not anchor or anchor not in self._anchors:
+            return self._automaton
+        automaton = self._compiled.get(anchor)
+        if automaton is None:
+            mapping = dict(self._global)
+            mapping.update(self._anchors[anchor])
+            automaton = _compile(mapping)
+            self._compiled[anchor] = automaton
+        return automaton
+
+    # ------------------------------------------------------------------
+    # 替换
+    # ------------------------------------------------------------------
+    def apply(self, text: str, anchor: Optional[str] = None) -> str:
+        """单次扫描完成全部替换（最左最长匹配）"""
+        self._maybe_reload()
+        if not text:
+            return text
+        self.applied += 1
+        automaton = self._automaton_for(anchor)
+        if not automaton.size:
+            return text
+
+        # 同一起点保留最长命中；命中按结束位置产出
+        best: Dict[int, tuple] = {}
+        for start, end, _wrong, right in automaton.iter(text):
+            prev = best.get(start)
+            if prev is None or end > prev[0]:
+                best[start] = (end, right)
+        if not best:
+            return text
 
-    def apply(self, text: str) -> str:
-        return text
+        parts: List[str] = []
+        pos = 0
+        changed = 0
+        for start in sorted(best):
+            if start < pos:
+                continue
+            end, right = best[start]
+            if text[start:end] != right:
+                parts.append(text[pos:start])
+                parts.append(right)
+                pos = end
+                changed += 1
+            else:
+                # 保护词：原样保留，但占住该区间
+                parts.append(text[pos:end])
+                pos = end
+        if not changed:
+            return text
+        parts.append(text[pos:])
+        self.replaced += changed
+        return "".join(parts)
 
-    def set_rules(self, replace: Dict[str, List[str]]) -> None:
-        self.rules = {}
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "rules": len(self._global),
+            "anchors": len(self._anchors),
+            "version": self.version,
+            "applied": self.applied,
+            "replaced": self.replaced,
+        }
@@ -1,31 +1,365 @@
 """
-问题提取模块空实现。
+弹幕问题提取与近似去重聚类
 
-接口保留但不再依赖分词或 NLP 逻辑，统一返回空结果，
-避免影响依赖方的调用流程。
+- 疑问识别：疑问词/句末语气词/问号编译进同一个 Aho-Corasick 自动机，每条弹幕扫描一次，
+  同时给出问题类别（价格、物流、商品、使用、其他）
+- 近似去重：问题文本归一化后取字二元组（bigram），MinHash 签名 + LSH 分带找候选簇，
+  再用精确 Jaccard 确认；“多少钱啊”“多少钱？？”“这个多少钱”归入同一簇
+- 每个簇累计条数、去重用户数与按半衰期衰减的权重，只把各簇代表问题交给下游回答
 """
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import hashlib
+import math
+import re
+import time
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
+from server.utils.aho_corasick import LexiconMatcher
 from server.utils.logger import LoggerMixin
 
+# 疑问线索：任意位置出现即视为提问
+INTERROGATIVES = [
+    "?", "？", "什么", "怎么", "咋", "啥", "多少", "几号", "几点", "几天",
+    "多久", "多大", "多高", "多重", "哪里", "哪儿", "哪个", "哪款", "哪种", "在哪",
+    "为什么", "为啥", "如何", "能不能", "可不可以", "可以吗", "有没有", "是不是",
+    "会不会", "要不要", "好不好", "行不行",
+    "how", "what", "why", "when", "where", "price",
+]
+# 句末语气词：只在句尾（忽略标点）时算作提问
+FINAL_PARTICLES = ["吗", "么", "嘛", "呢"]
+
+QUESTION_CATEGORIES = {
+    "price": [
+        "多少钱", "价格", "价钱", "优惠", "券", "折扣", "便宜", "贵", "活动", "满减", "price",
+    ],
+    "logistics": ["发货", "包邮", "快递", "物流", "到货", "退货", "换货", "退换", "运费"],
+    "product": [
+        "尺码", "码数", "尺寸", "颜色", "材质", "面料", "质量", "效果", "味道", "规格", "型号",
+        "保质期",
+    ],
+    "usage": ["怎么用", "用法", "使用", "适合", "能用", "可以用", "搭配"],
+    "purchase": ["链接", "怎么买", "哪里买", "上车", "拍", "下单", "库存", "有货", "现货"],
+}
+
+# 归一化：去掉标点/空白/表情，句末语气词不参与相似度
+_STRIP_RE = re.compile(r"[^\w\u4e00-\u9fff]+")
+_TRAILING_RE = re.compile(r"[啊呀吖哇呢吗么嘛哈啦了]+$")
+_REPEAT_RE = re.compile(r"(.)\1{2,}")
+
+_MERSENNE = (1 << 61) - 1
+
+
+def normalize_question(text: str) -> str:
+    """归一化问题文本用于聚类（小写、去标点、压缩重复字符、去句末语气词）"""
+    cleaned = _STRIP_RE.sub("", str(text or "").lower())
+    cleaned = _REPEAT_RE.sub(r"\1\1", cleaned)
+    stripped = _TRAILING_RE.sub("", cleaned)
+    return stripped or cleaned
+
+
+def shingles(text: str) -> Set[str]:
+    """字二元组集合；单字文本退化为单字"""
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+
+@lru_cache(maxsize=1)
+def _default_matchers() -> Tuple[LexiconMatcher, LexiconMatcher]:
+    """默认词典的自动机只编译一次，按窗口新建的提取器共用"""
+    return (
+        LexiconMatcher({"interrogative": INTERROGATIVES, "particle": FINAL_PARTICLES}),
+        LexiconMatcher(QUESTION_CATEGORIES),
+    )
+
+
+@lru_cache(maxsize=4)
+def _hasher(num_perm: int) -> "MinHasher":
+    return MinHasher(num_perm)
+
+
+class MinHasher:
+    """MinHash 签名（num_perm 个 (a*x+b) mod p 置换）"""
+
+    def __init__(self, num_perm: int = 32, seed: int = 7):
+        self.num_perm = num_perm
+        params = []
+        state = seed
+        for _ in range(num_perm):
+            # 确定性伪随机参数，保证跨进程签名一致
+            state = (state * 6364136223846793005 + 1442695040888963407) & ((1 << 64) - 1)
+            a = (state >> 3) % (_MERSENNE - 1) + 1
+            state = (state * 6364136223846793005 + 1442695040888963407) & ((1 << 64) - 1)
+            b = (state >> 3) % _MERSENNE
+            params.append((a, b))
+        self._params = params
+
+    def signature(self, items: Iterable[str]) -> Tuple[int, ...]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+            for s in items
+        ]
+        if not hashes:
+            return tuple([_MERSENNE] * self.num_perm)
+        return tuple(min((a * h + b) % _MERSENNE for h in hashes) for a, b in self._params)
+
+
+class QuestionCluster:
+    """近似问题簇"""
+
+    __slots__ = (
+        "cluster_id", "representative", "shingles", "category", "count", "users",
+        "weight", "weight_ts", "first_seen", "last_seen", "variants",
+    )
+
+    def __init__(
+        self, cluster_id: int, text: str, norm: str, grams: Set[str], category: str, ts: float
+    ):
+        self.cluster_id = cluster_id
+        self.representative = text
+        self.shingles = grams
+        self.category = category
+        self.count = 0
+        self.users: Set[str] = set()
+        self.weight = 0.0
+        self.weight_ts = ts
+        self.first_seen = ts
+        self.last_seen = ts
+        self.variants: Counter = Counter()
+
+    def to_dict(self, score: float) -> Dict[str, Any]:
+        if self.count >= 3 or score >= 3:
+            priority = "high"
+        else:
+            priority = "medium" if self.count >= 2 else "low"
+        return {
+            "question": self.representative,
+            "category": self.category,
+            "count": self.count,
+            "unique_users": len(self.users),
+            "score": round(score, 3),
+            "priority": priority,
+            "variants": [v for v, _ in self.variants.most_common(3)],
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+        }
+
 
 class QuestionExtractor(LoggerMixin):
-    """空实现：不再分析或分类弹幕问题。"""
+    """流式问题提取器：识别提问并聚合近似问题"""
 
     def __init__(self, config: Optional[Dict[str, Any]] = None) -> None:
         self.config = config or {}
-        self.logger.info("问题提取功能已禁用，所有接口返回空列表。")
+        get = self.config.get
+        self.similarity = float(get("question_similarity", 0.5))
+        self.half_life = float(get("question_half_life", 180.0))
+        self.window_sec = float(get("question_window_sec", 600.0))
+        self.max_clusters = int(get("question_max_clusters", 500))
+        self.max_length = int(get("question_max_length", 80))
+        num_perm = int(get("question_num_perm", 32))
+        # 2 行一带：Jaccard 0.5 时命中至少一带的概率 > 99%
+        self.rows = 2
+        self.bands = max(1, num_perm // self.rows)
+        self._hasher = _hasher(self.bands * self.rows)
+        self._decay = math.log(2) / self.half_life
+
+        self.matcher, self.category_matcher = _default_matchers()
+
+        self._clusters: Dict[int, QuestionCluster] = {}
+        self._bands: List[Dict[Tuple[int, ...], Set[int]]] = [{} for _ in range(self.bands)]
+        self._exact: Dict[str, int] = {}
+        self._next_id = 1
+        self.total_questions = 0
+
+    # ------------------------------------------------------------------
+    # 识别
+    # ------------------------------------------------------------------
+    def is_question(self, text: str) -> bool:
+        content = str(text or "").strip()
+        if not content or len(content) > self.max_length:
+            return False
+        tail = len(content.rstrip("~～!！。.，, 啊呀哈"))
+        for start, end, _word, family in self.matcher.find(content.lower()):
+            if family == "interrogative" or end >= tail:
+                return True
+        return False
+
+    def classify(self, text: str) -> str:
+        counts = self.category_matcher.count(str(text or "").lower())
+        return counts.most_common(1)[0][0] if counts else "other"
 
     def extract_questions(self, text: str) -> List[Dict[str, Any]]:
-        return []
+        """单条文本的问题识别结果（非提问返回空列表）"""
+        if not self.is_question(text):
+            return []
+        content = str(text).strip()
+        return [{
+            "question": content,
+            "category": self.classify(content),
+            "normalized": normalize_question(content),
+        }]
+
+    # ------------------------------------------------------------------
+    # 聚类
+    # ------------------------------------------------------------------
+    def add(
+        self,
+        text: str,
+        user: Optional[str] = None,
+        weight: float = 1.0,
+        ts: Optional[float] = None,
+        check: bool = True,
+    ) -> Optional[int]:
+        """计入一条弹幕；是提问时返回所属簇 ID，否则返回 None"""
+        if check and not self.is_question(text):
+            return None
+        content = str(text).strip()
+        norm = normalize_question(content)
+        if not norm:
+            return None
+        now = time.time() if ts is None else ts
+        self.total_questions += 1
+
+        cluster_id = self._exact.get(norm)
+        if cluster_id is None or cluster_id not in self._clusters:
+            grams = shingles(norm)
+            signature = self._hasher.signature(grams)
+            keys = [signature[i * self.rows:(i + 1) * self.rows] for i in range(self.bands)]
+            cluster_id = self._find_similar(grams, keys)
+            if cluster_id is None:
+                cluster_id = self._new_cluster(content, norm, grams, keys, now)
+            self._exact[norm] = cluster_id
+
+        cluster = self._clusters[cluster_id]
+        cluster.count += 1
+        if user:
+            cluster.users.add(str(user))
+        decay = math.exp(-self._decay * max(0.0, now - cluster.weight_ts))
+        cluster.weight = cluster.weight * decay + weight
+        cluster.weight_ts = now
+        cluster.last_seen = now
+        cluster.variants[content] += 1
+        # 代表问题取出现最多的原文
+        cluster.representative = cluster.variants.most_common(1)[0][0]
+        return cluster_id
+
+    def add_comments(self, comments: Iterable[Any], ts: Optional[float] = None) -> int:
+        """批量计入评论（dict 取 content/user 字段），返回识别出的问题数"""
+        found = 0
+        for comment in comments:
+            if isinstance(comment, dict):
+                content = comment.get("content")
+                user = comment.get("user_id") or comment.get("user")
+            else:
+                content = getattr(comment, "content", "")
+                user = getattr(comment, "user_id", None) or getattr(comment, "user", None)
+            if self.add(content, user=user, ts=ts) is not None:
+                found += 1
+        return found
+
+    def _find_similar(self, grams: Set[str], keys: List[Tuple[int, ...]]) -> Optional[int]:
+        candidates: Set[int] = set()
+        for band, key in zip(self._bands, keys):
+            candidates.update(band.get(key, ()))
+        best, best_sim = None, self.similarity
+        for cid in candidates:
+            cluster = self._clusters.get(cid)
+            if cluster is None:
+                continue
+            sim = jaccard(grams, cluster.shingles)
+            if sim >= best_sim:
+                best, best_sim = cid, sim
+        return best
+
+    def _new_cluster(
+        self, text: str, norm: str, grams: Set[str], keys: List[Tuple[int, ...]], now: float
+    ) -> int:
+        if len(self._clusters) >= self.max_clusters:
+            self.expire(now, force=True)
+        cid = self._next_id
+        self._next_id += 1
+        self._clusters[cid] = QuestionCluster(cid, text, norm, grams, self.classify(text), now)
+        for band, key in zip(self._bands, keys):
+            band.setdefault(key, set()).add(cid)
+        return cid
+
+    def expire(self, now: Optional[float] = None, force: bool = False) -> int:
+        """移除窗口外的簇；force 时额外淘汰得分最低的簇直到低于容量"""
+        now = time.time() if now is None else now
+        stale = [cid for cid, c in self._clusters.items() if now - c.last_seen > self.window_sec]
+        if force and len(self._clusters) - len(stale) >= self.max_clusters:
+            stale_set = set(stale)
+            alive = sorted(
+                (cid for cid in self._clusters if cid not in stale_set),
+                key=lambda cid: self._score(self._clusters[cid], now),
+            )
+            stale.extend(alive[: len(alive) - self.max_clusters + 1])
+        if stale:
+            drop = set(stale)
+            for cid in drop:
+                self._clusters.pop(cid, None)
+            for band in self._bands:
+                for key in [k for k, ids in band.items() if ids & drop]:
+                    band[key] -= drop
+                    if not band[key]:
+                        del band[key]
+            self._exact = {n: cid for n, cid in self._exact.items() if cid not in drop}
+        return len(stale)
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+    def _score(self, cluster: QuestionCluster, now: float) -> float:
+        return cluster.weight * math.exp(-self._decay * max(0.0, now - cluster.weight_ts))
+
+    def top_clusters(self, limit: int = 5, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """按衰减权重排序的问题簇"""
+        now = time.time() if now is None else now
+        ranked = sorted(
+            self._clusters.values(),
+            key=lambda c: (self._score(c, now), c.count, c.last_seen),
+            reverse=True,
+        )
+        return [c.to_dict(self._score(c, now)) for c in ranked[:limit]]
+
+    def representatives(self, limit: int = 5, now: Optional[float] = None) -> List[str]:
+        """各簇代表问题（热门在前），供下游回答"""
+        return [c["question"] for c in self.top_clusters(limit, now)]
 
     def extract_from_comments(self, comments: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """计入一批评论并返回聚合后的问题概览"""
+        self.add_comments(comments)
+        clusters = self.top_clusters(limit=len(self._clusters))
+        return {
+            "total_questions": self.total_questions,
+            "questions": clusters,
+            "category_distribution": dict(Counter(c["category"] for c in clusters)),
+            "priority_distribution": dict(Counter(c["priority"] for c in clusters)),
+        }
+
+    def clear(self) -> None:
+        self._clusters.clear()
+        self._bands = [{} for _ in range(self.bands)]
+        self._exact.clear()
+        self.total_questions = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        dedup_ratio = 0.0
+        if self.total_questions:
+            dedup_ratio = round(1 - len(self._clusters) / self.total_questions, 3)
         return {
-            "total_questions": 0,
-            "questions": [],
-            "category_distribution": {},
-            "priority_distribution": {},
+            "total_questions": self.total_questions,
+            "clusters": len(self._clusters),
+            "dedup_ratio": dedup_ratio,
         }
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Aho-Corasick 多模式匹配
+
+一次 O(n) 扫描找出文本中所有词典命中（含重叠），耗时与词典大小无关。
+``LexiconMatcher`` 把多个词族（如垃圾/广告词、正面词、负面词、否定词、程度词）
+编译进同一个自动机，每个命中带上所属词族；词典变更时在旁路构建新自动机后整体替换，
+读者始终看到完整的一版。
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import Counter, deque
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+# (起始下标, 结束下标(不含), 词, 词族)
+Hit = Tuple[int, int, str, str]
+
+
+class AhoCorasick:
+    """不可变的 Aho-Corasick 自动机，patterns 为 (词, 标签) 序列"""
+
+    __slots__ = ("_goto", "_fail", "_out", "_patterns", "size")
+
+    def __init__(self, patterns: Iterable[Tuple[str, str]]):
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[int]] = [[]]
+        self._patterns: List[Tuple[str, str]] = []
+        seen = set()
+        for word, tag in patterns:
+            if not word or (word, tag) in seen:
+                continue
+            seen.add((word, tag))
+            state = 0
+            for ch in word:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                state = nxt
+            out[state].append(len(self._patterns))
+            self._patterns.append((word, tag))
+
+        # BFS 构建失败指针，并沿失败链合并输出，扫描时无需再回溯输出
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[nxt] = target if target != nxt else 0
+                if out[fail[nxt]]:
+                    out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = [tuple(o) for o in out]
+        self.size = len(self._patterns)
+
+    def iter(self, text: str) -> Iterator[Hit]:
+        """逐个产出命中 (start, end, word, tag)，包含重叠命中"""
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self._patterns
+        state = 0
+        for i, ch in enumerate(text):
+            nxt = goto[state].get(ch)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto[state].get(ch)
+            state = nxt or 0
+            if out[state]:
+                end = i + 1
+                for pid in out[state]:
+                    word, tag = patterns[pid]
+                    yield end - len(word), end, word, tag
+
+    def findall(self, text: str) -> List[Hit]:
+        return list(self.iter(text))
+
+    def contains(self, text: str, tag: Optional[str] = None) -> bool:
+        """是否存在命中（可限定标签），找到即返回"""
+        for hit in self.iter(text):
+            if tag is None or hit[3] == tag:
+                return True
+        return False
+
+
+class LexiconMatcher:
+    """多词族词典匹配器，支持原子重建（线程安全）"""
+
+    def __init__(self, lexicons: Optional[Mapping[str, Iterable[str]]] = None):
+        self._lexicons: Dict[str, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+        self._automaton = AhoCorasick(())
+        self.version = 0
+        if lexicons:
+            self.update(lexicons)
+
+    def update(self, lexicons: Mapping[str, Iterable[str]], replace: bool = False) -> None:
+        """更新一个或多个词族；replace=True 时丢弃未提及的词族"""
+        with self._lock:
+            merged = {} if replace else dict(self._lexicons)
+            for family, words in lexicons.items():
+                merged[family] = tuple(dict.fromkeys(w for w in words if w))
+            automaton = AhoCorasick((w, family) for family, words in merged.items() for w in words)
+            # 单次引用赋值，扫描中的读者继续使用旧自动机
+            self._lexicons = merged
+            self._automaton = automaton
+            self.version += 1
+
+    def words(self, family: str) -> Tuple[str, ...]:
+        return self._lexicons.get(family, ())
+
+    @property
+    def families(self) -> List[str]:
+        return list(self._lexicons)
+
+    def find(self, text: str) -> List[Hit]:
+        """一次扫描返回全部词族的命中"""
+        return self._automaton.findall(text)
+
+    def count(self, text: str) -> Counter:
+        """按词族统计命中次数"""
+        return Counter(hit[3] for hit in self._automaton.iter(text))
+
+    def contains(self, text: str, family: str) -> bool:
+        return self._automaton.contains(text, family)
+
+    def __len__(self) -> int:
+        return self._automaton.size
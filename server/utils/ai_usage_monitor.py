@@ -10,10 +10,12 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
-from collections import defaultdict
+from collections import defaultdict, deque
 import threading
 from decimal import Decimal, ROUND_HALF_UP
 
+from server.ai.provider_health import percentile
+
 logger = logging.getLogger(__name__)
 
 
@@ -419,6 +421,9 @@ class AIUsageMonitor:
             "cost": 0.0
         })
         
+        # 网关限流排队耗时（按 服务商/优先级，最近 500 次）
+        self._queue_waits: Dict[str, deque] = defaultdict(lambda: deque(maxlen=500))
+        
         # 线程锁
         self._lock = threading.Lock()
         
@@ -562,6 +567,26 @@ class AIUsageMonitor:
         with self._lock:
             return dict(self._session_stats.get(session_id, {}))
     
+    def record_queue_time(self, provider: str, priority: str, queue_ms: float) -> None:
+        """记录一次请求在网关限流器中的排队耗时"""
+        with self._lock:
+            self._queue_waits[f"{provider}/{priority}"].append(float(queue_ms))
+    
+    def get_queue_stats(self) -> Dict[str, Dict[str, Any]]:
+        """按 服务商/优先级 汇总排队耗时（次数、平均、p95、最大，毫秒）"""
+        with self._lock:
+            snapshot = {key: list(values) for key, values in self._queue_waits.items() if values}
+        result = {}
+        for key, values in snapshot.items():
+            # 与选路时延同一算法（provider_health.percentile，最近秩法）
+            result[key] = {
+                "count": len(values),
+                "avg_ms": round(sum(values) / len(values), 1),
+                "p95_ms": round(percentile(values, 95), 1),
+                "max_ms": round(max(values), 1),
+            }
+        return result
+    
     def get_hourly_summary(self, hours_ago: int = 0) -> UsageSummary:
         """获取小时汇总"""
         now = datetime.now()
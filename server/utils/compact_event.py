@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+紧凑事件表示
+
+中转事件原本是 dict 套 dict，同一观众的昵称、ID、等级等在每条事件里重复存储。
+这里用 slots + frozen 的记录保存事件，用户信息按 user_id 驻留到共享的 ``UserTable``，
+payload 其余字段以 (key, value) 元组保存，键名经 ``sys.intern`` 驻留。
+只有在 API/落盘边界调用 ``to_dict()`` 时才还原为原始 dict 结构。
+"""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+# payload 中属于用户的字段，顺序决定 CompactEvent.user_mask 的位
+USER_FIELDS: Tuple[str, ...] = ("user_id", "user_id_str", "nickname", "gender", "level")
+_TOP_LEVEL_FIELDS = ("type", "payload", "timestamp")
+
+Pairs = Tuple[Tuple[str, Any], ...]
+
+
+@dataclass(frozen=True, slots=True)
+class UserRecord:
+    """驻留的观众信息，相同用户的所有事件共享同一实例"""
+
+    user_id: Any = None
+    user_id_str: Optional[str] = None
+    nickname: Optional[str] = None
+    gender: Any = None
+    level: Any = None
+
+
+@dataclass(frozen=True, slots=True)
+class CompactEvent:
+    """紧凑事件记录，提供只读的 dict 风格访问"""
+
+    type: str
+    timestamp: Any
+    user: Optional[UserRecord]
+    user_mask: int
+    data: Pairs
+    extra: Pairs = ()
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {}
+        if self.user is not None:
+            for bit, name in enumerate(USER_FIELDS):
+                if self.user_mask & (1 << bit):
+                    payload[name] = getattr(self.user, name)
+        payload.update(self.data)
+        return payload
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == "type":
+            return self.type
+        if key == "payload":
+            return self.payload
+        if key == "timestamp":
+            return self.timestamp if self.timestamp is not None else default
+        for k, v in self.extra:
+            if k == key:
+                return v
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            raise KeyError(key)
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"type": self.type, "payload": self.payload}
+        if self.timestamp is not None:
+            out["timestamp"] = self.timestamp
+        out.update(self.extra)
+        return out
+
+
+class UserTable:
+    """按 user_id 驻留用户记录，容量有界（淘汰最久未出现的用户）"""
+
+    def __init__(self, max_users: int = 200_000):
+        self.max_users = max(1, int(max_users))
+        self._users: Dict[str, UserRecord] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def intern(self, key: str, record: UserRecord) -> UserRecord:
+        existing = self._users.pop(key, None)
+        if existing is not None and existing == record:
+            self.hits += 1
+            record = existing
+        else:
+            self.misses += 1
+        # 重新插入到末尾，dict 的插入顺序即最近出现顺序
+        self._users[key] = record
+        if len(self._users) > self.max_users:
+            self._users.pop(next(iter(self._users)))
+        return record
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+
+def _intern_str(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+class EventCompactor:
+    """将中转事件 dict 转为 CompactEvent（单线程使用）"""
+
+    def __init__(self, users: Optional[UserTable] = None):
+        self.users = users if users is not None else UserTable()
+
+    def compact(self, event: Any) -> Any:
+        """转换一条事件；已是 CompactEvent 或非 dict 时原样返回"""
+        if not isinstance(event, dict):
+            return event
+        payload = event.get("payload")
+        if not isinstance(payload, dict):
+            payload = {}
+
+        user: Optional[UserRecord] = None
+        mask = 0
+        data = payload
+        user_key = payload.get("user_id_str") or payload.get("user_id")
+        if user_key not in (None, "", 0):
+            values = []
+            for bit, name in enumerate(USER_FIELDS):
+                if name in payload:
+                    mask |= 1 << bit
+                values.append(_intern_str(payload.get(name)))
+            user = self.users.intern(str(user_key), UserRecord(*values))
+            data = {k: v for k, v in payload.items() if k not in USER_FIELDS}
+
+        return CompactEvent(
+            type=sys.intern(str(event.get("type") or "")),
+            timestamp=event.get("timestamp"),
+            user=user,
+            user_mask=mask,
+            data=tuple((sys.intern(k), v) for k, v in data.items()),
+            extra=tuple(
+                (sys.intern(k), _intern_str(v))
+                for k, v in event.items()
+                if k not in _TOP_LEVEL_FIELDS
+            ),
+        )
+
+
+def to_dict(event: Any) -> Any:
+    """API 边界的统一转换：CompactEvent 还原为 dict，其余原样返回"""
+    return event.to_dict() if isinstance(event, CompactEvent) else event
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+EventBroadcaster - 一次编码、多端共享的事件广播器
+
+每个事件在发布时只封装一次（``EncodedEvent``），SSE 帧在首次被读取时编码并缓存，
+所有订阅者共享同一份不可变缓冲区。每个订阅者拥有有界队列，溢出时按策略
+丢弃最旧事件（drop_oldest）或断开该订阅者（disconnect），并记录滞后指标。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DISCONNECT = "disconnect"
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DISCONNECT)
+
+
+class SubscriberClosed(Exception):
+    """订阅者因溢出策略被断开后继续读取（``get`` / ``get_nowait`` / ``get_frame``）时抛出。"""
+
+
+class EncodedEvent(dict):
+    """
+    已发布事件的共享封装
+
+    本身即事件 dict（兼容原有消费者），附带发布序号与时间；
+    SSE 帧惰性编码且只编码一次，所有订阅者共享。
+    """
+
+    __slots__ = ("seq", "published_at", "_sse")
+
+    def __init__(self, event: Dict[str, Any], seq: int = 0, published_at: Optional[float] = None):
+        super().__init__(event)
+        self.seq = seq
+        self.published_at = published_at if published_at is not None else time.monotonic()
+        self._sse: Optional[bytes] = None
+
+    @property
+    def sse(self) -> bytes:
+        """``data: <json>\\n\\n`` 格式的 SSE 帧（UTF-8）。"""
+        if self._sse is None:
+            body = json.dumps(self, ensure_ascii=False, default=str)
+            self._sse = b"data: " + body.encode("utf-8") + b"\n\n"
+        return self._sse
+
+
+_CLOSED = EncodedEvent({"type": "subscriber_closed"}, seq=-1, published_at=0.0)
+
+
+class BroadcastSubscriber(asyncio.Queue):
+    """
+    有界订阅队列
+
+    与 ``asyncio.Queue`` 接口兼容，``get()`` 返回 ``EncodedEvent``（即事件 dict），
+    ``get_frame()`` 返回共享的 SSE 帧字节。写入从不阻塞：队列满时按溢出策略处理。
+    被断开后每次读取都抛出 ``SubscriberClosed``，``while True: await q.get()`` 式的消费者不会空转。
+    """
+
+    def __init__(self, maxsize: int = 1000, overflow: str = OVERFLOW_DROP_OLDEST, name: str = ""):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"未知的溢出策略: {overflow}")
+        super().__init__(maxsize=max(1, int(maxsize)))
+        self.overflow = overflow
+        self.name = name
+        self.closed = False
+        self.delivered = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.last_seq = 0
+        self.created_at = time.time()
+
+    # asyncio.Queue 的子类钩子（同 PriorityQueue 的做法）
+    def _put(self, item: Any) -> None:
+        if not isinstance(item, EncodedEvent):
+            item = EncodedEvent(item)
+        self._queue.append(item)
+        if len(self._queue) > self.max_depth:
+            self.max_depth = len(self._queue)
+
+    def _get(self) -> EncodedEvent:
+        item = self._queue[0]
+        if item is _CLOSED:
+            # 保留关闭标记，后续读取同样抛出
+            raise SubscriberClosed(self.name)
+        self._queue.popleft()
+        self.delivered += 1
+        if item.seq:
+            self.last_seq = item.seq
+        return item
+
+    def put_nowait(self, item: Any) -> None:
+        if self.closed:
+            return
+        if self.full():
+            if self.overflow == OVERFLOW_DISCONNECT:
+                self._disconnect()
+                return
+            self._queue.popleft()
+            self.dropped += 1
+        super().put_nowait(item)
+
+    def _disconnect(self) -> None:
+        self.dropped += len(self._queue)
+        self._queue.clear()
+        self.closed = True
+        # 队列已清空，写入关闭标记以唤醒读取者
+        super().put_nowait(_CLOSED)
+        logger.warning(f"订阅者 {self.name or id(self)} 积压超过 {self.maxsize} 条，已断开")
+
+    async def get_frame(self) -> bytes:
+        """读取下一条事件的 SSE 帧；订阅者已被断开时抛出 ``SubscriberClosed``。"""
+        item = await self.get()
+        return item.sse
+
+    def stats(self, head_seq: int = 0) -> Dict[str, Any]:
+        depth = 0 if self.closed else len(self._queue)
+        lag_ms = 0.0
+        if depth:
+            lag_ms = (time.monotonic() - self._queue[0].published_at) * 1000
+        return {
+            "name": self.name,
+            "overflow": self.overflow,
+            "maxsize": self.maxsize,
+            "closed": self.closed,
+            "depth": depth,
+            "max_depth": self.max_depth,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "lag_events": max(0, head_seq - self.last_seq) if self.last_seq else depth,
+            "lag_ms": round(lag_ms, 2),
+        }
+
+
+class EventBroadcaster:
+    """
+    事件广播器
+
+    ``publish`` 为 O(订阅者数) 的引用拷贝，不做任何序列化；
+    序列化由 ``EncodedEvent.sse`` 在首次读取时完成一次。
+    """
+
+    def __init__(self, default_maxsize: int = 1000, default_overflow: str = OVERFLOW_DROP_OLDEST):
+        if default_overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"未知的溢出策略: {default_overflow}")
+        self.default_maxsize = default_maxsize
+        self.default_overflow = default_overflow
+        self._subscribers: Set[BroadcastSubscriber] = set()
+        self._seq = 0
+        self._published = 0
+        self._disconnected = 0
+
+    def subscribe(
+        self,
+        maxsize: Optional[int] = None,
+        overflow: Optional[str] = None,
+        name: str = "",
+    ) -> BroadcastSubscriber:
+        sub = BroadcastSubscriber(
+            maxsize=maxsize or self.default_maxsize,
+            overflow=overflow or self.default_overflow,
+            name=name,
+        )
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: asyncio.Queue) -> None:
+        self._subscribers.discard(sub)  # type: ignore[arg-type]
+
+    def publish(self, event: Dict[str, Any]) -> EncodedEvent:
+        self._seq += 1
+        encoded = EncodedEvent(event, seq=self._seq)
+        self._published += 1
+        for sub in list(self._subscribers):
+            sub.put_nowait(encoded)
+            if sub.closed:
+                self._subscribers.discard(sub)
+                self._disconnected += 1
+        return encoded
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def stats(self) -> Dict[str, Any]:
+        clients = [sub.stats(self._seq) for sub in self._subscribers]
+        return {
+            "subscribers": len(clients),
+            "published": self._published,
+            "disconnected": self._disconnected,
+            "dropped": sum(c["dropped"] for c in clients),
+            "max_lag_ms": max((c["lag_ms"] for c in clients), default=0.0),
+            "clients": clients,
+        }
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+GiftComboAggregator - 礼物连击聚合器
+
+连击期间抖音为每次重复推送一条 GiftMessage，其中 repeat_count 为累计值。
+本聚合器按 (user_id, gift_id, group_id) 合并同一连击：
+- 中间更新只刷新累计数量，不向下游转发
+- 收到 repeat_end 或窗口内无新更新时，输出一条权威的 ``gift`` 事件
+- 连击进行中按固定间隔输出低频 ``gift_progress`` 事件供界面展示
+
+下游只对 ``gift`` 事件计数/计价，连击的总价值等于最终累计数量 × 单价。
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+ComboKey = Tuple[str, str, int]
+
+
+@dataclass
+class _ComboState:
+    event: Dict[str, Any]
+    count: int
+    first_ts: float
+    last_ts: float
+    updates: int = 1
+    last_progress_ts: float = float("-inf")
+
+
+class GiftComboAggregator:
+    """按 (用户, 礼物, group_id) 聚合礼物连击（单线程使用）"""
+
+    def __init__(self, window_sec: float = 3.0, progress_interval_sec: float = 1.0):
+        """
+        Args:
+            window_sec: 连击静默超时（秒），超时未收到 repeat_end 也视为结束
+            progress_interval_sec: 同一连击两次 gift_progress 之间的最小间隔
+        """
+        self.window_sec = float(window_sec)
+        self.progress_interval_sec = float(progress_interval_sec)
+        self._open: Dict[ComboKey, _ComboState] = {}
+        self._raw = 0
+        self._passthrough = 0
+        self._final = 0
+        self._progress = 0
+        self._collapsed = 0
+
+    @staticmethod
+    def _key(payload: Dict[str, Any]) -> Optional[ComboKey]:
+        group_id = payload.get("group_id") or 0
+        if not payload.get("combo") or not group_id:
+            return None
+        user = payload.get("user_id_str") or payload.get("user_id") or ""
+        gift = payload.get("gift_id") or payload.get("gift_name") or ""
+        return (str(user), str(gift), int(group_id))
+
+    def feed(self, event: Dict[str, Any], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        输入一条原始 gift 事件，返回需要下游处理的事件列表（可能为空）。
+        """
+        ts = time.monotonic() if now is None else now
+        self._raw += 1
+        out = self.sweep(now=ts)
+        payload = event.get("payload") or {}
+        key = self._key(payload)
+        if key is None:
+            self._passthrough += 1
+            out.append(event)
+            return out
+
+        count = int(payload.get("count") or 1)
+        state = self._open.get(key)
+        if state is None:
+            state = _ComboState(event=event, count=count, first_ts=ts, last_ts=ts)
+            self._open[key] = state
+        else:
+            state.updates += 1
+            state.last_ts = ts
+            state.event = event
+            # repeat_count 为累计值，取最大值防止乱序回退
+            state.count = max(state.count, count)
+
+        if payload.get("repeat_end"):
+            out.append(self._finalize(key))
+        elif ts - state.last_progress_ts >= self.progress_interval_sec:
+            state.last_progress_ts = ts
+            self._progress += 1
+            out.append(self._progress_event(state))
+        return out
+
+    def sweep(self, now: Optional[float] = None, force: bool = False) -> List[Dict[str, Any]]:
+        """结束超过静默窗口的连击（force=True 时结束全部），返回权威 gift 事件。"""
+        if not self._open:
+            return []
+        ts = time.monotonic() if now is None else now
+        expired = [
+            key for key, state in self._open.items()
+            if force or ts - state.last_ts >= self.window_sec
+        ]
+        return [self._finalize(key) for key in expired]
+
+    def _finalize(self, key: ComboKey) -> Dict[str, Any]:
+        state = self._open.pop(key)
+        self._final += 1
+        self._collapsed += state.updates - 1
+        payload = dict(state.event.get("payload") or {})
+        diamond_count = int(payload.get("diamond_count") or 0)
+        payload.update(
+            {
+                "count": state.count,
+                "gift_value": diamond_count * max(state.count, 1),
+                "combo_updates": state.updates,
+                "combo_final": True,
+            }
+        )
+        return {**state.event, "type": "gift", "payload": payload}
+
+    def _progress_event(self, state: _ComboState) -> Dict[str, Any]:
+        payload = state.event.get("payload") or {}
+        return {
+            "type": "gift_progress",
+            "payload": {
+                "user_id": payload.get("user_id"),
+                "user_id_str": payload.get("user_id_str"),
+                "nickname": payload.get("nickname"),
+                "gift_id": payload.get("gift_id"),
+                "gift_name": payload.get("gift_name"),
+                "group_id": payload.get("group_id"),
+                "count": state.count,
+                "diamond_count": payload.get("diamond_count"),
+            },
+            "timestamp": state.event.get("timestamp", time.time()),
+        }
+
+    @property
+    def open_combos(self) -> int:
+        return len(self._open)
+
+    def get_stats(self) -> Dict[str, Any]:
+        emitted = self._passthrough + self._final + self._progress
+        return {
+            "raw_events": self._raw,
+            "passthrough": self._passthrough,
+            "final_events": self._final,
+            "progress_events": self._progress,
+            "collapsed_updates": self._collapsed,
+            "open_combos": len(self._open),
+            "reduction_ratio": round(self._raw / emitted, 2) if emitted else 0.0,
+        }
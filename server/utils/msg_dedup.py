@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+MessageDeduplicator - 基于 msg_id 的限时去重过滤器
+
+抖音在重连、need_ack 与历史推送时会重复下发同一条消息。本过滤器以
+OrderedDict 维护 (msg_id -> 首次出现时间)，按插入顺序即时间顺序淘汰：
+- 查询/插入 O(1)，过期淘汰为均摊 O(1)
+- 条目同时受时间窗口（horizon）与容量上限约束，内存有界
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class MessageDeduplicator:
+    """限时 LRU 去重集合（线程安全）"""
+
+    def __init__(self, horizon_sec: float = 600.0, max_entries: int = 200_000):
+        """
+        Args:
+            horizon_sec: 去重时间窗口（秒），超过窗口的 msg_id 会被遗忘
+            max_entries: 最大条目数，超过时淘汰最早的条目
+        """
+        self.horizon_sec = float(horizon_sec)
+        self.max_entries = max(1, int(max_entries))
+        self._seen: "OrderedDict[int, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._checked = 0
+        self._duplicates = 0
+        self._expired = 0
+        self._evicted = 0
+        self._unkeyed = 0
+        self._duplicates_by_method: Dict[str, int] = {}
+
+    def is_duplicate(
+        self, msg_id: Optional[int], method: str = "", now: Optional[float] = None
+    ) -> bool:
+        """
+        判断 msg_id 是否在窗口内出现过；未出现则记录。
+
+        msg_id 为空或 0 时无法去重，视为新消息。
+        """
+        if not msg_id:
+            self._unkeyed += 1
+            return False
+        ts = time.monotonic() if now is None else now
+        with self._lock:
+            self._checked += 1
+            self._expire(ts)
+            if msg_id in self._seen:
+                self._duplicates += 1
+                if method:
+                    by_method = self._duplicates_by_method
+                    by_method[method] = by_method.get(method, 0) + 1
+                return True
+            self._seen[msg_id] = ts
+            if len(self._seen) > self.max_entries:
+                self._seen.popitem(last=False)
+                self._evicted += 1
+            return False
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.horizon_sec
+        seen = self._seen
+        while seen:
+            oldest_id, oldest_ts = next(iter(seen.items()))
+            if oldest_ts >= cutoff:
+                break
+            seen.popitem(last=False)
+            self._expired += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._seen.clear()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            checked = self._checked
+            return {
+                "size": len(self._seen),
+                "horizon_sec": self.horizon_sec,
+                "max_entries": self.max_entries,
+                "checked": checked,
+                "duplicates": self._duplicates,
+                "duplicate_rate": round(self._duplicates / checked * 100, 2) if checked else 0.0,
+                "expired": self._expired,
+                "evicted": self._evicted,
+                "unkeyed": self._unkeyed,
+                "duplicates_by_method": dict(self._duplicates_by_method),
+            }
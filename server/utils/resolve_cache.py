@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+ResolveCache - 直播间解析结果的持久化 TTL 缓存
+
+启动中转/拉流前的准备工作（live_id → room_id、ttwid、直播间页面解析、拉流地址）
+在每次启动、每个服务里都会重复一遍。这里提供进程内 + 磁盘 JSON 的共享缓存：
+- 每条记录带绝对过期时间；拉流地址的过期时间取 URL 中 ``expire`` 参数
+- 同一 key 的并发加载只执行一次（线程与协程分别单飞）
+- 磁盘文件在进程重启后仍然有效，写入采用临时文件 + 原子替换
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+# 拉流地址里表示过期时间（Unix 秒）的查询参数
+_EXPIRE_PARAMS = ("expire", "expires", "x-expires", "x_expires")
+
+
+def url_expiry(urls: Iterable[Optional[str]], margin_sec: float = 60.0) -> Optional[float]:
+    """
+    从 URL 查询参数中提取最早的过期时间（Unix 秒，已减去安全余量）。
+    没有可识别的过期参数时返回 None。
+    """
+    earliest: Optional[float] = None
+    for url in urls:
+        if not url:
+            continue
+        try:
+            query = parse_qs(urlparse(url).query)
+        except Exception:
+            continue
+        for name in _EXPIRE_PARAMS:
+            for raw in query.get(name, []):
+                try:
+                    value = float(raw)
+                except ValueError:
+                    continue
+                if value > 1e12:  # 毫秒时间戳
+                    value /= 1000.0
+                if earliest is None or value < earliest:
+                    earliest = value
+    return earliest - margin_sec if earliest is not None else None
+
+
+class ResolveCache:
+    """内存 + 磁盘的 TTL 缓存，支持单飞加载（线程安全）"""
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 1000):
+        """
+        Args:
+            path: 持久化 JSON 文件路径，None 表示仅内存
+            max_entries: 最大条目数，超出时淘汰最早过期的记录
+        """
+        self.path = Path(path) if path else None
+        self.max_entries = max(1, int(max_entries))
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.coalesced = 0
+        self._load_file()
+
+    # ------------------------------------------------------------------
+    # 基本读写
+    # ------------------------------------------------------------------
+    def get(self, key: str, now: Optional[float] = None) -> Optional[Any]:
+        ts = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry["expires_at"] <= ts:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry["value"]
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        expires_at: Optional[float] = None,
+    ) -> None:
+        """写入一条记录；expires_at 优先于 ttl，两者都无效时不缓存"""
+        now = time.time()
+        if expires_at is None and ttl is not None:
+            expires_at = now + ttl
+        if value is None or expires_at is None or expires_at <= now:
+            return
+        with self._lock:
+            self._entries[key] = {"value": value, "expires_at": float(expires_at)}
+            if len(self._entries) > self.max_entries:
+                self._evict(now)
+            self._save_file()
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save_file()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._save_file()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # 单飞加载
+    # ------------------------------------------------------------------
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = None,
+        expires_from: Optional[Callable[[Any], Optional[float]]] = None,
+    ) -> Any:
+        """
+        同步版本：命中直接返回；未命中时同一 key 只有一个线程执行 loader，
+        其余线程等待后读取其结果。loader 返回 None 视为失败，不缓存。
+
+        过期时间取 expires_from(value) 与 now + ttl 中较早者；
+        expires_from 返回已过去的时间（如 0）表示该结果不缓存。
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry["expires_at"] > time.time():
+                    self.coalesced += 1
+                    return entry["value"]
+            self.loads += 1
+            value = loader()
+            self._store_loaded(key, value, ttl, expires_from)
+            return value
+
+    async def aget_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        expires_from: Optional[Callable[[Any], Optional[float]]] = None,
+    ) -> Any:
+        """异步版本：并发请求共享同一个加载 Future"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        loop = asyncio.get_running_loop()
+        future = self._inflight.get(key)
+        if future is not None and future.get_loop() is loop and not future.done():
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            self.loads += 1
+            value = await loader()
+            self._store_loaded(key, value, ttl, expires_from)
+            future.set_result(value)
+            return value
+        except BaseException as exc:
+            future.set_exception(exc)
+            # 没有等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _store_loaded(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float],
+        expires_from: Optional[Callable[[Any], Optional[float]]],
+    ) -> None:
+        expires_at = None
+        if expires_from is not None and value is not None:
+            try:
+                expires_at = expires_from(value)
+            except Exception:
+                expires_at = None
+        if ttl is not None:
+            cap = time.time() + ttl
+            expires_at = cap if expires_at is None else min(expires_at, cap)
+        self.set(key, value, expires_at=expires_at)
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+    def _evict(self, now: float) -> None:
+        expired = [k for k, e in self._entries.items() if e["expires_at"] <= now]
+        for k in expired:
+            del self._entries[k]
+        overflow = len(self._entries) - self.max_entries
+        if overflow > 0:
+            for k in sorted(self._entries, key=lambda k: self._entries[k]["expires_at"])[:overflow]:
+                del self._entries[k]
+
+    def _load_file(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            now = time.time()
+            for key, entry in (data or {}).items():
+                if isinstance(entry, dict) and float(entry.get("expires_at", 0)) > now:
+                    self._entries[key] = {
+                        "value": entry.get("value"),
+                        "expires_at": float(entry["expires_at"]),
+                    }
+        except Exception as e:
+            logger.warning(f"解析缓存文件读取失败，忽略: {e}")
+
+    def _save_file(self) -> None:
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(
+                json.dumps(self._entries, ensure_ascii=False, default=str), encoding="utf-8"
+            )
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.debug(f"解析缓存写入失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "path": str(self.path) if self.path else None,
+        }
+
+
+_resolve_cache: Optional[ResolveCache] = None
+_resolve_cache_lock = threading.Lock()
+
+
+def get_resolve_cache() -> ResolveCache:
+    """获取全局解析缓存（DOUYIN_RESOLVE_CACHE_PATH 为空字符串时仅内存）"""
+    global _resolve_cache
+    if _resolve_cache is None:
+        with _resolve_cache_lock:
+            if _resolve_cache is None:
+                path = os.getenv("DOUYIN_RESOLVE_CACHE_PATH", "records/cache/douyin_resolve.json")
+                _resolve_cache = ResolveCache(Path(path) if path else None)
+    return _resolve_cache
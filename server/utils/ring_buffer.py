@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+SeqRingBuffer - 带序号与时间索引的定长环形缓冲
+
+评论缓存需要同时支持：
+- 固定内存：满了覆盖最旧的一条，不做列表切片/整体复制
+- 游标续读：每条记录分配单调递增的序号，客户端带上次的序号即可 O(1) 定位
+- 按时间查询：时间戳按写入顺序单调（乱序的按前一条计），二分查找 O(log n)
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SeqRingBuffer(Generic[T]):
+    """定长环形缓冲，序号从 1 开始单调递增，清空或覆盖后也不回退（线程安全）"""
+
+    def __init__(self, capacity: int, key: Optional[Callable[[T], float]] = None):
+        """
+        Args:
+            capacity: 最大条数
+            key: 从记录中取时间戳的函数，None 时使用写入时刻 time.time()
+        """
+        self.capacity = max(1, int(capacity))
+        self._key = key
+        self._items: List[Optional[T]] = [None] * self.capacity
+        self._keys: List[float] = [0.0] * self.capacity
+        self._start = 0  # 最旧记录的物理下标
+        self._size = 0
+        self._next_seq = 1
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+    def append(self, item: T, ts: Optional[float] = None) -> int:
+        """写入一条记录，返回其序号"""
+        if ts is None:
+            ts = self._key(item) if self._key is not None else time.time()
+        with self._lock:
+            cap = self.capacity
+            if self._size:
+                prev = self._keys[(self._start + self._size - 1) % cap]
+                if ts < prev:
+                    ts = prev  # 保持时间索引单调
+            if self._size == cap:
+                pos = self._start
+                self._start = (self._start + 1) % cap
+            else:
+                pos = (self._start + self._size) % cap
+                self._size += 1
+            self._items[pos] = item
+            self._keys[pos] = ts
+            seq = self._next_seq
+            self._next_seq += 1
+            return seq
+
+    def extend(self, items: List[T]) -> int:
+        """批量写入，返回最后一条的序号"""
+        seq = self.last_seq
+        for item in items:
+            seq = self.append(item)
+        return seq
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+    @property
+    def first_seq(self) -> int:
+        """最旧一条的序号（为空时等于 last_seq + 1）"""
+        return self._next_seq - self._size
+
+    @property
+    def last_seq(self) -> int:
+        """最新一条的序号（从未写入时为 0）"""
+        return self._next_seq - 1
+
+    def after(self, cursor: int, limit: Optional[int] = None) -> Tuple[List[T], int]:
+        """
+        读取序号大于 cursor 的记录（旧→新），返回 (记录, 新游标)。
+        游标早于缓冲中最旧的记录时从最旧处开始（中间的已被覆盖）。
+        """
+        with self._lock:
+            offset = max(cursor + 1 - self.first_seq, 0)
+            count = self._size - offset
+            if count <= 0:
+                return [], self.last_seq
+            if limit is not None:
+                count = min(count, max(0, limit))
+            items = self._slice(offset, count)
+            return items, self.first_seq + offset + count - 1
+
+    def since(self, ts: float, limit: Optional[int] = None) -> List[T]:
+        """时间戳严格大于 ts 的记录（旧→新），limit 限制返回最早的若干条"""
+        with self._lock:
+            offset = self._bisect_right(ts)
+            count = self._size - offset
+            if limit is not None:
+                count = min(count, max(0, limit))
+            return self._slice(offset, count)
+
+    def seq_since(self, ts: float) -> int:
+        """时间戳 <= ts 的最后一条记录的序号，可作为按时间续读的游标"""
+        with self._lock:
+            return self.first_seq + self._bisect_right(ts) - 1
+
+    def latest(self, n: int) -> List[T]:
+        """最新的 n 条（旧→新）"""
+        with self._lock:
+            count = min(max(0, n), self._size)
+            return self._slice(self._size - count, count)
+
+    def snapshot(self) -> List[T]:
+        with self._lock:
+            return self._slice(0, self._size)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.snapshot())
+
+    # ------------------------------------------------------------------
+    # 维护
+    # ------------------------------------------------------------------
+    def drop_before(self, ts: float) -> int:
+        """丢弃时间戳 <= ts 的旧记录，返回丢弃条数"""
+        with self._lock:
+            count = self._bisect_right(ts)
+            for i in range(count):
+                self._items[(self._start + i) % self.capacity] = None
+            self._start = (self._start + count) % self.capacity
+            self._size -= count
+            return count
+
+    def resize(self, capacity: int) -> None:
+        """调整容量，缩容时保留最新的记录，序号不变"""
+        capacity = max(1, int(capacity))
+        with self._lock:
+            keep = min(self._size, capacity)
+            items = self._slice(self._size - keep, keep)
+            first = self._start + self._size - keep
+            keys = [self._keys[(first + i) % self.capacity] for i in range(keep)]
+            self.capacity = capacity
+            self._items = items + [None] * (capacity - keep)
+            self._keys = keys + [0.0] * (capacity - keep)
+            self._start = 0
+            self._size = keep
+
+    def clear(self) -> None:
+        """清空记录，序号继续递增，已有游标仍然有效"""
+        with self._lock:
+            self._items = [None] * self.capacity
+            self._keys = [0.0] * self.capacity
+            self._start = 0
+            self._size = 0
+
+    def _slice(self, offset: int, count: int) -> List[T]:
+        if count <= 0:
+            return []
+        begin = (self._start + offset) % self.capacity
+        end = begin + count
+        if end <= self.capacity:
+            return self._items[begin:end]  # type: ignore[return-value]
+        return self._items[begin:] + self._items[:end - self.capacity]  # type: ignore[return-value]
+
+    def _bisect_right(self, ts: float) -> int:
+        """逻辑下标：第一条时间戳 > ts 的位置"""
+        keys, start, cap = self._keys, self._start, self.capacity
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if keys[(start + mid) % cap] <= ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
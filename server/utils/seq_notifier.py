@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+SeqNotifier - 序号推进通知
+
+数据本身保存在带序号的缓冲里（如 ``SeqRingBuffer``），这里只负责“序号已推进”的唤醒：
+- 生产者可在任意线程调用 ``notify(seq)``，不阻塞、没有等待者时几乎零开销
+- 消费者协程 ``await wait_for(cursor, timeout)``，游标之后已有新数据时立即返回，
+  否则挂起在 Future 上，空闲连接不占 CPU
+- 唤醒通过 ``loop.call_soon_threadsafe`` 投递到等待者所在的事件循环
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import List, Optional, Tuple
+
+
+class SeqNotifier:
+    """跨线程的序号推进通知（线程安全）"""
+
+    def __init__(self, seq: int = 0):
+        self._seq = seq
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[int]"]] = []
+        self.notifications = 0
+        self.wakeups = 0
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    @property
+    def waiter_count(self) -> int:
+        return len(self._waiters)
+
+    def notify(self, seq: int) -> None:
+        """序号推进到 seq，唤醒全部等待者"""
+        with self._lock:
+            if seq > self._seq:
+                self._seq = seq
+            self.notifications += 1
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(self._wake, future, seq)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+
+    def _wake(self, future: "asyncio.Future[int]", seq: int) -> None:
+        if not future.done():
+            self.wakeups += 1
+            future.set_result(seq)
+
+    async def wait_for(self, cursor: int, timeout: Optional[float] = None) -> int:
+        """
+        等待序号超过 cursor，返回当前序号；超时返回时序号可能仍等于 cursor。
+        """
+        if self._seq > cursor:
+            return self._seq
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[int]" = loop.create_future()
+        entry = (loop, future)
+        with self._lock:
+            # 加锁后复查，避免检查与登记之间的通知丢失
+            if self._seq > cursor:
+                return self._seq
+            self._waiters.append(entry)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # 超时时 wait_for 已取消 future，条目仍需摘除，否则空闲连接每次心跳都会遗留一条
+            with self._lock:
+                try:
+                    self._waiters.remove(entry)
+                except ValueError:
+                    pass
+        return self._seq
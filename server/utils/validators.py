@@ -4,8 +4,10 @@
 """
 
 import re
+import sys
 import json
-from typing import Any, Dict, List, Optional, Union, Callable
+import math
+from typing import Any, Dict, List, Optional, Tuple, Union, Callable
 from datetime import datetime
 
 
@@ -226,6 +228,180 @@ class DateTimeValidator(Validator):
         raise ValidationError(f"{field_name} 必须是日期时间字符串或datetime对象")
 
 
+# ---------------------------------------------------------------------------
+# 编译后的校验：schema 只在导入时展开一次，热路径上不再创建验证器对象
+# ---------------------------------------------------------------------------
+
+FieldCheck = Callable[[Any], Any]
+
+
+def _compile_field(validator: Validator, name: str) -> FieldCheck:
+    """把单个验证器展开为扁平的检查函数（错误信息与 validator.validate 一致）"""
+    required, allow_none = validator.required, validator.allow_none
+    missing_msg = f"{name} 是必需的"
+    cls = type(validator)
+
+    if cls in (StringValidator, EmailValidator, URLValidator):
+        lo, hi = validator.min_length, validator.max_length
+        match = validator.pattern.match if validator.pattern else None
+        choices = frozenset(validator.choices) if validator.choices else None
+        type_msg = f"{name} 必须是字符串"
+        lo_msg = f"{name} 长度不能少于 {lo} 个字符"
+        hi_msg = f"{name} 长度不能超过 {hi} 个字符"
+        choice_msg = f"{name} 必须是以下值之一: {', '.join(validator.choices or [])}"
+
+        def check(value):
+            if value is None:
+                if allow_none or not required:
+                    return None
+                raise ValidationError(missing_msg)
+            if not isinstance(value, str):
+                raise ValidationError(type_msg)
+            n = len(value)
+            if n < lo:
+                raise ValidationError(lo_msg)
+            if hi and n > hi:
+                raise ValidationError(hi_msg)
+            if match is not None and not match(value):
+                raise ValidationError(f"{name} 格式不正确")
+            if choices is not None and value not in choices:
+                raise ValidationError(choice_msg)
+            return value
+        return check
+
+    if cls is Validator:
+        def check(value):
+            if value is None and required and not allow_none:
+                raise ValidationError(missing_msg)
+            return value
+        return check
+
+    # 数字、日期、列表、嵌套字典等规则较少出现在热路径，直接复用验证器实例
+    def check(value):
+        return validator.validate(value, name)
+    return check
+
+
+def _fast_accept(validator: Validator) -> Callable[[Any], bool]:
+    """
+    字段非 None 值的快速判定：返回 True 表示该值无需转换即可原样通过；
+    返回 False 不代表非法，只表示需要走完整检查。
+    """
+    cls = type(validator)
+
+    if cls in (StringValidator, EmailValidator, URLValidator):
+        lo = validator.min_length
+        hi = validator.max_length or sys.maxsize
+        match = validator.pattern.match if validator.pattern else None
+        choices = frozenset(validator.choices) if validator.choices else None
+
+        def accept(v):
+            return (
+                type(v) is str and lo <= len(v) <= hi
+                and (match is None or match(v) is not None)
+                and (choices is None or v in choices)
+            )
+        return accept
+
+    if cls is Validator:
+        return lambda v: True
+
+    if cls is DateTimeValidator:
+        return lambda v: type(v) is datetime
+
+    if cls is NumberValidator:
+        types = (int,) if validator.integer_only else (int, float)
+        lo = validator.min_value if validator.min_value is not None else -math.inf
+        hi = validator.max_value if validator.max_value is not None else math.inf
+        return lambda v: type(v) in types and lo <= v <= hi
+
+    return lambda v: False
+
+
+class CompiledSchema:
+    """
+    预编译的字典校验器，行为与 ``DictValidator(schema).validate`` 相同。
+
+    已规范的数据（如中转层产出的事件：字段类型正确、可选字段缺省）走快速路径，
+    逐字段只做一次类型/长度判定后原样输出；任一字段不满足时退回完整检查。
+    """
+
+    def __init__(self, schema: Dict[str, Validator], name: str, allow_extra: bool = True):
+        self.name = name
+        self.allow_extra = allow_extra
+        self._key_set = frozenset(schema)
+        self._fields = tuple((key, _compile_field(v, f"{name}.{key}")) for key, v in schema.items())
+        # (字段, 缺省是否合法, 非 None 值的快速判定)
+        self._accepts = tuple(
+            (key, v.allow_none or not v.required, _fast_accept(v)) for key, v in schema.items()
+        )
+        self._type_msg = f"{name} 必须是字典"
+
+    def __call__(self, value: Any) -> Dict[str, Any]:
+        if type(value) is dict:
+            fast = self._fast(value)
+            if fast is not None:
+                return fast
+        return self._full(value)
+
+    def _fast(self, value: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        out = {}
+        get = value.get
+        for key, none_ok, accept in self._accepts:
+            v = get(key)
+            if v is None:
+                if not none_ok:
+                    return None
+            elif not accept(v):
+                return None
+            out[key] = v
+        if len(value) > len(out) or any(k not in self._key_set for k in value):
+            if not self.allow_extra:
+                return None
+            for k, v in value.items():
+                if k not in self._key_set:
+                    out[k] = v
+        return out
+
+    def _full(self, value: Any) -> Dict[str, Any]:
+        if not isinstance(value, dict):
+            raise ValidationError(self._type_msg)
+        out = {}
+        get = value.get
+        for key, check in self._fields:
+            try:
+                out[key] = check(get(key))
+            except ValidationError as e:
+                raise ValidationError(f"{self.name}.{key}: {str(e)}")
+        key_set = self._key_set
+        if self.allow_extra:
+            for k, v in value.items():
+                if k not in key_set:
+                    out[k] = v
+        else:
+            extra_keys = set(value.keys()) - key_set
+            if extra_keys:
+                raise ValidationError(f"{self.name} 包含不允许的字段: {', '.join(extra_keys)}")
+        return out
+
+    def validate_many(self, items: List[Any]) -> Tuple[List[Dict[str, Any]], List[Tuple[int, str]]]:
+        """批量校验，返回 (通过的数据, [(下标, 错误信息)])"""
+        valid: List[Dict[str, Any]] = []
+        errors: List[Tuple[int, str]] = []
+        for i, item in enumerate(items):
+            if type(item) is dict:
+                fast = self._fast(item)
+                if fast is not None:
+                    valid.append(fast)
+                    continue
+            try:
+                valid.append(self._full(item))
+            except Exception as e:
+                # 与逐条调用时一致：任何异常都只让这一条失败，不影响整批
+                errors.append((i, str(e)))
+        return valid, errors
+
+
 # 预定义验证器实例
 required_string = StringValidator(required=True)
 optional_string = StringValidator(required=False)
@@ -236,99 +412,120 @@ positive_int = NumberValidator(min_value=0, integer_only=True)
 positive_float = NumberValidator(min_value=0.0)
 
 
+COMMENT_SCHEMA = {
+    'user': StringValidator(min_length=1, max_length=50, required=True),
+    'content': StringValidator(min_length=1, max_length=500, required=True),
+    'timestamp': DateTimeValidator(required=False),
+    'platform': StringValidator(choices=['douyin', 'kuaishou', 'bilibili'], required=False),
+    'user_level': NumberValidator(min_value=0, max_value=100, integer_only=True, required=False),
+    'is_vip': Validator(required=False),
+    'gift_count': NumberValidator(min_value=0, integer_only=True, required=False)
+}
+
+HOT_WORD_SCHEMA = {
+    'word': StringValidator(min_length=1, max_length=50, required=True),
+    'count': NumberValidator(min_value=1, integer_only=True, required=True),
+    'category': StringValidator(
+        choices=['product', 'emotion', 'question', 'other'], required=False
+    ),
+    'trend': StringValidator(choices=['up', 'down', 'stable'], required=False),
+    'last_updated': DateTimeValidator(required=False)
+}
+
+AI_SCRIPT_SCHEMA = {
+    'content': StringValidator(min_length=1, max_length=200, required=True),
+    'type': StringValidator(
+        choices=['welcome', 'product', 'interaction', 'closing', 'question', 'emotion'],
+        required=True,
+    ),
+    'context': ListValidator(item_validator=StringValidator(), required=False),
+    'source': StringValidator(choices=['ai', 'template', 'manual'], required=False),
+    'score': NumberValidator(min_value=0.0, max_value=10.0, required=False),
+    'used': Validator(required=False),
+    'created_at': DateTimeValidator(required=False)
+}
+
+CONFIG_SCHEMA = {
+    'ai_service': StringValidator(choices=['deepseek', 'openai', 'doubao'], required=False),
+    'ai_api_key': StringValidator(min_length=1, required=False),
+    'ai_base_url': URLValidator(required=False),
+    'ai_model': StringValidator(required=False),
+    'max_comments': NumberValidator(
+        min_value=10, max_value=10000, integer_only=True, required=False
+    ),
+    'hot_word_threshold': NumberValidator(min_value=1, integer_only=True, required=False),
+    'script_generation_interval': NumberValidator(min_value=5, integer_only=True, required=False),
+    'enable_auto_script': Validator(required=False),
+    'log_level': StringValidator(choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], required=False)
+}
+
+API_REQUEST_SCHEMAS = {
+    'comments': {
+        'limit': NumberValidator(min_value=1, max_value=1000, integer_only=True, required=False),
+        'offset': NumberValidator(min_value=0, integer_only=True, required=False),
+        'platform': StringValidator(choices=['douyin', 'kuaishou', 'bilibili'], required=False)
+    },
+    'hot_words': {
+        'limit': NumberValidator(min_value=1, max_value=100, integer_only=True, required=False),
+        'category': StringValidator(
+            choices=['product', 'emotion', 'question', 'other'], required=False
+        )
+    },
+    'scripts': {
+        'type': StringValidator(
+            choices=['welcome', 'product', 'interaction', 'closing', 'question', 'emotion'],
+            required=False,
+        ),
+        'limit': NumberValidator(min_value=1, max_value=50, integer_only=True, required=False),
+        'used': Validator(required=False)
+    },
+    'config': {
+        'key': StringValidator(min_length=1, required=False),
+        'value': Validator(required=False)
+    }
+}
+
+_comment_schema = CompiledSchema(COMMENT_SCHEMA, "comment")
+_hot_word_schema = CompiledSchema(HOT_WORD_SCHEMA, "hot_word")
+_ai_script_schema = CompiledSchema(AI_SCRIPT_SCHEMA, "ai_script")
+_config_schema = CompiledSchema(CONFIG_SCHEMA, "config", allow_extra=True)
+_api_request_schemas = {
+    endpoint: CompiledSchema(schema, f"{endpoint}_request", allow_extra=True)
+    for endpoint, schema in API_REQUEST_SCHEMAS.items()
+}
+
+
 def validate_comment(data: Dict[str, Any]) -> Dict[str, Any]:
     """验证评论数据"""
-    schema = {
-        'user': StringValidator(min_length=1, max_length=50, required=True),
-        'content': StringValidator(min_length=1, max_length=500, required=True),
-        'timestamp': DateTimeValidator(required=False),
-        'platform': StringValidator(choices=['douyin', 'kuaishou', 'bilibili'], required=False),
-        'user_level': NumberValidator(min_value=0, max_value=100, integer_only=True, required=False),
-        'is_vip': Validator(required=False),
-        'gift_count': NumberValidator(min_value=0, integer_only=True, required=False)
-    }
-    
-    validator = DictValidator(schema=schema)
-    return validator.validate(data, "comment")
+    return _comment_schema(data)
+
+
+def validate_comments(items: List[Any]) -> Tuple[List[Dict[str, Any]], List[Tuple[int, str]]]:
+    """批量验证评论，返回 (通过的数据, [(下标, 错误信息)])"""
+    return _comment_schema.validate_many(items)
 
 
 def validate_hot_word(data: Dict[str, Any]) -> Dict[str, Any]:
     """验证热词数据"""
-    schema = {
-        'word': StringValidator(min_length=1, max_length=50, required=True),
-        'count': NumberValidator(min_value=1, integer_only=True, required=True),
-        'category': StringValidator(choices=['product', 'emotion', 'question', 'other'], required=False),
-        'trend': StringValidator(choices=['up', 'down', 'stable'], required=False),
-        'last_updated': DateTimeValidator(required=False)
-    }
-    
-    validator = DictValidator(schema=schema)
-    return validator.validate(data, "hot_word")
+    return _hot_word_schema(data)
 
 
 def validate_ai_script(data: Dict[str, Any]) -> Dict[str, Any]:
     """验证AI话术数据"""
-    schema = {
-        'content': StringValidator(min_length=1, max_length=200, required=True),
-        'type': StringValidator(choices=['welcome', 'product', 'interaction', 'closing', 'question', 'emotion'], required=True),
-        'context': ListValidator(item_validator=StringValidator(), required=False),
-        'source': StringValidator(choices=['ai', 'template', 'manual'], required=False),
-        'score': NumberValidator(min_value=0.0, max_value=10.0, required=False),
-        'used': Validator(required=False),
-        'created_at': DateTimeValidator(required=False)
-    }
-    
-    validator = DictValidator(schema=schema)
-    return validator.validate(data, "ai_script")
+    return _ai_script_schema(data)
 
 
 def validate_config(data: Dict[str, Any]) -> Dict[str, Any]:
     """验证配置数据"""
-    schema = {
-        'ai_service': StringValidator(choices=['deepseek', 'openai', 'doubao'], required=False),
-        'ai_api_key': StringValidator(min_length=1, required=False),
-        'ai_base_url': URLValidator(required=False),
-        'ai_model': StringValidator(required=False),
-        'max_comments': NumberValidator(min_value=10, max_value=10000, integer_only=True, required=False),
-        'hot_word_threshold': NumberValidator(min_value=1, integer_only=True, required=False),
-        'script_generation_interval': NumberValidator(min_value=5, integer_only=True, required=False),
-        'enable_auto_script': Validator(required=False),
-        'log_level': StringValidator(choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], required=False)
-    }
-    
-    validator = DictValidator(schema=schema, allow_extra=True)
-    return validator.validate(data, "config")
+    return _config_schema(data)
 
 
 def validate_api_request(data: Dict[str, Any], endpoint: str) -> Dict[str, Any]:
     """验证API请求数据"""
-    schemas = {
-        'comments': {
-            'limit': NumberValidator(min_value=1, max_value=1000, integer_only=True, required=False),
-            'offset': NumberValidator(min_value=0, integer_only=True, required=False),
-            'platform': StringValidator(choices=['douyin', 'kuaishou', 'bilibili'], required=False)
-        },
-        'hot_words': {
-            'limit': NumberValidator(min_value=1, max_value=100, integer_only=True, required=False),
-            'category': StringValidator(choices=['product', 'emotion', 'question', 'other'], required=False)
-        },
-        'scripts': {
-            'type': StringValidator(choices=['welcome', 'product', 'interaction', 'closing', 'question', 'emotion'], required=False),
-            'limit': NumberValidator(min_value=1, max_value=50, integer_only=True, required=False),
-            'used': Validator(required=False)
-        },
-        'config': {
-            'key': StringValidator(min_length=1, required=False),
-            'value': Validator(required=False)
-        }
-    }
-    
-    schema = schemas.get(endpoint, {})
-    if not schema:
+    schema = _api_request_schemas.get(endpoint)
+    if schema is None:
         return data
-    
-    validator = DictValidator(schema=schema, allow_extra=True)
-    return validator.validate(data, f"{endpoint}_request")
+    return schema(data)
 
 
 class ValidationResult:
@@ -378,17 +575,27 @@ def validate_batch(validators: Dict[str, Validator], data: Dict[str, Any]) -> Va
     return result
 
 
+_SCALARS = frozenset((int, float, bool, type(None)))
+
+
+def _sanitize_str(data: str) -> str:
+    # 移除潜在的恶意字符
+    data = data.replace('<', '&lt;').replace('>', '&gt;')
+    data = data.replace('&', '&amp;').replace('"', '&quot;')
+    return data.strip()
+
+
 def sanitize_input(data: Any) -> Any:
-    """清理输入数据"""
+    """清理输入数据（评论字典的字符串字段直接内联处理，不再逐值递归）"""
     if isinstance(data, str):
-        # 移除潜在的恶意字符
-        data = data.replace('<', '&lt;').replace('>', '&gt;')
-        data = data.replace('&', '&amp;').replace('"', '&quot;')
-        data = data.strip()
-        return data
+        return _sanitize_str(data)
     
     elif isinstance(data, dict):
-        return {k: sanitize_input(v) for k, v in data.items()}
+        return {
+            k: _sanitize_str(v) if type(v) is str
+            else (v if type(v) in _SCALARS else sanitize_input(v))
+            for k, v in data.items()
+        }
     
     elif isinstance(data, list):
         return [sanitize_input(item) for item in data]
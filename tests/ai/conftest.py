@@ -0,0 +1,142 @@
+"""tests/ai 公共夹具：本地 OpenAI 兼容桩服务与接入桩服务的 AIGateway"""
+import asyncio
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from server.ai import ai_gateway, rate_governor
+from server.ai.ai_gateway import AIGateway
+
+
+def completion_payload(content: str, prompt_tokens: int = 5, completion_tokens: int = 3) -> dict:
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "qwen-plus",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def stream_chunks(
+    content: str, size: int, prompt_tokens: int = 5, completion_tokens: int = 3
+) -> list:
+    """把回复切成 SSE 增量块，最后一块携带 usage"""
+    head = {
+        "id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0, "model": "qwen-plus"
+    }
+    chunks = [
+        {
+            **head,
+            "choices": [
+                {"index": 0, "delta": {"content": content[i:i + size]}, "finish_reason": None}
+            ],
+        }
+        for i in range(0, len(content), size)
+    ]
+    chunks.append({
+        **head,
+        "choices": [],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    })
+    return chunks
+
+
+class StubTransport:
+    """记录请求的本地 OpenAI 兼容服务，回显最后一条消息（或返回固定 reply），支持流式
+
+    按 base_url 的主机名注入延迟（host_delays）或持续故障（down_hosts），模拟多个服务商。
+    """
+
+    def __init__(self):
+        self.failures = []
+        self.delay = 0.0
+        self.host_delays = {}
+        self.down_hosts = set()
+        self.by_host = {}
+        self.requests = 0
+        self.clients = 0
+        self.reply = None
+        self.chunk_size = 4
+        self.chunk_delay = 0.0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        host = request.url.host
+        self.by_host[host] = self.by_host.get(host, 0) + 1
+        delay = self.host_delays.get(host, self.delay)
+        if delay:
+            await asyncio.sleep(delay)
+        if host in self.down_hosts:
+            return httpx.Response(503, json={"error": {"message": "stub unavailable"}})
+        if self.failures:
+            return httpx.Response(
+                self.failures.pop(0), json={"error": {"message": "stub failure"}}
+            )
+        body = json.loads(request.content)
+        content = self.reply
+        if content is None:
+            content = f"echo:{body['messages'][-1]['content']}"
+        if body.get("stream"):
+            return httpx.Response(
+                200, headers={"content-type": "text/event-stream"}, content=self._sse(content)
+            )
+        if self.chunk_delay:
+            # 非流式响应需等全部内容生成完毕，耗时与流式总耗时一致
+            await asyncio.sleep(self.chunk_delay * len(stream_chunks(content, self.chunk_size)))
+        return httpx.Response(200, json=completion_payload(content))
+
+    async def _sse(self, content: str):
+        for chunk in stream_chunks(content, self.chunk_size):
+            if self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8")
+        yield b"data: [DONE]\n\n"
+
+    def make_client(self, config):
+        self.clients += 1
+        return httpx.AsyncClient(
+            transport=httpx.MockTransport(self.handler), timeout=config.timeout
+        )
+
+
+@pytest.fixture
+def stub():
+    return StubTransport()
+
+
+@pytest.fixture
+def make_gateway(monkeypatch):
+    """创建接入桩服务的网关；默认不启用响应缓存"""
+    monkeypatch.setattr(ai_gateway, "RETRY_BACKOFF_BASE", 0.0)
+    monkeypatch.setattr(rate_governor, "RATE_LIMIT_PAUSE", 0.0)
+
+    def factory(stub: StubTransport, cache=None) -> AIGateway:
+        with patch.dict("os.environ", {}, clear=True):
+            gateway = AIGateway()
+        gateway.cache = cache
+        gateway.register_provider("qwen", "test-key", "https://stub.local/v1")
+        gateway.switch_provider("qwen")
+        monkeypatch.setattr(gateway, "_make_http_client", stub.make_client)
+        monkeypatch.setattr(gateway, "_record_usage", lambda **kwargs: None)
+        monkeypatch.setattr(gateway, "_record_queue", lambda *args: None)
+        return gateway
+
+    return factory
@@ -0,0 +1,113 @@
+"""AI 网关负载基准测试（本地桩服务，无需 API 密钥）
+
+桩服务行为（时延分布、流式、429 / 503）与 scripts/benchmark_ai_gateway.py 的负载驱动：
+吞吐、时延百分位、线程数与上游连接数。
+"""
+import json
+import os
+import random
+import sys
+
+import httpx
+import pytest
+
+from server.ai import ai_gateway, rate_governor
+from server.ai.testing.stub_provider import LatencyDistribution, StubBehavior, StubProvider
+
+_ROOT = os.path.join(os.path.dirname(__file__), "..", "..", "..")
+sys.path.insert(0, os.path.abspath(os.path.join(_ROOT, "scripts")))
+
+from benchmark_ai_gateway import run_gateway, run_gateway_v2, run_workflow  # noqa: E402
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    monkeypatch.setattr(ai_gateway, "RETRY_BACKOFF_BASE", 0.0)
+    monkeypatch.setattr(rate_governor, "RATE_LIMIT_PAUSE", 0.0)
+    with StubProvider(StubBehavior(latency="fixed:30", chunk_interval="fixed:2")) as stub:
+        yield stub
+
+
+def test_latency_distribution_parse():
+    """测试时延分布描述解析"""
+    assert LatencyDistribution.parse("80").kind == "fixed"
+    dist = LatencyDistribution.parse("uniform:10,20")
+    rng = random.Random(1)
+    assert all(10 <= dist.sample(rng) <= 20 for _ in range(50))
+    with pytest.raises(ValueError):
+        LatencyDistribution.parse("pareto:1,2")
+
+
+def test_stub_serves_json_card_stream_and_faults(stub_server):
+    """测试桩服务：JSON 卡片回复、SSE 流式（末块携带 usage）、按模型注入 429 / 503"""
+    stub_server.models = {
+        "limited": StubBehavior(latency="fixed:0", rate_limit_rate=1.0, retry_after=1.5),
+        "broken": StubBehavior(latency="fixed:0", error_rate=1.0),
+    }
+    url = f"{stub_server.base_url}/chat/completions"
+    messages = [{"role": "user", "content": "在聊什么"}]
+    with httpx.Client() as client:
+        card = client.post(url, json={"model": "qwen-plus", "messages": messages,
+                                      "response_format": {"type": "json_object"}}).json()
+        assert "analysis_overview" in json.loads(card["choices"][0]["message"]["content"])
+
+        request = {"model": "qwen-plus", "messages": messages, "stream": True}
+        with client.stream("POST", url, json=request) as resp:
+            events = [line[6:] for line in resp.iter_lines() if line.startswith("data: ")]
+        assert events[-1] == "[DONE]"
+        chunks = [json.loads(event) for event in events[:-1]]
+        text = "".join(c["choices"][0]["delta"]["content"] for c in chunks if c["choices"])
+        assert text == "stub:在聊什么"
+        assert chunks[-1]["usage"]["total_tokens"] > 0
+
+        limited = client.post(url, json={"model": "limited", "messages": messages})
+        assert limited.status_code == 429 and limited.headers["retry-after"] == "1.5"
+        assert client.post(url, json={"model": "broken", "messages": messages}).status_code == 503
+
+    stats = stub_server.stats()
+    assert stats["by_status"] == {200: 2, 429: 1, 503: 1}
+    assert stats["streams"] == 1 and stats["connections"] == 1
+
+
+def test_gateway_load_reuses_pooled_connections(stub_server):
+    """测试 AIGateway 负载：无错误、时延不低于注入延迟、连接数受限流器并发上限约束；
+    异步接口不随并发增加线程，同步接口每个调用方占用一个线程"""
+    result = run_gateway(stub_server, requests=40, concurrency=10)
+    assert result["errors"] == 0 and result["upstream_requests"] == 40
+    assert result["p50_ms"] >= 30
+    assert result["upstream_connections"] <= rate_governor.DEFAULT_CONCURRENCY
+
+    sync_result = run_gateway(stub_server, requests=40, concurrency=10, sync=True)
+    assert sync_result["errors"] == 0
+    assert sync_result["threads_peak"] - sync_result["threads_baseline"] >= 10
+    assert result["threads_peak"] - result["threads_baseline"] < 10
+
+
+def test_gateway_stream_load_reports_first_token(stub_server):
+    """测试流式负载：首个增量早于完整响应，429 经限流器暂停后重试成功"""
+    stub_server.behavior = StubBehavior(latency="fixed:20", chunk_interval="fixed:10", chunk_size=2)
+    result = run_gateway(stub_server, requests=10, concurrency=5, stream=True)
+    assert result["errors"] == 0
+    assert result["first_token_p50_ms"] < result["p50_ms"]
+
+    # 顺序请求，桩服务的随机序列固定（种子 7），重试次数内必定成功
+    stub_server.behavior = StubBehavior(latency="fixed:5", rate_limit_rate=0.15)
+    result = run_gateway(stub_server, requests=20, concurrency=1)
+    assert result["errors"] == 0
+    assert result["upstream_status"].get(429, 0) > 0
+
+
+def test_gateway_v2_load(stub_server):
+    """测试 AIGatewayV2 负载：同步客户端每个并发占用一个连接"""
+    result = run_gateway_v2(stub_server, requests=20, concurrency=4)
+    assert result["errors"] == 0
+    assert 1 <= result["upstream_connections"] <= 4
+    assert result["routing"]["minimax/MiniMax-M2.5-highspeed"]["calls"] == 20
+
+
+def test_workflow_load_produces_cards(stub_server):
+    """测试 LangGraphLiveWorkflow 负载：每个窗口产出分析卡片"""
+    result = run_workflow(stub_server, windows=2, concurrency=1)
+    assert result["errors"] == 0
+    assert result["analysis_cards"] == 2
+    assert result["upstream_per_window"] >= 1
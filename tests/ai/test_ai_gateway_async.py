@@ -0,0 +1,159 @@
+"""测试 AIGateway 异步调用路径（连接池复用、异步重试、同步薄封装）"""
+import asyncio
+import threading
+import time
+
+
+async def test_async_call_reuses_pooled_client(make_gateway, stub):
+    """测试异步调用复用同一个服务商客户端"""
+    gateway = make_gateway(stub)
+
+    first = await gateway.achat_completion(messages=[{"role": "user", "content": "a"}])
+    second = await gateway.achat_completion(messages=[{"role": "user", "content": "b"}])
+
+    assert first.success and first.content == "echo:a"
+    assert second.content == "echo:b"
+    assert second.usage["total_tokens"] == 8
+    assert stub.clients == 1
+    await gateway.aclose()
+
+
+async def test_concurrent_calls_overlap(make_gateway, stub):
+    """测试并发请求在事件循环内重叠执行"""
+    stub.delay = 0.1
+    gateway = make_gateway(stub)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            gateway.achat_completion(messages=[{"role": "user", "content": str(i)}])
+            for i in range(20)
+        )
+    )
+    elapsed = time.perf_counter() - started
+
+    assert all(r.success for r in results)
+    assert elapsed < 1.0
+    assert stub.clients == 1
+    await gateway.aclose()
+
+
+async def test_transient_errors_retried(make_gateway, stub):
+    """测试 503 / 429 异步退避重试，400 不重试"""
+    gateway = make_gateway(stub)
+    stub.failures = [503, 429]
+    result = await gateway.achat_completion(messages=[{"role": "user", "content": "x"}])
+    assert result.success
+    assert stub.requests == 3
+
+    stub.failures = [400]
+    result = await gateway.achat_completion(messages=[{"role": "user", "content": "x"}])
+    assert not result.success
+    assert stub.requests == 4
+
+
+def test_sync_wrapper_shares_background_loop(make_gateway, stub):
+    """测试同步接口在后台事件循环执行，多线程调用共享连接池"""
+    gateway = make_gateway(stub)
+    results = []
+
+    def worker(i):
+        results.append(gateway.chat_completion(messages=[{"role": "user", "content": str(i)}]))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(r.content for r in results) == ["echo:0", "echo:1", "echo:2", "echo:3"]
+    assert stub.clients == 1
+
+
+def test_key_update_rebuilds_client(make_gateway, stub):
+    """测试更新 API Key 后重新创建客户端"""
+    gateway = make_gateway(stub)
+    gateway.chat_completion(messages=[{"role": "user", "content": "a"}])
+    gateway.update_provider_api_key("qwen", "new-key")
+    gateway.chat_completion(messages=[{"role": "user", "content": "b"}])
+    assert stub.clients == 2
+
+
+def test_invalid_provider_returns_failure(make_gateway, stub):
+    """测试未注册服务商返回失败响应而不抛异常"""
+    gateway = make_gateway(stub)
+    result = gateway.chat_completion(
+        messages=[{"role": "user", "content": "a"}], provider="deepseek"
+    )
+    assert not result.success
+    assert "deepseek" in result.error
+
+
+async def test_concurrent_duplicates_share_one_upstream_call(make_gateway, stub):
+    """测试并发相同请求只发起一次上游调用，跟随者拿到独立副本"""
+    stub.delay = 0.05
+    gateway = make_gateway(stub)
+    messages = [{"role": "user", "content": "同一个窗口"}]
+
+    results = await asyncio.gather(
+        *(gateway.achat_completion(messages=messages) for _ in range(10))
+    )
+    other = await gateway.achat_completion(messages=[{"role": "user", "content": "另一个窗口"}])
+
+    assert stub.requests == 2
+    assert {r.content for r in results} == {"echo:同一个窗口"}
+    assert sum(r.cache_hit == "inflight" for r in results) == 9
+    assert len({id(r) for r in results}) == 10
+    assert other.cache_hit is None
+    assert gateway.get_cache_stats()["single_flight"] == {
+        "inflight": 0, "coalesced": 9, "upstream_cancelled": 0
+    }
+
+    await asyncio.gather(
+        *(gateway.achat_completion(messages=messages, coalesce=False) for _ in range(3))
+    )
+    assert stub.requests == 5
+    await gateway.aclose()
+
+
+async def test_upstream_cancelled_only_when_all_waiters_leave(make_gateway, stub):
+    """测试部分等待者取消不影响其他人，全部取消后上游调用被取消"""
+    stub.delay = 0.2
+    gateway = make_gateway(stub)
+    messages = [{"role": "user", "content": "x"}]
+
+    first = asyncio.create_task(gateway.achat_completion(messages=messages))
+    second = asyncio.create_task(gateway.achat_completion(messages=messages))
+    await asyncio.sleep(0.05)
+    first.cancel()
+    result = await second
+    assert result.success and stub.requests == 1
+    assert gateway.upstream_cancelled == 0
+
+    waiters = [asyncio.create_task(gateway.achat_completion(messages=messages)) for _ in range(3)]
+    await asyncio.sleep(0.05)
+    for task in waiters:
+        task.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert gateway.upstream_cancelled == 1
+    assert gateway.get_cache_stats()["single_flight"]["inflight"] == 0
+    await gateway.aclose()
+
+
+def test_sync_callers_coalesce_on_background_loop(make_gateway, stub):
+    """测试多线程同步调用在后台事件循环上合并"""
+    stub.delay = 0.1
+    gateway = make_gateway(stub)
+    results = []
+
+    def call():
+        results.append(gateway.chat_completion(messages=[{"role": "user", "content": "s"}]))
+
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(results) == 5 and stub.requests == 1
@@ -0,0 +1,174 @@
+"""测试直播分析工作流的分支并发与窗口截止时间"""
+import asyncio
+import time
+
+import pytest
+
+from server.ai import langgraph_live_workflow as workflow_module
+from server.ai.langgraph_live_workflow import LangGraphLiveWorkflow, LiveWorkflowConfig
+
+BRANCH_DELAY = 0.2
+TRANSCRIPT = ["欢迎来到直播间，今天给大家带来新款保温杯，三百一十六不锈钢内胆，保温十二个小时"] * 2
+
+
+class SlowBranch:
+    """同步 / 异步实现各自耗时固定时长的假生成器"""
+
+    def __init__(self, result, delay=BRANCH_DELAY):
+        self.result = result
+        self.delay = delay
+        self.calls = 0
+
+    def _sync(self, *args, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.result
+
+    async def _async(self, *args, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.result
+
+
+class FakeAnalysis(SlowBranch):
+    def generate(self, context, on_field=None):
+        return self._sync()
+
+    async def agenerate(self, context, on_field=None):
+        for key, value in self.result.items():
+            if on_field:
+                on_field(key, value)
+            await asyncio.sleep(self.delay / len(self.result))
+        self.calls += 1
+        return self.result
+
+
+class FakeStyle(SlowBranch):
+    build_profile = SlowBranch._sync
+    abuild_profile = SlowBranch._async
+
+
+class FakeResponder(SlowBranch):
+    generate = SlowBranch._sync
+    agenerate = SlowBranch._async
+
+
+class FakeFocus(SlowBranch):
+    summarize = SlowBranch._sync
+    asummarize = SlowBranch._async
+
+
+def _no_knowledge_base():
+    raise RuntimeError("knowledge base disabled in tests")
+
+
+@pytest.fixture
+def workflow(tmp_path, monkeypatch):
+    monkeypatch.setattr(workflow_module, "get_knowledge_base", _no_knowledge_base)
+    wf = LangGraphLiveWorkflow(
+        FakeAnalysis({"analysis_overview": "互动升温", "next_topic_direction": "尺码"}),
+        question_responder=FakeResponder([{"question": "多少钱", "line": "49.9"}]),
+        config=LiveWorkflowConfig(memory_root=tmp_path, enable_chat_focus_ai=False),
+        chat_focus_summarizer=FakeFocus("杯子价格"),
+    )
+    wf.style_profile_builder = FakeStyle({"style_profile": {"tone": "热情"}})
+    return wf
+
+
+def _window():
+    return {
+        "anchor_id": "room1",
+        "sentences": list(TRANSCRIPT),
+        "comments": [
+            {"type": "chat", "nickname": "小王", "content": "这个杯子多少钱？", "user_key": "u1"}
+        ],
+    }
+
+
+async def test_llm_branches_run_concurrently(workflow):
+    """测试四个 LLM 分支并发执行，窗口耗时接近最慢分支"""
+    started = time.perf_counter()
+    result = await workflow.ainvoke(_window())
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < BRANCH_DELAY * 2.5
+    assert result["analysis_card"]["analysis_overview"] == "互动升温"
+    assert result["style_profile"] == {"tone": "热情"}
+    assert result["chat_focus"] == "杯子价格"
+    assert "杯子价格" in result["summary"]
+    assert workflow.question_responder.calls == 1
+
+
+def test_sync_invoke_runs_branches_in_parallel(workflow):
+    """测试同步 invoke 由 LangGraph 线程池并发执行分支"""
+    started = time.perf_counter()
+    result = workflow.invoke(_window())
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < BRANCH_DELAY * 2.5
+    assert result["analysis_card"]["next_topic_direction"] == "尺码"
+    assert result["chat_focus"] == "杯子价格"
+
+
+async def test_deadline_keeps_partial_card_and_fallbacks(workflow, monkeypatch):
+    """测试超过窗口截止时间的分支被取消：分析卡片保留已生成字段，其余分支降级"""
+    monkeypatch.setattr(workflow_module, "WORKFLOW_DEADLINE", 0.3)
+    workflow.analysis_generator.delay = 1.0
+    workflow.style_profile_builder.delay = 1.0
+    events = []
+
+    started = time.perf_counter()
+    result = await workflow.ainvoke(_window(), on_event=events.append)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.6
+    assert result["analysis_card"] == {"analysis_overview": "互动升温"}
+    assert result["style_profile"] == result["persona"] != {"tone": "热情"}
+    assert result["chat_focus"] == "杯子价格"
+    assert events == [
+        {"node": "analysis_generator", "field": "analysis_overview", "value": "互动升温"}
+    ]
+    assert workflow._listeners == {}
+
+
+async def test_fallback_mode_gathers_branches(workflow, monkeypatch):
+    """测试未安装 LangGraph 的降级路径同样并发执行分支"""
+    monkeypatch.setattr(workflow, "_workflow", None)
+    started = time.perf_counter()
+    result = await workflow.ainvoke(_window())
+    assert time.perf_counter() - started < BRANCH_DELAY * 2.5
+    assert result["answer_scripts"] == [{"question": "多少钱", "line": "49.9"}]
+
+
+async def test_question_responder_builds_prompt_off_the_event_loop(monkeypatch):
+    """测试异步话术生成在线程中拼提示词（知识库查询、示例文件读取），不阻塞事件循环"""
+    import threading
+
+    from server.ai.live_question_responder import LiveQuestionResponder
+
+    class Gateway:
+        async def achat_completion(self, **kwargs):
+            from server.ai.ai_gateway import AIResponse
+            return AIResponse(
+                content='[{"question": "多少钱", "line": "到手四十九"}]',
+                model="m",
+                provider="p",
+                usage={},
+                cost=0.0,
+                duration_ms=0.0,
+                success=True,
+            )
+
+    threads = []
+    responder = LiveQuestionResponder.__new__(LiveQuestionResponder)
+    responder.gateway = Gateway()
+    responder._examples_cache = ""
+
+    def knowledge_block(context):
+        threads.append(threading.get_ident())
+        return ""
+
+    monkeypatch.setattr(responder, "_prepare_knowledge_block", knowledge_block)
+    scripts = await responder.agenerate({"questions": ["多少钱"], "transcript": "看看这个杯子"})
+    assert scripts and scripts[0]["line"] == "到手四十九"
+    assert threads and threads[0] != threading.get_ident()
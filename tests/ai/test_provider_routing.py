@@ -0,0 +1,231 @@
+"""测试时延感知选路（滚动 p95、熔断半开探测、失败切换、对冲请求）"""
+import asyncio
+import time
+
+import pytest
+
+from server.ai import provider_health
+from server.ai.ai_gateway_v2 import AIGatewayV2
+from server.ai.provider_health import CircuitBreaker, ProviderHealth
+
+MESSAGES = [{"role": "user", "content": "弹幕在聊什么"}]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_then_half_open_probe():
+    """测试连续失败打开熔断，冷却后只放行一个探测，探测成功后关闭"""
+    clock = FakeClock()
+    health = ProviderHealth(
+        clock=clock, breaker_factory=lambda: CircuitBreaker(failure_threshold=3, cooldown=10)
+    )
+    for _ in range(3):
+        health.record("qwen", "qwen-plus", 100, ok=False)
+    assert health.state("qwen", "qwen-plus") == "open"
+    assert not health.acquire("qwen", "qwen-plus")
+
+    clock.now = 11
+    assert health.acquire("qwen", "qwen-plus")
+    assert not health.acquire("qwen", "qwen-plus")
+    health.record("qwen", "qwen-plus", 100, ok=False)
+    assert health.state("qwen", "qwen-plus") == "open"
+
+    clock.now = 22
+    assert health.acquire("qwen", "qwen-plus")
+    health.record("qwen", "qwen-plus", 100, ok=True)
+    assert health.state("qwen", "qwen-plus") == "closed"
+    assert health.snapshot()["qwen/qwen-plus"]["trips"] == 2
+
+
+def test_rank_prefers_measured_latency_and_keeps_config_order_otherwise():
+    """测试有数据的候选按 p95 排序，无数据的候选保持配置顺序，熔断中的候选剔除"""
+    health = ProviderHealth(min_samples=3)
+    routes = [("qwen", "qwen-plus"), ("deepseek", "deepseek-chat"), ("glm", "glm-4")]
+    assert health.rank(routes) == routes
+
+    for latency in (900, 1000, 1200):
+        health.record("qwen", "qwen-plus", latency, ok=True)
+    for latency in (200, 250, 300):
+        health.record("deepseek", "deepseek-chat", latency, ok=True)
+    assert health.rank(routes) == [
+        ("deepseek", "deepseek-chat"), ("qwen", "qwen-plus"), ("glm", "glm-4")
+    ]
+    assert health.latency("deepseek", "deepseek-chat", 50) == 250
+
+    for _ in range(5):
+        health.record("deepseek", "deepseek-chat", 50, ok=False)
+    assert ("deepseek", "deepseek-chat") not in health.rank(routes)
+
+
+@pytest.fixture
+def routed_gateway(make_gateway, stub, monkeypatch):
+    """qwen（stub.local）为首选、deepseek（backup.local）为备选的 chat_focus"""
+    gateway = make_gateway(stub)
+    gateway.register_provider("deepseek", "test-key", "https://backup.local/v1")
+    monkeypatch.setitem(
+        gateway.FUNCTION_MODELS,
+        "chat_focus",
+        {
+            "provider": "qwen",
+            "model": "qwen-plus",
+            "cache": None,
+            "fallbacks": [("deepseek", "")],
+            "hedge": False,
+        },
+    )
+    return gateway
+
+
+async def test_failover_and_breaker_skip_flapping_provider(routed_gateway, stub):
+    """测试首选故障时切换到备选，熔断后不再请求首选"""
+    stub.down_hosts = {"stub.local"}
+    for _ in range(5):
+        result = await routed_gateway.achat_completion(messages=MESSAGES, function="chat_focus")
+        assert result.success and result.provider == "deepseek"
+    down_requests = stub.by_host["stub.local"]
+
+    result = await routed_gateway.achat_completion(messages=MESSAGES, function="chat_focus")
+    assert result.provider == "deepseek"
+    assert stub.by_host["stub.local"] == down_requests
+
+    stats = routed_gateway.get_routing_stats()
+    assert stats["routes"]["qwen/qwen-plus"]["breaker"] == "open"
+    assert stats["failovers"] == 5
+    await routed_gateway.aclose()
+
+
+async def test_hedged_request_beats_slow_primary(routed_gateway, stub, monkeypatch):
+    """测试首选超过 p95 未返回时对冲到备选，先返回者胜出，慢请求被取消"""
+    monkeypatch.setattr(provider_health, "HEDGE_MIN_DELAY", 0.01)
+    routed_gateway.FUNCTION_MODELS["chat_focus"]["hedge"] = True
+    for _ in range(5):
+        routed_gateway.health.record("qwen", "qwen-plus", 30, ok=True)
+    stub.host_delays = {"stub.local": 0.5, "backup.local": 0.02}
+
+    started = time.perf_counter()
+    result = await routed_gateway.achat_completion(messages=MESSAGES, function="chat_focus")
+    elapsed = time.perf_counter() - started
+
+    assert result.success and result.provider == "deepseek"
+    assert elapsed < 0.3
+    stats = routed_gateway.get_routing_stats()
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+    await asyncio.sleep(0)
+    # 被取消的慢请求不计入观测
+    assert stats["routes"]["qwen/qwen-plus"]["calls"] == 5
+    await routed_gateway.aclose()
+
+
+async def test_no_hedge_when_primary_is_fast(routed_gateway, stub):
+    """测试首选在对冲等待内返回时不发起对冲"""
+    routed_gateway.FUNCTION_MODELS["chat_focus"]["hedge"] = True
+    result = await routed_gateway.achat_completion(messages=MESSAGES, function="chat_focus")
+    assert result.provider == "qwen"
+    assert routed_gateway.get_routing_stats()["hedges"] == 0
+    assert "backup.local" not in stub.by_host
+    await routed_gateway.aclose()
+
+
+async def test_no_hedge_without_distinct_backup(routed_gateway, stub, monkeypatch):
+    """测试没有备选服务商时不对冲：不向同一服务商 / 模型重复发起请求"""
+    monkeypatch.setattr(provider_health, "HEDGE_MIN_DELAY", 0.01)
+    routed_gateway.FUNCTION_MODELS["chat_focus"].update(hedge=True, fallbacks=[])
+    for _ in range(5):
+        routed_gateway.health.record("qwen", "qwen-plus", 30, ok=True)
+    stub.host_delays = {"stub.local": 0.1}
+
+    result = await routed_gateway.achat_completion(messages=MESSAGES, function="chat_focus")
+    assert result.success and result.provider == "qwen"
+    assert stub.by_host == {"stub.local": 1}
+    assert routed_gateway.get_routing_stats()["hedges"] == 0
+    await routed_gateway.aclose()
+
+
+async def test_no_failover_after_stream_deltas_delivered(routed_gateway, stub):
+    """测试流式输出已推送部分增量后中断时不切换服务商，回调不会收到第二份内容"""
+    stub.reply = '{"focus": "杯子价格"}'
+    sse = stub._sse
+
+    async def broken_after_first_chunk(content):
+        async for frame in sse(content):
+            yield frame
+            raise ConnectionResetError("stream interrupted")
+
+    stub._sse = broken_after_first_chunk
+    deltas = []
+    streamed = {"messages": MESSAGES, "function": "chat_focus", "on_delta": deltas.append}
+    result = await routed_gateway.achat_completion(**streamed)
+
+    assert not result.success and result.provider == "qwen"
+    assert deltas == ['{"fo']
+    assert "backup.local" not in stub.by_host
+    assert routed_gateway.get_routing_stats()["failovers"] == 0
+
+    # 建立连接即失败（尚未推送增量）仍然切换
+    stub.down_hosts = {"stub.local"}
+    stub._sse = sse
+    deltas.clear()
+    result = await routed_gateway.achat_completion(**streamed)
+    assert result.success and result.provider == "deepseek"
+    assert "".join(deltas) == '{"focus": "杯子价格"}'
+    await routed_gateway.aclose()
+
+
+def test_v2_stream_error_after_first_chunk_records_once():
+    """测试 V2 流式调用在首个增量后出错只记录一次失败"""
+    AIGatewayV2._reset_instance()
+    gateway = AIGatewayV2()
+    gateway.register_provider("glm", "key", "url", "glm-5")
+    gateway.switch_provider("glm")
+
+    class Chunk:
+        def __init__(self, content):
+            delta = type("Delta", (), {"content": content})()
+            self.choices = [type("Choice", (), {"delta": delta})()]
+
+    def broken_stream(**kwargs):
+        yield Chunk("你好")
+        raise ConnectionResetError("stream interrupted")
+
+    def full_stream(**kwargs):
+        yield Chunk("你好")
+        yield Chunk("呀")
+
+    try:
+        gateway.clients["glm"].chat.completions.create = broken_stream
+        with pytest.raises(RuntimeError):
+            list(gateway.chat_completion_stream(MESSAGES))
+        gateway.clients["glm"].chat.completions.create = full_stream
+        assert "".join(gateway.chat_completion_stream(MESSAGES)) == "你好呀"
+
+        route = gateway.health.snapshot()["glm/glm-5"]
+        assert route["calls"] == 2 and route["failures"] == 1
+    finally:
+        AIGatewayV2._reset_instance()
+
+
+def test_smart_route_uses_observed_health():
+    """测试 V2 智能路由：首选熔断时切换，延迟敏感任务按实测 p95 选择"""
+    AIGatewayV2._reset_instance()
+    gateway = AIGatewayV2()
+    gateway.register_provider("glm", "key", "url", "glm-5")
+    gateway.register_provider("minimax", "key", "url", "MiniMax-M2.5-highspeed")
+    try:
+        for _ in range(5):
+            gateway.health.record("glm", "glm-5", 100, ok=False)
+        assert gateway.smart_route("style_profile", {}) == "minimax:MiniMax-M2.5"
+
+        for _ in range(5):
+            gateway.health.record("minimax", "MiniMax-M2.5-highspeed", 3000, ok=True)
+            gateway.health.record("minimax", "MiniMax-M2.5", 800, ok=True)
+        assert gateway.smart_route("live_analysis", {"latency": "fast"}) == "minimax:MiniMax-M2.5"
+        # 非延迟敏感任务只做熔断切换
+        assert gateway.smart_route("unknown_task", {}) == "minimax:MiniMax-M2.5-highspeed"
+    finally:
+        AIGatewayV2._reset_instance()
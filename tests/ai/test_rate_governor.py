@@ -0,0 +1,102 @@
+"""测试网关限流器（按服务商并发上限、令牌桶、优先级排队、429 暂停、排队耗时上报）"""
+import asyncio
+import time
+
+from server.ai import rate_governor
+from server.ai.rate_governor import BATCH, REALTIME, RateGovernor
+from server.utils.ai_usage_monitor import AIUsageMonitor
+
+
+async def test_concurrency_cap_and_realtime_preempts_batch(monkeypatch):
+    """测试批量任务不能占用预留名额，排队时实时请求先于更早到达的批量请求放行"""
+    monkeypatch.setenv("AI_PROVIDER_QWEN_CONCURRENCY", "2")
+    governor = RateGovernor()
+    order = []
+
+    async def worker(name, priority, hold):
+        ticket = await governor.acquire("qwen", priority)
+        order.append(name)
+        await asyncio.sleep(hold)
+        governor.release(ticket)
+
+    batch_a = asyncio.create_task(worker("batch_a", BATCH, 0.1))
+    await asyncio.sleep(0.01)
+    batch_b = asyncio.create_task(worker("batch_b", BATCH, 0.0))
+    await asyncio.sleep(0.01)
+    assert order == ["batch_a"]
+
+    realtime = asyncio.create_task(worker("realtime", REALTIME, 0.1))
+    await asyncio.sleep(0.01)
+    # 预留名额让实时请求不必等待批量任务
+    assert order == ["batch_a", "realtime"]
+
+    realtime_2 = asyncio.create_task(worker("realtime_2", REALTIME, 0.0))
+    await asyncio.gather(batch_a, batch_b, realtime, realtime_2)
+    assert order == ["batch_a", "realtime", "realtime_2", "batch_b"]
+
+    stats = governor.snapshot()
+    assert stats["providers"]["qwen"]["inflight"] == 0
+    assert stats["queues"]["qwen/batch"]["queued"] == 1
+
+
+async def test_tpm_bucket_delays_until_refill(monkeypatch):
+    """测试 TPM 令牌耗尽后按补充速度等待，实际用量少于预扣时退还差额"""
+    monkeypatch.setenv("AI_PROVIDER_QWEN_TPM", "6000")
+    governor = RateGovernor()
+
+    first = await governor.acquire("qwen", tokens=6000)
+    started = time.perf_counter()
+    second = await governor.acquire("qwen", tokens=10)
+    assert time.perf_counter() - started >= 0.08
+
+    governor.release(first, used_tokens=1000)
+    started = time.perf_counter()
+    await governor.acquire("qwen", tokens=4000)
+    assert time.perf_counter() - started < 0.05
+    governor.release(second)
+
+
+async def test_cancelled_waiter_leaves_queue(monkeypatch):
+    """测试排队中被取消的请求出队，不阻塞后来者"""
+    monkeypatch.setenv("AI_PROVIDER_QWEN_CONCURRENCY", "1")
+    governor = RateGovernor()
+    holder = await governor.acquire("qwen")
+    waiter = asyncio.create_task(governor.acquire("qwen"))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+
+    governor.release(holder)
+    ticket = await asyncio.wait_for(governor.acquire("qwen"), timeout=0.5)
+    assert governor.snapshot()["providers"]["qwen"]["waiting"] == 0
+    governor.release(ticket)
+
+
+async def test_gateway_pauses_provider_after_429(make_gateway, stub, monkeypatch):
+    """测试 429 后暂停放行：并发请求在限流器中等待，而不是各自重试"""
+    monkeypatch.setattr(rate_governor, "RATE_LIMIT_PAUSE", 0.2)
+    queued = []
+    gateway = make_gateway(stub)
+    monkeypatch.setattr(gateway, "_record_queue", lambda *args: queued.append(args))
+    stub.failures = [429]
+
+    first = await gateway.achat_completion(messages=[{"role": "user", "content": "a"}])
+    second = await gateway.achat_completion(messages=[{"role": "user", "content": "b"}])
+
+    assert first.success and second.success
+    assert second.queue_ms >= 150
+    assert gateway.get_governor_stats()["providers"]["qwen"]["rate_limited"] == 1
+    assert queued and queued[0][:2] == ("qwen", "interactive")
+    await gateway.aclose()
+
+
+def test_usage_monitor_reports_queue_times(tmp_path):
+    """测试排队耗时按 服务商/优先级 汇总"""
+    monitor = AIUsageMonitor(data_dir=tmp_path)
+    for queue_ms in (10, 20, 30, 400):
+        monitor.record_queue_time("qwen", "batch", queue_ms)
+    monitor.record_queue_time("qwen", "realtime", 5)
+
+    stats = monitor.get_queue_stats()
+    assert stats["qwen/batch"] == {"count": 4, "avg_ms": 115.0, "p95_ms": 400.0, "max_ms": 400.0}
+    assert stats["qwen/realtime"]["count"] == 1
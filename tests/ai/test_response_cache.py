@@ -0,0 +1,146 @@
+"""测试 AI 网关响应缓存（精确 / 语义两级、TTL、LRU、持久化、按功能开启）"""
+import time
+
+from server.ai.response_cache import ResponseCache, request_fingerprint
+
+PARAMS = {"temperature": 0.4, "max_tokens": 900, "response_format": {"type": "json_object"}}
+
+
+def _fp(content, model="qwen-plus", params=PARAMS):
+    messages = [
+        {"role": "system", "content": "你是直播助手"},
+        {"role": "user", "content": content},
+    ]
+    return request_fingerprint("qwen", model, messages, params)
+
+
+def test_exact_key_ignores_whitespace_but_not_params():
+    """测试规范化后相同的请求命中，参数或模型不同则不命中"""
+    cache = ResponseCache()
+    key, _, _ = _fp("这个  多少钱？\n")
+    cache.set(key, {"content": "49.9"}, ttl=60)
+
+    assert cache.lookup(_fp("这个 多少钱？")[0]) == ({"content": "49.9"}, "exact")
+    hotter = {**PARAMS, "temperature": 0.9}
+    assert cache.lookup(_fp("这个 多少钱？", params=hotter)[0]) == (None, None)
+    assert cache.lookup(_fp("这个 多少钱？", model="qwen-max")[0]) == (None, None)
+
+
+def test_ttl_and_lru_bounds():
+    """测试过期失效与按最近使用淘汰"""
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.get("a", now=time.time() + 61) is None
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_semantic_tier_matches_near_duplicates_in_scope():
+    """测试近似提示词在同一范围内语义命中，跨模型不命中"""
+    cache = ResponseCache()
+    base = "观众提问：这个杯子能装开水吗？主播刚才介绍了杯子的材质是316不锈钢，保温十二小时。"
+    key, scope, text = _fp(base)
+    cache.set(key, {"content": "可以装开水"}, ttl=60, scope=scope, text=text)
+
+    near_key, near_scope, near_text = _fp(base.replace("能装开水吗", "能不能装开水"))
+    value, kind = cache.lookup(
+        near_key, scope=near_scope, text=near_text, threshold=0.9, function="script_generation"
+    )
+    assert (value, kind) == ({"content": "可以装开水"}, "semantic")
+
+    other_key, other_scope, other_text = _fp("观众提问：今天有什么优惠活动？", model="qwen-plus")
+    assert cache.lookup(other_key, scope=other_scope, text=other_text, threshold=0.9)[0] is None
+    far_key, far_scope, far_text = _fp(base, model="qwen-max")
+    assert cache.lookup(far_key, scope=far_scope, text=far_text, threshold=0.9)[0] is None
+
+    stats = cache.get_stats()
+    assert stats["semantic_hits"] == 1 and stats["misses"] == 2
+    assert stats["by_function"]["script_generation"]["semantic_hits"] == 1
+
+
+def test_persisted_with_semantic_index(tmp_path):
+    """测试落盘后新实例可继续精确与语义命中"""
+    path = tmp_path / "ai_responses.json"
+    cache = ResponseCache(path)
+    key, scope, text = _fp("帮我写一段欢迎新粉丝的话术，语气热情一点，突出今天的福利活动")
+    cache.set(key, {"content": "欢迎宝宝"}, ttl=60, scope=scope, text=text)
+    cache.flush()
+
+    reloaded = ResponseCache(path)
+    assert reloaded.get(key) == {"content": "欢迎宝宝"}
+    near = _fp("帮我写一段欢迎新粉丝的话术，语气热情一些，突出今天的福利活动")
+    assert reloaded.lookup(near[0], scope=near[1], text=near[2], threshold=0.9)[1] == "semantic"
+
+
+async def test_gateway_caches_opted_in_functions(make_gateway, stub):
+    """测试按功能开启缓存：重复话术请求不再访问服务商，未开启或显式跳过时照常请求"""
+    cache = ResponseCache()
+    gateway = make_gateway(stub, cache=cache)
+    messages = [{"role": "user", "content": "这个多少钱"}]
+
+    scripted = {"messages": messages, "provider": "qwen", "function": "script_generation"}
+    first = await gateway.achat_completion(**scripted)
+    second = await gateway.achat_completion(**scripted)
+    assert stub.requests == 1
+    assert second.content == first.content and second.cache_hit == "exact"
+    assert second.cost == 0.0
+
+    await gateway.achat_completion(**scripted, cache=False)
+    await gateway.achat_completion(messages=messages, provider="qwen")
+    await gateway.achat_completion(messages=messages, provider="qwen")
+    assert stub.requests == 4
+
+    stub.failures = [400]
+    failed = await gateway.achat_completion(
+        messages=[{"role": "user", "content": "x"}], provider="qwen", function="chat_focus"
+    )
+    assert not failed.success and len(cache) == 1
+
+    stats = gateway.get_cache_stats()
+    assert stats["hits"] == 1 and stats["saved_tokens"] == 8
+    await gateway.aclose()
+
+
+async def test_semantic_tier_ignores_prompt_templates(make_gateway, stub, monkeypatch):
+    """测试话术 / 风格画像默认只做精确匹配；开启语义层时只比对可变素材，不同问题、不同口播不命中"""
+    from server.ai.ai_gateway import AIGateway
+    from server.ai.live_question_responder import LiveQuestionResponder
+    from server.ai.style_profile_builder import StyleProfileBuilder, StyleProfileBuilderConfig
+
+    for function in ("script_generation", "style_profile", "topic_generation"):
+        assert "semantic" not in AIGateway.FUNCTION_MODELS[function]["cache"]
+
+    gateway = make_gateway(stub, cache=ResponseCache())
+    monkeypatch.setattr(gateway, "FUNCTION_MODELS", {
+        "script_generation": {"cache": {"ttl": 60, "semantic": 0.95}},
+        "style_profile": {"cache": {"ttl": 60, "semantic": 0.97}},
+    })
+    stub.reply = '[{"question": "q", "line": "今天到手价四十九", "style": "暖心"}]'
+
+    responder = LiveQuestionResponder.__new__(LiveQuestionResponder)
+    responder.gateway = gateway
+    responder._examples_cache = ""
+    monkeypatch.setattr(responder, "_prepare_knowledge_block", lambda context: "")
+    monkeypatch.setattr(responder, "_CALL_OPTIONS", {**responder._CALL_OPTIONS, "provider": "qwen"})
+    for question in ("这个多少钱", "什么时候发货"):
+        await responder.agenerate({"questions": [question], "transcript": "家人们看看这款保温杯"})
+    assert stub.requests == 2
+
+    builder = StyleProfileBuilder.__new__(StyleProfileBuilder)
+    builder.gateway = gateway
+    builder.config = StyleProfileBuilderConfig()
+    monkeypatch.setattr(builder, "_CALL_OPTIONS", {**builder._CALL_OPTIONS, "provider": "qwen"})
+    for transcript in (
+        "家人们这款面霜特别滋润，敏感肌也可以用，我自己用了三个月，今天下单送小样",
+        "这件羊毛大衣是双面呢的，版型很挺，冬天穿特别保暖，颜色有驼色和黑色",
+    ):
+        await builder.abuild_profile("anchor", transcript, "2026-01-01", 1)
+    assert stub.requests == 4
+    assert gateway.get_cache_stats()["semantic_hits"] == 0
+    await gateway.aclose()
+
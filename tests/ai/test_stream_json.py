@@ -0,0 +1,95 @@
+"""测试流式生成：增量 JSON 字段解析、网关流式回调、分析卡片首字段时延"""
+import json
+import time
+
+from server.ai.live_analysis_generator import LiveAnalysisGenerator
+from server.ai.stream_json import IncrementalJSONParser
+
+CARD = {
+    "analysis_overview": "弹幕集中在价格和尺码，互动热度上升",
+    "audience_sentiment": {"label": "积极", "signals": ["求链接", "已下单"]},
+    "engagement_highlights": ["福利讲解后评论翻倍"],
+    "risks": [],
+    "score": 0.82,
+    "urgent": True,
+}
+
+
+def test_parser_emits_fields_as_they_close():
+    """测试逐字符喂入时每个字段在闭合处产出，忽略代码块前后缀"""
+    expected = {"a": 'x"}y', "b": [1, {"c": "}"}], "n": -1.5, "t": None}
+    text = "```json\n" + json.dumps(expected, ensure_ascii=False) + "\n```"
+    parser = IncrementalJSONParser()
+    seen = []
+    for i, ch in enumerate(text):
+        for key, value in parser.feed(ch):
+            seen.append((key, value, i))
+
+    assert [(k, v) for k, v, _ in seen] == list(expected.items())
+    assert seen[0][2] == text.index(', "b"') - 1
+    assert parser.done and parser.result()["b"][1] == {"c": "}"}
+
+
+def test_parser_handles_arbitrary_chunking():
+    """测试任意切块方式结果一致"""
+    text = json.dumps(CARD, ensure_ascii=False)
+    for size in (1, 3, 7, len(text)):
+        parser = IncrementalJSONParser()
+        for i in range(0, len(text), size):
+            parser.feed(text[i:i + size])
+        assert parser.result() == CARD
+
+
+async def test_gateway_streams_deltas_and_usage(make_gateway, stub):
+    """测试流式调用逐块回调、拼接完整内容并保留 usage"""
+    gateway = make_gateway(stub)
+    deltas = []
+
+    result = await gateway.achat_completion(
+        messages=[{"role": "user", "content": "流式输出"}], on_delta=deltas.append
+    )
+
+    assert result.success and result.content == "echo:流式输出"
+    assert len(deltas) > 1 and "".join(deltas) == result.content
+    assert result.usage["total_tokens"] == 8
+    assert result.first_token_ms is not None and result.first_token_ms <= result.duration_ms
+    await gateway.aclose()
+
+
+def test_first_card_field_arrives_before_full_response(make_gateway, stub, monkeypatch):
+    """对比分析卡片首个字段可见时间：流式 vs 完整响应"""
+    stub.reply = json.dumps(CARD, ensure_ascii=False)
+    stub.chunk_size = 8
+    stub.chunk_delay = 0.01
+    generator = LiveAnalysisGenerator({})
+    generator.gateway = make_gateway(stub)
+    monkeypatch.setitem(
+        generator.gateway.FUNCTION_MODELS,
+        "live_analysis",
+        {
+            **generator.gateway.FUNCTION_MODELS["live_analysis"],
+            "provider": "qwen",
+            "model": "qwen-plus",
+        },
+    )
+    context = {"transcript": "欢迎来到直播间"}
+
+    started = time.perf_counter()
+    fields = []
+    card = generator.generate(
+        context, on_field=lambda k, v: fields.append((k, time.perf_counter() - started))
+    )
+    streamed_total = time.perf_counter() - started
+
+    started = time.perf_counter()
+    full = generator.generate(context)
+    full_total = time.perf_counter() - started
+
+    assert card == full == CARD
+    assert [k for k, _ in fields] == list(CARD)
+    first_field = fields[0][1]
+    print(
+        f"\n首字段 {first_field * 1000:.0f}ms / 流式完成 {streamed_total * 1000:.0f}ms"
+        f" / 完整响应 {full_total * 1000:.0f}ms"
+    )
+    assert first_field < full_total / 2
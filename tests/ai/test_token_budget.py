@@ -0,0 +1,119 @@
+"""测试提示词 token 预算（估算器、去重折叠、注水分配、显著性挑选、节省统计）"""
+from server.ai.live_analysis_generator import LiveAnalysisGenerator
+from server.ai.token_budget import (
+    Section,
+    TokenBudgeter,
+    estimate_tokens,
+    get_budget_stats,
+    recency_scores,
+    reset_budget_stats,
+    truncate_to_tokens,
+)
+
+
+def test_estimator_prices_character_classes():
+    """测试中文按字、英文按词片、数字按位组计价"""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("直播间欢迎你") == 5
+    assert estimate_tokens("welcome") == 2
+    assert estimate_tokens("2024") == 2
+    assert estimate_tokens("好" * 100) > estimate_tokens("good" * 25)
+
+
+def test_repeated_comments_fold_with_count():
+    """测试重复弹幕折叠为 ×N，去重键可忽略用户名"""
+    budgeter = TokenBudgeter(0)
+    section = Section(
+        "chat", ["a: 666", "b: 666！", "c: 能包邮吗"], keys=["666", "666！", "能包邮吗"]
+    )
+    entries = budgeter._prepare(section)
+    assert [text for _, text, _ in entries] == ["a: 666 ×2", "c: 能包邮吗"]
+
+
+def test_water_fill_gives_leftover_to_hungry_sections():
+    """测试用不满份额的段落把余量让给其他段落"""
+    budgeter = TokenBudgeter(300)
+    assert budgeter._allocate([50, 1000, 1000], [1, 1, 1]) == [50, 125, 125]
+    assert budgeter._allocate([50, 1000, 0], [1, 3, 1]) == [50, 250, 0]
+
+
+def test_selection_keeps_questions_and_order():
+    """测试超出预算时优先保留提问，输出保持原始顺序"""
+    items = (
+        ["哈哈哈"]
+        + [f"主播今天的状态真不错第{i}次来" for i in range(20)]
+        + ["这个杯子能装开水吗？"]
+    )
+    result = TokenBudgeter(40, label="t").compact([Section("chat", items)])
+
+    kept = result["chat"].split("\n")
+    assert "这个杯子能装开水吗？" in kept
+    assert "哈哈哈" not in kept
+    assert kept == sorted(kept, key=lambda line: items.index(line) if line in items else len(items))
+    assert result.tokens_after <= 40
+    assert result.saved == result.tokens_before - result.tokens_after > 0
+
+
+def test_max_items_caps_selection_with_or_without_budget():
+    """测试条数上限与预算同时生效，预算为 0 时仍按显著性保留上限内的条目"""
+    items = [f"第{i}个问题：这个杯子能装开水吗？" for i in range(10)] + ["哈哈"]
+    for budget in (10_000, 0):
+        result = TokenBudgeter(budget).compact([Section("chat", items, max_items=3)])
+        kept = result["chat"].split("\n")
+        assert len(kept) == 3 and "哈哈" not in kept
+        assert result.dropped["chat"] == 8
+
+
+def test_review_prompt_keeps_previous_item_caps():
+    """测试长直播的复盘提示词不超过原先的 100 个时间窗、50 条弹幕"""
+    from server.ai.gemini_adapter_enhanced import _build_content_analysis_prompt
+
+    transcript = [
+        {"start_time": i * 30, "end_time": (i + 1) * 30, "text": f"第{i}段讲解保温杯的卖点。"}
+        for i in range(360)
+    ]
+    chats = [{"user": f"u{i}", "content": f"第{i}条弹幕问能装开水吗？"} for i in range(300)]
+    events = {"chats": chats, "gifts": [], "follows": [], "likes": [], "entries": []}
+    prompt = _build_content_analysis_prompt("主播", 3 * 3600, transcript, events, {})
+
+    assert prompt.count("段讲解保温杯的卖点") == 100
+    assert prompt.count("条弹幕问能装开水吗") == 50
+
+
+def test_compaction_is_deterministic_and_truncates_once():
+    """测试相同输入得到相同输出，放不下的条目最多截断一条"""
+    persona = "主播画像：" + "性格开朗爱聊天，" * 40
+    sentences = ["你好。"] * 5 + ["今天上新三款杯子。"]
+    sections = [
+        Section("transcript", sentences, scores=recency_scores(sentences)),
+        Section("persona", [persona]),
+    ]
+    first = TokenBudgeter(60).compact(sections)
+    second = TokenBudgeter(60).compact(sections)
+
+    assert first.texts == second.texts
+    assert first["transcript"] == "你好。 ×5\n今天上新三款杯子。"
+    assert first["persona"].endswith("…")
+    assert truncate_to_tokens("短句", 10) == "短句"
+
+
+def test_live_analysis_prompt_within_budget(monkeypatch):
+    """测试实时分析提示词按预算压缩口播，并按调用方记录节省量"""
+    import server.ai.live_analysis_generator as module
+
+    monkeypatch.setattr(module, "PROMPT_BUDGET", 200)
+    reset_budget_stats()
+    generator = LiveAnalysisGenerator.__new__(LiveAnalysisGenerator)
+    transcript = (
+        "".join(f"第{i}句口播介绍一下我们家的保温杯。" for i in range(80))
+        + "最后问一下大家想看哪个颜色？"
+    )
+    messages = generator._build_prompt({"transcript": transcript, "persona": {"tone": "热情"}})
+
+    user_prompt = messages[1]["content"]
+    assert "最后问一下大家想看哪个颜色？" in user_prompt
+    assert "第0句" not in user_prompt
+    assert '{"tone": "热情"}' in user_prompt
+    stats = get_budget_stats()["live_analysis"]
+    assert stats["calls"] == 1 and stats["saved"] > 0
+    assert stats["tokens_after"] <= 200
@@ -0,0 +1,165 @@
+"""测试实时分析窗口增量判定（空窗口 / 素材不足顺延 / 无变化跳过）与滚动摘要"""
+import pytest
+
+from server.ai.live_analysis_generator import LiveAnalysisGenerator
+from server.ai.window_delta import EMPTY, RUN, SPARSE, UNCHANGED, WindowDelta, normalize
+
+TALK = ["家人们看看这款保温杯，五百毫升大容量", "今天直播间下单送杯套，还有两个颜色可以选"]
+
+
+def chats(*texts):
+    return [{"type": "chat", "content": text, "user_key": f"u{i}"} for i, text in enumerate(texts)]
+
+
+def card(overview, direction="聊聊容量"):
+    return {"analysis_card": {"analysis_overview": overview, "next_topic_direction": direction}}
+
+
+def test_normalize_folds_repeats_and_punctuation():
+    assert normalize("哈哈哈哈哈！！ OK") == "哈哈ok"
+
+
+def test_assess_skips_empty_sparse_and_unchanged_windows():
+    """测试只有进场 / 点赞为空窗口；素材不足顺延，超过顺延上限丢弃；与上次分析窗口相似则跳过"""
+    delta = WindowDelta(min_chars=30, min_comments=3, max_defer=2, unchanged_similarity=0.85)
+    ambient = [
+        {"type": "member", "content": "小王进入直播间"},
+        {"type": "like", "content": "小李点赞+3"},
+    ]
+    assert delta.assess([], ambient).action == EMPTY
+    assert delta.assess(["来了"], chats("666")).action == SPARSE
+    assert delta.assess(["来了"], chats("666", "主播好")).action == SPARSE
+    assert delta.assess(["来了"], chats("666", "主播好")).action == EMPTY
+
+    decision = delta.assess(TALK, chats("多少钱", "包邮吗"))
+    assert decision.action == RUN and decision.new_comments == 2
+    delta.mark_analyzed(TALK, chats("多少钱", "包邮吗"), card("观众在问价格"))
+
+    # 同样的口播、刷屏弹幕换了人发
+    repeat = chats("多少钱！", "多少钱", "包邮吗？？")
+    for _ in range(4):
+        assert delta.assess(TALK, repeat).action == UNCHANGED
+    # 主播换了话题
+    assert delta.assess(["接下来看看这款双层玻璃杯，耐热一百二十度"], repeat).action == RUN
+
+    stats = delta.stats()
+    assert stats["analyzed"] == 2
+    assert stats["skipped"] == {EMPTY: 2, SPARSE: 2, UNCHANGED: 4}
+
+
+def test_new_questions_in_repeated_window_are_analyzed():
+    """测试重复口播里夹着新的观众提问时照常分析；问过的问题再出现仍按无变化跳过"""
+    pitch = [f"家人们这款保温杯第{i}遍讲，五百毫升大容量，今天下单送杯套" for i in range(12)]
+    crowd = chats(*[f"主播好{i}" for i in range(20)])
+    delta = WindowDelta(unchanged_similarity=0.85)
+    assert delta.assess(pitch, crowd).run
+    delta.mark_analyzed(pitch, crowd, card("主播在讲保温杯"))
+
+    asked = crowd + chats("能装开水吗", "发什么快递")
+    decision = delta.assess(pitch, asked)
+    assert decision.similarity >= 0.85
+    assert decision.action == RUN and decision.new_questions == 2
+    delta.mark_analyzed(pitch, asked, card("观众问开水和快递"))
+    assert delta.assess(pitch, crowd + chats("能装开水吗？", "发什么快递")).action == UNCHANGED
+
+
+def test_sparse_window_with_question_is_not_dropped():
+    """测试顺延到上限的零星素材里有新问题时分析而不是丢弃"""
+    delta = WindowDelta(min_chars=30, min_comments=3, max_defer=1)
+    assert delta.assess(["来了"], chats("有优惠券吗")).action == SPARSE
+    assert delta.assess(["来了"], chats("有优惠券吗")).action == RUN
+    assert delta.assess(["来了"], chats("666")).action == SPARSE
+    assert delta.assess(["来了"], chats("666")).action == EMPTY
+
+
+def test_rolling_summary_keeps_latest_entries_within_budget():
+    """测试滚动摘要按预算保留最新的若干条，按时间顺序输出；失败的卡片不进摘要"""
+    delta = WindowDelta(summary_budget=60)
+    for i in range(6):
+        payload = card(f"第{i}个窗口观众在问价格和发货时间")
+        delta.mark_analyzed([f"第{i}段"], [], payload, now=i * 60)
+    delta.mark_analyzed(["x"], [], {**card("生成失败"), "error": "timeout"})
+
+    summary = delta.rolling_summary().splitlines()
+    assert 1 < len(summary) < 6
+    assert "第5个窗口" in summary[-1]
+    assert "生成失败" not in delta.rolling_summary()
+
+
+def test_style_profile_refreshes_every_n_windows():
+    delta = WindowDelta(style_refresh=3)
+    assert delta.style_due(False)
+    for _ in range(2):
+        delta.mark_analyzed(TALK, [], card("a"))
+        assert not delta.style_due(True)
+    delta.mark_analyzed(TALK, [], card("a"))
+    assert delta.style_due(True)
+
+
+def test_prompt_carries_rolling_summary():
+    """测试分析提示词附带此前窗口摘要"""
+    generator = LiveAnalysisGenerator.__new__(LiveAnalysisGenerator)
+    messages = generator._build_prompt(
+        {"transcript": "看看这个杯子", "rolling_summary": "[20:01] 观众在问价格"}
+    )
+    assert "【此前窗口摘要】\n[20:01] 观众在问价格" in messages[1]["content"]
+    assert "此前窗口摘要" not in generator._build_prompt({"transcript": "看看"})[1]["content"]
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    from server.app.services import ai_live_analyzer
+
+    monkeypatch.setattr(ai_live_analyzer.AILiveAnalyzer, "_init_workflow", lambda self: None)
+    monkeypatch.setattr(ai_live_analyzer, "ANALYSIS_CACHE_TTL", 0)
+    instance = ai_live_analyzer.AILiveAnalyzer()
+    instance._workflow = object()
+    instance._state.window_sec = 60
+    return instance
+
+
+async def test_analyzer_skips_quiet_and_repeated_windows_over_an_hour(analyzer, monkeypatch):
+    """模拟一小时直播（60 个窗口）：安静、刷屏重复的窗口不调用工作流，夹带新提问的重复窗口照常分析，
+    后续窗口带滚动摘要"""
+    pitch = [f"家人们这款保温杯第{i}遍讲，五百毫升大容量，今天下单送杯套" for i in range(12)]
+    states = []
+
+    async def fake_run(sentences, comments, window_start, user_scores=None, speakers=None):
+        states.append(
+            analyzer._workflow_state(sentences, comments, window_start, user_scores, speakers)
+        )
+        return {**card(f"第{len(states)}次分析"), "style_profile": {"tone": "热情"}}
+
+    monkeypatch.setattr(analyzer, "_run_workflow_async", fake_run)
+
+    non_empty = 0
+    for minute in range(60):
+        s = analyzer._state
+        if minute % 10 < 3:
+            # 讲新品：口播与弹幕都在变化
+            s.sentences.extend(
+                [f"第{minute}分钟讲第{minute}款产品的卖点", f"这款{minute}号链接今天有福利"]
+            )
+            s.comments.extend(chats(f"{minute}号多少钱", f"{minute}号有什么颜色", "发什么快递"))
+        elif minute % 10 < 7:
+            # 刷屏：同样的口播与弹幕反复出现，第 5 分钟夹带两个新问题
+            s.sentences.extend(pitch)
+            s.comments.extend(chats("主播好", "666", "哈哈哈哈"))
+            if minute == 5:
+                s.comments.extend(chats("能装开水吗", "保修多久"))
+        else:
+            # 冷场：只有零星一句
+            s.sentences.append("嗯")
+        non_empty += 1
+        s.last_window_ts = 0
+        await analyzer._maybe_analyze()
+
+    stats = analyzer.status()["windows"]
+    assert stats["windows"] == non_empty == 60
+    # 18 个讲品窗口全部分析，每轮刷屏只分析第一个窗口和带新问题的窗口，冷场窗口不分析
+    assert len(states) == 25
+    assert {"能装开水吗", "保修多久"} <= {c["content"] for c in states[4]["comments"]}
+    assert stats["analyzed"] == len(states)
+    assert states[0]["rolling_summary"] == "" and states[0]["style_refresh"] is True
+    assert "第1次分析" in states[1]["rolling_summary"]
+    assert states[1]["style_refresh"] is False and states[1]["style_profile"] == {"tone": "热情"}
@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Tests for server/app/services modules"""
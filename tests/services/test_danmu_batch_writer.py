@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+DanmuBatchWriter 测试
+
+测试单写入任务的批量持久化：按大小/时间刷新、每批一个事务、停止时排空，
+以及高速率压测下不为单条事件创建任务。
+"""
+
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event, text
+
+
+def _make_engine(tmpdir: str):
+    return create_engine(f"sqlite:///{Path(tmpdir) / 'live_test.db'}")
+
+
+def _chat(i: int):
+    return {
+        "type": "chat",
+        "payload": {"user_id": 1000 + i % 50, "nickname": f"用户{i % 50}", "content": f"弹幕{i}"},
+        "timestamp": time.time(),
+    }
+
+
+def _count(engine, where: str = "") -> int:
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM live_events {where}")).scalar()
+
+
+class TestDanmuBatchWriter:
+    """DanmuBatchWriter 测试套件"""
+
+    @pytest.mark.asyncio
+    async def test_flush_on_interval(self):
+        """测试未达到批量大小时按时间间隔刷新"""
+        from server.app.services.danmu_batch_writer import DanmuBatchWriter
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = _make_engine(tmpdir)
+            writer = DanmuBatchWriter(
+                session_id="s1", live_id="room", batch_size=100, flush_interval=0.05,
+                engine_factory=lambda: engine,
+            )
+            writer.start()
+            for i in range(3):
+                assert writer.submit(_chat(i))
+            await asyncio.sleep(0.3)
+
+            assert _count(engine, "WHERE session_id = 's1'") == 3
+            assert writer.get_stats()["batches"] == 1
+            await writer.stop()
+            engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_stop_drains_pending_events(self):
+        """测试停止时写入所有排队事件"""
+        from server.app.services.danmu_batch_writer import DanmuBatchWriter
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = _make_engine(tmpdir)
+            writer = DanmuBatchWriter(
+                batch_size=1000, flush_interval=60, engine_factory=lambda: engine
+            )
+            writer.start()
+            for i in range(250):
+                writer.submit(_chat(i))
+            await writer.stop()
+
+            assert _count(engine) == 250
+            assert not writer.submit(_chat(0))
+            engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_stop_with_full_queue(self):
+        """测试队列已满（哨兵放不进去）且写入较慢时，停止仍能排空并退出"""
+        from server.app.services.danmu_batch_writer import DanmuBatchWriter
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = _make_engine(tmpdir)
+            writer = DanmuBatchWriter(
+                batch_size=5, max_queue=10, flush_interval=60, engine_factory=lambda: engine
+            )
+            write_batch = writer._write_batch
+
+            def slow_write(rows):
+                time.sleep(0.1)
+                write_batch(rows)
+
+            writer._write_batch = slow_write
+            writer.start()
+            for i in range(10):
+                writer.submit(_chat(i))
+            # 写入任务取走第一批并开始慢写，期间把队列重新填满
+            await asyncio.sleep(0.02)
+            for i in range(10, 20):
+                writer.submit(_chat(i))
+            assert writer.get_stats()["queued"] == 10
+
+            # 不用 wait_for：超时取消会让 stop 吞掉取消后照常返回，掩盖挂起
+            stopper = asyncio.create_task(writer.stop())
+            done, _ = await asyncio.wait({stopper}, timeout=5)
+            assert stopper in done
+            stats = writer.get_stats()
+            assert not stats["running"]
+            assert stats["written"] == stats["accepted"] == _count(engine)
+            engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_bounded_queue_drops_overflow(self):
+        """测试队列满时丢弃并计数，而不是无限增长"""
+        from server.app.services.danmu_batch_writer import DanmuBatchWriter
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = _make_engine(tmpdir)
+            writer = DanmuBatchWriter(batch_size=10, max_queue=10, engine_factory=lambda: engine)
+            # 未启动写入任务，队列无人消费
+            accepted = sum(writer.submit(_chat(i)) for i in range(25))
+
+            assert accepted == 10
+            assert writer.get_stats()["dropped"] == 15
+            await writer.stop()
+            assert _count(engine) == 10
+            engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_gift_row_fields(self):
+        """测试礼物事件的结构化字段"""
+        from server.app.services.danmu_batch_writer import DanmuBatchWriter
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = _make_engine(tmpdir)
+            writer = DanmuBatchWriter(engine_factory=lambda: engine)
+            writer.start()
+            writer.submit({
+                "type": "gift",
+                "payload": {
+                    "user_id_str": "u1",
+                    "nickname": "A",
+                    "gift_name": "玫瑰",
+                    "count": 3,
+                    "gift_value": 3,
+                },
+                "timestamp": 1700000000.0,
+            })
+            await writer.stop()
+
+            with engine.connect() as conn:
+                row = conn.execute(
+                    text("SELECT event_type, user_id, gift_name, count, value, ts FROM live_events")
+                ).one()
+            assert tuple(row) == ("gift", "u1", "玫瑰", 3, 3.0, 1700000000.0)
+            engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_high_rate_soak(self):
+        """压测：高速率入队，全部落库，每批一个事务，且无逐事件任务"""
+        from server.app.services.danmu_batch_writer import DanmuBatchWriter
+
+        total = 20000
+        batch_size = 500
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = _make_engine(tmpdir)
+            commits = []
+            event.listen(engine, "commit", lambda conn: commits.append(1))
+
+            writer = DanmuBatchWriter(
+                batch_size=batch_size, flush_interval=0.05, max_queue=total,
+                engine_factory=lambda: engine,
+            )
+            writer.start()
+            tasks_before = len(asyncio.all_tasks())
+            for i in range(total):
+                writer.submit(_chat(i))
+                if i % 2000 == 0:
+                    # 让出事件循环，模拟持续到达
+                    assert len(asyncio.all_tasks()) <= tasks_before + 1
+                    await asyncio.sleep(0)
+            await writer.stop()
+
+            stats = writer.get_stats()
+            assert stats["dropped"] == 0
+            assert stats["written"] == total
+            assert _count(engine) == total
+            # 建表一次 + 每批一次提交
+            assert stats["batches"] <= total // batch_size + 5
+            assert len(commits) <= stats["batches"] + 2
+            engine.dispose()
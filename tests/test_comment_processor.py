@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+CommentProcessor 测试
+
+测试事件驱动唤醒、整批处理结果（垃圾过滤/情感/热词）、吞吐与排队延迟指标，
+以及 5000 条/秒输入下不积压。
+"""
+
+import time
+
+
+def _wait(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.002)
+    return False
+
+
+class TestCommentProcessor:
+    """CommentProcessor 测试套件"""
+
+    def test_wakes_on_arrival(self):
+        """测试评论到达后立即处理，而不是等待轮询周期"""
+        from server.comment_processor import CommentProcessor
+
+        processor = CommentProcessor()
+        processor.update_config({"batch_linger_ms": 0})
+        seen = []
+        processor.add_callback(seen.append)
+        processor.start()
+        try:
+            processor.add_comment({"user": "小明", "content": "这个产品不错啊"})
+            assert _wait(lambda: seen)
+            assert [c.content for c in seen] == ["这个产品不错啊"]
+            assert _wait(lambda: processor.get_stats()["processed_comments"] == 1)
+        finally:
+            processor.stop()
+
+    def test_batch_results(self):
+        """测试整批处理：垃圾过滤、验证失败计数、情感与热词"""
+        from server.comment_processor import CommentProcessor
+
+        processor = CommentProcessor()
+        processor.add_comments([
+            {"user": "小明", "content": "主播很棒 喜欢"},
+            {"user": "张三", "content": "质量差 失望"},
+            {"user": "李四", "content": "加我微信看看"},
+            {"user": "", "content": "没有用户名"},
+        ])
+        seen = []
+        processor.add_callback(seen.append)
+        processor._process_batch([processor.comment_queue.popleft() for _ in range(4)])
+
+        assert [c.sentiment for c in seen] == ["positive", "negative"]
+        stats = processor.get_stats()
+        assert stats["processed_comments"] == 2
+        assert stats["spam_comments"] == 1
+        assert stats["error_comments"] == 1
+        assert stats["last_batch_size"] == 4
+        assert processor.hot_words["主播很棒"] == 1
+
+    def test_sentiment_negation_and_lexicon_update(self):
+        """测试否定/程度修饰与词典热更新"""
+        from server.comment_processor import CommentProcessor
+
+        processor = CommentProcessor()
+        assert processor._analyze_sentiment("不满意") == "negative"
+        assert processor._analyze_sentiment("不太好") == "negative"
+        assert processor._analyze_sentiment("没有不满") == "positive"
+
+        assert not processor._is_spam("看看vx号")
+        processor.update_lexicon("spam", processor.spam_keywords + ["vx"])
+        assert processor._is_spam("看看vx号")
+
+    def test_keeps_up_with_5k_per_second(self):
+        """压测：5000 条/秒输入 2 秒，全部处理、无丢弃且按批处理"""
+        from server.comment_processor import CommentProcessor, CommentSimulator
+
+        processor = CommentProcessor()
+        processor.comment_queue = type(processor.comment_queue)(maxlen=10000)
+        processor.start()
+        try:
+            result = CommentSimulator(processor).run_load(rate=5000, seconds=2.0)
+        finally:
+            processor.stop()
+        assert result["sent"] > 0
+        assert result["handled"] == result["sent"], result
+        assert result["dropped"] == 0
+        assert result["max_batch_size"] > 1
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+流式热词引擎测试
+
+测试 Space-Saving Top-K 的计数与误差界、固定容量淘汰、
+时间分桶滑动窗口、衰减趋势，以及 HotwordAnalyzer / CommentProcessor 的接入。
+"""
+
+import random
+from collections import Counter
+
+
+class TestSpaceSaving:
+    """Space-Saving 重击者统计"""
+
+    def test_top_k_bounds_on_skewed_stream(self):
+        """测试偏斜流上 Top-K 正确且真实计数落在误差界内"""
+        from server.nlp.hotword_engine import SpaceSaving
+
+        rng = random.Random(7)
+        ss = SpaceSaving(capacity=50)
+        exact = Counter()
+        for _ in range(20000):
+            word = f"w{int(rng.paretovariate(1.2))}"
+            ss.offer(word)
+            exact[word] += 1
+
+        assert len(ss) == 50
+        assert [w for w, _, _ in ss.top(5)] == [w for w, _ in exact.most_common(5)]
+        for word, count, error in ss.top(50):
+            assert count - error <= exact[word] <= count
+
+    def test_eviction_returns_replaced_word(self):
+        """测试容量满时替换最小计数的词"""
+        from server.nlp.hotword_engine import SpaceSaving
+
+        ss = SpaceSaving(capacity=2)
+        ss.offer("a", 3)
+        ss.offer("b")
+        assert ss.offer("c") == "b"
+        assert ss.top(2) == [("a", 3, 0), ("c", 2, 1)]
+
+
+class TestHotwordEngine:
+    """时间窗口与趋势"""
+
+    def test_sliding_windows(self):
+        """测试 1 分钟窗口只统计最近的桶，全程计数不受影响"""
+        from server.nlp.hotword_engine import HotwordEngine
+
+        engine = HotwordEngine(capacity=100)
+        t0 = 1_000_000.0
+        for i in range(30):
+            engine.add(["上链接"], now=t0 + i)
+        for i in range(10):
+            engine.add(["多少钱"], now=t0 + 600 + i)
+
+        now = t0 + 610
+        assert [hw["word"] for hw in engine.top_window(60, k=5, now=now)] == ["多少钱"]
+        assert engine.window_count("上链接", 1800, now=now) == 30
+        assert engine.window_count("上链接", 60, now=now) == 0
+        assert engine.top(1, now=now)[0]["word"] == "上链接"
+
+    def test_trend_and_category(self):
+        """测试新爆发的词趋势向上、沉寂的词趋势向下，分类只算一次"""
+        from server.nlp.hotword_engine import HotwordEngine
+
+        calls = []
+        engine = HotwordEngine(classifier=lambda w: calls.append(w) or "product")
+        t0 = 1_000_000.0
+        for i in range(50):
+            engine.add(["价格"], now=t0 + i * 10)
+        for i in range(20):
+            engine.add(["尺码"], now=t0 + 500 + i)
+
+        words = {hw["word"]: hw for hw in engine.top(10, now=t0 + 560)}
+        assert words["尺码"]["trend"] == "up"
+        assert words["价格"]["trend"] == "down"
+        assert words["价格"]["category"] == "product"
+        assert sorted(calls) == ["价格", "尺码"]
+        assert engine.trending(k=1, now=t0 + 560)[0]["word"] == "尺码"
+
+    def test_memory_is_bounded(self):
+        """测试长尾词流下跟踪词数与时间桶数保持上限"""
+        from server.nlp.hotword_engine import HotwordEngine
+
+        engine = HotwordEngine(capacity=100, bucket_sec=10, horizon_sec=300)
+        t0 = 1_000_000.0
+        for i in range(5000):
+            engine.add([f"词{i}", "主播"], now=t0 + i)
+
+        stats = engine.get_stats()
+        assert stats["tracked_words"] == 100
+        assert stats["time_buckets"] <= 31
+        assert engine.top(1)[0]["word"] == "主播"
+
+
+class TestHotwordConsumers:
+    """HotwordAnalyzer 与 CommentProcessor 接入"""
+
+    def test_analyzer_returns_hot_words(self):
+        """测试热词分析器不再返回空结果"""
+        from server.nlp.hotword_analyzer import HotwordAnalyzer
+
+        analyzer = HotwordAnalyzer()
+        result = analyzer.analyze_comments([{"content": "主播 多少钱"}] * 5 + [{"content": "好看"}])
+
+        assert [hw["word"] for hw in result["hot_words"]] == ["主播", "多少钱"]
+        assert result["stats"]["total_comments"] == 6
+        assert analyzer.get_hotwords(limit=5, category="interaction")[0]["word"] == "主播"
+
+    def test_processor_hot_words_from_engine(self):
+        """测试评论处理器的热词输出格式不变"""
+        from server.comment_processor import CommentProcessor
+
+        processor = CommentProcessor()
+        processor.add_comments([{"user": f"u{i}", "content": "价格 怎么样"} for i in range(4)])
+        processor._process_batch([processor.comment_queue.popleft() for _ in range(4)])
+
+        hot = processor.get_hot_words(limit=5)
+        assert {hw["word"] for hw in hot} == {"价格", "怎么样"}
+        assert set(hot[0]) == {"word", "count", "category", "trend", "last_updated"}
+        assert processor.hot_words["价格"] == 4
+
+    def test_category_top_stops_after_k_matches(self, monkeypatch):
+        """测试按分类取 Top-K 按计数从高到低扫描，凑够 K 个即停"""
+        from server.nlp.hotword_engine import HotwordEngine, SpaceSaving, classify_word
+
+        engine = HotwordEngine(classifier=classify_word)
+        for i in range(30):
+            engine.add([f"词{i}"] * (i % 3 + 1) + ["价格"] * 5 + ["主播"] * 8, now=1_000_000.0)
+        scanned = []
+        iter_desc = SpaceSaving.iter_desc
+
+        def counting(self):
+            for entry in iter_desc(self):
+                scanned.append(entry[0])
+                yield entry
+
+        monkeypatch.setattr(SpaceSaving, "iter_desc", counting)
+        assert [hw["word"] for hw in engine.top(1, category="product", now=1_000_000.0)] == ["价格"]
+        assert scanned == ["主播", "价格"]
+
+    def test_comment_api_feeds_hotword_analyzer(self, monkeypatch):
+        """测试 /api/live/hotwords：抓取器的新评论回调计入热词分析器"""
+        import asyncio
+
+        from server.app.api import live_comments
+        from server.ingest.comment_fetcher import Comment
+
+        for name in ("comment_fetcher", "hotword_analyzer", "tip_generator"):
+            monkeypatch.setattr(live_comments, name, None)
+        live_comments.init_services()
+        live_comments.init_services()
+        fetcher = live_comments.comment_fetcher
+        assert fetcher.callbacks.count(live_comments.hotword_analyzer.add_comment) == 1
+
+        for i in range(4):
+            for callback in fetcher.callbacks:
+                callback(Comment(f"u{i}", f"用户{i}", "主播 多少钱"))
+        response = asyncio.run(live_comments.get_hotwords(limit=5, category=None))
+        assert {hw["word"] for hw in response.data["hotwords"]} == {"主播", "多少钱"}
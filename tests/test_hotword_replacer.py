@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+热词替换测试
+
+测试最左最长匹配、保护词、主播级规则覆盖与规则文件热加载。
+"""
+
+import json
+import os
+
+from server.nlp.hotwords import HotwordReplacer
+
+
+class TestHotwordReplacer:
+    """批量热词替换"""
+
+    def test_longest_match_single_pass(self):
+        """测试同一起点取最长规则，替换结果不再参与匹配"""
+        replacer = HotwordReplacer(path="")
+        replacer.set_rules(
+            {"拼多多": ["拼哆哆", "拼多多儿"], "抖音": ["抖映"], "抖音商城": ["抖映上城"]}
+        )
+
+        assert replacer.apply("在抖映上城和拼多多儿都能买") == "在抖音商城和拼多多都能买"
+        assert replacer.apply("抖映抖映") == "抖音抖音"
+        assert replacer.apply("今天天气不错") == "今天天气不错"
+        assert replacer.get_stats()["replaced"] == 4
+
+    def test_correct_terms_are_protected(self):
+        """测试正确词内部不会被较短规则改写"""
+        replacer = HotwordReplacer(path="")
+        replacer.set_rules({"小米": ["小蜜"], "蜜雪冰城": ["米雪冰城"]})
+
+        assert replacer.apply("蜜雪冰城和小蜜") == "蜜雪冰城和小米"
+        assert replacer.apply("米雪冰城") == "蜜雪冰城"
+
+    def test_anchor_rules_override_global(self):
+        """测试主播规则叠加在全局规则之上，其他主播不受影响"""
+        replacer = HotwordReplacer(path="")
+        replacer.set_rules({"华为": ["花为"]}, anchors={"room1": {"提猫": ["题猫", "花为"]}})
+
+        anchor = replacer.anchor_for("unknown", "room1")
+        assert anchor == "room1"
+        assert replacer.apply("题猫花为", anchor=anchor) == "提猫提猫"
+        assert replacer.apply("题猫花为") == "题猫华为"
+        assert replacer.apply("题猫花为", anchor="room2") == "题猫华为"
+
+    def test_hot_reload_from_file(self, tmp_path):
+        """测试规则文件修改后自动重新加载"""
+        path = tmp_path / "hotwords.json"
+
+        def write_rules(rules):
+            path.write_text(json.dumps({"replace": rules}, ensure_ascii=False), encoding="utf-8")
+
+        write_rules({"淘宝": ["套包"]})
+        replacer = HotwordReplacer(path=str(path), reload_interval=0.001)
+        assert replacer.apply("套包") == "淘宝"
+
+        write_rules({"京东": ["精东"]})
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 5))
+        replacer._next_check = 0.0
+
+        assert replacer.apply("套包精东") == "套包京东"
+        assert replacer.version == 2
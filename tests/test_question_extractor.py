@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+问题提取器测试
+
+测试疑问识别、近似问题聚簇与排序、窗口过期，以及 LangGraph 工作流只把代表问题交给回答节点。
+"""
+
+from server.nlp.question_extractor import QuestionExtractor, normalize_question
+
+
+class TestQuestionDetection:
+    """疑问识别与分类"""
+
+    def test_interrogatives_and_final_particles(self):
+        """测试疑问词任意位置命中、语气词只在句尾命中"""
+        extractor = QuestionExtractor()
+        assert extractor.is_question("这个多少钱")
+        assert extractor.is_question("链接在哪")
+        assert extractor.is_question("包邮吗~")
+        assert not extractor.is_question("吗喽好可爱")
+        assert not extractor.is_question("主播好漂亮")
+        assert extractor.classify("几号发货") == "logistics"
+        assert extractor.classify("尺码怎么选") == "product"
+
+    def test_normalize(self):
+        """测试归一化去标点、压缩重复与句末语气词"""
+        assert normalize_question("多少钱啊？？？") == "多少钱"
+        assert normalize_question("好好好好看吗") == "好好看"
+
+
+class TestQuestionClustering:
+    """近似去重聚类"""
+
+    def test_near_duplicates_grouped_and_ranked(self):
+        """测试近似问题归入同簇，热门问题排在前面"""
+        extractor = QuestionExtractor()
+        t0 = 1_000_000.0
+        asked = [
+            "多少钱啊", "多少钱？？", "这个多少钱", "这个多少钱呀",
+            "尺码怎么选", "这个尺码怎么选呢", "包邮吗",
+        ]
+        for i, text in enumerate(asked):
+            extractor.add(text, user=f"u{i}", ts=t0 + i)
+
+        clusters = extractor.top_clusters(limit=5, now=t0 + 10)
+        assert [c["count"] for c in clusters] == [4, 2, 1]
+        assert clusters[0]["category"] == "price"
+        assert clusters[0]["unique_users"] == 4
+        assert extractor.representatives(2, now=t0 + 10)[1] == "尺码怎么选"
+        assert extractor.get_stats()["clusters"] == 3
+
+    def test_window_expiry_and_capacity(self):
+        """测试窗口外的簇被移除、簇数不超过上限"""
+        extractor = QuestionExtractor({"question_window_sec": 60, "question_max_clusters": 3})
+        extractor.add("几号发货", ts=0.0)
+        assert extractor.expire(now=100.0) == 1
+
+        for i, text in enumerate(["有链接吗", "质量好吗", "M码还有吗", "适合小孩吗"]):
+            extractor.add(text, ts=200.0 + i)
+        assert extractor.get_stats()["clusters"] <= 3
+
+
+class TestWorkflowIntegration:
+    """工作流信号收集"""
+
+    def test_signal_collector_sends_cluster_representatives(self):
+        """测试重复提问只产生一个代表问题，按人数排序"""
+        from server.ai.langgraph_live_workflow import LangGraphLiveWorkflow
+
+        comments = [{"type": "chat", "user": f"u{i}", "content": "这个多少钱？"} for i in range(5)]
+        comments += [{"type": "chat", "user": "v", "content": "什么时候发货"}]
+        comments += [{"type": "chat", "user": f"w{i}", "content": "多少钱啊"} for i in range(2)]
+
+        state = {"comments": comments, "sentences": []}
+        result = LangGraphLiveWorkflow._signal_collector(None, state)
+
+        assert result["top_questions"] == ["这个多少钱？", "什么时候发货"]
+        assert result["question_clusters"][0]["count"] == 7
+        assert result["chat_stats"]["category_counts"]["question"] == 8
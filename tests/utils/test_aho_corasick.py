@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Aho-Corasick / LexiconMatcher 单元测试
+
+测试全部命中（含重叠）与暴力匹配一致、多词族标签、原子重建，
+以及词典规模增长时单条耗时基本不变。
+"""
+
+import random
+import time
+
+
+class TestAhoCorasick:
+    """AhoCorasick 测试套件"""
+
+    def test_matches_brute_force(self):
+        """测试与逐词暴力查找结果一致（含重叠与互为前后缀的词）"""
+        from server.utils.aho_corasick import AhoCorasick
+
+        rng = random.Random(1)
+        for _ in range(500):
+            words = [
+                "".join(rng.choice("ab好") for _ in range(rng.randint(1, 4)))
+                for _ in range(rng.randint(1, 8))
+            ]
+            text = "".join(rng.choice("ab好") for _ in range(rng.randint(0, 20)))
+            automaton = AhoCorasick((w, "t") for w in words)
+
+            got = sorted((s, e, w) for s, e, w, _ in automaton.iter(text))
+            expected = sorted(
+                {
+                    (i, i + len(w), w)
+                    for w in set(words)
+                    for i in range(len(text))
+                    if text.startswith(w, i)
+                }
+            )
+            assert got == expected
+
+    def test_overlapping_hits_across_families(self):
+        """测试同一位置的多词族重叠命中全部返回"""
+        from server.utils.aho_corasick import LexiconMatcher
+
+        matcher = LexiconMatcher({"negative": ["不满"], "positive": ["满意"], "negation": ["不"]})
+        hits = matcher.find("不满意")
+        assert [(h[2], h[3]) for h in hits] == [
+            ("不", "negation"), ("不满", "negative"), ("满意", "positive")
+        ]
+        assert matcher.count("不满意不满") == {"negation": 2, "negative": 2, "positive": 1}
+
+
+class TestLexiconMatcher:
+    """LexiconMatcher 测试套件"""
+
+    def test_atomic_update(self):
+        """测试更新词族后立即生效，旧自动机引用不受影响"""
+        from server.utils.aho_corasick import LexiconMatcher
+
+        matcher = LexiconMatcher({"spam": ["微信"], "positive": ["好"]})
+        old = matcher._automaton
+        matcher.update({"spam": ["vx", "加我"]})
+
+        assert matcher.version == 2
+        assert not matcher.contains("加微信", "spam")
+        assert matcher.contains("加我vx", "spam")
+        assert matcher.contains("很好", "positive")
+        assert old.contains("加微信", "spam")
+
+    def test_latency_independent_of_lexicon_size(self):
+        """测试词典从 50 扩到 5000 词时单条扫描耗时基本不变"""
+        from server.utils.aho_corasick import LexiconMatcher
+
+        rng = random.Random(3)
+        chars = [chr(c) for c in range(0x4E00, 0x4E00 + 3000)]
+        text = "这个产品不错啊主播很棒我很喜欢多少钱包邮吗" * 2
+
+        def per_call(size):
+            words = [
+                "".join(rng.choice(chars) for _ in range(rng.randint(2, 4))) for _ in range(size)
+            ]
+            matcher = LexiconMatcher({"positive": words})
+            start = time.perf_counter()
+            for _ in range(2000):
+                matcher.find(text)
+            return time.perf_counter() - start
+
+        assert per_call(5000) < per_call(50) * 3
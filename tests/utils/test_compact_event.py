@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+CompactEvent 单元测试
+
+测试紧凑事件的无损还原、dict 风格只读访问、用户驻留与内存缩减。
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+
+def _chat(uid, content, nickname=None):
+    return {
+        "type": "chat",
+        "payload": {
+            "user_id": uid,
+            "user_id_str": str(uid),
+            "nickname": nickname or f"观众{uid}",
+            "content": content,
+        },
+        "timestamp": 1700000000.5,
+        "ts": 1700000000500,
+        "source": "douyin",
+    }
+
+
+class TestCompactEvent:
+    """CompactEvent 测试套件"""
+
+    def test_round_trip_is_lossless(self):
+        """测试 to_dict 还原与原事件完全一致"""
+        from server.utils.compact_event import EventCompactor
+
+        compactor = EventCompactor()
+        events = [
+            _chat(1, "你好"),
+            {"type": "member", "payload": {"user_id": 2, "user_id_str": None, "nickname": "B",
+                                           "gender": "male", "level": None, "action": "enter"},
+             "timestamp": 1.0},
+            {
+                "type": "room_user_stats",
+                "payload": {"current": 10, "total": None},
+                "timestamp": 2.0,
+            },
+            {"type": "status", "payload": {"stage": "connected"}},
+        ]
+        for ev in events:
+            assert compactor.compact(ev).to_dict() == ev
+
+    def test_dict_style_access(self):
+        """测试 get/[] 访问顶层字段与 payload"""
+        from server.utils.compact_event import EventCompactor
+
+        ev = EventCompactor().compact(_chat(1, "多少钱"))
+        assert ev.get("type") == "chat"
+        assert ev["ts"] == 1700000000500
+        assert ev.get("payload")["content"] == "多少钱"
+        assert ev.get("missing", "x") == "x"
+        with pytest.raises(KeyError):
+            ev["missing"]
+
+    def test_records_are_frozen(self):
+        """测试记录不可变"""
+        from dataclasses import FrozenInstanceError
+
+        from server.utils.compact_event import EventCompactor
+
+        ev = EventCompactor().compact(_chat(1, "hi"))
+        with pytest.raises(FrozenInstanceError):
+            ev.type = "gift"
+
+    def test_users_interned_by_user_id(self):
+        """测试同一用户的事件共享一个用户记录，昵称变更时更新"""
+        from server.utils.compact_event import EventCompactor
+
+        compactor = EventCompactor()
+        a = compactor.compact(_chat(1, "a"))
+        b = compactor.compact(_chat(1, "b"))
+        c = compactor.compact(_chat(1, "c", nickname="改名了"))
+
+        assert a.user is b.user
+        assert c.user is not a.user
+        assert c.payload["nickname"] == "改名了"
+        assert a.payload["nickname"] == "观众1"
+        assert len(compactor.users) == 1
+
+    def test_user_table_bounded(self):
+        """测试用户驻留表容量有界"""
+        from server.utils.compact_event import EventCompactor, UserTable
+
+        compactor = EventCompactor(UserTable(max_users=10))
+        for uid in range(1, 101):
+            compactor.compact(_chat(uid, "x"))
+        assert len(compactor.users) == 10
+
+    def test_to_dict_helper_passthrough(self):
+        """测试边界转换函数对普通 dict 原样返回"""
+        from server.utils.compact_event import EventCompactor, to_dict
+
+        raw = _chat(1, "x")
+        assert to_dict(raw) is raw
+        assert json.loads(json.dumps(to_dict(EventCompactor().compact(raw)))) == raw
+
+    def test_memory_per_event_reduced(self):
+        """基准（小规模）：紧凑表示的每事件字节数明显低于 dict"""
+        scripts = os.path.join(os.path.dirname(__file__), "..", "..", "scripts")
+        sys.path.insert(0, os.path.abspath(scripts))
+        from benchmark_event_memory import run
+
+        result = run(events=5000, users=200)
+        assert result["compact_bytes_per_event"] < result["dict_bytes_per_event"] * 0.7
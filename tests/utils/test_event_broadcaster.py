@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+EventBroadcaster 单元测试
+
+测试一次编码广播、有界订阅队列的溢出策略与滞后指标。
+"""
+
+import asyncio
+import json
+
+import pytest
+
+
+class TestEventBroadcaster:
+    """EventBroadcaster 测试套件"""
+
+    @pytest.mark.asyncio
+    async def test_publish_shares_one_encoded_event(self):
+        """测试所有订阅者收到同一个编码对象，SSE 帧只编码一次"""
+        from server.utils.event_broadcaster import EventBroadcaster
+
+        broadcaster = EventBroadcaster(default_maxsize=10)
+        a = broadcaster.subscribe()
+        b = broadcaster.subscribe()
+
+        broadcaster.publish({"type": "chat", "payload": {"content": "你好"}})
+
+        ev_a = await a.get()
+        ev_b = await b.get()
+        assert ev_a is ev_b
+        assert ev_a["type"] == "chat"
+        assert ev_a.sse is ev_b.sse
+        assert ev_a.sse.startswith(b"data: ")
+        assert ev_a.sse.endswith(b"\n\n")
+        assert json.loads(ev_a.sse[6:].decode("utf-8"))["payload"]["content"] == "你好"
+
+    @pytest.mark.asyncio
+    async def test_get_frame_returns_bytes(self):
+        """测试 get_frame 直接返回 SSE 帧字节"""
+        from server.utils.event_broadcaster import EventBroadcaster
+
+        broadcaster = EventBroadcaster()
+        sub = broadcaster.subscribe()
+        broadcaster.publish({"type": "like", "payload": {"count": 3}})
+
+        frame = await sub.get_frame()
+        assert isinstance(frame, bytes)
+        assert b'"count": 3' in frame
+
+    def test_drop_oldest_keeps_latest_events(self):
+        """测试 drop_oldest 策略只保留最新事件并计数丢弃"""
+        from server.utils.event_broadcaster import EventBroadcaster
+
+        broadcaster = EventBroadcaster(default_maxsize=3)
+        sub = broadcaster.subscribe()
+        for i in range(10):
+            broadcaster.publish({"type": "chat", "payload": {"i": i}})
+
+        assert sub.qsize() == 3
+        assert sub.dropped == 7
+        assert [sub.get_nowait()["payload"]["i"] for _ in range(3)] == [7, 8, 9]
+
+    @pytest.mark.asyncio
+    async def test_disconnect_policy_closes_slow_subscriber(self):
+        """测试 disconnect 策略断开积压的订阅者且不影响其他订阅者"""
+        from server.utils.event_broadcaster import EventBroadcaster, SubscriberClosed
+
+        broadcaster = EventBroadcaster(default_maxsize=2)
+        slow = broadcaster.subscribe(overflow="disconnect")
+        fast = broadcaster.subscribe(maxsize=100)
+        for i in range(5):
+            broadcaster.publish({"type": "chat", "payload": {"i": i}})
+
+        assert slow.closed
+        assert broadcaster.subscriber_count == 1
+        with pytest.raises(SubscriberClosed):
+            await slow.get_frame()
+        # 关闭后再次读取仍然失败，不会阻塞
+        with pytest.raises(SubscriberClosed):
+            await asyncio.wait_for(slow.get_frame(), timeout=0.1)
+        # 普通 get() / get_nowait() 同样抛出，while True: await q.get() 的消费者不会空转
+        with pytest.raises(SubscriberClosed):
+            await asyncio.wait_for(slow.get(), timeout=0.1)
+        with pytest.raises(SubscriberClosed):
+            slow.get_nowait()
+        assert fast.qsize() == 5
+
+    @pytest.mark.asyncio
+    async def test_internal_relay_clients_ignore_disconnect_policy(self, monkeypatch):
+        """测试服务内部消费者固定 drop_oldest，不受 DANMU_CLIENT_OVERFLOW=disconnect 影响"""
+        from server.app.services.douyin_web_relay import DouyinWebRelay
+
+        monkeypatch.setenv("DANMU_CLIENT_OVERFLOW", "disconnect")
+        monkeypatch.setenv("DANMU_CLIENT_QUEUE_SIZE", "3")
+        relay = DouyinWebRelay()
+        sse = await relay.register_client(name="sse")
+        internal = await relay.register_internal_client("ai_live_analyzer")
+        for i in range(5):
+            relay._broadcaster.publish({"type": "chat", "payload": {"i": i}})
+
+        assert sse.closed and not internal.closed
+        assert [(await internal.get())["payload"]["i"] for _ in range(3)] == [2, 3, 4]
+
+    def test_invalid_overflow_policy(self):
+        """测试未知溢出策略抛出 ValueError"""
+        from server.utils.event_broadcaster import EventBroadcaster
+
+        with pytest.raises(ValueError):
+            EventBroadcaster().subscribe(overflow="block")
+
+    def test_stats_report_lag(self):
+        """测试统计信息包含每个客户端的深度与滞后"""
+        from server.utils.event_broadcaster import EventBroadcaster
+
+        broadcaster = EventBroadcaster(default_maxsize=100)
+        sub = broadcaster.subscribe(name="sse")
+        for i in range(4):
+            broadcaster.publish({"type": "chat", "payload": {"i": i}})
+        sub.get_nowait()
+
+        stats = broadcaster.stats()
+        assert stats["subscribers"] == 1
+        assert stats["published"] == 4
+        client = stats["clients"][0]
+        assert client["name"] == "sse"
+        assert client["depth"] == 3
+        assert client["delivered"] == 1
+        assert client["lag_events"] == 3
+        assert client["lag_ms"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_plain_dict_put_is_wrapped(self):
+        """测试直接写入普通 dict（如补发的状态事件）也能编码成帧"""
+        from server.utils.event_broadcaster import BroadcastSubscriber
+
+        sub = BroadcastSubscriber(maxsize=5)
+        sub.put_nowait({"type": "status", "payload": {"stage": "connected"}})
+        frame = await sub.get_frame()
+        assert b'"stage": "connected"' in frame
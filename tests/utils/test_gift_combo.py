@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+GiftComboAggregator 单元测试
+
+测试礼物连击聚合：repeat_end 结束、静默超时结束、非连击礼物透传、
+进度事件限频，以及礼物风暴下的事件量缩减与价值守恒。
+"""
+
+
+def _gift(user, repeat, *, group_id=1, end=0, combo=True, diamond=1, gift_id=463):
+    return {
+        "type": "gift",
+        "payload": {
+            "user_id": user,
+            "nickname": f"用户{user}",
+            "gift_id": gift_id,
+            "gift_name": "小心心",
+            "group_id": group_id,
+            "count": repeat,
+            "repeat_count": repeat,
+            "repeat_end": end,
+            "combo": combo,
+            "diamond_count": diamond,
+            "gift_value": diamond * repeat,
+        },
+        "timestamp": 1700000000.0,
+    }
+
+
+class TestGiftComboAggregator:
+    """GiftComboAggregator 测试套件"""
+
+    def test_repeat_end_emits_single_final_event(self):
+        """测试连击以 repeat_end 结束时只输出一条权威 gift 事件"""
+        from server.utils.gift_combo import GiftComboAggregator
+
+        agg = GiftComboAggregator(window_sec=3, progress_interval_sec=10)
+        out = []
+        for i in range(1, 6):
+            out += agg.feed(_gift(1, i, end=int(i == 5), diamond=10), now=i * 0.1)
+
+        gifts = [e for e in out if e["type"] == "gift"]
+        assert len(gifts) == 1
+        assert gifts[0]["payload"]["count"] == 5
+        assert gifts[0]["payload"]["gift_value"] == 50
+        assert gifts[0]["payload"]["combo_updates"] == 5
+        assert agg.open_combos == 0
+
+    def test_silent_combo_finalized_by_sweep(self):
+        """测试未收到 repeat_end 的连击在静默窗口后结束"""
+        from server.utils.gift_combo import GiftComboAggregator
+
+        agg = GiftComboAggregator(window_sec=2, progress_interval_sec=10)
+        agg.feed(_gift(1, 1), now=0.0)
+        agg.feed(_gift(1, 2), now=0.5)
+
+        assert agg.sweep(now=1.0) == []
+        final = agg.sweep(now=3.0)
+        assert len(final) == 1
+        assert final[0]["payload"]["count"] == 2
+
+    def test_non_combo_gift_passes_through(self):
+        """测试非连击礼物立即透传"""
+        from server.utils.gift_combo import GiftComboAggregator
+
+        agg = GiftComboAggregator()
+        event = _gift(1, 1, combo=False)
+        assert agg.feed(event, now=0.0) == [event]
+        assert agg.open_combos == 0
+
+    def test_distinct_groups_not_merged(self):
+        """测试不同 group_id 的连击分别结算"""
+        from server.utils.gift_combo import GiftComboAggregator
+
+        agg = GiftComboAggregator(progress_interval_sec=10)
+        agg.feed(_gift(1, 3, group_id=1), now=0.0)
+        agg.feed(_gift(1, 4, group_id=2), now=0.0)
+        final = agg.sweep(force=True)
+        assert sorted(e["payload"]["count"] for e in final) == [3, 4]
+
+    def test_progress_events_rate_limited(self):
+        """测试进度事件按间隔限频且不计为 gift"""
+        from server.utils.gift_combo import GiftComboAggregator
+
+        agg = GiftComboAggregator(window_sec=5, progress_interval_sec=1.0)
+        out = []
+        for i in range(1, 21):
+            out += agg.feed(_gift(1, i), now=i * 0.1)
+
+        progress = [e for e in out if e["type"] == "gift_progress"]
+        assert 2 <= len(progress) <= 3
+        assert progress[-1]["payload"]["count"] <= 20
+        assert not [e for e in out if e["type"] == "gift"]
+
+    def test_gift_storm_reduces_volume_and_preserves_value(self):
+        """测试礼物风暴下事件量下降一个数量级且总价值不变"""
+        from server.utils.gift_combo import GiftComboAggregator
+
+        agg = GiftComboAggregator(window_sec=3, progress_interval_sec=1.0)
+        users, repeats, diamond = 20, 50, 10
+        out = []
+        raw = 0
+        for step in range(1, repeats + 1):
+            for user in range(users):
+                raw += 1
+                gift = _gift(user, step, end=int(step == repeats), diamond=diamond)
+                out += agg.feed(gift, now=step * 0.05)
+
+        gifts = [e for e in out if e["type"] == "gift"]
+        assert len(gifts) == users
+        assert sum(e["payload"]["gift_value"] for e in gifts) == users * repeats * diamond
+        assert raw / len(out) >= 10
+        assert agg.get_stats()["reduction_ratio"] >= 10
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+MessageDeduplicator 单元测试
+
+测试基于 msg_id 的限时去重：重复识别、时间窗口过期、容量上限与统计。
+"""
+
+import pytest
+
+
+class TestMessageDeduplicator:
+    """MessageDeduplicator 测试套件"""
+
+    def test_first_seen_then_duplicate(self):
+        """测试首次出现放行，重复出现拦截"""
+        from server.utils.msg_dedup import MessageDeduplicator
+
+        dedup = MessageDeduplicator(horizon_sec=60)
+        assert not dedup.is_duplicate(101, "WebcastChatMessage", now=0.0)
+        assert dedup.is_duplicate(101, "WebcastChatMessage", now=1.0)
+        assert not dedup.is_duplicate(102, "WebcastChatMessage", now=1.0)
+
+        stats = dedup.get_stats()
+        assert stats["checked"] == 3
+        assert stats["duplicates"] == 1
+        assert stats["duplicates_by_method"] == {"WebcastChatMessage": 1}
+
+    def test_zero_msg_id_never_deduped(self):
+        """测试缺失 msg_id 的消息不参与去重"""
+        from server.utils.msg_dedup import MessageDeduplicator
+
+        dedup = MessageDeduplicator()
+        assert not dedup.is_duplicate(0)
+        assert not dedup.is_duplicate(0)
+        assert dedup.get_stats()["unkeyed"] == 2
+        assert len(dedup) == 0
+
+    def test_entries_expire_after_horizon(self):
+        """测试超过时间窗口的 msg_id 被遗忘"""
+        from server.utils.msg_dedup import MessageDeduplicator
+
+        dedup = MessageDeduplicator(horizon_sec=10)
+        dedup.is_duplicate(1, now=0.0)
+        dedup.is_duplicate(2, now=5.0)
+        # t=12 时 msg 1 已过期，msg 2 仍在窗口内
+        assert not dedup.is_duplicate(1, now=12.0)
+        assert dedup.is_duplicate(2, now=12.0)
+        assert dedup.get_stats()["expired"] == 1
+
+    def test_memory_bounded_by_max_entries(self):
+        """测试条目数不超过容量上限"""
+        from server.utils.msg_dedup import MessageDeduplicator
+
+        dedup = MessageDeduplicator(horizon_sec=3600, max_entries=100)
+        for i in range(1, 1001):
+            dedup.is_duplicate(i, now=float(i) / 1000)
+
+        assert len(dedup) == 100
+        assert dedup.get_stats()["evicted"] == 900
+        # 最近的条目仍可去重
+        assert dedup.is_duplicate(1000, now=1.0)
+
+
+class TestRelayFetcherDedup:
+    """中转抓取器在分发前按 msg_id 去重"""
+
+    def test_repeated_push_dispatched_once(self):
+        import gzip
+
+        pytest.importorskip("betterproto")
+        pytest.importorskip("websocket")
+        from server.app.services.douyin_web_relay import _WebRelayFetcher
+        from server.modules.douyin.protobuf.douyin import (
+            ChatMessage,
+            Message,
+            PushFrame,
+            Response,
+            User,
+        )
+        from server.utils.msg_dedup import MessageDeduplicator
+
+        events = []
+        dedup = MessageDeduplicator()
+        fetcher = _WebRelayFetcher("123", events.append, dedup=dedup)
+
+        chat = ChatMessage(user=User(id=7, nick_name="观众"), content="你好")
+        msg = Message(method="WebcastChatMessage", payload=bytes(chat), msg_id=987654321)
+        frame = bytes(PushFrame(payload=gzip.compress(bytes(Response(messages_list=[msg])))))
+
+        fetcher._wsOnMessage(None, frame)
+        fetcher._wsOnMessage(None, frame)  # 重连后重复下发
+
+        chats = [e for e in events if e["type"] == "chat"]
+        assert len(chats) == 1
+        assert dedup.get_stats()["duplicates"] == 1
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+ResolveCache 单元测试
+
+测试 TTL 过期、磁盘持久化、URL expire 参数解析，以及线程/协程单飞加载。
+"""
+
+import asyncio
+import threading
+import time
+
+
+class TestResolveCache:
+    """ResolveCache 测试套件"""
+
+    def test_ttl_expiry(self):
+        """测试记录按过期时间失效"""
+        from server.utils.resolve_cache import ResolveCache
+
+        cache = ResolveCache()
+        cache.set("a", "1", ttl=60)
+        assert cache.get("a") == "1"
+        assert cache.get("a", now=time.time() + 61) is None
+        cache.set("b", "2", ttl=-1)
+        assert cache.get("b") is None
+
+    def test_persisted_across_instances(self, tmp_path):
+        """测试磁盘文件在新实例（进程重启）中仍然有效"""
+        from server.utils.resolve_cache import ResolveCache
+
+        path = tmp_path / "cache.json"
+        ResolveCache(path).set("douyin:room:1", "7000", ttl=60)
+        ResolveCache(path).set("douyin:room:2", "8000", expires_at=time.time() - 1)
+
+        reloaded = ResolveCache(path)
+        assert reloaded.get("douyin:room:1") == "7000"
+        assert reloaded.get("douyin:room:2") is None
+
+        reloaded.invalidate("douyin:room:1")
+        assert ResolveCache(path).get("douyin:room:1") is None
+
+    def test_url_expiry(self):
+        """测试从拉流地址中提取最早的 expire 参数"""
+        from server.utils.resolve_cache import url_expiry
+
+        urls = [
+            "https://pull-flv.douyincdn.com/stage/stream.flv?expire=2000000000&sign=x",
+            "https://pull-hls.douyincdn.com/stage/stream.m3u8?expire=1900000000000",
+            None,
+        ]
+        assert url_expiry(urls, margin_sec=60) == 1900000000 - 60
+        assert url_expiry(["https://example.com/live.flv"]) is None
+
+    def test_sync_single_flight(self):
+        """测试并发线程对同一 key 只加载一次"""
+        from server.utils.resolve_cache import ResolveCache
+
+        cache = ResolveCache()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.1)
+            return "7000"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader, ttl=60)))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert results == ["7000"] * 8
+        assert len(calls) == 1
+        assert cache.get_stats()["coalesced"] == 7
+
+    def test_async_single_flight_and_no_cache_on_failure(self):
+        """测试协程单飞；失败/离线结果不缓存"""
+        from server.utils.resolve_cache import ResolveCache
+
+        cache = ResolveCache()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"is_live": True, "record_url": "u?expire=%d" % (time.time() + 3600)}
+
+        async def main():
+            return await asyncio.gather(
+                *[cache.aget_or_load("s", loader, ttl=600) for _ in range(10)]
+            )
+
+        results = asyncio.run(main())
+        assert len(calls) == 1 and len(results) == 10
+
+        async def offline():
+            return {"is_live": False}
+
+        asyncio.run(cache.aget_or_load("off", offline, ttl=600, expires_from=lambda d: 0.0))
+        assert cache.get("off") is None
+        cache.get_or_load("none", lambda: None, ttl=600)
+        assert cache.get("none") is None
+
+
+class TestFetcherResolveCache:
+    """DouyinLiveWebFetcher 通过共享缓存复用 room_id"""
+
+    def test_room_id_resolved_once_and_invalidated_on_reset(self, monkeypatch):
+        from server.modules.douyin.liveMan import DouyinLiveWebFetcher
+        from server.utils.resolve_cache import ResolveCache
+
+        cache = ResolveCache()
+        calls = []
+        monkeypatch.setattr(
+            DouyinLiveWebFetcher, "_resolveRoomId", lambda self: calls.append(1) or "7000"
+        )
+
+        first = DouyinLiveWebFetcher("123", resolve_cache=cache)
+        second = DouyinLiveWebFetcher("123", resolve_cache=cache)
+        assert first.room_id == "7000"
+        assert second.room_id == "7000"
+        assert len(calls) == 1
+
+        second.resetSession()
+        assert DouyinLiveWebFetcher("123", resolve_cache=cache).room_id == "7000"
+        assert len(calls) == 2
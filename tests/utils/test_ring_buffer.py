@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+SeqRingBuffer 测试
+
+测试定长覆盖、序号游标续读、按时间二分查询，以及评论抓取器 / 数据管理器的接入。
+"""
+
+from datetime import datetime, timedelta
+
+from server.utils.ring_buffer import SeqRingBuffer
+
+
+class TestSeqRingBuffer:
+    """环形缓冲基本行为"""
+
+    def test_overwrite_keeps_seq_monotonic(self):
+        """测试写满后覆盖最旧记录，序号不回退"""
+        buf = SeqRingBuffer(3)
+        seqs = [buf.append(i, ts=float(i)) for i in range(5)]
+
+        assert seqs == [1, 2, 3, 4, 5]
+        assert buf.snapshot() == [2, 3, 4]
+        assert (buf.first_seq, buf.last_seq) == (3, 5)
+        assert buf.latest(2) == [3, 4]
+
+    def test_cursor_resume(self):
+        """测试游标续读、分页与被覆盖区间"""
+        buf = SeqRingBuffer(4)
+        for i in range(6):
+            buf.append(f"c{i}", ts=float(i))
+
+        assert buf.after(4) == (["c4", "c5"], 6)
+        assert buf.after(2, limit=1) == (["c2"], 3)
+        assert buf.after(0) == (["c2", "c3", "c4", "c5"], 6)  # 前两条已被覆盖
+        assert buf.after(6) == ([], 6)
+
+        buf.clear()
+        buf.append("c6", ts=6.0)
+        assert buf.after(6) == (["c6"], 7)
+
+    def test_bisect_by_timestamp(self):
+        """测试按时间戳查询、乱序时间戳归并与按时间清理"""
+        buf = SeqRingBuffer(5)
+        for ts in (1.0, 2.0, 2.0, 1.5, 4.0, 5.0, 6.0):
+            buf.append(ts, ts=ts)
+
+        # 1.5 晚于 2.0 写入，按 2.0 计入索引
+        assert buf.since(1.9) == [2.0, 1.5, 4.0, 5.0, 6.0]
+        assert buf.since(2.0) == [4.0, 5.0, 6.0]
+        assert buf.since(4.0, limit=1) == [5.0]
+        assert buf.seq_since(4.0) == 5
+        assert buf.drop_before(4.0) == 3
+        assert buf.snapshot() == [5.0, 6.0]
+
+    def test_resize_keeps_newest(self):
+        """测试缩容保留最新记录"""
+        buf = SeqRingBuffer(5)
+        for i in range(5):
+            buf.append(i, ts=float(i))
+        buf.resize(2)
+        buf.append(5, ts=5.0)
+
+        assert buf.snapshot() == [4, 5]
+        assert buf.after(5) == ([5], 6)
+
+
+class TestCommentStores:
+    """评论抓取器与数据管理器"""
+
+    def test_fetcher_cursor_and_since(self):
+        """测试评论抓取器游标续读与按时间查询"""
+        from server.ingest.comment_fetcher import Comment, CommentFetcher
+
+        fetcher = CommentFetcher(room_id="r1")
+        fetcher.max_comments = 3
+        fetcher.comments.resize(3)
+        for i in range(5):
+            fetcher._add_comment(Comment(f"u{i}", f"用户{i}", f"内容{i}", timestamp=100.0 + i))
+
+        page = fetcher.get_comments_after(1)
+        assert [c["content"] for c in page["comments"]] == ["内容2", "内容3", "内容4"]
+        assert page["cursor"] == 5 and page["missed"] == 1
+        assert [c["content"] for c in fetcher.get_comments_since(103.0)] == ["内容4"]
+        assert [c["content"] for c in fetcher.get_recent_comments(2)] == ["内容3", "内容4"]
+
+    def test_data_manager_order_and_datetime_timestamps(self):
+        """测试数据管理器保持新→旧顺序并兼容 datetime 时间戳"""
+        from server.models import Comment, DataManager
+
+        dm = DataManager()
+        now = datetime.now()
+        dm.add_comment(Comment(user="a", content="旧", timestamp=now - timedelta(minutes=30)))
+        dm.add_comment(Comment(user="b", content="新", timestamp=int(now.timestamp() * 1000)))
+
+        assert [c.content for c in dm.get_comments(limit=10)] == ["新", "旧"]
+        assert [c.content for c in dm.get_recent_comments(10)] == ["新"]
+        assert dm.get_stats()["total_comments"] == 2
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+SeqNotifier 测试
+
+测试跨线程唤醒延迟、已有新数据时立即返回、超时不遗留等待者，
+以及评论抓取器写入评论后唤醒订阅者并按游标补齐、服务重启后的旧游标被重置。
+"""
+
+import asyncio
+import json
+import threading
+import time
+
+from server.utils.seq_notifier import SeqNotifier
+
+
+class TestSeqNotifier:
+    """序号推进通知"""
+
+    async def test_wakes_waiter_from_thread(self):
+        """测试其他线程 notify 后等待者立即被唤醒"""
+        notifier = SeqNotifier()
+        started = time.monotonic()
+        timer = threading.Timer(0.05, notifier.notify, args=(1,))
+        timer.start()
+
+        seq = await notifier.wait_for(0, timeout=5)
+        elapsed = time.monotonic() - started
+
+        assert seq == 1
+        assert elapsed < 0.5
+        assert notifier.waiter_count == 0
+
+    async def test_returns_immediately_when_behind(self):
+        """测试游标落后时不挂起"""
+        notifier = SeqNotifier()
+        notifier.notify(3)
+        assert await notifier.wait_for(1, timeout=0) == 3
+
+    async def test_timeout_leaves_no_waiters(self):
+        """测试心跳超时后等待者被摘除，空闲连接不累积"""
+        notifier = SeqNotifier()
+        for _ in range(3):
+            assert await notifier.wait_for(0, timeout=0.01) == 0
+        assert notifier.waiter_count == 0
+
+    async def test_many_idle_waiters_woken_once(self):
+        """测试多个空闲订阅者挂起时不消耗唤醒，一次通知全部唤醒"""
+        notifier = SeqNotifier()
+        tasks = [asyncio.create_task(notifier.wait_for(0, timeout=5)) for _ in range(50)]
+        await asyncio.sleep(0.05)
+        assert notifier.waiter_count == 50
+        assert notifier.wakeups == 0
+
+        notifier.notify(1)
+        assert await asyncio.gather(*tasks) == [1] * 50
+        assert notifier.wakeups == 50
+
+
+class TestCommentFetcherStream:
+    """评论抓取器推送"""
+
+    async def test_new_comment_wakes_subscriber(self):
+        """测试写入评论唤醒订阅者，并按游标读到其间全部评论"""
+        from server.ingest.comment_fetcher import Comment, CommentFetcher
+
+        fetcher = CommentFetcher(room_id="r1")
+        cursor = fetcher.last_seq
+
+        def produce():
+            for i in range(3):
+                fetcher._add_comment(Comment(f"u{i}", f"用户{i}", f"内容{i}"))
+
+        threading.Timer(0.02, produce).start()
+        latest = await fetcher.wait_for_comments(cursor, timeout=5)
+        await asyncio.sleep(0.02)
+        page = fetcher.get_comments_after(cursor)
+
+        assert latest >= 1
+        assert [c["content"] for c in page["comments"]] == ["内容0", "内容1", "内容2"]
+        assert page["cursor"] == 3
+
+    async def test_stream_resets_stale_cursor(self, monkeypatch):
+        """测试旧 Last-Event-ID 超过当前序号（服务已重启）时重置游标，而不是一直只发心跳"""
+        from starlette.requests import Request
+
+        from server.app.api import live_comments
+        from server.ingest.comment_fetcher import Comment, CommentFetcher
+
+        fetcher = CommentFetcher(room_id="r1")
+        for i in range(2):
+            fetcher._add_comment(Comment(f"u{i}", f"用户{i}", f"内容{i}"))
+        monkeypatch.setattr(live_comments, "comment_fetcher", fetcher)
+        monkeypatch.setattr(live_comments, "init_services", lambda: None)
+        request = Request({
+            "type": "http", "method": "GET", "path": "/", "headers": [(b"last-event-id", b"500")]
+        })
+
+        response = await live_comments.stream_comments(request, cursor=None)
+        frames = response.body_iterator
+        try:
+            received = [await asyncio.wait_for(frames.__anext__(), timeout=2) for _ in range(4)]
+        finally:
+            await frames.aclose()
+
+        assert json.loads(received[0][6:]) == {"type": "reset", "cursor": 0, "previous": 500}
+        assert json.loads(received[1][6:])["cursor"] == 0
+        assert [frame.split("\n")[0] for frame in received[2:]] == ["id: 1", "id: 2"]
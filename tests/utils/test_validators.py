@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+预编译校验 schema 测试
+
+编译后的校验必须与逐次构建 DictValidator 的旧实现输出与报错一致，
+快速路径只接受无需转换的数据，批量校验逐条隔离错误。
+"""
+
+from datetime import datetime
+
+import pytest
+
+from server.utils.validators import (
+    COMMENT_SCHEMA,
+    CONFIG_SCHEMA,
+    CompiledSchema,
+    DictValidator,
+    ValidationError,
+    sanitize_input,
+    validate_comment,
+    validate_comments,
+    validate_config,
+)
+
+_COMMENTS = [
+    {"user": "观众", "content": "多少钱"},
+    {"user": "观众", "content": "多少钱", "platform": "douyin", "user_level": 12, "msg_id": 9},
+    {"user": "观众", "content": "好", "timestamp": datetime(2024, 1, 1), "is_vip": True},
+    {"user": "观众", "content": "好", "timestamp": "2024-01-01 08:00:00"},
+    {"user": "观众", "content": "好", "user_level": "12"},
+    {"user": "观众", "content": "好", "user_level": 3.7, "gift_count": True},
+    {"user": "", "content": "好"},
+    {"user": "观众", "content": "x" * 501},
+    {"content": "好"},
+    {"user": "观众", "content": "好", "platform": "youtube"},
+    {"user": "观众", "content": "好", "user_level": 101},
+    {"user": 1, "content": "好"},
+    "not a dict",
+]
+
+
+def _legacy(schema, data, name, allow_extra=True):
+    try:
+        return DictValidator(schema=schema, allow_extra=allow_extra).validate(data, name)
+    except ValidationError as e:
+        return ("error", str(e))
+
+
+def _compiled(fn, data):
+    try:
+        return fn(data)
+    except ValidationError as e:
+        return ("error", str(e))
+
+
+class TestCompiledSchema:
+    """编译校验与旧实现等价"""
+
+    @pytest.mark.parametrize("data", _COMMENTS)
+    def test_comment_matches_legacy(self, data):
+        """测试评论校验结果、字段顺序与错误信息一致"""
+        expected = _legacy(COMMENT_SCHEMA, data, "comment")
+        actual = _compiled(validate_comment, data)
+        assert actual == expected
+        if isinstance(expected, dict):
+            assert list(actual) == list(expected)
+
+    def test_config_matches_legacy(self):
+        """测试配置校验（URL 正则、枚举）一致"""
+        for data in (
+            {"ai_service": "openai", "ai_base_url": "https://api.example.com/v1", "extra": 1},
+            {"ai_base_url": "ftp://x"},
+            {"log_level": "TRACE"},
+            {"max_comments": "50"},
+        ):
+            assert _compiled(validate_config, data) == _legacy(CONFIG_SCHEMA, data, "config")
+
+    def test_fast_path_only_for_unchanged_values(self):
+        """测试需要类型转换的值不走快速路径"""
+        schema = CompiledSchema(COMMENT_SCHEMA, "comment")
+        assert schema._fast({"user": "a", "content": "b", "platform": "douyin"}) is not None
+        assert schema._fast({"user": "a", "content": "b", "user_level": "3"}) is None
+        comment = {"user": "a", "content": "b", "timestamp": "2024-01-01 08:00:00"}
+        assert schema._fast(comment) is None
+
+    def test_batch_isolates_errors(self):
+        """测试批量校验逐条隔离错误并保留顺序"""
+        valid, errors = validate_comments(_COMMENTS)
+        expected = [_legacy(COMMENT_SCHEMA, d, "comment") for d in _COMMENTS]
+        assert valid == [e for e in expected if isinstance(e, dict)]
+        failed = [i for i, e in enumerate(expected) if not isinstance(e, dict)]
+        assert [i for i, _ in errors] == failed
+
+    def test_sanitize_unchanged(self):
+        """测试清理结果与原逐字符串替换一致"""
+        data = [{"user": " <b>", "content": 'a&"b" ', "n": 1, "tags": ["<x>"]}, " &lt; "]
+        assert sanitize_input(data) == [
+            {
+                "user": "&amp;lt;b&amp;gt;",
+                "content": "a&amp;&quot;b&quot;",
+                "n": 1,
+                "tags": ["&amp;lt;x&amp;gt;"],
+            },
+            "&amp;lt;",
+        ]